@@ -1,14 +1,22 @@
 import asyncio
 import uuid
+import copy
+import time
 from datetime import datetime
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import io
 import json
-from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException
+import re
+import hashlib
+from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import logging
@@ -22,10 +30,15 @@ from sklearn.neural_network import MLPClassifier, MLPRegressor
 from sklearn.metrics import accuracy_score, classification_report, r2_score, mean_squared_error, log_loss
 import warnings
 import os
-from scipy.stats import norm, poisson
+from scipy import sparse
+from scipy.stats import norm, poisson, skellam
 import tempfile
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import multiprocessing
 import csv
 import math
 import base64
@@ -94,12 +107,985 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+class DatabaseIndexManager:
+    """Declares and bootstraps the MongoDB indexes used by hot query paths"""
+
+    # collection -> list of (index name, key spec, options)
+    DECLARED_INDEXES = {
+        "matches": [
+            ("home_team_match_date", [("home_team", ASCENDING), ("match_date", DESCENDING)], {}),
+            ("away_team_match_date", [("away_team", ASCENDING), ("match_date", DESCENDING)], {}),
+            ("referee", [("referee", ASCENDING)], {}),
+            ("match_id", [("match_id", ASCENDING)], {}),
+        ],
+        "team_stats": [
+            ("match_id_team_name_is_home", [("match_id", ASCENDING), ("team_name", ASCENDING), ("is_home", ASCENDING)], {}),
+            ("team_name_is_home", [("team_name", ASCENDING), ("is_home", ASCENDING)], {}),
+        ],
+        "player_stats": [
+            ("team_name_player_name", [("team_name", ASCENDING), ("player_name", ASCENDING)], {}),
+            ("match_id_team_name", [("match_id", ASCENDING), ("team_name", ASCENDING)], {}),
+        ],
+        "rbs_results": [
+            ("team_name_referee", [("team_name", ASCENDING), ("referee", ASCENDING)], {}),
+            ("referee", [("referee", ASCENDING)], {}),
+        ],
+        "rbs_aggregates": [
+            ("team_name_referee", [("team_name", ASCENDING), ("referee", ASCENDING)], {}),
+        ],
+        "prediction_tracking": [
+            ("timestamp", [("timestamp", DESCENDING)], {}),
+            ("prediction_id", [("prediction_id", ASCENDING)], {}),
+        ],
+        "jobs": [
+            ("job_id", [("job_id", ASCENDING)], {"unique": True}),
+            # At most one queued/running job per type and parameter set
+            ("dedupe_key_active", [("dedupe_key", ASCENDING)], {"unique": True, "partialFilterExpression": {"active": True}}),
+            ("created_at", [("created_at", DESCENDING)], {}),
+        ],
+    }
+
+    # collection -> index names that were replaced and are dropped on bootstrap
+    OBSOLETE_INDEXES = {
+        "jobs": ["job_type_active"],
+    }
+
+    def __init__(self, database):
+        self.db = database
+        self.last_bootstrap = None
+
+    async def ensure_indexes(self):
+        """Create any declared index that is missing and drop obsolete ones; existing ones are left untouched"""
+        created, existing, failed, dropped = [], [], [], []
+
+        for collection_name, names in self.OBSOLETE_INDEXES.items():
+            collection = self.db[collection_name]
+            try:
+                actual = await collection.index_information()
+            except Exception as e:
+                print(f"⚠️ Could not read indexes for {collection_name}: {e}")
+                continue
+            for name in names:
+                if name not in actual:
+                    continue
+                try:
+                    await collection.drop_index(name)
+                    dropped.append(f"{collection_name}.{name}")
+                except Exception as e:
+                    print(f"❌ Failed to drop index {collection_name}.{name}: {e}")
+                    failed.append({"index": f"{collection_name}.{name}", "error": str(e)})
+
+        for collection_name, specs in self.DECLARED_INDEXES.items():
+            collection = self.db[collection_name]
+            try:
+                actual = await collection.index_information()
+            except Exception as e:
+                print(f"⚠️ Could not read indexes for {collection_name}: {e}")
+                actual = {}
+            actual_keys = {tuple(tuple(k) for k in info["key"]) for info in actual.values()}
+
+            for name, keys, options in specs:
+                if name in actual or tuple(keys) in actual_keys:
+                    existing.append(f"{collection_name}.{name}")
+                    continue
+                try:
+                    await collection.create_index(keys, name=name, background=True, **options)
+                    created.append(f"{collection_name}.{name}")
+                except Exception as e:
+                    print(f"❌ Failed to create index {collection_name}.{name}: {e}")
+                    failed.append({"index": f"{collection_name}.{name}", "error": str(e)})
+
+        self.last_bootstrap = {
+            "timestamp": datetime.now().isoformat(),
+            "created": created,
+            "existing": existing,
+            "dropped": dropped,
+            "failed": failed
+        }
+        print(f"🗂️ Index bootstrap: {len(created)} created, {len(existing)} already present, {len(dropped)} dropped, {len(failed)} failed")
+        return self.last_bootstrap
+
+    async def report(self):
+        """Compare declared indexes against what MongoDB actually has"""
+        collections = {}
+        total_missing = 0
+
+        for collection_name, specs in self.DECLARED_INDEXES.items():
+            actual = await self.db[collection_name].index_information()
+            actual_by_keys = {
+                tuple(tuple(k) for k in info["key"]): name for name, info in actual.items()
+            }
+
+            declared = []
+            for name, keys, _ in specs:
+                matched_name = name if name in actual else actual_by_keys.get(tuple(keys))
+                declared.append({
+                    "name": name,
+                    "keys": [[field, direction] for field, direction in keys],
+                    "present": matched_name is not None,
+                    "actual_name": matched_name
+                })
+
+            declared_keys = {tuple(keys) for _, keys, _ in specs}
+            declared_names = {name for name, _, _ in specs}
+            undeclared = [
+                {"name": name, "keys": [[k, d] for k, d in info["key"]]}
+                for name, info in actual.items()
+                if name != "_id_" and name not in declared_names
+                and tuple(tuple(k) for k in info["key"]) not in declared_keys
+            ]
+
+            missing = [d["name"] for d in declared if not d["present"]]
+            total_missing += len(missing)
+            collections[collection_name] = {
+                "declared": declared,
+                "missing": missing,
+                "undeclared": undeclared
+            }
+
+        return {
+            "success": True,
+            "all_present": total_missing == 0,
+            "total_missing": total_missing,
+            "collections": collections,
+            "last_bootstrap": self.last_bootstrap
+        }
+
+# Initialize index manager
+index_manager = DatabaseIndexManager(db)
+
+# Default number of documents fetched per cursor round trip for full-collection jobs
+CURSOR_BATCH_SIZE = int(os.environ.get('CURSOR_BATCH_SIZE', 2000))
+
+class ScanStats:
+    """Counts documents actually read from each collection during a job"""
+
+    def __init__(self):
+        self.by_collection = defaultdict(int)
+
+    def add(self, collection_name, count):
+        self.by_collection[collection_name] += count
+
+    @property
+    def total(self):
+        return sum(self.by_collection.values())
+
+    def as_dict(self):
+        return {"documents_scanned": self.total, "by_collection": dict(self.by_collection)}
+
+async def iter_batches(collection, query=None, projection=None, batch_size=None, sort=None, scan_stats=None):
+    """Stream a query in fixed-size batches so full-history jobs run in bounded memory"""
+    batch_size = batch_size or CURSOR_BATCH_SIZE
+    cursor = collection.find(query or {}, projection).batch_size(batch_size)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            if scan_stats is not None:
+                scan_stats.add(collection.name, len(batch))
+            yield batch
+            batch = []
+    if batch:
+        if scan_stats is not None:
+            scan_stats.add(collection.name, len(batch))
+        yield batch
+
+async def iter_documents(collection, query=None, projection=None, batch_size=None, sort=None, scan_stats=None):
+    """Stream a query one document at a time (fetched in batches)"""
+    async for batch in iter_batches(collection, query, projection, batch_size, sort, scan_stats):
+        for doc in batch:
+            yield doc
+
+async def collect_documents(collection, query=None, projection=None, batch_size=None, sort=None, scan_stats=None):
+    """Read every matching document - no silent truncation, unlike to_list(N)"""
+    documents = []
+    async for batch in iter_batches(collection, query, projection, batch_size, sort, scan_stats):
+        documents.extend(batch)
+    return documents
+
+class DataSnapshot:
+    """Immutable pandas-backed view of matches, team_stats and player_stats with lookup indexes"""
+
+    MATCH_NUMERIC = ['home_score', 'away_score']
+    TEAM_STAT_NUMERIC = [
+        'yellow_cards', 'red_cards', 'fouls', 'fouls_committed', 'possession_pct',
+        'shots_total', 'shots_on_target', 'fouls_drawn', 'penalties_awarded',
+        'penalty_attempts', 'penalty_goals', 'xg', 'xg_per_shot', 'goals_per_xg',
+        'shot_accuracy', 'conversion_rate', 'penalty_conversion_rate', 'goals_scored',
+        'goals_conceded', 'points_earned', 'goal_difference', 'clean_sheet', 'scored_goals'
+    ]
+    PLAYER_STAT_NUMERIC = [
+        'goals', 'assists', 'yellow_cards', 'red_cards', 'fouls_committed', 'fouls_drawn',
+        'xg', 'shots_total', 'shots_on_target', 'penalty_attempts', 'penalty_goals'
+    ]
+    MATCH_KEYS = ['match_id', 'home_team', 'away_team', 'referee', 'match_date']
+    TEAM_STAT_KEYS = ['match_id', 'team_name', 'is_home']
+    PLAYER_STAT_KEYS = ['match_id', 'team_name', 'player_name', 'is_home']
+
+    def __init__(self, version, matches, team_stats, player_stats):
+        self.version = version
+        self.built_at = datetime.now().isoformat()
+
+        self.matches = self._frame(matches, self.MATCH_KEYS, self.MATCH_NUMERIC)
+        self.team_stats = self._frame(team_stats, self.TEAM_STAT_KEYS, self.TEAM_STAT_NUMERIC)
+        self.player_stats = self._frame(player_stats, self.PLAYER_STAT_KEYS, self.PLAYER_STAT_NUMERIC)
+
+        m, ts, ps = self.matches, self.team_stats, self.player_stats
+
+        # Match indexes: by match_id, team (home or away), referee and date
+        self.match_positions_by_id = m.groupby('match_id', sort=False).indices
+        self.first_match_by_id = m.drop_duplicates('match_id', keep='first').set_index('match_id', drop=False)
+        self.match_date_by_id = dict(zip(m['match_id'], m['match_date']))
+        home_idx = m.groupby('home_team', sort=False).indices
+        away_idx = m.groupby('away_team', sort=False).indices
+        empty = np.array([], dtype=np.int64)
+        self.matches_by_team = {
+            team: np.union1d(home_idx.get(team, empty), away_idx.get(team, empty))
+            for team in set(home_idx) | set(away_idx)
+        }
+        self.matches_by_referee = m.groupby('referee', sort=False).indices
+        self.match_dates = pd.to_datetime(m['match_date'], format="%Y-%m-%d", errors='coerce').to_numpy()
+        self.match_order_by_date = np.argsort(self.match_dates, kind='stable')
+        self.last_match_position_by_id = pd.Series(np.arange(len(m)), index=m['match_id'].to_numpy())
+        self.last_match_position_by_id = self.last_match_position_by_id[~self.last_match_position_by_id.index.duplicated(keep='last')]
+
+        # Team stats indexes
+        self.team_stats_by_team = ts.groupby('team_name', sort=False).indices
+        self.team_stats_by_team_venue = ts.groupby(['team_name', 'is_home'], sort=False).indices
+        self.team_stats_by_match_team = ts.groupby(['match_id', 'team_name'], sort=False).indices
+
+        # Player stats indexes and per (match, team) totals
+        self.player_stats_by_team = ps.groupby('team_name', sort=False).indices
+        self.player_stats_by_match_team = ps.groupby(['match_id', 'team_name'], sort=False).indices
+        player_numeric = [col for col in self.PLAYER_STAT_NUMERIC if col in ps.columns]
+        self.player_match_totals = ps.groupby(['match_id', 'team_name'], sort=False)[player_numeric].sum()
+        self._player_matrices = {}
+
+    @staticmethod
+    def _frame(records, keys, numeric):
+        """Build a DataFrame with guaranteed key columns and coerced numeric columns"""
+        frame = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+        for key in keys:
+            if key not in frame.columns:
+                frame[key] = pd.Series([None] * len(frame), dtype=object)
+        for col in numeric:
+            if col in frame.columns and frame[col].dtype == object:
+                frame[col] = pd.to_numeric(frame[col], errors='coerce')
+        if 'is_home' in frame.columns:
+            frame['is_home'] = frame['is_home'].fillna(False).astype(bool)
+        return frame.reset_index(drop=True)
+
+    @staticmethod
+    def column(frame, name, default=0.0):
+        """Column as a Series, or a constant Series when the field was never stored"""
+        if name in frame.columns:
+            return frame[name]
+        return pd.Series(default, index=frame.index)
+
+    def _rows(self, frame, positions):
+        if positions is None:
+            return frame.iloc[0:0]
+        return frame.iloc[positions]
+
+    def team_matches(self, team_name):
+        """Matches where the team played home or away, in stored order"""
+        return self._rows(self.matches, self.matches_by_team.get(team_name))
+
+    def referee_matches(self, referee):
+        return self._rows(self.matches, self.matches_by_referee.get(referee))
+
+    def matches_for_ids(self, match_ids):
+        """First stored match for each id, indexed by match_id"""
+        found = pd.Index(match_ids).unique().intersection(self.first_match_by_id.index)
+        return self.first_match_by_id.loc[found]
+
+    def matches_in_range(self, start=None, end=None):
+        """Matches whose parsed date falls in [start, end], ordered by date"""
+        dates = self.match_dates[self.match_order_by_date]
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side='left')
+        hi = np.searchsorted(dates, np.datetime64('NaT'), side='left') if end is None else \
+            np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side='right')
+        return self.matches.iloc[self.match_order_by_date[lo:hi]]
+
+    def match_dates_for_ids(self, match_ids):
+        """Parsed date of the last stored match for each id (NaT when unknown or undated)"""
+        positions = self.last_match_position_by_id.reindex(pd.Index(match_ids)).to_numpy(dtype=float)
+        found = ~np.isnan(positions)
+        if len(self.matches) == 0:
+            return np.full(len(positions), np.datetime64('NaT'), dtype='datetime64[ns]')
+        return np.where(found, self.match_dates[np.where(found, positions, 0).astype(np.int64)], np.datetime64('NaT'))
+
+    def played_before(self, positions, as_of):
+        """Mask of the match rows at positions whose date is strictly before as_of (undated rows are excluded)"""
+        return self.match_dates[positions] < np.datetime64(as_of)
+
+    def team_stats_for(self, team_name, is_home=None):
+        if is_home is None:
+            return self._rows(self.team_stats, self.team_stats_by_team.get(team_name))
+        return self._rows(self.team_stats, self.team_stats_by_team_venue.get((team_name, bool(is_home))))
+
+    def team_stat_for_match(self, match_id, team_name):
+        """First team stat row for (match_id, team) as a dict, or None"""
+        positions = self.team_stats_by_match_team.get((match_id, team_name))
+        if positions is None or len(positions) == 0:
+            return None
+        return self.team_stats.iloc[positions[0]].to_dict()
+
+    def player_stats_for_team(self, team_name):
+        return self._rows(self.player_stats, self.player_stats_by_team.get(team_name))
+
+    def player_totals(self, match_ids, team_names, fields):
+        """Summed player stats per (match_id, team) pair as an array aligned with the inputs"""
+        keys = pd.MultiIndex.from_arrays([np.asarray(match_ids, dtype=object), np.asarray(team_names, dtype=object)])
+        if self.player_match_totals.empty:
+            return np.zeros((len(keys), len(fields)))
+        return self.player_match_totals.reindex(index=keys, columns=fields).fillna(0).to_numpy(dtype=float)
+
+    def player_match_matrix(self, team_name):
+        """Sparse player x match stat tensor for a team, built on first use and kept for this snapshot"""
+        matrix = self._player_matrices.get(team_name)
+        if matrix is None:
+            matrix = self._player_matrices[team_name] = PlayerMatchMatrix(self, team_name)
+        return matrix
+
+    @property
+    def document_count(self):
+        return len(self.matches) + len(self.team_stats) + len(self.player_stats)
+
+    def summary(self):
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "matches": len(self.matches),
+            "team_stats": len(self.team_stats),
+            "player_stats": len(self.player_stats),
+            "teams": len(self.matches_by_team),
+            "referees": len(self.matches_by_referee)
+        }
+
+class PlayerMatchMatrix:
+    """Sparse player x match stat tensor for one team.
+
+    Rows are stacked per field (field-major, one row per match) plus a final block of
+    appearance counts; columns are players. A starting XI is an 11-hot vector, so its
+    per-match totals come from a single sparse matrix-vector product.
+    """
+
+    FIELDS = ['goals', 'assists', 'xg', 'shots_total', 'shots_on_target', 'penalty_attempts', 'penalty_goals']
+
+    def __init__(self, snapshot, team_name):
+        # Each match is dated by its first stored row in the team's matches
+        first_rows = snapshot.team_matches(team_name).drop_duplicates('match_id', keep='first')
+        match_positions = pd.Series(first_rows.index.to_numpy(), index=first_rows['match_id'].to_numpy())
+
+        rows = snapshot.player_stats_for_team(team_name)
+        rows = rows[rows['player_name'].notna() & rows['match_id'].isin(match_positions.index)]
+        self.players = pd.Index(rows['player_name'].unique())
+        self.match_ids = pd.Index(rows['match_id'].unique())
+        self.positions = match_positions.reindex(self.match_ids).to_numpy(dtype=np.int64)
+
+        # Duplicate (match, player) rows are summed when the matrix is built
+        blocks = [DataSnapshot.column(rows, field).fillna(0).to_numpy(dtype=float) for field in self.FIELDS]
+        blocks.append(np.ones(len(rows)))
+        match_codes = self.match_ids.get_indexer(rows['match_id'])
+        player_codes = self.players.get_indexer(rows['player_name'])
+        n_matches = len(self.match_ids)
+        self.matrix = sparse.csr_matrix(
+            (np.concatenate(blocks), (np.concatenate([k * n_matches + match_codes for k in range(len(blocks))]),
+                                      np.tile(player_codes, len(blocks)))),
+            shape=(len(blocks) * n_matches, len(self.players))
+        )
+        self.matrix.eliminate_zeros()
+
+    def selection(self, player_names):
+        """0/1 vector over this team's players marking the selected ones (unknown names are ignored)"""
+        codes = self.players.get_indexer(pd.Index(player_names).unique())
+        vector = np.zeros(len(self.players))
+        vector[codes[codes >= 0]] = 1.0
+        return vector
+
+    def aggregate(self, player_names):
+        """Per-match totals of the selected players: a fields x matches array and the matches' row positions,
+        for the matches at least one of them played"""
+        totals = (self.matrix @ self.selection(player_names)).reshape(len(self.FIELDS) + 1, len(self.match_ids))
+        played = totals[-1] > 0
+        return totals[:-1, played], self.positions[played]
+
+class DataSnapshotManager:
+    """Loads the shared DataSnapshot once and swaps it atomically after data changes"""
+
+    def __init__(self, database):
+        self.db = database
+        self._snapshot = None
+        self._stale = True
+        self._version = 0
+        # Bumped on every data change, including writes the snapshot does not hold (RBS results, configs)
+        self.data_version = 0
+        self._lock = asyncio.Lock()
+        self.last_load_seconds = None
+        self.last_scan = None
+
+    async def get(self):
+        """Current snapshot, reloading first if the underlying data changed"""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale:
+            return snapshot
+        return await self.refresh()
+
+    async def refresh(self, force=False):
+        async with self._lock:
+            if not force and self._snapshot is not None and not self._stale:
+                return self._snapshot
+
+            # Clear the flag before reading so writes that land mid-load trigger another reload
+            self._stale = False
+            started = datetime.now()
+            scan_stats = ScanStats()
+            matches = await collect_documents(self.db.matches, projection={"_id": 0}, scan_stats=scan_stats)
+            team_stats = await collect_documents(self.db.team_stats, projection={"_id": 0}, scan_stats=scan_stats)
+            player_stats = await collect_documents(self.db.player_stats, projection={"_id": 0}, scan_stats=scan_stats)
+
+            snapshot = await asyncio.to_thread(
+                DataSnapshot, self._version + 1, matches, team_stats, player_stats
+            )
+
+            # Single reference assignment - readers holding the old snapshot keep a consistent view
+            self._version = snapshot.version
+            self._snapshot = snapshot
+            self.last_load_seconds = (datetime.now() - started).total_seconds()
+            self.last_scan = scan_stats.as_dict()
+            print(f"📦 Data snapshot v{snapshot.version} loaded in {self.last_load_seconds:.2f}s "
+                  f"({len(snapshot.matches)} matches, {len(snapshot.team_stats)} team stats, {len(snapshot.player_stats)} player stats)")
+            return snapshot
+
+    def invalidate(self, reason=""):
+        """Mark the snapshot stale; the next reader triggers a reload"""
+        self._stale = True
+        self.data_version += 1
+        if reason:
+            print(f"📦 Data snapshot invalidated: {reason}")
+
+    def mark_changed(self, reason=""):
+        """Bump the data version for writes outside the snapshot collections"""
+        self.data_version += 1
+        if reason:
+            print(f"📦 Data version {self.data_version}: {reason}")
+
+    def status(self):
+        return {
+            "loaded": self._snapshot is not None,
+            "stale": self._stale,
+            "data_version": self.data_version,
+            "last_load_seconds": self.last_load_seconds,
+            "last_scan": self.last_scan,
+            "snapshot": self._snapshot.summary() if self._snapshot is not None else None
+        }
+
+# Initialize shared data snapshot
+data_snapshot = DataSnapshotManager(db)
+
+class ExecutionLayer:
+    """Runs CPU-bound work off the event loop.
+
+    Short inference runs in a bounded thread pool; training, hyperparameter search and PDF
+    builds run in a process pool. Each category has its own concurrency limit so a long
+    retrain cannot starve predictions or health checks.
+    """
+    
+    def __init__(self):
+        self.thread_workers = int(os.environ.get('INFERENCE_THREAD_WORKERS', 4))
+        self.process_workers = int(os.environ.get('CPU_PROCESS_WORKERS', 2))
+        # spawn avoids forking a process that holds OpenMP and Mongo client threads
+        self.start_method = os.environ.get('CPU_PROCESS_START_METHOD', 'spawn')
+        self.limits = {
+            'inference': int(os.environ.get('INFERENCE_CONCURRENCY', 8)),
+            'training': int(os.environ.get('TRAINING_CONCURRENCY', 1)),
+            'hpo': int(os.environ.get('HPO_CONCURRENCY', 1)),
+            'pdf': int(os.environ.get('PDF_CONCURRENCY', 2)),
+            'simulation': int(os.environ.get('SIMULATION_CONCURRENCY', 1))
+        }
+        self._semaphores = {category: asyncio.Semaphore(limit) for category, limit in self.limits.items()}
+        self._active = dict.fromkeys(self.limits, 0)
+        self._waiting = dict.fromkeys(self.limits, 0)
+        self._thread_pool = None
+        self._process_pool = None
+    
+    def thread_pool(self):
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="inference")
+        return self._thread_pool
+    
+    def process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._process_pool
+    
+    async def _run(self, category, executor, fn, *args, **kwargs):
+        semaphore = self._semaphores[category]
+        self._waiting[category] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._waiting[category] -= 1
+        
+        self._active[category] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._active[category] -= 1
+            semaphore.release()
+    
+    async def run_in_thread(self, category, fn, *args, **kwargs):
+        """Run a short CPU-bound call (model inference) in the thread pool"""
+        return await self._run(category, self.thread_pool(), fn, *args, **kwargs)
+    
+    async def run_in_process(self, category, fn, *args, **kwargs):
+        """Run a long CPU-bound call in the process pool; fn and its arguments must be picklable"""
+        pool = self.process_pool()
+        try:
+            return await self._run(category, pool, fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A crashed worker breaks the whole pool; start a fresh one for the next job
+            if self._process_pool is pool:
+                self._process_pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    
+    def status(self):
+        return {
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers,
+            "process_start_method": self.start_method,
+            "categories": {
+                category: {
+                    "limit": limit,
+                    "active": self._active[category],
+                    "waiting": self._waiting[category]
+                }
+                for category, limit in self.limits.items()
+            }
+        }
+    
+    def shutdown(self):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+
+# Initialize CPU-bound execution layer
+execution_layer = ExecutionLayer()
+
+JOB_TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+JOB_EVENT_POLL_SECONDS = float(os.environ.get('JOB_EVENT_POLL_SECONDS', 0.5))
+
+class JobCancelled(Exception):
+    """Raised at a job checkpoint once cancellation has been requested"""
+
+class JobContext:
+    """Handle a running job uses to report its stage and progress"""
+
+    def __init__(self, manager, job_id):
+        self.manager = manager
+        self.job_id = job_id
+
+    async def update(self, stage, progress=None, message=None):
+        """Record progress; also a cancellation checkpoint"""
+        fields = {"stage": stage, "updated_at": datetime.now().isoformat()}
+        if progress is not None:
+            fields["progress"] = round(float(progress), 1)
+        if message is not None:
+            fields["message"] = message
+        job = await self.manager.collection.find_one_and_update(
+            {"job_id": self.job_id},
+            {"$set": fields},
+            projection={"_id": 0, "cancel_requested": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        print(f"⏳ Job {self.job_id[:8]} {stage}" + (f" ({fields['progress']}%)" if progress is not None else ""))
+        if job and job.get("cancel_requested"):
+            raise JobCancelled()
+
+class JobManager:
+    """Background jobs persisted in the jobs collection, one active job per type and parameter set"""
+
+    def __init__(self, database):
+        self.collection = database.jobs
+        self.tasks = {}
+
+    @staticmethod
+    def dedupe_key(job_type, params):
+        """Job type plus a stable hash of its parameters"""
+        canonical = json.dumps(params or {}, sort_keys=True, default=str)
+        return f"{job_type}:{hashlib.sha1(canonical.encode()).hexdigest()}"
+
+    async def submit(self, job_type, runner, params=None):
+        """Start runner(job, **params) in the background, or return the same job already running.
+
+        Returns (job record, deduplicated).
+        """
+        params = params or {}
+        dedupe_key = self.dedupe_key(job_type, params)
+        existing = await self.collection.find_one({"dedupe_key": dedupe_key, "active": True}, {"_id": 0})
+        if existing:
+            return existing, True
+
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "job_type": job_type,
+            "params": params,
+            "dedupe_key": dedupe_key,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "message": None,
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+            "active": True,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": now
+        }
+        try:
+            await self.collection.insert_one(dict(job))
+        except DuplicateKeyError:
+            # Lost the race to another request; report the job that won
+            existing = await self.collection.find_one({"dedupe_key": dedupe_key, "active": True}, {"_id": 0})
+            if existing:
+                return existing, True
+            raise
+
+        task = asyncio.create_task(self._execute(job["job_id"], runner, params))
+        self.tasks[job["job_id"]] = task
+        task.add_done_callback(lambda done: self._forget(job["job_id"], done))
+        print(f"📋 Job {job['job_id'][:8]} queued: {job_type}")
+        return job, False
+
+    async def _execute(self, job_id, runner, params):
+        context = JobContext(self, job_id)
+        await self._set(job_id, status="running", stage="starting", started_at=datetime.now().isoformat())
+        try:
+            result = await runner(context, **params)
+        except (JobCancelled, asyncio.CancelledError):
+            await self._finish(job_id, "cancelled", error="Cancelled by request")
+            raise JobCancelled()
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await self._finish(job_id, "failed", error=detail)
+            raise
+
+        result = convert_numpy_types(result)
+        # Several legacy handlers report failure in the result instead of raising
+        failed = isinstance(result, dict) and (result.get("success") is False or (result.get("error") and not result.get("success")))
+        if failed:
+            await self._finish(job_id, "failed", result=result, error=str(result.get("error")))
+        else:
+            await self._finish(job_id, "completed", result=result, progress=100.0)
+        return result
+
+    def _forget(self, job_id, task):
+        self.tasks.pop(job_id, None)
+        # The error is already recorded on the job; retrieve it so asyncio does not warn
+        if not task.cancelled():
+            task.exception()
+
+    async def _set(self, job_id, **fields):
+        fields["updated_at"] = datetime.now().isoformat()
+        await self.collection.update_one({"job_id": job_id}, {"$set": fields})
+
+    async def _finish(self, job_id, status, **fields):
+        # Shielded so a cancelled job still records its final state
+        await asyncio.shield(self._set(
+            job_id, status=status, stage=status, active=False,
+            finished_at=datetime.now().isoformat(), **fields
+        ))
+        print(f"{'✅' if status == 'completed' else '⚠️'} Job {job_id[:8]} {status}")
+
+    async def get(self, job_id):
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def list_jobs(self, job_type=None, status=None, limit=50):
+        query = {}
+        if job_type:
+            query["job_type"] = job_type
+        if status:
+            query["status"] = status
+        return await self.collection.find(query, {"_id": 0}).sort("created_at", DESCENDING).limit(limit).to_list(limit)
+
+    async def cancel(self, job_id):
+        """Flag a job for cancellation and interrupt it if it runs in this process"""
+        job = await self.collection.find_one_and_update(
+            {"job_id": job_id, "active": True},
+            {"$set": {"cancel_requested": True, "updated_at": datetime.now().isoformat()}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        task = self.tasks.get(job_id)
+        if job and task is not None:
+            task.cancel()
+        return job
+
+    async def wait(self, job_id):
+        """Wait for a job to finish and return its result, re-raising its error when it ran here"""
+        task = self.tasks.get(job_id)
+        if task is not None:
+            # Shielded: a dropped client connection must not cancel the job itself
+            return await asyncio.shield(task)
+        while True:
+            job = await self.get(job_id)
+            if job is None or job["status"] in JOB_TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+        if job and job["status"] == "completed":
+            return job["result"]
+        if job and job["status"] == "failed" and job.get("result") is not None:
+            return job["result"]
+        raise HTTPException(status_code=500, detail=(job or {}).get("error") or "Job did not complete")
+
+    async def run(self, job_type, runner, params=None, wait=False):
+        """Submit a job for an endpoint and answer 202 with its handle; with wait the endpoint keeps its original response"""
+        job, deduplicated = await self.submit(job_type, runner, params)
+        if not wait:
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "job_id": job["job_id"],
+                "job_type": job_type,
+                "status": job["status"],
+                "deduplicated": deduplicated,
+                "status_url": f"/api/jobs/{job['job_id']}",
+                "events_url": f"/api/jobs/{job['job_id']}/events"
+            })
+        try:
+            return await self.wait(job["job_id"])
+        except JobCancelled:
+            raise HTTPException(status_code=409, detail=f"Job {job['job_id']} was cancelled")
+
+    async def recover(self):
+        """Mark jobs left active by a previous server process as failed"""
+        result = await self.collection.update_many(
+            {"active": True},
+            {"$set": {
+                "status": "failed",
+                "stage": "failed",
+                "active": False,
+                "error": "Interrupted by server restart",
+                "finished_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat()
+            }}
+        )
+        if result.modified_count:
+            print(f"⚠️ Marked {result.modified_count} interrupted jobs as failed")
+
+# Initialize background job manager
+job_manager = JobManager(db)
+
+def starting_xi_fingerprint(starting_xi):
+    """Order-independent hash of a starting XI, or None when no XI was given"""
+    if starting_xi is None:
+        return None
+    xi = starting_xi.dict() if hasattr(starting_xi, 'dict') else dict(starting_xi)
+    positions = sorted(xi.get('positions') or [], key=lambda p: (p.get('position_id') or '', json.dumps(p, sort_keys=True, default=str)))
+    canonical = json.dumps({"formation": xi.get('formation'), "positions": positions}, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+def decay_fingerprint(decay_config):
+    """Decay parameters that affect a prediction, or None when time decay is off"""
+    if decay_config is None:
+        return None
+    return decay_config.dict() if hasattr(decay_config, 'dict') else dict(decay_config)
+
+def resolve_as_of(as_of=None, match_date=None):
+    """Reference date for time-decayed features as YYYY-MM-DD: as_of, else the match date, else today"""
+    if as_of:
+        parsed = pd.to_datetime(str(as_of)[:10], format="%Y-%m-%d", errors='coerce')
+        if pd.isna(parsed):
+            raise ValueError(f"Invalid as_of date '{as_of}', expected YYYY-MM-DD")
+        return parsed.strftime("%Y-%m-%d")
+    if match_date:
+        parsed = pd.to_datetime(str(match_date)[:10], format="%Y-%m-%d", errors='coerce')
+        if not pd.isna(parsed):
+            return parsed.strftime("%Y-%m-%d")
+    return datetime.now().strftime("%Y-%m-%d")
+
+def validate_as_of(as_of):
+    """Reject an unparseable as_of date with a 400 before any prediction work starts"""
+    try:
+        resolve_as_of(as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def request_key(kind, parts):
+    """Stable hash of a request's inputs plus the current data version"""
+    payload = {"kind": kind, "data_version": data_snapshot.data_version, **parts}
+    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+class SingleFlight:
+    """Coalesces concurrent identical requests onto one in-flight computation.
+
+    The first caller for a key starts the work; callers arriving before it finishes await the
+    same task and each get their own copy of the result (or the same exception). The task is
+    shielded, so a disconnecting client does not cancel the work for everyone else.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key, compute):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so abandoned tasks don't log "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {"in_flight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+# Initialize request coalescer
+request_coalescer = SingleFlight()
+
+class PredictionCache:
+    """LRU + TTL cache for prediction results.
+
+    Keys cover the request inputs plus the model version and the data version, so a retrain,
+    upload or recalculation makes older entries unreachable instead of serving stale results.
+    Only successful results are stored, and callers get deep copies so response post-processing
+    never leaks back into the cache.
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=900, enabled=True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def is_cacheable(result):
+        if isinstance(result, dict):
+            return result.get('success') is True
+        return getattr(result, 'success', False) is True
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, kind, parts, compute, bypass=False):
+        """Return a cached result for these inputs, or compute and cache it.
+
+        Concurrent misses for the same key share one computation. bypass=True always runs a
+        fresh computation of its own and refreshes the stored entry.
+        """
+        key = request_key(kind, parts)
+
+        async def compute_and_store():
+            result = await compute()
+            if self.enabled and self.is_cacheable(result):
+                self.put(key, result)
+            return result
+
+        if bypass:
+            self.bypassed += 1
+            return await compute_and_store()
+
+        if self.enabled:
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        return await request_coalescer.run(key, compute_and_store)
+
+    def clear(self):
+        cleared = len(self._entries)
+        self._entries.clear()
+        return cleared
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "bypassed": self.bypassed,
+            "data_version": data_snapshot.data_version
+        }
+
+# Initialize prediction cache
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_MAX_ENTRIES', 2048)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL_SECONDS', 900)),
+    enabled=os.environ.get('PREDICTION_CACHE_ENABLED', 'true').lower() != 'false'
+)
+
 # Create the main app without a prefix
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    try:
+        await index_manager.ensure_indexes()
+    except Exception as e:
+        print(f"⚠️ Index bootstrap failed, continuing without it: {e}")
+    try:
+        await data_snapshot.refresh()
+    except Exception as e:
+        print(f"⚠️ Data snapshot preload failed, will load on first use: {e}")
+    try:
+        await job_manager.recover()
+    except Exception as e:
+        print(f"⚠️ Job recovery failed: {e}")
     yield
     # Shutdown
+    execution_layer.shutdown()
     client.close()
 
 app = FastAPI(
@@ -227,6 +1213,8 @@ class UploadResponse(BaseModel):
     success: bool
     message: str
     records_processed: int
+    rows_rejected: int = 0
+    row_errors: List[Dict[str, Any]] = []
 
 class MultiDatasetUploadRequest(BaseModel):
     dataset_name: str
@@ -348,6 +1336,15 @@ class RBSConfigRequest(BaseModel):
     confidence_threshold_medium: int = 5
     confidence_threshold_high: int = 10
 
+class SeasonSimulationRequest(BaseModel):
+    season: Optional[str] = None  # Defaults to the latest season in the data
+    competition: Optional[str] = None
+    simulations: Optional[int] = 100000
+    seed: Optional[int] = None  # Random seed; generated and returned when omitted
+    top_spots: Optional[int] = 4
+    relegation_spots: Optional[int] = 3
+    include_unscheduled: Optional[bool] = True  # Add unplayed double round-robin pairings
+
 class RegressionAnalysisRequest(BaseModel):
     selected_stats: List[str]
     target: str  # 'points_per_game' or 'match_result'
@@ -371,6 +1368,8 @@ class MatchPredictionRequest(BaseModel):
     config_name: Optional[str] = "default"  # Allow custom config selection
     use_time_decay: Optional[bool] = True
     decay_preset: Optional[str] = "moderate"
+    as_of: Optional[str] = None  # YYYY-MM-DD reference date for time decay (defaults to match_date, then today)
+    bypass_cache: Optional[bool] = False  # Skip the prediction cache and recompute
 
 class MatchPredictionResponse(BaseModel):
     success: bool
@@ -428,6 +1427,8 @@ class EnhancedMatchPredictionRequest(BaseModel):
     use_time_decay: Optional[bool] = True
     decay_preset: Optional[str] = "moderate"  # Options: "aggressive", "moderate", "conservative", "custom"
     custom_decay_rate: Optional[float] = None  # For custom decay
+    as_of: Optional[str] = None  # YYYY-MM-DD reference date for time decay (defaults to match_date, then today)
+    bypass_cache: Optional[bool] = False  # Skip the prediction cache and recompute
 
 class TeamPlayersResponse(BaseModel):
     success: bool
@@ -444,6 +1445,37 @@ class TimeDecayConfig(BaseModel):
     cutoff_months: Optional[int] = None  # For step decay
     description: str
 
+def decay_months(dates):
+    """Months since 1970 plus (day of month - 1) / 30; the difference of two values is a decay age in months"""
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    months = dates.astype('datetime64[M]')
+    return months.astype(np.int64) + (dates - months).astype(np.int64) / 30
+
+def time_decay_weights(match_dates, decay_config, current_date=None):
+    """Time-decay weight for every match date at once, clamped to [0.1, 1.0]
+
+    match_dates is a datetime64 array (NaT where a date could not be parsed, which keeps full weight).
+    Age is measured in calendar months plus (day difference / 30), as the per-match calculation did.
+    """
+    dates = np.asarray(match_dates, dtype='datetime64[D]')
+    current = np.datetime64(current_date if current_date is not None else datetime.now().date(), 'D')
+    undated = np.isnat(dates)
+    if decay_config is None or dates.size == 0:
+        return np.ones(dates.shape)
+    
+    months_diff = decay_months(current) - decay_months(np.where(undated, current, dates))
+    
+    if decay_config.decay_type == "exponential":
+        weights = 0.5 ** (months_diff / (decay_config.half_life_months or 4.0))
+    elif decay_config.decay_type == "linear":
+        weights = 1.0 - months_diff * (decay_config.decay_rate_per_month or 0.1)
+    elif decay_config.decay_type == "step":
+        weights = np.where(months_diff <= (decay_config.cutoff_months or 12), 1.0, 0.1)
+    else:
+        weights = np.ones(dates.shape)
+    
+    return np.where(undated, 1.0, np.clip(weights, 0.1, 1.0))
+
 # Starting XI Manager
 class StartingXIManager:
     def __init__(self):
@@ -552,7 +1584,7 @@ class StartingXIManager:
         """Get all players for a team with their playing time statistics"""
         try:
             # Get all player stats for this team
-            player_stats = await db.player_stats.find({"team_name": team_name}).to_list(10000)
+            player_stats = await collect_documents(db.player_stats, {"team_name": team_name}, {"_id": 0})
             
             # Group by player and calculate total minutes/matches
             player_aggregates = {}
@@ -663,37 +1695,10 @@ class StartingXIManager:
             return None
     
     def calculate_time_weight(self, match_date_str: str, current_date_str: str, decay_config: TimeDecayConfig):
-        """Calculate time-based weight for a match"""
+        """Calculate time-based weight for a single match (see time_decay_weights for whole arrays)"""
         try:
-            from datetime import datetime
-            
-            match_date = datetime.strptime(match_date_str, "%Y-%m-%d")
-            current_date = datetime.strptime(current_date_str, "%Y-%m-%d") if current_date_str else datetime.now()
-            
-            # Calculate months difference
-            months_diff = (current_date.year - match_date.year) * 12 + (current_date.month - match_date.month)
-            months_diff += (current_date.day - match_date.day) / 30  # Approximate days to months
-            
-            if decay_config.decay_type == "exponential":
-                # Exponential decay: weight = 0.5^(months_diff / half_life)
-                half_life = decay_config.half_life_months or 4.0
-                weight = 0.5 ** (months_diff / half_life)
-            elif decay_config.decay_type == "linear":
-                # Linear decay: weight = 1 - (months_diff * decay_rate)
-                decay_rate = decay_config.decay_rate_per_month or 0.1
-                weight = max(0.1, 1.0 - (months_diff * decay_rate))  # Minimum weight of 0.1
-            elif decay_config.decay_type == "step":
-                # Step decay: full weight until cutoff, then zero
-                cutoff = decay_config.cutoff_months or 12
-                weight = 1.0 if months_diff <= cutoff else 0.1
-            else:
-                # No decay
-                weight = 1.0
-            
-            # DEBUG: Log time decay calculation
-            print(f"⏰ Time Decay: {match_date_str} ({months_diff:.1f}mo ago) → weight: {weight:.3f} (type: {decay_config.decay_type})")
-            
-            return max(0.1, min(1.0, weight))  # Clamp between 0.1 and 1.0
+            match_date = pd.to_datetime([match_date_str], format="%Y-%m-%d", errors='coerce').to_numpy()
+            return float(time_decay_weights(match_date, decay_config, current_date_str or None)[0])
             
         except Exception as e:
             print(f"Error calculating time weight: {e}")
@@ -733,99 +1738,74 @@ class RBSCalculator:
             # Return default config if not found
             return self.default_config
     
-    async def calculate_team_avg_stats(self, team_name, all_team_stats, all_matches, with_referee=None, exclude_referee=None):
+    async def calculate_team_avg_stats(self, team_name, snapshot=None, with_referee=None, exclude_referee=None):
         """Calculate average stats for a team, optionally filtered by referee"""
+        snapshot = snapshot or await data_snapshot.get()
+        
         # Get all matches for this team
-        team_matches = [m for m in all_matches if m['home_team'] == team_name or m['away_team'] == team_name]
+        team_matches = snapshot.team_matches(team_name)
         
         # Filter matches by referee if specified
+        referees = team_matches['referee'].fillna(self.MISSING_REFEREE)
         if with_referee:
-            team_matches = [m for m in team_matches if m['referee'] == with_referee]
+            team_matches = team_matches[referees == with_referee]
         elif exclude_referee:
-            team_matches = [m for m in team_matches if m['referee'] != exclude_referee]
+            team_matches = team_matches[referees != exclude_referee]
         
-        if not team_matches:
+        if team_matches.empty:
             return None, 0
         
-        # Get team stats for these matches and calculate averages
-        team_stats_for_matches = []
-        match_ids_for_team = [match['match_id'] for match in team_matches]
-        
-        # Get player stats for fouls_drawn and penalties_awarded aggregation
-        player_stats = await db.player_stats.find({
-            "match_id": {"$in": match_ids_for_team},
-            "team_name": team_name
-        }).to_list(10000)
-        
-        # Group player stats by match_id for aggregation
-        player_stats_by_match = {}
-        for pstat in player_stats:
-            match_id = pstat['match_id']
-            if match_id not in player_stats_by_match:
-                player_stats_by_match[match_id] = []
-            player_stats_by_match[match_id].append(pstat)
-        
-        for match in team_matches:
-            match_stats = [s for s in all_team_stats if s['match_id'] == match['match_id'] and s['team_name'] == team_name]
-            for stat in match_stats:
-                # Get player stats for this match to aggregate xG, fouls_drawn, and penalties_awarded
-                match_player_stats = player_stats_by_match.get(match['match_id'], [])
-                match_xg = sum(ps.get('xg', 0) for ps in match_player_stats)
-                match_fouls_drawn = sum(ps.get('fouls_drawn', 0) for ps in match_player_stats)
-                match_penalties_awarded = sum(ps.get('penalty_attempts', 0) for ps in match_player_stats)
-                
-                # Override xG with aggregated value from player stats
-                stat['xg'] = match_xg
-                
-                # Calculate xG difference (team xG - opponent xG) for this match
-                opponent_name = match['away_team'] if match['home_team'] == team_name else match['home_team']
-                opponent_stats = [s for s in all_team_stats if s['match_id'] == match['match_id'] and s['team_name'] == opponent_name]
-                
-                # Get opponent player stats for xG calculation
-                opponent_player_stats = []
-                for pstat in player_stats:
-                    if pstat['match_id'] == match['match_id'] and pstat['team_name'] == opponent_name:
-                        opponent_player_stats.append(pstat)
-                
-                opponent_xg = sum(ps.get('xg', 0) for ps in opponent_player_stats)
-                stat['xg_difference'] = match_xg - opponent_xg
-                
-                # Rename fields to match new specification
-                stat['fouls_committed'] = stat.get('fouls', 0)
-                stat['possession_percentage'] = stat.get('possession_pct', 0)
-                
-                # Override with aggregated values if they exist, otherwise use team stat values
-                stat['fouls_drawn'] = match_fouls_drawn if match_fouls_drawn > 0 else stat.get('fouls_drawn', 0)
-                stat['penalties_awarded'] = match_penalties_awarded if match_penalties_awarded > 0 else stat.get('penalties_awarded', 0)
-                
-                team_stats_for_matches.append(stat)
+        # Pair every match with this team's stat rows for it
+        team_stats = snapshot.team_stats_for(team_name)
+        merged = team_matches[['match_id', 'home_team', 'away_team']].merge(
+            team_stats.drop(columns=['home_team', 'away_team'], errors='ignore'), on='match_id', how='inner'
+        )
         
-        if not team_stats_for_matches:
+        if merged.empty:
             return None, 0
         
-        # Calculate averages for required fields
-        avg_stats = {}
-        stat_fields = ['yellow_cards', 'red_cards', 'fouls_committed', 'fouls_drawn', 'penalties_awarded', 'xg_difference', 'possession_percentage']
+        # Aggregate player stats for xG, fouls_drawn and penalties_awarded
+        own_totals = snapshot.player_totals(
+            merged['match_id'], [team_name] * len(merged), ['xg', 'fouls_drawn', 'penalty_attempts']
+        )
+        opponents = np.where(merged['home_team'] == team_name, merged['away_team'], merged['home_team'])
+        opponent_xg = snapshot.player_totals(merged['match_id'], opponents, ['xg'])[:, 0]
+        match_xg, match_fouls_drawn, match_penalties = own_totals[:, 0], own_totals[:, 1], own_totals[:, 2]
+        
+        column = DataSnapshot.column
+        per_match = pd.DataFrame({
+            'yellow_cards': column(merged, 'yellow_cards', np.nan),
+            'red_cards': column(merged, 'red_cards', np.nan),
+            'fouls_committed': column(merged, 'fouls').fillna(0),
+            # Use aggregated values if they exist, otherwise team stat values
+            'fouls_drawn': np.where(match_fouls_drawn > 0, match_fouls_drawn, column(merged, 'fouls_drawn').fillna(0)),
+            'penalties_awarded': np.where(match_penalties > 0, match_penalties, column(merged, 'penalties_awarded').fillna(0)),
+            'xg_difference': match_xg - opponent_xg,
+            'possession_percentage': column(merged, 'possession_pct', np.nan),
+        })
         
-        for field in stat_fields:
-            values = [s.get(field, 0) for s in team_stats_for_matches if s.get(field) is not None]
-            avg_stats[field] = sum(values) / len(values) if values else 0
+        # Calculate averages for required fields (missing values are skipped)
+        avg_stats = {}
+        for field in per_match.columns:
+            mean = per_match[field].mean()
+            avg_stats[field] = float(mean) if pd.notna(mean) else 0
         
         return avg_stats, len(team_matches)
     
-    async def calculate_rbs_for_team_referee(self, team_name, referee, all_team_stats, all_matches, config_name="default"):
+    async def calculate_rbs_for_team_referee(self, team_name, referee, config_name="default", snapshot=None):
         """Calculate RBS score for a specific team-referee combination using configurable weights"""
         # Get configuration
         config = await self.get_config(config_name)
+        snapshot = snapshot or await data_snapshot.get()
         
         # Calculate average stats with this referee
         with_ref_stats, matches_with_ref = await self.calculate_team_avg_stats(
-            team_name, all_team_stats, all_matches, with_referee=referee
+            team_name, snapshot, with_referee=referee
         )
         
         # Calculate average stats with other referees (exclude this referee)
         without_ref_stats, matches_without_ref = await self.calculate_team_avg_stats(
-            team_name, all_team_stats, all_matches, exclude_referee=referee
+            team_name, snapshot, exclude_referee=referee
         )
         
         # Check minimum match requirement
@@ -888,6 +1868,158 @@ class RBSCalculator:
             'stats_breakdown': {k: round(v, 4) for k, v in rbs_components.items()},
             'config_used': config_name
         }
+
+    # Per-match inputs of the RBS components, in component order
+    RBS_FIELDS = ['yellow_cards', 'red_cards', 'fouls_committed', 'fouls_drawn', 'penalties_awarded']
+    # Referee label for matches without one, the same one ingest gives them
+    MISSING_REFEREE = "Unknown"
+
+    def build_team_match_table(self, snapshot, match_ids=None):
+        """Team x match tables: one row per team appearance, and one per joined team stat row"""
+        matches = snapshot.matches
+        positions = np.arange(len(matches))
+        appearances = pd.concat([
+            pd.DataFrame({'position': positions, 'team_name': matches[side].to_numpy(),
+                          'match_id': matches['match_id'].to_numpy(),
+                          'referee': matches['referee'].fillna(self.MISSING_REFEREE).to_numpy()})
+            for side in ('home_team', 'away_team')
+        ], ignore_index=True).drop_duplicates(['position', 'team_name'])
+        appearances = appearances[appearances['team_name'].notna()]
+        if match_ids is not None:
+            appearances = appearances[appearances['match_id'].isin(list(match_ids))]
+
+        # Pair every appearance with the team's stat rows for that match
+        column = DataSnapshot.column
+        team_stats = snapshot.team_stats
+        stat_columns = [c for c in ('yellow_cards', 'red_cards', 'fouls', 'fouls_drawn', 'penalties_awarded') if c in team_stats.columns]
+        merged = appearances.merge(team_stats[['match_id', 'team_name'] + stat_columns], on=['match_id', 'team_name'], how='inner')
+
+        # Aggregated player fouls drawn / penalties take priority over team stat values
+        player_totals = snapshot.player_totals(merged['match_id'], merged['team_name'], ['fouls_drawn', 'penalty_attempts'])
+        rows = pd.DataFrame({
+            'match_id': merged['match_id'],
+            'team_name': merged['team_name'],
+            'referee': merged['referee'],
+            'yellow_cards': column(merged, 'yellow_cards', np.nan),
+            'red_cards': column(merged, 'red_cards', np.nan),
+            'fouls_committed': column(merged, 'fouls').fillna(0),
+            'fouls_drawn': np.where(player_totals[:, 0] > 0, player_totals[:, 0], column(merged, 'fouls_drawn').fillna(0)),
+            'penalties_awarded': np.where(player_totals[:, 1] > 0, player_totals[:, 1], column(merged, 'penalties_awarded').fillna(0)),
+        })
+        return appearances, rows
+
+    def rbs_pair_aggregates(self, snapshot, match_ids=None):
+        """Per (team, referee) sums and counts of the RBS inputs, optionally for a subset of matches.
+
+        Columns: team_name, referee (MISSING_REFEREE for matches without one), matches, rows and
+        <field>_sum / <field>_count for each RBS field (NaN values are not counted).
+        """
+        appearances, rows = self.build_team_match_table(snapshot, match_ids)
+        keys = ['team_name', 'referee']
+        fields = self.RBS_FIELDS
+
+        pair_groups = rows.groupby(keys, sort=False, dropna=False)
+        aggregates = pd.concat([
+            appearances.groupby(keys, sort=False, dropna=False).size().rename('matches'),
+            pair_groups.size().rename('rows'),
+            pair_groups[fields].sum().add_suffix('_sum'),
+            pair_groups[fields].count().add_suffix('_count'),
+        ], axis=1).fillna(0).reset_index()
+        return aggregates
+
+    def rbs_scores(self, n, with_rows, without_rows, with_sum, with_count, without_sum, without_count, config):
+        """Vectorized RBS formula over arrays of with/without-referee sums and counts.
+
+        Returns (components, rbs_raw, rbs_normalized, confidence, valid), one entry per pair.
+        """
+        # Means default to 0 when a field has no values
+        with_mean = np.divide(with_sum, with_count, out=np.zeros_like(with_sum), where=with_count > 0)
+        without_mean = np.divide(without_sum, without_count, out=np.zeros_like(without_sum), where=without_count > 0)
+
+        # Cards and fouls committed count against the team, fouls drawn and penalties in its favour
+        signs = np.array([-1, -1, -1, 1, 1], dtype=float)
+        weights = np.array([
+            config.yellow_cards_weight, config.red_cards_weight, config.fouls_committed_weight,
+            config.fouls_drawn_weight, config.penalties_awarded_weight
+        ], dtype=float)
+        components = (with_mean - without_mean) * signs * weights
+
+        # Sum components in order so the raw score matches the per-pair calculation
+        rbs_raw = np.zeros(len(n))
+        for j in range(len(self.RBS_FIELDS)):
+            rbs_raw = rbs_raw + components[:, j]
+        rbs_normalized = np.tanh(rbs_raw)
+
+        # Confidence from configurable thresholds
+        confidence = np.select(
+            [n >= config.confidence_threshold_high, n >= config.confidence_threshold_medium, n >= config.confidence_threshold_low],
+            [
+                np.minimum(config.max_confidence, 70 + (n - config.confidence_threshold_high) * 2.5),
+                50 + (n - config.confidence_threshold_medium) * 4,
+                20 + (n - config.confidence_threshold_low) * 10
+            ],
+            default=n * 10
+        )
+        confidence = np.maximum(config.min_confidence, np.minimum(config.max_confidence, confidence))
+
+        valid = (with_rows > 0) & (without_rows > 0) & (n >= config.confidence_threshold_low)
+        return components, rbs_raw, rbs_normalized, confidence, valid
+
+    def rbs_from_aggregates(self, aggregates, config, config_name="default"):
+        """RBS results for every team-referee pair in a per-(team, referee) aggregate table.
+
+        With-referee means come from the pair's own sums; without-referee means are the
+        team totals minus the pair sums.
+        """
+        fields = self.RBS_FIELDS
+        sum_columns = [f"{field}_sum" for field in fields]
+        count_columns = [f"{field}_count" for field in fields]
+        value_columns = ['matches', 'rows'] + sum_columns + count_columns
+
+        pairs = aggregates[aggregates['referee'].notna() & (aggregates['matches'] > 0)]
+        if pairs.empty:
+            return []
+        team_totals = aggregates.groupby('team_name', sort=False)[value_columns].sum().reindex(pairs['team_name'])
+
+        n = pairs['matches'].to_numpy()
+        matches_without_ref = team_totals['matches'].to_numpy() - n
+        with_rows = pairs['rows'].to_numpy()
+        without_rows = team_totals['rows'].to_numpy() - with_rows
+
+        with_sum = pairs[sum_columns].to_numpy(dtype=float)
+        with_count = pairs[count_columns].to_numpy(dtype=float)
+        without_sum = team_totals[sum_columns].to_numpy(dtype=float) - with_sum
+        without_count = team_totals[count_columns].to_numpy(dtype=float) - with_count
+
+        components, rbs_raw, rbs_normalized, confidence, valid = self.rbs_scores(
+            n, with_rows, without_rows, with_sum, with_count, without_sum, without_count, config
+        )
+
+        team_names = pairs['team_name'].to_numpy()
+        referees = pairs['referee'].to_numpy()
+        results = []
+        for i in np.flatnonzero(valid):
+            results.append({
+                'team_name': team_names[i],
+                'referee': referees[i],
+                'rbs_score': round(float(rbs_normalized[i]), 3),
+                'rbs_raw': round(float(rbs_raw[i]), 3),
+                'matches_with_ref': int(n[i]),
+                'matches_without_ref': int(matches_without_ref[i]),
+                'confidence_level': round(float(confidence[i]), 1),
+                'stats_breakdown': {field: round(float(components[i, j]), 4) for j, field in enumerate(fields)},
+                'config_used': config_name
+            })
+        return results
+
+    async def calculate_all_rbs(self, config_name="default", snapshot=None):
+        """Calculate RBS for every team-referee pair in one vectorized pass.
+
+        Produces the same results as calling calculate_rbs_for_team_referee for each pair.
+        """
+        config = await self.get_config(config_name)
+        snapshot = snapshot or await data_snapshot.get()
+        return self.rbs_from_aggregates(self.rbs_pair_aggregates(snapshot), config, config_name)
     
     async def calculate_referee_variance_analysis(self, team_name: str, referee_name: str):
         """
@@ -1041,6 +2173,461 @@ class RBSCalculator:
 # Initialize RBS Calculator
 rbs_calculator = RBSCalculator()
 
+class RBSAggregateStore:
+    """Persisted per-(team, referee) RBS input sums, kept current as matches are added or removed.
+
+    /calculate-rbs rebuilds everything; uploads and dataset deletions apply only the change
+    in sums for the touched matches and refresh the RBS results of the affected teams.
+    """
+
+    STATE_ID = "rbs_aggregates"
+    # Bumped when the aggregate keys change; older builds need a /calculate-rbs rebuild
+    LAYOUT_VERSION = 2
+
+    def __init__(self, database):
+        self.db = database
+
+    @staticmethod
+    def _value_columns():
+        fields = RBSCalculator.RBS_FIELDS
+        return ['matches', 'rows'] + [f"{f}_sum" for f in fields] + [f"{f}_count" for f in fields]
+
+    def _frame(self, docs):
+        """Aggregate documents back into the rbs_pair_aggregates table layout"""
+        columns = ['team_name', 'referee'] + self._value_columns()
+        if not docs:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame.from_records(docs).reindex(columns=columns)
+        frame[self._value_columns()] = frame[self._value_columns()].fillna(0)
+        return frame
+
+    async def get_state(self):
+        return await self.db.rbs_state.find_one({"_id": self.STATE_ID})
+
+    async def rebuild(self, config_name="default", snapshot=None):
+        """Recompute every aggregate and RBS result, upserting both in place"""
+        snapshot = snapshot or await data_snapshot.get()
+        aggregates = rbs_calculator.rbs_pair_aggregates(snapshot)
+        now = datetime.now().isoformat()
+
+        # Replace aggregates in place, then drop pairs that no longer exist
+        value_columns = self._value_columns()
+        operations = [
+            UpdateOne(
+                {"team_name": row['team_name'], "referee": row['referee']},
+                {"$set": {**{col: float(row[col]) for col in value_columns}, "updated_at": now}},
+                upsert=True
+            )
+            for row in aggregates.to_dict('records')
+        ]
+        if operations:
+            await self.db.rbs_aggregates.bulk_write(operations, ordered=False)
+        await self.db.rbs_aggregates.delete_many({"updated_at": {"$ne": now}})
+
+        config = await rbs_calculator.get_config(config_name)
+        results = rbs_calculator.rbs_from_aggregates(aggregates, config, config_name)
+        await self._upsert_results(results, now)
+        await self.db.rbs_results.delete_many({"last_updated": {"$ne": now}})
+        data_snapshot.mark_changed(f"RBS results rebuilt ({config_name})")
+
+        await self.db.rbs_state.update_one(
+            {"_id": self.STATE_ID},
+            {"$set": {"config_name": config_name, "layout_version": self.LAYOUT_VERSION, "built_at": now, "updated_at": now}},
+            upsert=True
+        )
+        return results
+
+    async def capture(self, match_ids):
+        """RBS input sums for the given matches before they change (None if RBS was never built or needs a rebuild)"""
+        try:
+            if not match_ids:
+                return None
+            state = await self.get_state()
+            if not state:
+                return None
+            if state.get("layout_version") != self.LAYOUT_VERSION:
+                print("⚠️ RBS aggregates were built with an older layout; run /calculate-rbs to rebuild them")
+                return None
+            snapshot = await data_snapshot.get()
+            return rbs_calculator.rbs_pair_aggregates(snapshot, match_ids)
+        except Exception as e:
+            print(f"⚠️ Could not capture RBS aggregates: {e}")
+            return None
+
+    async def apply_changes(self, before, match_ids, reason=""):
+        """Apply the change in RBS input sums for the given matches and refresh affected teams"""
+        if before is None:
+            return None
+        try:
+            snapshot = await data_snapshot.get()
+            after = rbs_calculator.rbs_pair_aggregates(snapshot, match_ids)
+
+            # Delta per (team, referee): new contribution minus old contribution
+            value_columns = self._value_columns()
+            negated = before.copy()
+            negated[value_columns] = -negated[value_columns]
+            delta = pd.concat([after, negated], ignore_index=True).groupby(
+                ['team_name', 'referee'], sort=False, dropna=False
+            )[value_columns].sum().reset_index()
+            delta['referee'] = delta['referee'].astype(object).where(delta['referee'].notna(), None)
+            delta = delta[(delta[value_columns] != 0).any(axis=1)]
+            if delta.empty:
+                return {"teams_updated": 0, "pairs_updated": 0}
+
+            now = datetime.now().isoformat()
+            await self.db.rbs_aggregates.bulk_write([
+                UpdateOne(
+                    {"team_name": row['team_name'], "referee": row['referee']},
+                    {"$inc": {col: float(row[col]) for col in value_columns}, "$set": {"updated_at": now}},
+                    upsert=True
+                )
+                for row in delta.to_dict('records')
+            ], ordered=False)
+
+            # Only the affected teams' pairs (and their without-referee totals) change
+            teams = sorted(delta['team_name'].unique())
+            await self.db.rbs_aggregates.delete_many({"team_name": {"$in": teams}, "matches": {"$lte": 0}, "rows": {"$lte": 0}})
+            docs = await collect_documents(self.db.rbs_aggregates, {"team_name": {"$in": teams}}, {"_id": 0})
+
+            state = await self.get_state()
+            config_name = state.get('config_name', 'default') if state else 'default'
+            config = await rbs_calculator.get_config(config_name)
+            results = rbs_calculator.rbs_from_aggregates(self._frame(docs), config, config_name)
+            await self._upsert_results(results, now)
+            await self.db.rbs_results.delete_many({"team_name": {"$in": teams}, "last_updated": {"$ne": now}})
+            data_snapshot.mark_changed(f"RBS results updated ({reason})")
+
+            await self.db.rbs_state.update_one({"_id": self.STATE_ID}, {"$set": {"updated_at": now}})
+            print(f"📊 RBS updated incrementally for {len(teams)} teams ({reason})")
+            return {"teams_updated": len(teams), "pairs_updated": len(results)}
+        except Exception as e:
+            print(f"⚠️ Incremental RBS update failed ({reason}): {e} - run /calculate-rbs to rebuild")
+            return None
+
+    async def _upsert_results(self, results, now):
+        if results:
+            await self.db.rbs_results.bulk_write([
+                UpdateOne(
+                    {"team_name": result['team_name'], "referee": result['referee']},
+                    {"$set": {**result, "last_updated": now}},
+                    upsert=True
+                )
+                for result in results
+            ], ordered=False)
+
+# Initialize RBS aggregate store
+rbs_aggregate_store = RBSAggregateStore(db)
+
+class TeamDecayStore:
+    """Persisted exponentially-weighted team stat sums per (team, venue, half-life) for the exponential presets.
+
+    Weights are max(0.1, 0.5 ** (age / half_life)), so each key keeps two parts: decayed sums of the
+    matches still above the 0.1 floor, relative to a reference date (with those matches, oldest first,
+    so they can drop to the floor as they age), and plain sums of the floored matches. A later match
+    decays every key by the elapsed time before it is added, so ingesting a match is O(1) per key and
+    calculate_team_averages_with_decay becomes a lookup instead of a rescan of the team's history.
+    """
+
+    STATE_ID = "team_decay_aggregates"
+    EXCLUDED_FIELDS = ['_id', 'team_name', 'match_date', 'date', 'is_home']
+    MIN_WEIGHT = 0.1
+    OPPOSITE_VENUE_WEIGHT = 0.8
+
+    def __init__(self, database):
+        self.db = database
+        self._state = None  # fields, half_lives, reference (decay months), reference_date, rows
+        self._aggregates = {}  # (team_name, is_home, half_life) -> aggregate
+        self._loaded = False
+        self._checked_version = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def value_fields(cls, team_stats):
+        """Numeric team stat columns that time-decayed team averages are computed over"""
+        return [col for col in team_stats.select_dtypes(include=[np.number]).columns if col not in cls.EXCLUDED_FIELDS]
+
+    @staticmethod
+    def half_lives():
+        return sorted({preset.half_life_months or 4.0 for preset in starting_xi_manager.decay_presets.values()
+                       if preset.decay_type == "exponential"})
+
+    @classmethod
+    def floor_age(cls, half_life):
+        """Age in months after which a match's weight is the 0.1 floor"""
+        return half_life * math.log2(1 / cls.MIN_WEIGHT)
+
+    def rows(self, snapshot, match_ids=None):
+        """Dated team stat rows (optionally only for match_ids) with their decay months and values"""
+        ts = snapshot.team_stats
+        if match_ids is not None:
+            ts = ts[ts['match_id'].isin(list(match_ids))]
+        fields = self.value_fields(snapshot.team_stats)
+        dates = snapshot.match_dates_for_ids(ts['match_id'])
+        keep = ~np.isnat(dates) & ts['team_name'].notna().to_numpy()
+        ts = ts[keep]
+        return {
+            "fields": fields,
+            "team_name": ts['team_name'].to_numpy(dtype=object),
+            "is_home": ts['is_home'].to_numpy(dtype=bool),
+            "match_id": ts['match_id'].to_numpy(dtype=object),
+            "date": dates[keep],
+            "months": decay_months(dates[keep]),
+            "values": np.nan_to_num(ts[fields].to_numpy(dtype=float), nan=0.0, posinf=0.0, neginf=0.0)
+        }
+
+    def _new_aggregate(self, team_name, is_home, half_life):
+        width = len(self._state['fields'])
+        return {"team_name": team_name, "is_home": bool(is_home), "half_life": half_life,
+                "weight": 0.0, "sums": np.zeros(width), "floor_count": 0, "floor_sums": np.zeros(width), "window": []}
+
+    def _add(self, team_name, is_home, match_id, months, values, sign=1):
+        """Add (sign=1) or remove (sign=-1) one stat row at the current reference date"""
+        reference = self._state['reference']
+        for half_life in self._state['half_lives']:
+            key = (team_name, bool(is_home), half_life)
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = self._new_aggregate(team_name, is_home, half_life)
+            if months >= reference - self.floor_age(half_life):
+                weight = 2.0 ** ((months - reference) / half_life)
+                aggregate['weight'] += sign * weight
+                aggregate['sums'] += sign * weight * values
+                if sign > 0:
+                    aggregate['window'].append((months, match_id, values))
+                    aggregate['window'].sort(key=lambda entry: entry[0])
+                else:
+                    window = aggregate['window']
+                    for i, (entry_months, entry_id, entry_values) in enumerate(window):
+                        if entry_id == match_id and entry_months == months and np.array_equal(entry_values, values):
+                            del window[i]
+                            break
+                    if not window:
+                        aggregate['weight'], aggregate['sums'] = 0.0, np.zeros_like(aggregate['sums'])
+            else:
+                aggregate['floor_count'] += sign
+                aggregate['floor_sums'] += sign * values
+            if aggregate['floor_count'] <= 0 and not aggregate['window']:
+                del self._aggregates[key]
+
+    def _advance(self, reference):
+        """Decay every aggregate to a later reference and move matches that reached the floor"""
+        elapsed = reference - self._state['reference']
+        if elapsed <= 0:
+            return False
+        for aggregate in self._aggregates.values():
+            half_life = aggregate['half_life']
+            decay = 2.0 ** (-elapsed / half_life)
+            aggregate['weight'] *= decay
+            aggregate['sums'] = aggregate['sums'] * decay
+            window, cutoff = aggregate['window'], reference - self.floor_age(half_life)
+            expired = 0
+            while expired < len(window) and window[expired][0] < cutoff:
+                months, _, values = window[expired]
+                weight = 2.0 ** ((months - reference) / half_life)
+                aggregate['weight'] -= weight
+                aggregate['sums'] = aggregate['sums'] - weight * values
+                aggregate['floor_count'] += 1
+                aggregate['floor_sums'] = aggregate['floor_sums'] + values
+                expired += 1
+            del window[:expired]
+            if not window:
+                aggregate['weight'], aggregate['sums'] = 0.0, np.zeros_like(aggregate['sums'])
+        self._state['reference'] = reference
+        return True
+
+    async def rebuild(self, snapshot=None):
+        """Recompute every aggregate from the snapshot and persist them"""
+        snapshot = snapshot or await data_snapshot.get()
+        async with self._lock:
+            return await self._rebuild(snapshot)
+
+    async def _rebuild(self, snapshot):
+        rows = self.rows(snapshot)
+        dated = len(rows['months']) > 0
+        self._state = {
+            "fields": rows['fields'],
+            "half_lives": self.half_lives(),
+            "reference": float(rows['months'].max()) if dated else None,
+            "reference_date": str(rows['date'].max().astype('datetime64[D]')) if dated else None,
+            "rows": len(rows['months'])
+        }
+        self._aggregates = {}
+        if dated:
+            order = np.argsort(rows['months'], kind='stable')
+            for i in order:
+                self._add(rows['team_name'][i], rows['is_home'][i], rows['match_id'][i], float(rows['months'][i]), rows['values'][i])
+        await self._save(replace=True)
+        self._loaded, self._checked_version = True, snapshot.version
+        print(f"📉 Team decay aggregates rebuilt: {len(self._aggregates)} keys from {self._state['rows']} stat rows")
+        return self.status()
+
+    async def capture(self, match_ids):
+        """Stat rows for the given matches before they change (None if the store was never built)"""
+        try:
+            if not match_ids or not await self._load():
+                return None
+            return self.rows(await data_snapshot.get(), match_ids)
+        except Exception as e:
+            print(f"⚠️ Could not capture team decay aggregates: {e}")
+            return None
+
+    async def apply_changes(self, before, match_ids, reason=""):
+        """Remove the old rows of the given matches, decay to the newest date and add their new rows"""
+        if before is None:
+            return None
+        async with self._lock:
+            try:
+                snapshot = await data_snapshot.get()
+                after = self.rows(snapshot, match_ids)
+                if self._state is None or after['fields'] != self._state['fields'] or before['fields'] != self._state['fields']:
+                    # A stat column appeared or disappeared, so every key changes shape
+                    return await self._rebuild(snapshot)
+                
+                for i in range(len(before['months'])):
+                    self._add(before['team_name'][i], before['is_home'][i], before['match_id'][i], float(before['months'][i]), before['values'][i], sign=-1)
+                if len(after['months']):
+                    newest = int(np.argmax(after['months']))
+                    if self._state['reference'] is None:
+                        self._state['reference'] = float(after['months'][newest])
+                    if self._advance(float(after['months'][newest])) or self._state['reference_date'] is None:
+                        self._state['reference_date'] = str(after['date'][newest].astype('datetime64[D]'))
+                for i in range(len(after['months'])):
+                    self._add(after['team_name'][i], after['is_home'][i], after['match_id'][i], float(after['months'][i]), after['values'][i])
+                self._state['rows'] += len(after['months']) - len(before['months'])
+                
+                await self._save(replace=True)
+                self._checked_version = snapshot.version
+                print(f"📉 Team decay aggregates updated for {len(before['months'])} -> {len(after['months'])} stat rows ({reason})")
+                return self.status()
+            except Exception as e:
+                print(f"⚠️ Incremental team decay update failed ({reason}): {e} - rebuilding on next use")
+                self._checked_version = None
+                self._state = None
+                return None
+
+    async def _save(self, replace=False):
+        now = datetime.now().isoformat()
+        if self._aggregates:
+            await self.db.team_decay_aggregates.bulk_write([
+                UpdateOne(
+                    {"team_name": aggregate['team_name'], "is_home": aggregate['is_home'], "half_life": aggregate['half_life']},
+                    {"$set": {
+                        "weight": float(aggregate['weight']),
+                        "sums": aggregate['sums'].tolist(),
+                        "floor_count": int(aggregate['floor_count']),
+                        "floor_sums": aggregate['floor_sums'].tolist(),
+                        "window": [{"months": months, "match_id": match_id, "values": values.tolist()}
+                                   for months, match_id, values in aggregate['window']],
+                        "updated_at": now
+                    }},
+                    upsert=True
+                )
+                for aggregate in self._aggregates.values()
+            ], ordered=False)
+        if replace:
+            await self.db.team_decay_aggregates.delete_many({"updated_at": {"$ne": now}})
+        await self.db.team_decay_state.update_one(
+            {"_id": self.STATE_ID}, {"$set": {**self._state, "updated_at": now}}, upsert=True
+        )
+
+    async def _load(self):
+        """Load persisted aggregates once per process; False when the store was never built"""
+        if self._loaded:
+            return self._state is not None
+        state = await self.db.team_decay_state.find_one({"_id": self.STATE_ID})
+        self._aggregates = {}
+        if state:
+            self._state = {key: state.get(key) for key in ('fields', 'half_lives', 'reference', 'reference_date', 'rows')}
+            async for doc in iter_documents(self.db.team_decay_aggregates, {}, {"_id": 0}):
+                key = (doc['team_name'], bool(doc['is_home']), doc['half_life'])
+                self._aggregates[key] = {
+                    "team_name": doc['team_name'], "is_home": bool(doc['is_home']), "half_life": doc['half_life'],
+                    "weight": doc['weight'], "sums": np.array(doc['sums'], dtype=float),
+                    "floor_count": doc['floor_count'], "floor_sums": np.array(doc['floor_sums'], dtype=float),
+                    "window": [(entry['months'], entry['match_id'], np.array(entry['values'], dtype=float)) for entry in doc['window']]
+                }
+        self._loaded = True
+        return self._state is not None
+
+    async def ensure_current(self, snapshot):
+        """Build the store on first use and rebuild it when it no longer matches the snapshot"""
+        if self._checked_version == snapshot.version and self._state is not None:
+            return
+        async with self._lock:
+            if self._checked_version == snapshot.version and self._state is not None:
+                return
+            await self._load()
+            rows = self.rows(snapshot)
+            current = (
+                self._state is not None
+                and self._state['fields'] == rows['fields']
+                and self._state['half_lives'] == self.half_lives()
+                and self._state['rows'] == len(rows['months'])
+                and (not len(rows['months']) or str(rows['date'].max().astype('datetime64[D]')) <= self._state['reference_date'])
+            )
+            if not current:
+                print("📉 Team decay aggregates do not match the data, rebuilding")
+                await self._rebuild(snapshot)
+            self._checked_version = snapshot.version
+
+    async def lookup(self, snapshot, team_name, is_home, decay_config, as_of):
+        """Time-decayed averages of every numeric team stat, or None when the store cannot answer
+
+        The store answers exponential presets whose half-life it tracks, for as_of dates after every
+        stored match; anything else (other decay types, backtests before the newest match) rescans.
+        """
+        if decay_config is None or decay_config.decay_type != "exponential":
+            return None
+        half_life = decay_config.half_life_months or 4.0
+        if half_life not in self.half_lives():
+            return None
+        await self.ensure_current(snapshot)
+        state = self._state
+        if state is None or state['reference'] is None or as_of <= state['reference_date']:
+            return None
+        
+        query = float(decay_months(np.datetime64(as_of, 'D')))
+        cutoff = query - self.floor_age(half_life)
+        total_weight, totals, found = 0.0, np.zeros(len(state['fields'])), False
+        for venue in (True, False):
+            aggregate = self._aggregates.get((team_name, venue, half_life))
+            if aggregate is None:
+                continue
+            found = True
+            decay = 2.0 ** ((state['reference'] - query) / half_life)
+            weight, sums = aggregate['weight'] * decay, aggregate['sums'] * decay
+            floor_count, floor_sums = aggregate['floor_count'], aggregate['floor_sums']
+            # Matches that reached the weight floor between the reference date and as_of
+            for months, _, values in aggregate['window']:
+                if months >= cutoff:
+                    break
+                expired = 2.0 ** ((months - query) / half_life)
+                weight, sums = weight - expired, sums - expired * values
+                floor_count, floor_sums = floor_count + 1, floor_sums + values
+            venue_weight = 1.0 if venue == bool(is_home) else self.OPPOSITE_VENUE_WEIGHT
+            total_weight += venue_weight * (weight + self.MIN_WEIGHT * floor_count)
+            totals += venue_weight * (sums + self.MIN_WEIGHT * floor_sums)
+        if not found:
+            return None
+        if total_weight > 0:
+            totals = totals / total_weight
+        return dict(zip(state['fields'], totals.tolist()))
+
+    def status(self):
+        state = self._state or {}
+        return {
+            "built": self._state is not None,
+            "reference_date": state.get('reference_date'),
+            "half_lives": state.get('half_lives'),
+            "fields": len(state.get('fields') or []),
+            "stat_rows": state.get('rows'),
+            "keys": len(self._aggregates),
+            "window_rows": sum(len(aggregate['window']) for aggregate in self._aggregates.values())
+        }
+
+# Initialize team decay aggregate store
+team_decay_store = TeamDecayStore(db)
+
 # PDF Export Engine
 class PDFExporter:
     def __init__(self):
@@ -1093,6 +2680,14 @@ class PDFExporter:
     
     async def generate_prediction_pdf(self, prediction_data, head_to_head_data, referee_data):
         """Generate comprehensive PDF report for match prediction"""
+        # doc.build is CPU-bound, so render in the process pool
+        pdf_bytes = await execution_layer.run_in_process(
+            'pdf', render_prediction_pdf, prediction_data, head_to_head_data, referee_data
+        )
+        return io.BytesIO(pdf_bytes)
+    
+    def build_prediction_pdf(self, prediction_data, head_to_head_data, referee_data):
+        """Render the prediction report and return the PDF bytes"""
         try:
             # Create BytesIO buffer
             buffer = io.BytesIO()
@@ -1139,8 +2734,7 @@ class PDFExporter:
             doc.build(story)
             
             # Get PDF content
-            buffer.seek(0)
-            return buffer
+            return buffer.getvalue()
             
         except Exception as e:
             print(f"Error generating PDF: {e}")
@@ -1477,22 +3071,623 @@ class PDFExporter:
 # Initialize PDF Exporter
 pdf_exporter = PDFExporter()
 
-# XGBoost-Based Match Prediction Engine with Poisson Simulation
-class MLMatchPredictor:
-    def __init__(self):
-        self.models = {}
-        self.ensemble_models = {}  # Store ensemble models
-        self.model_weights = {}    # Store model performance weights
-        self.model_confidence = {} # Store model confidence scores
-        self.scaler = StandardScaler()
-        self.feature_columns = []
-        self.models_dir = os.path.join(os.path.dirname(__file__), "models")
-        self.ensemble_dir = os.path.join(self.models_dir, "ensemble")
-        self.ensure_models_dir()
-        self.load_models()
-        self.initialize_ensemble_models()
-        
-        # XGBoost optimal hyperparameters for football prediction
+def render_prediction_pdf(prediction_data, head_to_head_data, referee_data):
+    """Process pool entry point for PDFExporter.build_prediction_pdf"""
+    return pdf_exporter.build_prediction_pdf(prediction_data, head_to_head_data, referee_data)
+
+FEATURE_STORE_DIR = Path(os.environ.get('FEATURE_STORE_DIR', ROOT_DIR / 'feature_store'))
+FEATURE_STORE_KEEP_VERSIONS = int(os.environ.get('FEATURE_STORE_KEEP_VERSIONS', 5))
+
+class FeatureStore:
+    """Point-in-time training features: every match's feature vector as of its kickoff date.
+
+    Team averages, form, head-to-head and RBS are computed in one chronological pass over
+    the data snapshot using only matches dated strictly before kickoff, then saved as a
+    versioned Parquet table keyed by a fingerprint of the input data.
+    """
+
+    SCHEMA_VERSION = 1
+
+    # Same names and order as MLMatchPredictor.extract_features_for_match
+    FEATURE_COLUMNS = [
+        'home_xg_per_match', 'home_goals_per_match', 'home_shots_per_match', 'home_shots_on_target_per_match',
+        'home_xg_per_shot', 'home_shot_accuracy', 'home_conversion_rate', 'home_possession_pct',
+        'home_goals_conceded_per_match', 'home_xg_conceded_per_match',
+        'away_xg_per_match', 'away_goals_per_match', 'away_shots_per_match', 'away_shots_on_target_per_match',
+        'away_xg_per_shot', 'away_shot_accuracy', 'away_conversion_rate', 'away_possession_pct',
+        'away_goals_conceded_per_match', 'away_xg_conceded_per_match',
+        'home_form_last5', 'away_form_last5', 'home_advantage',
+        'home_referee_bias', 'away_referee_bias', 'home_rbs_confidence', 'away_rbs_confidence',
+        'h2h_home_wins', 'h2h_draws', 'h2h_away_wins', 'h2h_home_goals_avg', 'h2h_away_goals_avg',
+        'home_ppg', 'away_ppg', 'ppg_difference',
+        'home_penalties_per_match', 'away_penalties_per_match',
+        'home_fouls_drawn_per_match', 'away_fouls_drawn_per_match',
+        'home_fouls_committed_per_match', 'away_fouls_committed_per_match',
+        'home_yellow_cards_per_match', 'away_yellow_cards_per_match',
+        'home_red_cards_per_match', 'away_red_cards_per_match'
+    ]
+    TARGET_COLUMNS = ['outcome', 'home_goals', 'away_goals', 'home_xg', 'away_xg']
+
+    # Per-venue team_stats fields averaged as of kickoff, keyed by feature suffix
+    TEAM_FEATURE_FIELDS = {
+        'xg_per_match': 'xg', 'goals_per_match': 'goals_scored', 'shots_per_match': 'shots_total',
+        'shots_on_target_per_match': 'shots_on_target', 'xg_per_shot': 'xg_per_shot',
+        'shot_accuracy': 'shot_accuracy', 'conversion_rate': 'conversion_rate',
+        'possession_pct': 'possession_pct', 'goals_conceded_per_match': 'goals_conceded',
+        'ppg': 'points_earned', 'penalties_per_match': 'penalties_awarded',
+        'fouls_drawn_per_match': 'fouls_drawn', 'fouls_committed_per_match': 'fouls',
+        'yellow_cards_per_match': 'yellow_cards', 'red_cards_per_match': 'red_cards'
+    }
+
+    def __init__(self, directory=FEATURE_STORE_DIR):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / "manifest.json"
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def as_of_totals(event_keys, event_days, values, query_keys, query_days, window=None):
+        """Per query, sums of event values with the same key dated strictly before the query day.
+
+        Keys are lists of aligned arrays and days are integer day numbers. With a window,
+        only the last `window` prior events count. Returns (sums, counts).
+        """
+        n_events = len(event_days)
+        codes, _ = pd.factorize(pd.MultiIndex.from_arrays([
+            np.concatenate([np.asarray(e, dtype=object), np.asarray(q, dtype=object)])
+            for e, q in zip(event_keys, query_keys)
+        ]))
+        event_codes, query_codes = codes[:n_events].astype(np.int64), codes[n_events:].astype(np.int64)
+        event_days = np.asarray(event_days, dtype=np.int64)
+        query_days = np.asarray(query_days, dtype=np.int64)
+
+        # Sort events by (key, day) as one integer so each query is two binary searches
+        low = min(event_days.min(initial=0), query_days.min(initial=0))
+        span = max(event_days.max(initial=0), query_days.max(initial=0)) - low + 2
+        event_sort_keys = event_codes * span + (event_days - low)
+        order = np.argsort(event_sort_keys, kind='stable')
+        sorted_keys = event_sort_keys[order]
+
+        values = np.asarray(values, dtype=float).reshape(n_events, -1)
+        cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values[order], axis=0)])
+        end = np.searchsorted(sorted_keys, query_codes * span + (query_days - low), side='left')
+        start = np.searchsorted(sorted_keys, query_codes * span, side='left')
+        if window is not None:
+            start = np.maximum(start, end - window)
+        return cumulative[end] - cumulative[start], end - start
+
+    @staticmethod
+    def _ratio(numerator, denominator):
+        numerator = np.asarray(numerator, dtype=float)
+        denominator = np.broadcast_to(np.asarray(denominator, dtype=float), numerator.shape)
+        return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+    def fingerprint(self, snapshot, config_name, config):
+        """Order-independent hash of every input the features depend on"""
+        digest = hashlib.sha1()
+        digest.update(json.dumps({"schema": self.SCHEMA_VERSION, "config_name": config_name,
+                                  "config": config.dict(exclude={'id', 'created_at', 'updated_at'})}, sort_keys=True, default=str).encode())
+        inputs = [
+            (snapshot.matches, ['match_id', 'home_team', 'away_team', 'referee', 'match_date', 'home_score', 'away_score']),
+            (snapshot.team_stats, ['match_id', 'team_name', 'is_home'] + RBSCalculator.RBS_FIELDS + list(self.TEAM_FEATURE_FIELDS.values()) + ['fouls']),
+            (snapshot.player_stats, ['match_id', 'team_name', 'fouls_drawn', 'penalty_attempts'])
+        ]
+        for frame, columns in inputs:
+            columns = sorted(set(columns) & set(frame.columns))
+            row_hashes = pd.util.hash_pandas_object(frame[columns].astype(str), index=False).to_numpy() if columns else np.array([], dtype=np.uint64)
+            digest.update(",".join(columns).encode())
+            digest.update(np.sort(row_hashes).tobytes())
+        return digest.hexdigest()
+
+    def compute(self, snapshot, config):
+        """Feature and target table for every completed, dated match with prior history for both teams"""
+        m = snapshot.matches
+        dated = ~np.isnat(snapshot.match_dates)
+        days = np.where(dated, snapshot.match_dates.astype('datetime64[D]').astype(np.int64), 0)
+        day_by_id = pd.Series(np.where(dated, days, np.nan), index=m['match_id'].to_numpy())
+        day_by_id = day_by_id[~day_by_id.index.duplicated(keep='first')]
+
+        home_score = pd.to_numeric(m['home_score'], errors='coerce').to_numpy(dtype=float)
+        away_score = pd.to_numeric(m['away_score'], errors='coerce').to_numpy(dtype=float)
+        completed = dated & ~np.isnan(home_score) & ~np.isnan(away_score) & m['home_team'].notna().to_numpy() & m['away_team'].notna().to_numpy()
+
+        matches = m[completed]
+        home, away = matches['home_team'].to_numpy(dtype=object), matches['away_team'].to_numpy(dtype=object)
+        referee = matches['referee'].to_numpy(dtype=object)
+        q_days = days[completed]
+        hs, as_ = home_score[completed], away_score[completed]
+        n = len(matches)
+        columns = {}
+
+        # Expanding per-venue team averages from team_stats rows of earlier matches
+        ts = snapshot.team_stats
+        ts_days = ts['match_id'].map(day_by_id).to_numpy(dtype=float)
+        ts_valid = ~np.isnan(ts_days) & ts['team_name'].notna().to_numpy()
+        ts_events = ts[ts_valid]
+        fields = list(dict.fromkeys(self.TEAM_FEATURE_FIELDS.values()))
+        ts_values = np.column_stack([DataSnapshot.column(ts_events, field).fillna(0).to_numpy(dtype=float) for field in fields]) \
+            if len(ts_events) else np.zeros((0, len(fields)))
+        history = {}
+        for side, teams, is_home in (('home', home, True), ('away', away, False)):
+            sums, counts = self.as_of_totals(
+                [ts_events['team_name'].to_numpy(dtype=object), ts_events['is_home'].to_numpy(dtype=object)],
+                ts_days[ts_valid], ts_values,
+                [teams, np.full(n, is_home, dtype=object)], q_days
+            )
+            means = self._ratio(sums, counts[:, None])
+            history[side] = counts
+            for suffix, field in self.TEAM_FEATURE_FIELDS.items():
+                columns[f"{side}_{suffix}"] = means[:, fields.index(field)]
+            columns[f"{side}_xg_conceded_per_match"] = np.zeros(n)
+
+        # Form: points per match over each team's last five results
+        home_points = np.select([hs > as_, hs == as_], [3.0, 1.0], 0.0)
+        away_points = np.select([as_ > hs, as_ == hs], [3.0, 1.0], 0.0)
+        # Interleave home and away appearances so same-day results keep stored match order
+        form_teams = np.column_stack([home, away]).ravel()
+        form_days = np.repeat(q_days, 2)
+        form_points = np.column_stack([home_points, away_points]).ravel()
+        for side, teams in (('home', home), ('away', away)):
+            sums, counts = self.as_of_totals([form_teams], form_days, form_points, [teams], q_days, window=5)
+            columns[f"{side}_form_last5"] = self._ratio(sums[:, 0], counts)
+        columns['home_advantage'] = np.ones(n)
+
+        # Head-to-head from the perspective of the alphabetically first team, flipped for the fixture
+        first_is_home = np.array([str(h) <= str(a) for h, a in zip(home, away)], dtype=bool)
+        first = np.where(first_is_home, home, away)
+        second = np.where(first_is_home, away, home)
+        first_goals = np.where(first_is_home, hs, as_)
+        second_goals = np.where(first_is_home, as_, hs)
+        h2h_values = np.column_stack([
+            first_goals > second_goals, first_goals == second_goals, first_goals < second_goals,
+            first_goals, second_goals
+        ]).astype(float)
+        sums, counts = self.as_of_totals([first, second], q_days, h2h_values, [first, second], q_days)
+        wins_home = np.where(first_is_home, sums[:, 0], sums[:, 2])
+        wins_away = np.where(first_is_home, sums[:, 2], sums[:, 0])
+        goals_home = np.where(first_is_home, sums[:, 3], sums[:, 4])
+        goals_away = np.where(first_is_home, sums[:, 4], sums[:, 3])
+        columns.update({
+            'h2h_home_wins': wins_home, 'h2h_draws': sums[:, 1], 'h2h_away_wins': wins_away,
+            'h2h_home_goals_avg': self._ratio(goals_home, counts), 'h2h_away_goals_avg': self._ratio(goals_away, counts)
+        })
+
+        # Referee bias from RBS input sums accumulated before kickoff
+        appearances, rows = rbs_calculator.build_team_match_table(snapshot)
+        no_referee = "\x00"
+        app_days = appearances['match_id'].map(day_by_id).to_numpy(dtype=float)
+        app = appearances[~np.isnan(app_days)]
+        app_days = app_days[~np.isnan(app_days)]
+        row_days = rows['match_id'].map(day_by_id).to_numpy(dtype=float)
+        rows = rows[~np.isnan(row_days)]
+        row_days = row_days[~np.isnan(row_days)]
+        rbs_fields = rbs_calculator.RBS_FIELDS
+        row_values = np.column_stack(
+            [np.ones(len(rows))]
+            + [rows[field].fillna(0).to_numpy(dtype=float) for field in rbs_fields]
+            + [rows[field].notna().to_numpy(dtype=float) for field in rbs_fields]
+        )
+        app_referees = app['referee'].astype(object).where(app['referee'].notna(), no_referee).to_numpy(dtype=object)
+        row_referees = rows['referee'].astype(object).where(rows['referee'].notna(), no_referee).to_numpy(dtype=object)
+        query_referees = pd.Series(referee, dtype=object).where(pd.notna(referee), no_referee).to_numpy(dtype=object)
+        k = len(rbs_fields)
+        for side, teams in (('home', home), ('away', away)):
+            pair_matches = self.as_of_totals([app['team_name'].to_numpy(dtype=object), app_referees], app_days,
+                                             np.ones(len(app)), [teams, query_referees], q_days)[0][:, 0]
+            pair = self.as_of_totals([rows['team_name'].to_numpy(dtype=object), row_referees], row_days,
+                                     row_values, [teams, query_referees], q_days)[0]
+            team = self.as_of_totals([rows['team_name'].to_numpy(dtype=object)], row_days,
+                                     row_values, [teams], q_days)[0]
+            _, _, rbs_normalized, confidence, valid = rbs_calculator.rbs_scores(
+                pair_matches, pair[:, 0], team[:, 0] - pair[:, 0],
+                pair[:, 1:1 + k], pair[:, 1 + k:], team[:, 1:1 + k] - pair[:, 1:1 + k], team[:, 1 + k:] - pair[:, 1 + k:],
+                config
+            )
+            valid &= (query_referees != no_referee) & (pair_matches > 0)
+            columns[f"{side}_referee_bias"] = np.where(valid, np.round(rbs_normalized, 3), 0.0)
+            columns[f"{side}_rbs_confidence"] = np.where(valid, np.round(confidence, 1), 0.0)
+
+        columns['ppg_difference'] = columns['home_ppg'] - columns['away_ppg']
+
+        # Targets: result, goals and the xG recorded for each side
+        first_stats = ts.drop_duplicates(['match_id', 'team_name', 'is_home'], keep='first').set_index(['match_id', 'team_name', 'is_home'])
+        xg_by_key = DataSnapshot.column(first_stats, 'xg').fillna(0)
+        match_ids = matches['match_id'].to_numpy(dtype=object)
+        def recorded_xg(teams, is_home):
+            keys = pd.MultiIndex.from_arrays([match_ids, teams, np.full(n, is_home)])
+            return xg_by_key.reindex(keys).fillna(0).to_numpy(dtype=float)
+
+        frame = pd.DataFrame({
+            'match_id': match_ids,
+            'match_date': matches['match_date'].to_numpy(dtype=object),
+            'home_team': home,
+            'away_team': away,
+            'referee': referee,
+            **{column: columns[column] for column in self.FEATURE_COLUMNS},
+            'outcome': np.select([hs > as_, hs == as_], [0, 1], 2),
+            'home_goals': hs.astype(np.int64),
+            'away_goals': as_.astype(np.int64),
+            'home_xg': recorded_xg(home, True),
+            'away_xg': recorded_xg(away, False)
+        })
+
+        # Both teams need earlier stats at their venue, as the live extractor requires
+        has_history = (history['home'] > 0) & (history['away'] > 0)
+        frame = frame[has_history].iloc[np.argsort(q_days[has_history], kind='stable')].reset_index(drop=True)
+        skipped = {
+            "undated_or_unplayed": int(len(m) - n),
+            "no_prior_history": int(n - has_history.sum())
+        }
+        return frame, skipped
+
+    def read_manifest(self):
+        if not self.manifest_path.exists():
+            return {"versions": []}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def find_version(self, fingerprint):
+        for entry in reversed(self.read_manifest()["versions"]):
+            if entry["fingerprint"] == fingerprint and (self.directory / entry["file"]).exists():
+                return entry
+        return None
+
+    def write_table(self, snapshot, config, version):
+        """Compute the feature table and write it as <version>.parquet; returns (rows, skipped)"""
+        frame, skipped = self.compute(snapshot, config)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        frame.to_parquet(self.directory / f"{version}.parquet", index=False)
+        return len(frame), skipped
+
+    async def build(self, config_name="default", force=False):
+        """Materialize the feature table for the current data, reusing an identical existing version"""
+        snapshot = await data_snapshot.get()
+        config = await rbs_calculator.get_config(config_name)
+        # Hashing, the full-history pass and the parquet write run in a worker thread;
+        # the lock keeps concurrent callers from building the same table twice
+        async with self._lock:
+            fingerprint = await asyncio.to_thread(self.fingerprint, snapshot, config_name, config)
+            if not force:
+                entry = self.find_version(fingerprint)
+                if entry:
+                    return {**entry, "reused": True}
+
+            started = datetime.now()
+            version = f"{started.strftime('%Y%m%dT%H%M%S')}-{fingerprint[:10]}"
+            rows, skipped = await asyncio.to_thread(self.write_table, snapshot, config, version)
+            return self.record_version(version, fingerprint, config_name, snapshot, rows, skipped, started)
+
+    def record_version(self, version, fingerprint, config_name, snapshot, rows, skipped, started):
+        """Add a built table to the manifest and drop the oldest tables beyond the retention limit"""
+        entry = {
+            "version": version,
+            "file": f"{version}.parquet",
+            "fingerprint": fingerprint,
+            "schema_version": self.SCHEMA_VERSION,
+            "config_name": config_name,
+            "snapshot_version": snapshot.version,
+            "rows": rows,
+            "skipped": skipped,
+            "feature_columns": self.FEATURE_COLUMNS,
+            "built_at": started.isoformat(),
+            "build_seconds": round((datetime.now() - started).total_seconds(), 3)
+        }
+
+        # Record the version and drop the oldest tables beyond the retention limit
+        manifest = self.read_manifest()
+        manifest["versions"].append(entry)
+        for old in manifest["versions"][:-FEATURE_STORE_KEEP_VERSIONS]:
+            (self.directory / old["file"]).unlink(missing_ok=True)
+        manifest["versions"] = manifest["versions"][-FEATURE_STORE_KEEP_VERSIONS:]
+        self.write_manifest(manifest)
+
+        print(f"🧱 Feature store {version}: {rows} rows ({entry['build_seconds']}s)")
+        return {**entry, "reused": False}
+
+    async def load(self, config_name="default", version=None):
+        """Feature table for the given version, or for the current data (building it if needed)"""
+        if version:
+            entry = next((e for e in self.read_manifest()["versions"] if e["version"] == version), None)
+            if not entry:
+                raise ValueError(f"Feature store version '{version}' not found")
+        else:
+            entry = await self.build(config_name)
+        return entry, await asyncio.to_thread(pd.read_parquet, self.directory / entry["file"])
+
+# Initialize feature store
+feature_store = FeatureStore()
+
+def completed_matches(matches):
+    """Snapshot match rows that have both scores recorded"""
+    if 'home_score' not in matches.columns or 'away_score' not in matches.columns:
+        return matches.iloc[0:0]
+    return matches[matches['home_score'].notna() & matches['away_score'].notna()]
+
+# Independent feature lookups one extraction request may run at the same time
+FEATURE_LOOKUP_CONCURRENCY = int(os.environ.get('FEATURE_LOOKUP_CONCURRENCY', 8))
+
+class FixtureContext:
+    """Data shared by every fixture in a feature extraction batch, loaded once per batch"""
+
+    def __init__(self, snapshot, rbs_results):
+        self.snapshot = snapshot
+        self.rbs_results = rbs_results  # (team_name, referee) -> (rbs_score, confidence_level)
+        self._memo = {}
+        self._semaphore = asyncio.Semaphore(FEATURE_LOOKUP_CONCURRENCY)
+
+    async def memoize(self, key, compute):
+        """Run compute() once per key for the lifetime of the batch; concurrent callers share it"""
+        task = self._memo.get(key)
+        if task is None:
+            task = self._memo[key] = asyncio.ensure_future(compute())
+        return await task
+
+    async def gather(self, *lookups):
+        """Await independent lookups concurrently, at most FEATURE_LOOKUP_CONCURRENCY at a time"""
+        async def limited(lookup):
+            async with self._semaphore:
+                return await lookup
+        return await asyncio.gather(*(limited(lookup) for lookup in lookups))
+
+    @staticmethod
+    def decay_key(decay_config):
+        return json.dumps(decay_config.dict(), sort_keys=True, default=str) if decay_config else None
+
+    @staticmethod
+    def xi_key(starting_xi):
+        if not starting_xi:
+            return None
+        return tuple(pos.player.player_name for pos in starting_xi.positions if pos.player)
+
+def fit_xgboost_models(X, targets, classifier_params, regressor_params, test_size=0.2, random_state=42):
+    """Fit the scaler and the five XGBoost models; runs in the process pool.
+
+    Returns (scaler, models, training_results).
+    """
+    # Prepare target variables
+    y_outcome = [t['outcome'] for t in targets]
+    y_home_goals = [t['home_goals'] for t in targets]
+    y_away_goals = [t['away_goals'] for t in targets]
+    y_home_xg = [t['home_xg'] for t in targets]
+    y_away_xg = [t['away_xg'] for t in targets]
+    
+    # Split data
+    X_train, X_test, y_outcome_train, y_outcome_test = train_test_split(
+        X, y_outcome, test_size=test_size, random_state=random_state, stratify=y_outcome
+    )
+    
+    # Scale features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    # Split other targets with same indices
+    train_indices = X_train.index
+    test_indices = X_test.index
+    
+    y_home_goals_train = [y_home_goals[i] for i in train_indices]
+    y_home_goals_test = [y_home_goals[i] for i in test_indices]
+    y_away_goals_train = [y_away_goals[i] for i in train_indices]
+    y_away_goals_test = [y_away_goals[i] for i in test_indices]
+    y_home_xg_train = [y_home_xg[i] for i in train_indices]
+    y_home_xg_test = [y_home_xg[i] for i in test_indices]
+    y_away_xg_train = [y_away_xg[i] for i in train_indices]
+    y_away_xg_test = [y_away_xg[i] for i in test_indices]
+    
+    print(f"Training on {len(X_train)} samples, testing on {len(X_test)} samples")
+    
+    # Train XGBoost models
+    models_to_train = {
+        'classifier': (xgb.XGBClassifier(**classifier_params), 
+                      y_outcome_train, y_outcome_test),
+        'home_goals': (xgb.XGBRegressor(**regressor_params),
+                      y_home_goals_train, y_home_goals_test),
+        'away_goals': (xgb.XGBRegressor(**regressor_params),
+                      y_away_goals_train, y_away_goals_test),
+        'home_xg': (xgb.XGBRegressor(**regressor_params),
+                   y_home_xg_train, y_home_xg_test),
+        'away_xg': (xgb.XGBRegressor(**regressor_params),
+                   y_away_xg_train, y_away_xg_test)
+    }
+    
+    training_results = {}
+    models = {}
+    
+    for model_name, (model, y_train, y_test) in models_to_train.items():
+        print(f"Training XGBoost {model_name}...")
+        
+        # Train model
+        model.fit(X_train_scaled, y_train)
+        
+        # Make predictions
+        y_pred = model.predict(X_test_scaled)
+        
+        # Evaluate
+        if model_name == 'classifier':
+            y_pred_proba = model.predict_proba(X_test_scaled)
+            
+            accuracy = accuracy_score(y_test, y_pred)
+            log_loss_score = log_loss(y_test, y_pred_proba)
+            class_report = classification_report(y_test, y_pred, output_dict=True)
+            
+            training_results[model_name] = {
+                'accuracy': accuracy,
+                'log_loss': log_loss_score,
+                'classification_report': class_report,
+                'samples': len(y_test)
+            }
+            print(f"{model_name} accuracy: {accuracy:.3f}, log loss: {log_loss_score:.3f}")
+        else:
+            r2 = r2_score(y_test, y_pred)
+            mse = mean_squared_error(y_test, y_pred)
+            training_results[model_name] = {
+                'r2_score': r2,
+                'mse': mse,
+                'samples': len(y_test)
+            }
+            print(f"{model_name} R² score: {r2:.3f}, MSE: {mse:.3f}")
+        
+        models[model_name] = model
+    
+    return scaler, models, training_results
+
+def fit_ensemble_models(model_type, models, training_data):
+    """Fit one ensemble model family on prepare_training_data output; runs in the process pool.
+
+    Returns (fitted models, model_results).
+    """
+    X_train, X_test, y_outcome_train, y_outcome_test, y_home_goals_train, y_home_goals_test, y_away_goals_train, y_away_goals_test, y_home_xg_train, y_home_xg_test, y_away_xg_train, y_away_xg_test = training_data
+    model_results = {}
+    
+    # Train classifier
+    print(f"  Training {model_type} classifier...")
+    models['classifier'].fit(X_train, y_outcome_train)
+    y_pred = models['classifier'].predict(X_test)
+    accuracy = accuracy_score(y_outcome_test, y_pred)
+    model_results['classifier'] = {'accuracy': accuracy, 'samples': len(y_outcome_test)}
+    print(f"    Accuracy: {accuracy:.3f}")
+    
+    # Train regressors
+    for target_name, y_train, y_test in [
+        ('home_goals', y_home_goals_train, y_home_goals_test),
+        ('away_goals', y_away_goals_train, y_away_goals_test),
+        ('home_xg', y_home_xg_train, y_home_xg_test),
+        ('away_xg', y_away_xg_train, y_away_xg_test)
+    ]:
+        print(f"  Training {model_type} {target_name}...")
+        models[target_name].fit(X_train, y_train)
+        y_pred = models[target_name].predict(X_test)
+        r2 = r2_score(y_test, y_pred)
+        mse = mean_squared_error(y_test, y_pred)
+        model_results[target_name] = {'r2_score': r2, 'mse': mse, 'samples': len(y_test)}
+        print(f"    R² score: {r2:.3f}, MSE: {mse:.3f}")
+    
+    return models, model_results
+
+# Expected goals are floored before scoring so a zero prediction still yields a valid distribution
+POISSON_MIN_LAMBDA = 0.1
+
+@functools.lru_cache(maxsize=None)
+def scoreline_labels(max_goals):
+    """'home-away' labels for a scoreline grid, in row-major (flattened matrix) order"""
+    return tuple(f"{home}-{away}" for home in range(max_goals + 1) for away in range(max_goals + 1))
+
+def poisson_outcome_probabilities(home_lambdas, away_lambdas):
+    """Exact home win / draw / away win probabilities for arrays of expected goals.
+
+    The goal difference of two independent Poisson variables is Skellam distributed, so these
+    include every scoreline rather than a truncated grid.
+    """
+    home = np.atleast_1d(np.asarray(home_lambdas, dtype=float))
+    away = np.atleast_1d(np.asarray(away_lambdas, dtype=float))
+    return skellam.sf(0, home, away), skellam.pmf(0, home, away), skellam.cdf(-1, home, away)
+
+def poisson_scorelines(home_lambdas, away_lambdas, max_goals=6):
+    """Scoreline probability matrices for one or many fixtures in a single call.
+
+    Returns arrays with a leading fixture axis: 'matrix' (n, max_goals + 1, max_goals + 1) where
+    matrix[i, h, a] = P(home scores h) * P(away scores a); exact 'home_win', 'draw' and 'away_win'
+    probabilities; and 'tail', the probability of a scoreline outside the grid.
+    """
+    home = np.atleast_1d(np.asarray(home_lambdas, dtype=float))
+    away = np.atleast_1d(np.asarray(away_lambdas, dtype=float))
+    goals = np.arange(max_goals + 1)
+    matrix = poisson.pmf(goals, home[:, None])[:, :, None] * poisson.pmf(goals, away[:, None])[:, None, :]
+    home_win, draw, away_win = poisson_outcome_probabilities(home, away)
+    return {
+        'matrix': matrix,
+        'home_win': home_win,
+        'draw': draw,
+        'away_win': away_win,
+        'tail': np.clip(1 - matrix.sum(axis=(1, 2)), 0, None)
+    }
+
+def simulate_season_chunk(home_index, away_index, home_lambdas, away_lambdas, base_points, base_goal_diff, base_goals_for, simulations, seed, chunk=0):
+    """Simulate the remaining fixtures of a season many times (process pool worker).
+
+    Fixture arrays give each remaining fixture's team indexes and expected goals; base arrays hold
+    the current table. Tables are ranked by points, goal difference, then goals scored, with any
+    remaining ties broken at random. Draws come from numpy's Generator seeded with (seed, chunk),
+    so a given seed and chunk layout always reproduces the same seasons.
+
+    Returns (position_counts, points_sum): position_counts[team, position] over all simulations
+    (position 0 is first) and each team's total final points.
+    """
+    rng = np.random.default_rng([seed, chunk])
+    n_teams = len(base_points)
+    n_fixtures = len(home_index)
+    fixtures = np.arange(n_fixtures)
+    
+    # float32 keeps the per-team sums on BLAS; goal and point totals are small exact integers
+    home_goals = rng.poisson(home_lambdas, size=(simulations, n_fixtures)).astype(np.float32)
+    away_goals = rng.poisson(away_lambdas, size=(simulations, n_fixtures)).astype(np.float32)
+    home_of = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    home_of[fixtures, home_index] = 1
+    away_of = np.zeros((n_fixtures, n_teams), dtype=np.float32)
+    away_of[fixtures, away_index] = 1
+    
+    draws = home_goals == away_goals
+    home_points = 3 * (home_goals > away_goals) + draws
+    away_points = 3 * (away_goals > home_goals) + draws
+    points = base_points + home_points.astype(np.float32) @ home_of + away_points.astype(np.float32) @ away_of
+    goal_diff = base_goal_diff + (home_goals - away_goals) @ (home_of - away_of)
+    goals_for = base_goals_for + home_goals @ home_of + away_goals @ away_of
+    
+    # Best team first; lexsort's last key is the primary one
+    order = np.lexsort((rng.random((simulations, n_teams)), -goals_for, -goal_diff, -points), axis=1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.broadcast_to(np.arange(n_teams), order.shape), axis=1)
+    
+    position_counts = np.bincount(
+        (np.arange(n_teams) * n_teams + positions).ravel(), minlength=n_teams * n_teams
+    ).reshape(n_teams, n_teams)
+    return position_counts, points.sum(axis=0, dtype=np.float64)
+
+def benchmark_season_simulation(teams=20, simulations=20000, seed=0):
+    """Simulations per second for a full double round-robin season of synthetic fixtures"""
+    rng = np.random.default_rng(seed)
+    home_index, away_index = (np.array(side) for side in zip(*[
+        (home, away) for home in range(teams) for away in range(teams) if home != away
+    ]))
+    home_lambdas = rng.uniform(0.8, 2.2, len(home_index))
+    away_lambdas = rng.uniform(0.5, 1.8, len(home_index))
+    zeros = np.zeros(teams, dtype=np.float32)
+    
+    started = time.perf_counter()
+    simulate_season_chunk(home_index, away_index, home_lambdas, away_lambdas, zeros, zeros, zeros, simulations, seed)
+    elapsed = time.perf_counter() - started
+    return {
+        'teams': teams,
+        'fixtures': len(home_index),
+        'simulations': simulations,
+        'elapsed_seconds': round(elapsed, 3),
+        'simulations_per_second': round(simulations / elapsed, 1)
+    }
+
+# XGBoost-Based Match Prediction Engine with Poisson Simulation
+class MLMatchPredictor:
+    def __init__(self):
+        self.models = {}
+        self.ensemble_models = {}  # Store ensemble models
+        self.model_version = 0     # Bumped whenever models are loaded or retrained (prediction cache key)
+        self.model_weights = {}    # Store model performance weights
+        self.model_confidence = {} # Store model confidence scores
+        self.scaler = StandardScaler()
+        self.feature_columns = []
+        self.last_training_scan = None
+        # "store" (point-in-time feature store) or "live" (per-match feature extraction)
+        self.training_feature_source = os.environ.get('TRAINING_FEATURE_SOURCE', 'store')
+        self.models_dir = os.path.join(os.path.dirname(__file__), "models")
+        self.ensemble_dir = os.path.join(self.models_dir, "ensemble")
+        self.ensure_models_dir()
+        self.load_models()
+        self.initialize_ensemble_models()
+        
+        # XGBoost optimal hyperparameters for football prediction
         self.xgb_params_classifier = {
             'n_estimators': 200,
             'max_depth': 6,
@@ -1561,6 +3756,7 @@ class MLMatchPredictor:
                 self.models['away_xg'] = joblib.load(model_paths['away_xg'])
                 self.scaler = joblib.load(model_paths['scaler'])
                 self.feature_columns = joblib.load(model_paths['feature_columns'])
+                self.model_version += 1
                 print("XGBoost models loaded successfully")
             else:
                 print("XGBoost models not found - will need to train first")
@@ -1746,6 +3942,7 @@ class MLMatchPredictor:
                         if os.path.exists(model_path):
                             self.ensemble_models[model_type][prediction_type] = joblib.load(model_path)
                             print(f"✅ Loaded {model_type} {prediction_type} model")
+            self.model_version += 1
         except Exception as e:
             print(f"⚠️ Error loading ensemble models: {e}")
     
@@ -1764,99 +3961,175 @@ class MLMatchPredictor:
         except Exception as e:
             print(f"❌ Error saving ensemble models: {e}")
     
+    FIXTURE_FIELDS = ('home_team', 'away_team', 'referee', 'match_date', 'home_starting_xi', 'away_starting_xi', 'decay_config', 'as_of')
+
+    @classmethod
+    def fixture_dict(cls, fixture):
+        """Normalize a fixture given as a dict or a (home, away, referee, date, home XI, away XI, decay, as_of) tuple"""
+        if isinstance(fixture, dict):
+            return {field: fixture.get(field) for field in cls.FIXTURE_FIELDS}
+        return dict(zip(cls.FIXTURE_FIELDS, tuple(fixture) + (None,) * len(cls.FIXTURE_FIELDS)))
+
+    async def load_fixture_context(self, fixtures):
+        """Load the data snapshot and every RBS result the batch needs, concurrently"""
+        teams = sorted({f[side] for f in fixtures for side in ('home_team', 'away_team') if f[side]})
+        referees = sorted({f['referee'] for f in fixtures if f['referee']})
+        
+        async def load_rbs_results():
+            rbs_results = {}
+            if teams and referees:
+                async for result in iter_documents(
+                    db.rbs_results,
+                    {"team_name": {"$in": teams}, "referee": {"$in": referees}},
+                    {"_id": 0, "team_name": 1, "referee": 1, "rbs_score": 1, "confidence_level": 1}
+                ):
+                    # First document wins, matching the previous find_one lookup
+                    rbs_results.setdefault(
+                        (result.get('team_name'), result.get('referee')),
+                        (result.get('rbs_score'), result.get('confidence_level'))
+                    )
+            return rbs_results
+        
+        snapshot, rbs_results = await asyncio.gather(data_snapshot.get(), load_rbs_results())
+        return FixtureContext(snapshot, rbs_results)
+
+    async def extract_features_batch(self, fixtures, enhanced=False, feature_columns=None, context=None):
+        """Extract features for many fixtures, loading team, referee and H2H data once per batch.
+
+        Returns (matrix, features, errors). Matrix rows align with fixtures and columns follow
+        feature_columns (the trained columns by default); a fixture that fails gets a NaN row,
+        None features and its error message.
+        """
+        fixtures = [self.fixture_dict(fixture) for fixture in fixtures]
+        context = context or await self.load_fixture_context(fixtures)
+        build = self.build_enhanced_features if enhanced else self.build_features
+        
+        features = []
+        errors = []
+        for fixture in fixtures:
+            try:
+                features.append(await build(fixture, context))
+                errors.append(None)
+            except Exception as e:
+                features.append(None)
+                errors.append(str(e))
+        
+        columns = feature_columns or self.feature_columns or next((list(row) for row in features if row), [])
+        return self.features_matrix(features, columns), features, errors
+
+    @staticmethod
+    def features_matrix(features, columns):
+        """Stack feature dicts in column order; missing features are 0 and failed rows NaN"""
+        matrix = np.full((len(features), len(columns)), np.nan)
+        for i, row in enumerate(features):
+            if row is not None:
+                matrix[i] = [row.get(column, 0) for column in columns]
+        return matrix
+
     async def extract_features_for_match(self, home_team, away_team, referee, match_date=None):
         """Extract features for a single match prediction"""
-        try:
-            # Get team stats (use existing calculation methods)
-            home_stats = await self.calculate_team_features(home_team, is_home=True)
-            away_stats = await self.calculate_team_features(away_team, is_home=False)
-            
-            if not home_stats or not away_stats:
-                raise ValueError("Could not calculate team features")
-            
-            # Get referee bias
-            home_rbs, home_rbs_conf = await self.get_referee_bias(home_team, referee)
-            away_rbs, away_rbs_conf = await self.get_referee_bias(away_team, referee)
-            
-            # Get head-to-head stats
-            h2h_stats = await self.get_head_to_head_stats(home_team, away_team)
-            
-            # Build feature vector
-            features = {
-                # Home team offensive stats
-                'home_xg_per_match': home_stats['xg'],
-                'home_goals_per_match': home_stats['goals'],
-                'home_shots_per_match': home_stats['shots_total'],
-                'home_shots_on_target_per_match': home_stats['shots_on_target'],
-                'home_xg_per_shot': home_stats['xg_per_shot'],
-                'home_shot_accuracy': home_stats['shot_accuracy'],
-                'home_conversion_rate': home_stats['conversion_rate'],
-                'home_possession_pct': home_stats['possession_pct'],
-                
-                # Home team defensive stats (what they concede)
-                'home_goals_conceded_per_match': home_stats['goals_conceded'],
-                'home_xg_conceded_per_match': home_stats.get('xg_conceded', 0),
-                
-                # Away team offensive stats
-                'away_xg_per_match': away_stats['xg'],
-                'away_goals_per_match': away_stats['goals'],
-                'away_shots_per_match': away_stats['shots_total'],
-                'away_shots_on_target_per_match': away_stats['shots_on_target'],
-                'away_xg_per_shot': away_stats['xg_per_shot'],
-                'away_shot_accuracy': away_stats['shot_accuracy'],
-                'away_conversion_rate': away_stats['conversion_rate'],
-                'away_possession_pct': away_stats['possession_pct'],
-                
-                # Away team defensive stats
-                'away_goals_conceded_per_match': away_stats['goals_conceded'],
-                'away_xg_conceded_per_match': away_stats.get('xg_conceded', 0),
-                
-                # Form over last 5 matches
-                'home_form_last5': await self.get_team_form(home_team, last_n=5),
-                'away_form_last5': await self.get_team_form(away_team, last_n=5),
-                
-                # Home advantage
-                'home_advantage': 1,  # Always 1 for home team
-                
-                # Referee bias
-                'home_referee_bias': home_rbs,
-                'away_referee_bias': away_rbs,
-                'home_rbs_confidence': home_rbs_conf,
-                'away_rbs_confidence': away_rbs_conf,
-                
-                # Head-to-head
-                'h2h_home_wins': h2h_stats['home_wins'],
-                'h2h_draws': h2h_stats['draws'],
-                'h2h_away_wins': h2h_stats['away_wins'],
-                'h2h_home_goals_avg': h2h_stats['home_goals_avg'],
-                'h2h_away_goals_avg': h2h_stats['away_goals_avg'],
-                
-                # Team quality metrics
-                'home_ppg': home_stats['points_per_game'],
-                'away_ppg': away_stats['points_per_game'],
-                'ppg_difference': home_stats['points_per_game'] - away_stats['points_per_game'],
-                
-                # Additional advanced stats
-                'home_penalties_per_match': home_stats['penalties_awarded'],
-                'away_penalties_per_match': away_stats['penalties_awarded'],
-                'home_fouls_drawn_per_match': home_stats['fouls_drawn'],
-                'away_fouls_drawn_per_match': away_stats['fouls_drawn'],
-                'home_fouls_committed_per_match': home_stats['fouls'],
-                'away_fouls_committed_per_match': away_stats['fouls'],
-                'home_yellow_cards_per_match': home_stats['yellow_cards'],
-                'away_yellow_cards_per_match': away_stats['yellow_cards'],
-                'home_red_cards_per_match': home_stats['red_cards'],
-                'away_red_cards_per_match': away_stats['red_cards'],
-            }
-            
-            return features
-            
-        except Exception as e:
-            print(f"Error extracting features: {e}")
-            return None
+        _, features, errors = await self.extract_features_batch([(home_team, away_team, referee, match_date)])
+        if errors[0]:
+            print(f"Error extracting features: {errors[0]}")
+        return features[0]
+
+    async def build_features(self, fixture, context):
+        """Feature vector for one fixture from the batch context"""
+        home_team, away_team, referee = fixture['home_team'], fixture['away_team'], fixture['referee']
+        
+        # Team stats, referee bias, head-to-head and form are independent: look them up concurrently
+        (home_stats, away_stats, (home_rbs, home_rbs_conf), (away_rbs, away_rbs_conf),
+         h2h_stats, home_form, away_form) = await context.gather(
+            self.calculate_team_features(home_team, is_home=True, context=context),
+            self.calculate_team_features(away_team, is_home=False, context=context),
+            self.get_referee_bias(home_team, referee, context=context),
+            self.get_referee_bias(away_team, referee, context=context),
+            self.get_head_to_head_stats(home_team, away_team, context=context),
+            self.get_team_form(home_team, last_n=5, context=context),
+            self.get_team_form(away_team, last_n=5, context=context)
+        )
+        
+        if not home_stats or not away_stats:
+            raise ValueError("Could not calculate team features")
+        
+        # Build feature vector
+        features = {
+            # Home team offensive stats
+            'home_xg_per_match': home_stats['xg'],
+            'home_goals_per_match': home_stats['goals'],
+            'home_shots_per_match': home_stats['shots_total'],
+            'home_shots_on_target_per_match': home_stats['shots_on_target'],
+            'home_xg_per_shot': home_stats['xg_per_shot'],
+            'home_shot_accuracy': home_stats['shot_accuracy'],
+            'home_conversion_rate': home_stats['conversion_rate'],
+            'home_possession_pct': home_stats['possession_pct'],
+            
+            # Home team defensive stats (what they concede)
+            'home_goals_conceded_per_match': home_stats['goals_conceded'],
+            'home_xg_conceded_per_match': home_stats.get('xg_conceded', 0),
+            
+            # Away team offensive stats
+            'away_xg_per_match': away_stats['xg'],
+            'away_goals_per_match': away_stats['goals'],
+            'away_shots_per_match': away_stats['shots_total'],
+            'away_shots_on_target_per_match': away_stats['shots_on_target'],
+            'away_xg_per_shot': away_stats['xg_per_shot'],
+            'away_shot_accuracy': away_stats['shot_accuracy'],
+            'away_conversion_rate': away_stats['conversion_rate'],
+            'away_possession_pct': away_stats['possession_pct'],
+            
+            # Away team defensive stats
+            'away_goals_conceded_per_match': away_stats['goals_conceded'],
+            'away_xg_conceded_per_match': away_stats.get('xg_conceded', 0),
+            
+            # Form over last 5 matches
+            'home_form_last5': home_form,
+            'away_form_last5': away_form,
+            
+            # Home advantage
+            'home_advantage': 1,  # Always 1 for home team
+            
+            # Referee bias
+            'home_referee_bias': home_rbs,
+            'away_referee_bias': away_rbs,
+            'home_rbs_confidence': home_rbs_conf,
+            'away_rbs_confidence': away_rbs_conf,
+            
+            # Head-to-head
+            'h2h_home_wins': h2h_stats['home_wins'],
+            'h2h_draws': h2h_stats['draws'],
+            'h2h_away_wins': h2h_stats['away_wins'],
+            'h2h_home_goals_avg': h2h_stats['home_goals_avg'],
+            'h2h_away_goals_avg': h2h_stats['away_goals_avg'],
+            
+            # Team quality metrics
+            'home_ppg': home_stats['points_per_game'],
+            'away_ppg': away_stats['points_per_game'],
+            'ppg_difference': home_stats['points_per_game'] - away_stats['points_per_game'],
+            
+            # Additional advanced stats
+            'home_penalties_per_match': home_stats['penalties_awarded'],
+            'away_penalties_per_match': away_stats['penalties_awarded'],
+            'home_fouls_drawn_per_match': home_stats['fouls_drawn'],
+            'away_fouls_drawn_per_match': away_stats['fouls_drawn'],
+            'home_fouls_committed_per_match': home_stats['fouls'],
+            'away_fouls_committed_per_match': away_stats['fouls'],
+            'home_yellow_cards_per_match': home_stats['yellow_cards'],
+            'away_yellow_cards_per_match': away_stats['yellow_cards'],
+            'home_red_cards_per_match': home_stats['red_cards'],
+            'away_red_cards_per_match': away_stats['red_cards'],
+        }
+        
+        return features
     
-    async def calculate_team_features(self, team_name, is_home):
+    async def calculate_team_features(self, team_name, is_home, context=None):
         """Calculate comprehensive team features using existing methods"""
+        if context is not None:
+            return await context.memoize(
+                ('team_features', team_name, is_home),
+                lambda: self.calculate_team_features(team_name, is_home)
+            )
+        
         # Use existing team averages calculation
         stats = await match_predictor.calculate_team_averages(team_name, is_home)
         if not stats:
@@ -1876,8 +4149,10 @@ class MLMatchPredictor:
         
         return stats
     
-    async def get_referee_bias(self, team_name, referee):
+    async def get_referee_bias(self, team_name, referee, context=None):
         """Get referee bias score"""
+        if context is not None:
+            return context.rbs_results.get((team_name, referee), (0.0, 0.0))
         try:
             rbs_result = await db.rbs_results.find_one({
                 "team_name": team_name,
@@ -1889,15 +4164,22 @@ class MLMatchPredictor:
         except:
             return 0.0, 0.0
     
-    async def get_head_to_head_stats(self, home_team, away_team):
+    async def get_head_to_head_stats(self, home_team, away_team, context=None):
         """Get head-to-head statistics"""
         try:
-            h2h_matches = await db.matches.find({
-                "$or": [
-                    {"home_team": home_team, "away_team": away_team},
-                    {"home_team": away_team, "away_team": home_team}
-                ]
-            }).to_list(100)
+            if context is not None:
+                # Same first 100 meetings, taken from the batch's snapshot
+                team_matches = completed_matches(context.snapshot.team_matches(home_team))
+                h2h_matches = team_matches[
+                    (team_matches['home_team'] == away_team) | (team_matches['away_team'] == away_team)
+                ].head(100).to_dict('records')
+            else:
+                h2h_matches = await db.matches.find({
+                    "$or": [
+                        {"home_team": home_team, "away_team": away_team},
+                        {"home_team": away_team, "away_team": home_team}
+                    ]
+                }).to_list(100)
             
             if not h2h_matches:
                 return {
@@ -1943,16 +4225,24 @@ class MLMatchPredictor:
                 'home_goals_avg': 0, 'away_goals_avg': 0
             }
     
-    async def get_team_form(self, team_name, last_n=5):
+    async def get_team_form(self, team_name, last_n=5, context=None):
         """Calculate team form over last N matches"""
         try:
             # Get recent matches for the team
-            recent_matches = await db.matches.find({
-                "$or": [
-                    {"home_team": team_name},
-                    {"away_team": team_name}
-                ]
-            }).sort("match_date", -1).limit(last_n).to_list(last_n)
+            if context is not None:
+                recent_matches = (
+                    completed_matches(context.snapshot.team_matches(team_name))
+                    .sort_values('match_date', ascending=False, kind='stable', na_position='last')
+                    .head(last_n)
+                    .to_dict('records')
+                )
+            else:
+                recent_matches = await db.matches.find({
+                    "$or": [
+                        {"home_team": team_name},
+                        {"away_team": team_name}
+                    ]
+                }).sort("match_date", -1).limit(last_n).to_list(last_n)
             
             if not recent_matches:
                 return 0.0
@@ -1974,74 +4264,90 @@ class MLMatchPredictor:
         except:
             return 0.0
     
+    async def iter_training_batches(self, scan_stats):
+        """Stream matches in batches together with their recorded home/away xG"""
+        match_projection = {"_id": 0, "match_id": 1, "home_team": 1, "away_team": 1,
+                            "referee": 1, "home_score": 1, "away_score": 1, "match_date": 1}
+        async for batch in iter_batches(db.matches, projection=match_projection, scan_stats=scan_stats):
+            match_ids = [match.get('match_id') for match in batch]
+            xg_lookup = {}
+            async for stat in iter_documents(
+                db.team_stats,
+                {"match_id": {"$in": match_ids}},
+                {"_id": 0, "match_id": 1, "team_name": 1, "is_home": 1, "xg": 1},
+                scan_stats=scan_stats
+            ):
+                # First document wins, matching the previous find_one lookup
+                xg_lookup.setdefault((stat.get('match_id'), stat.get('team_name'), stat.get('is_home')), stat.get('xg', 0))
+            yield batch, xg_lookup
+
+    async def load_training_dataset_from_store(self):
+        """Training features and targets as of each match's kickoff, from the feature store"""
+        entry, frame = await feature_store.load()
+        self.last_training_scan = {
+            "feature_store_version": entry['version'],
+            "rows": entry['rows'],
+            "skipped": entry['skipped']
+        }
+        print(f"Loaded {len(frame)} training rows from feature store {entry['version']}")
+        features = frame[FeatureStore.FEATURE_COLUMNS].reset_index(drop=True)
+        targets = frame[FeatureStore.TARGET_COLUMNS].to_dict('records')
+        return features, targets
+
     async def build_training_dataset(self):
         """Build training dataset from historical matches"""
+        if self.training_feature_source == 'store':
+            return await self.load_training_dataset_from_store()
         try:
             print("Building training dataset...")
             
-            # Get all matches
-            all_matches = await db.matches.find().to_list(10000)
-            print(f"Found {len(all_matches)} matches")
-            
             features_list = []
             targets = []
+            scan_stats = ScanStats()
             
-            for i, match in enumerate(all_matches):
-                if i % 100 == 0:
-                    print(f"Processing match {i+1}/{len(all_matches)}")
+            # Stream all matches in batches rather than a capped to_list
+            async for batch, xg_lookup in self.iter_training_batches(scan_stats):
+                print(f"Processing matches {scan_stats.by_collection['matches'] - len(batch) + 1}-{scan_stats.by_collection['matches']}")
                 
-                try:
-                    # Extract features for this match
-                    features = await self.extract_features_for_match(
-                        match['home_team'], 
-                        match['away_team'], 
-                        match['referee'],
-                        match.get('match_date')
-                    )
-                    
-                    if features is None:
+                # Extract features for the whole batch at once
+                _, batch_features, _ = await self.extract_features_batch(batch)
+                
+                for match, features in zip(batch, batch_features):
+                    try:
+                        if features is None:
+                            continue
+                        
+                        # Get actual match outcome and goals
+                        home_score = match['home_score']
+                        away_score = match['away_score']
+                        
+                        # Determine match outcome
+                        if home_score > away_score:
+                            outcome = 0  # Home win
+                        elif home_score == away_score:
+                            outcome = 1  # Draw
+                        else:
+                            outcome = 2  # Away win
+                        
+                        # Get actual xG values from team stats
+                        home_xg = xg_lookup.get((match['match_id'], match['home_team'], True), 0)
+                        away_xg = xg_lookup.get((match['match_id'], match['away_team'], False), 0)
+                        
+                        features_list.append(features)
+                        targets.append({
+                            'outcome': outcome,
+                            'home_goals': home_score,
+                            'away_goals': away_score,
+                            'home_xg': home_xg,
+                            'away_xg': away_xg
+                        })
+                        
+                    except Exception as e:
+                        print(f"Error processing match {match.get('match_id')}: {e}")
                         continue
-                    
-                    # Get actual match outcome and goals
-                    home_score = match['home_score']
-                    away_score = match['away_score']
-                    
-                    # Determine match outcome
-                    if home_score > away_score:
-                        outcome = 0  # Home win
-                    elif home_score == away_score:
-                        outcome = 1  # Draw
-                    else:
-                        outcome = 2  # Away win
-                    
-                    # Get actual xG values from team stats
-                    home_team_stats = await db.team_stats.find_one({
-                        "match_id": match['match_id'],
-                        "team_name": match['home_team'],
-                        "is_home": True
-                    })
-                    away_team_stats = await db.team_stats.find_one({
-                        "match_id": match['match_id'],
-                        "team_name": match['away_team'],
-                        "is_home": False
-                    })
-                    
-                    home_xg = home_team_stats.get('xg', 0) if home_team_stats else 0
-                    away_xg = away_team_stats.get('xg', 0) if away_team_stats else 0
-                    
-                    features_list.append(features)
-                    targets.append({
-                        'outcome': outcome,
-                        'home_goals': home_score,
-                        'away_goals': away_score,
-                        'home_xg': home_xg,
-                        'away_xg': away_xg
-                    })
-                    
-                except Exception as e:
-                    print(f"Error processing match {match['match_id']}: {e}")
-                    continue
             
+            self.last_training_scan = scan_stats.as_dict()
+            print(f"Scanned {scan_stats.total} documents")
             print(f"Successfully processed {len(features_list)} matches for training")
             return features_list, targets
             
@@ -2218,49 +4524,35 @@ class MLMatchPredictor:
             print(f"❌ Error preparing training data: {e}")
             raise e
     
-    async def train_ensemble_models(self):
-        """Train all ensemble models with the same data as XGBoost"""
+    async def train_ensemble_models(self, progress=None):
+        """Train all ensemble models with the same data as XGBoost.
+
+        progress, if given, is awaited as progress(stage, percent) before each step.
+        """
         try:
             print("🚀 Starting Ensemble Model Training...")
             
             # Get training data (same as XGBoost)
+            if progress:
+                await progress("preparing training data", 5)
             training_data = await self.prepare_training_data()
             if not training_data:
                 raise ValueError("No training data available")
             
-            X_train, X_test, y_outcome_train, y_outcome_test, y_home_goals_train, y_home_goals_test, y_away_goals_train, y_away_goals_test, y_home_xg_train, y_home_xg_test, y_away_xg_train, y_away_xg_test = training_data
-            
             ensemble_results = {}
             
             # Train each ensemble model type
-            for model_type in ['random_forest', 'gradient_boost', 'neural_net', 'logistic']:
+            model_types = ['random_forest', 'gradient_boost', 'neural_net', 'logistic']
+            for step, model_type in enumerate(model_types):
                 print(f"\n🤖 Training {model_type} models...")
+                if progress:
+                    await progress(f"training {model_type}", 10 + 85 * step / len(model_types))
                 
-                model_results = {}
-                models = self.ensemble_models[model_type]
-                
-                # Train classifier
-                print(f"  Training {model_type} classifier...")
-                models['classifier'].fit(X_train, y_outcome_train)
-                y_pred = models['classifier'].predict(X_test)
-                accuracy = accuracy_score(y_outcome_test, y_pred)
-                model_results['classifier'] = {'accuracy': accuracy, 'samples': len(y_outcome_test)}
-                print(f"    Accuracy: {accuracy:.3f}")
-                
-                # Train regressors
-                for target_name, y_train, y_test in [
-                    ('home_goals', y_home_goals_train, y_home_goals_test),
-                    ('away_goals', y_away_goals_train, y_away_goals_test),
-                    ('home_xg', y_home_xg_train, y_home_xg_test),
-                    ('away_xg', y_away_xg_train, y_away_xg_test)
-                ]:
-                    print(f"  Training {model_type} {target_name}...")
-                    models[target_name].fit(X_train, y_train)
-                    y_pred = models[target_name].predict(X_test)
-                    r2 = r2_score(y_test, y_pred)
-                    mse = mean_squared_error(y_test, y_pred)
-                    model_results[target_name] = {'r2_score': r2, 'mse': mse, 'samples': len(y_test)}
-                    print(f"    R² score: {r2:.3f}, MSE: {mse:.3f}")
+                # Fit in the process pool so the event loop keeps serving requests
+                models, model_results = await execution_layer.run_in_process(
+                    'training', fit_ensemble_models, model_type, self.ensemble_models[model_type], training_data
+                )
+                self.ensemble_models[model_type] = models
                 
                 ensemble_results[model_type] = model_results
                 
@@ -2285,6 +4577,7 @@ class MLMatchPredictor:
             if total_weight > 0:
                 for model_type in self.model_weights:
                     self.model_weights[model_type] /= total_weight
+            self.model_version += 1
             
             # Save ensemble models
             self.save_ensemble_models()
@@ -2385,7 +4678,62 @@ class MLMatchPredictor:
                 'referee': referee
             }
     
-    async def predict_match_ensemble(self, home_team, away_team, referee, match_date=None, decay_config=None):
+    def ensemble_model_outputs(self, X_scaled, xgb_models, ensemble_models):
+        """One-row predictions from XGBoost and every ensemble family; runs in the inference thread pool"""
+        model_predictions = {}
+        model_confidence_scores = {}
+        
+        # XGBoost predictions (primary model)
+        print("🎯 Getting XGBoost predictions...")
+        xgb_outcome_probs = xgb_models['classifier'].predict_proba(X_scaled)[0]
+        model_predictions['xgboost'] = {
+            'outcome_probs': xgb_outcome_probs,
+            'home_goals': max(0, xgb_models['home_goals'].predict(X_scaled)[0]),
+            'away_goals': max(0, xgb_models['away_goals'].predict(X_scaled)[0]),
+            'home_xg': max(0, xgb_models['home_xg'].predict(X_scaled)[0]),
+            'away_xg': max(0, xgb_models['away_xg'].predict(X_scaled)[0])
+        }
+        model_confidence_scores['xgboost'] = max(xgb_outcome_probs)
+        
+        # Ensemble model predictions
+        for model_type in ['random_forest', 'gradient_boost', 'neural_net', 'logistic']:
+            if model_type in ensemble_models:
+                print(f"🤖 Getting {model_type} predictions...")
+                try:
+                    models = ensemble_models[model_type]
+                    
+                    # Get outcome probabilities
+                    outcome_probs = models['classifier'].predict_proba(X_scaled)[0]
+                    
+                    model_predictions[model_type] = {
+                        'outcome_probs': outcome_probs,
+                        'home_goals': max(0, models['home_goals'].predict(X_scaled)[0]),
+                        'away_goals': max(0, models['away_goals'].predict(X_scaled)[0]),
+                        'home_xg': max(0, models['home_xg'].predict(X_scaled)[0]),
+                        'away_xg': max(0, models['away_xg'].predict(X_scaled)[0])
+                    }
+                    model_confidence_scores[model_type] = max(outcome_probs)
+                    
+                except Exception as e:
+                    print(f"⚠️ Error with {model_type}: {e}")
+                    # If model fails, skip it for this prediction
+                    continue
+        
+        return model_predictions, model_confidence_scores
+    
+    async def predict_match_ensemble(self, home_team, away_team, referee, match_date=None, decay_config=None, bypass_cache=False, as_of=None):
+        """Cached ensemble prediction; bypass_cache=True forces a fresh computation"""
+        as_of = resolve_as_of(as_of, match_date)
+        return await prediction_cache.get_or_compute(
+            'ml_predict_match_ensemble',
+            {"home_team": home_team, "away_team": away_team, "referee": referee,
+             "match_date": match_date, "as_of": as_of, "decay": decay_fingerprint(decay_config),
+             "model_version": self.model_version},
+            lambda: self._predict_match_ensemble(home_team, away_team, referee, match_date, decay_config, as_of),
+            bypass=bypass_cache
+        )
+    
+    async def _predict_match_ensemble(self, home_team, away_team, referee, match_date=None, decay_config=None, as_of=None):
         """Make ensemble match prediction using multiple ML models with confidence scoring"""
         try:
             print(f"🤖 Making Ensemble Prediction: {home_team} vs {away_team}")
@@ -2397,7 +4745,7 @@ class MLMatchPredictor:
             # Extract features with time decay if configured
             if decay_config:
                 print(f"🕒 Using time decay preset: {decay_config.preset_name}")
-                features = await self.extract_features_for_match_enhanced(home_team, away_team, referee, match_date, None, None, decay_config)
+                features = await self.extract_features_for_match_enhanced(home_team, away_team, referee, match_date, None, None, decay_config, as_of)
             else:
                 features = await self.extract_features_for_match(home_team, away_team, referee, match_date)
                 
@@ -2409,48 +4757,11 @@ class MLMatchPredictor:
             X = pd.DataFrame([features])
             X = X.reindex(columns=self.feature_columns, fill_value=0)
             
-            # Scale features
+            # Get predictions from all models in the inference thread pool
             X_scaled = self.scaler.transform(X)
-            
-            # Get predictions from all models
-            model_predictions = {}
-            model_confidence_scores = {}
-            
-            # XGBoost predictions (primary model)
-            print("🎯 Getting XGBoost predictions...")
-            xgb_outcome_probs = self.models['classifier'].predict_proba(X_scaled)[0]
-            model_predictions['xgboost'] = {
-                'outcome_probs': xgb_outcome_probs,
-                'home_goals': max(0, self.models['home_goals'].predict(X_scaled)[0]),
-                'away_goals': max(0, self.models['away_goals'].predict(X_scaled)[0]),
-                'home_xg': max(0, self.models['home_xg'].predict(X_scaled)[0]),
-                'away_xg': max(0, self.models['away_xg'].predict(X_scaled)[0])
-            }
-            model_confidence_scores['xgboost'] = max(xgb_outcome_probs)
-            
-            # Ensemble model predictions
-            for model_type in ['random_forest', 'gradient_boost', 'neural_net', 'logistic']:
-                if model_type in self.ensemble_models:
-                    print(f"🤖 Getting {model_type} predictions...")
-                    try:
-                        models = self.ensemble_models[model_type]
-                        
-                        # Get outcome probabilities
-                        outcome_probs = models['classifier'].predict_proba(X_scaled)[0]
-                        
-                        model_predictions[model_type] = {
-                            'outcome_probs': outcome_probs,
-                            'home_goals': max(0, models['home_goals'].predict(X_scaled)[0]),
-                            'away_goals': max(0, models['away_goals'].predict(X_scaled)[0]),
-                            'home_xg': max(0, models['home_xg'].predict(X_scaled)[0]),
-                            'away_xg': max(0, models['away_xg'].predict(X_scaled)[0])
-                        }
-                        model_confidence_scores[model_type] = max(outcome_probs)
-                        
-                    except Exception as e:
-                        print(f"⚠️ Error with {model_type}: {e}")
-                        # If model fails, skip it for this prediction
-                        continue
+            model_predictions, model_confidence_scores = await execution_layer.run_in_thread(
+                'inference', self.ensemble_model_outputs, X_scaled, self.models, self.ensemble_models
+            )
             
             # Calculate ensemble predictions using weighted voting
             ensemble_result = self.calculate_ensemble_prediction(model_predictions, model_confidence_scores)
@@ -2633,7 +4944,7 @@ class MLMatchPredictor:
             }
         }
     
-    def calculate_poisson_scoreline_probabilities(self, home_lambda, away_lambda, max_goals=6):
+    def calculate_poisson_scoreline_probabilities(self, home_lambda, away_lambda, max_goals=6, scorelines=None, row=0):
         """
         Calculate detailed scoreline probabilities using Poisson distribution
         
@@ -2641,55 +4952,33 @@ class MLMatchPredictor:
             home_lambda (float): Expected goals for home team (from XGBoost)
             away_lambda (float): Expected goals for away team (from XGBoost)
             max_goals (int): Maximum goals to calculate for (0 to max_goals)
+            scorelines (dict): Precomputed poisson_scorelines output for a batch containing this fixture;
+                its grid is cut to max_goals, or recomputed when it is smaller
+            row (int): This fixture's row in scorelines
             
         Returns:
             dict: Dictionary with scoreline probabilities and match outcome probabilities
         """
-        scoreline_probs = {}
-        home_win_prob = 0.0
-        draw_prob = 0.0
-        away_win_prob = 0.0
-        
         # Ensure lambda values are positive
-        home_lambda = max(0.1, home_lambda)
-        away_lambda = max(0.1, away_lambda)
-        
-        # Calculate probabilities for each scoreline
-        for home_goals in range(max_goals + 1):
-            for away_goals in range(max_goals + 1):
-                # Poisson probability for this exact scoreline
-                prob = poisson.pmf(home_goals, home_lambda) * poisson.pmf(away_goals, away_lambda)
-                scoreline = f"{home_goals}-{away_goals}"
-                scoreline_probs[scoreline] = prob
-                
-                # Add to match outcome probabilities
-                if home_goals > away_goals:
-                    home_win_prob += prob
-                elif home_goals == away_goals:
-                    draw_prob += prob
-                else:
-                    away_win_prob += prob
+        home_lambda = max(POISSON_MIN_LAMBDA, home_lambda)
+        away_lambda = max(POISSON_MIN_LAMBDA, away_lambda)
         
-        # Calculate remaining probability (for scores > max_goals)
-        total_calculated = sum(scoreline_probs.values())
-        remaining_prob = max(0, 1 - total_calculated)
+        if scorelines is None or scorelines['matrix'].shape[-1] <= max_goals:
+            scorelines = poisson_scorelines(home_lambda, away_lambda, max_goals)
+            row = 0
+        matrix = scorelines['matrix'][row][:max_goals + 1, :max_goals + 1]
         
-        # Distribute remaining probability based on current ratios
-        if total_calculated > 0:
-            home_win_prob += remaining_prob * (home_win_prob / total_calculated) if total_calculated > 0 else remaining_prob / 3
-            draw_prob += remaining_prob * (draw_prob / total_calculated) if total_calculated > 0 else remaining_prob / 3
-            away_win_prob += remaining_prob * (away_win_prob / total_calculated) if total_calculated > 0 else remaining_prob / 3
-        
-        # Normalize to ensure sum = 1
-        total_outcome_prob = home_win_prob + draw_prob + away_win_prob
+        # Outcome probabilities are exact (they include scorelines beyond the grid); normalize to percentages
+        outcomes = np.array([scorelines['home_win'][row], scorelines['draw'][row], scorelines['away_win'][row]])
+        total_outcome_prob = outcomes.sum()
         if total_outcome_prob > 0:
-            home_win_prob = (home_win_prob / total_outcome_prob) * 100
-            draw_prob = (draw_prob / total_outcome_prob) * 100
-            away_win_prob = (away_win_prob / total_outcome_prob) * 100
+            outcomes = outcomes / total_outcome_prob * 100
+        home_win_prob, draw_prob, away_win_prob = (float(p) for p in outcomes)
         
-        # Convert scoreline probabilities to percentages and sort by probability
-        scoreline_probs_pct = {k: v * 100 for k, v in scoreline_probs.items()}
-        sorted_scorelines = sorted(scoreline_probs_pct.items(), key=lambda x: x[1], reverse=True)
+        # Scoreline probabilities as percentages, most likely first
+        probs = matrix.ravel() * 100
+        labels = scoreline_labels(matrix.shape[0] - 1)
+        sorted_scorelines = [(labels[i], float(probs[i])) for i in np.argsort(-probs, kind='stable')]
         
         return {
             'scoreline_probabilities': dict(sorted_scorelines),
@@ -2707,65 +4996,57 @@ class MLMatchPredictor:
     
     async def build_training_dataset(self):
         """Build training dataset from historical matches"""
+        if self.training_feature_source == 'store':
+            return await self.load_training_dataset_from_store()
         try:
             print("Building XGBoost training dataset...")
             
-            # Get all matches with team stats
-            matches = await db.matches.find({}).to_list(10000)
-            print(f"Found {len(matches)} matches")
-            
             features_list = []
             targets = []
+            scan_stats = ScanStats()
             
-            for match in matches:
-                try:
-                    home_team = match['home_team']
-                    away_team = match['away_team']
-                    referee = match['referee']
-                    home_score = match['home_score']
-                    away_score = match['away_score']
-                    
-                    # Extract features for this match
-                    features = await self.extract_features_for_match(home_team, away_team, referee)
-                    if features is None:
+            # Stream all matches in batches rather than a capped to_list
+            async for batch, xg_lookup in self.iter_training_batches(scan_stats):
+                # Extract features for the whole batch at once
+                _, batch_features, _ = await self.extract_features_batch(batch)
+                
+                for match, features in zip(batch, batch_features):
+                    try:
+                        home_team = match['home_team']
+                        away_team = match['away_team']
+                        home_score = match['home_score']
+                        away_score = match['away_score']
+                        
+                        if features is None:
+                            continue
+                        
+                        # Determine match outcome
+                        if home_score > away_score:
+                            outcome = 0  # Home win
+                        elif home_score == away_score:
+                            outcome = 1  # Draw
+                        else:
+                            outcome = 2  # Away win
+                        
+                        # Get actual xG values from team stats
+                        home_xg = xg_lookup.get((match['match_id'], home_team, True), 0)
+                        away_xg = xg_lookup.get((match['match_id'], away_team, False), 0)
+                        
+                        features_list.append(features)
+                        targets.append({
+                            'outcome': outcome,
+                            'home_goals': home_score,
+                            'away_goals': away_score,
+                            'home_xg': home_xg,
+                            'away_xg': away_xg
+                        })
+                        
+                    except Exception as e:
+                        print(f"Error processing match {match.get('match_id')}: {e}")
                         continue
-                    
-                    # Determine match outcome
-                    if home_score > away_score:
-                        outcome = 0  # Home win
-                    elif home_score == away_score:
-                        outcome = 1  # Draw
-                    else:
-                        outcome = 2  # Away win
-                    
-                    # Get actual xG values from team stats
-                    home_team_stats = await db.team_stats.find_one({
-                        "match_id": match['match_id'],
-                        "team_name": match['home_team'],
-                        "is_home": True
-                    })
-                    away_team_stats = await db.team_stats.find_one({
-                        "match_id": match['match_id'],
-                        "team_name": match['away_team'],
-                        "is_home": False
-                    })
-                    
-                    home_xg = home_team_stats.get('xg', 0) if home_team_stats else 0
-                    away_xg = away_team_stats.get('xg', 0) if away_team_stats else 0
-                    
-                    features_list.append(features)
-                    targets.append({
-                        'outcome': outcome,
-                        'home_goals': home_score,
-                        'away_goals': away_score,
-                        'home_xg': home_xg,
-                        'away_xg': away_xg
-                    })
-                    
-                except Exception as e:
-                    print(f"Error processing match {match['match_id']}: {e}")
-                    continue
             
+            self.last_training_scan = scan_stats.as_dict()
+            print(f"Scanned {scan_stats.by_collection['matches']} matches ({scan_stats.total} documents)")
             print(f"Successfully processed {len(features_list)} matches for XGBoost training")
             return features_list, targets
             
@@ -2788,112 +5069,46 @@ class MLMatchPredictor:
             import pandas as pd
             X = pd.DataFrame(features_list)
             
-            # Store feature columns for later use
-            self.feature_columns = X.columns.tolist()
-            
-            print(f"Training with {len(self.feature_columns)} features")
-            
-            # Prepare target variables
-            y_outcome = [t['outcome'] for t in targets]
-            y_home_goals = [t['home_goals'] for t in targets]
-            y_away_goals = [t['away_goals'] for t in targets]
-            y_home_xg = [t['home_xg'] for t in targets]
-            y_away_xg = [t['away_xg'] for t in targets]
+            print(f"Training with {len(X.columns)} features")
             
-            # Split data
-            X_train, X_test, y_outcome_train, y_outcome_test = train_test_split(
-                X, y_outcome, test_size=test_size, random_state=random_state, stratify=y_outcome
+            # Fit in the process pool so the event loop keeps serving requests
+            scaler, models, training_results = await execution_layer.run_in_process(
+                'training', fit_xgboost_models, X, targets,
+                self.xgb_params_classifier, self.xgb_params_regressor, test_size, random_state
             )
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
+            # Swap in the new scaler, columns and models together so predictions never mix versions
+            self.scaler = scaler
+            self.feature_columns = X.columns.tolist()
+            self.models = models
+            self.model_version += 1
             
-            # Split other targets with same indices
-            train_indices = X_train.index
-            test_indices = X_test.index
+            # Save models
+            self.save_models()
             
-            y_home_goals_train = [y_home_goals[i] for i in train_indices]
-            y_home_goals_test = [y_home_goals[i] for i in test_indices]
-            y_away_goals_train = [y_away_goals[i] for i in train_indices]
-            y_away_goals_test = [y_away_goals[i] for i in test_indices]
-            y_home_xg_train = [y_home_xg[i] for i in train_indices]
-            y_home_xg_test = [y_home_xg[i] for i in test_indices]
-            y_away_xg_train = [y_away_xg[i] for i in train_indices]
-            y_away_xg_test = [y_away_xg[i] for i in test_indices]
+            print("XGBoost model training completed successfully!")
+            return training_results
             
-            print(f"Training on {len(X_train)} samples, testing on {len(X_test)} samples")
-            
-            # Train XGBoost models
-            models_to_train = {
-                'classifier': (xgb.XGBClassifier(**self.xgb_params_classifier), 
-                              y_outcome_train, y_outcome_test),
-                'home_goals': (xgb.XGBRegressor(**self.xgb_params_regressor),
-                              y_home_goals_train, y_home_goals_test),
-                'away_goals': (xgb.XGBRegressor(**self.xgb_params_regressor),
-                              y_away_goals_train, y_away_goals_test),
-                'home_xg': (xgb.XGBRegressor(**self.xgb_params_regressor),
-                           y_home_xg_train, y_home_xg_test),
-                'away_xg': (xgb.XGBRegressor(**self.xgb_params_regressor),
-                           y_away_xg_train, y_away_xg_test)
-            }
-            
-            training_results = {}
-            
-            for model_name, (model, y_train, y_test) in models_to_train.items():
-                print(f"Training XGBoost {model_name}...")
-                
-                # Train model
-                model.fit(X_train_scaled, y_train)
-                
-                # Make predictions
-                y_pred = model.predict(X_test_scaled)
-                
-                # Evaluate
-                if model_name == 'classifier':
-                    from sklearn.metrics import accuracy_score, classification_report
-                    y_pred_proba = model.predict_proba(X_test_scaled)
-                    
-                    accuracy = accuracy_score(y_test, y_pred)
-                    log_loss_score = log_loss(y_test, y_pred_proba)
-                    class_report = classification_report(y_test, y_pred, output_dict=True)
-                    
-                    training_results[model_name] = {
-                        'accuracy': accuracy,
-                        'log_loss': log_loss_score,
-                        'classification_report': class_report,
-                        'samples': len(y_test)
-                    }
-                    print(f"{model_name} accuracy: {accuracy:.3f}, log loss: {log_loss_score:.3f}")
-                else:
-                    r2 = r2_score(y_test, y_pred)
-                    mse = mean_squared_error(y_test, y_pred)
-                    training_results[model_name] = {
-                        'r2_score': r2,
-                        'mse': mse,
-                        'samples': len(y_test)
-                    }
-                    print(f"{model_name} R² score: {r2:.3f}, MSE: {mse:.3f}")
-                
-                # Store trained model
-                self.models[model_name] = model
-            
-            # Save models
-            self.save_models()
-            
-            print("XGBoost model training completed successfully!")
-            return training_results
-            
-        except Exception as e:
-            print(f"Error training XGBoost models: {e}")
-            raise e
-    
-    async def predict_match(self, home_team, away_team, referee, match_date=None):
-        """Make match prediction using trained XGBoost models with Poisson simulation"""
-        try:
-            # Check if models are available
-            if not self.models or len(self.models) != 5:
-                raise ValueError("XGBoost models not trained. Please train models first.")
+        except Exception as e:
+            print(f"Error training XGBoost models: {e}")
+            raise e
+    
+    async def predict_match(self, home_team, away_team, referee, match_date=None, bypass_cache=False):
+        """Cached XGBoost prediction; bypass_cache=True forces a fresh computation"""
+        return await prediction_cache.get_or_compute(
+            'ml_predict_match',
+            {"home_team": home_team, "away_team": away_team, "referee": referee,
+             "match_date": match_date, "as_of": resolve_as_of(None, match_date), "model_version": self.model_version},
+            lambda: self._predict_match(home_team, away_team, referee, match_date),
+            bypass=bypass_cache
+        )
+    
+    async def _predict_match(self, home_team, away_team, referee, match_date=None):
+        """Make match prediction using trained XGBoost models with Poisson simulation"""
+        try:
+            # Check if models are available
+            if not self.models or len(self.models) != 5:
+                raise ValueError("XGBoost models not trained. Please train models first.")
             
             # Extract features
             features = await self.extract_features_for_match(home_team, away_team, referee, match_date)
@@ -2901,80 +5116,164 @@ class MLMatchPredictor:
                 raise ValueError("Could not extract features for prediction")
             
             # Convert to DataFrame and ensure correct column order
-            import pandas as pd
             X = pd.DataFrame([features])
             X = X.reindex(columns=self.feature_columns, fill_value=0)
             
-            # Scale features
-            X_scaled = self.scaler.transform(X)
-            
-            # Make XGBoost predictions
-            outcome_probs = self.models['classifier'].predict_proba(X_scaled)[0]
-            home_goals = max(0, self.models['home_goals'].predict(X_scaled)[0])
-            away_goals = max(0, self.models['away_goals'].predict(X_scaled)[0])
-            home_xg = max(0, self.models['home_xg'].predict(X_scaled)[0])
-            away_xg = max(0, self.models['away_xg'].predict(X_scaled)[0])
-            
-            # Calculate Poisson scoreline probabilities using predicted goals
-            poisson_results = self.calculate_poisson_scoreline_probabilities(home_goals, away_goals)
-            
-            # Use Poisson probabilities for match outcome (more accurate than direct XGBoost probabilities)
-            home_win_prob = poisson_results['match_outcome_probabilities']['home_win']
-            draw_prob = poisson_results['match_outcome_probabilities']['draw']
-            away_win_prob = poisson_results['match_outcome_probabilities']['away_win']
-            
-            # Create enhanced prediction breakdown
-            prediction_breakdown = {
-                'xgboost_confidence': {
-                    'classifier_confidence': float(max(outcome_probs)),
-                    'features_used': len(self.feature_columns),
-                    'training_samples': 'Variable by model'
-                },
-                'feature_importance': {
-                    'top_features': {k: float(v) for k, v in self._get_top_feature_importance(5).items()}
-                },
-                'poisson_analysis': {
-                    'most_likely_scoreline': poisson_results['most_likely_scoreline'][0],
-                    'scoreline_probability': float(round(poisson_results['most_likely_scoreline'][1], 2)),
-                    'lambda_parameters': {
-                        'home_lambda': float(poisson_results['poisson_parameters']['home_lambda']),
-                        'away_lambda': float(poisson_results['poisson_parameters']['away_lambda'])
-                    }
-                },
-                'prediction_method': 'XGBoost + Poisson Distribution Simulation'
-            }
+            outputs = await self.predict_outputs(X)
+            return self.prediction_result(home_team, away_team, referee, outputs, 0, self._get_top_feature_importance(5))
             
+        except Exception as e:
+            print(f"Error making XGBoost prediction: {e}")
             return {
-                'success': True,
+                'success': False,
+                'error': str(e),
                 'home_team': home_team,
                 'away_team': away_team,
-                'referee': referee,
-                'predicted_home_goals': float(round(home_goals, 2)),
-                'predicted_away_goals': float(round(away_goals, 2)),
-                'home_xg': float(round(home_xg, 2)),
-                'away_xg': float(round(away_xg, 2)),
-                'home_win_probability': float(round(home_win_prob, 2)),
-                'draw_probability': float(round(draw_prob, 2)),
-                'away_win_probability': float(round(away_win_prob, 2)),
-                'scoreline_probabilities': {k: float(round(v, 2)) for k, v in poisson_results['scoreline_probabilities'].items()},
-                'prediction_breakdown': prediction_breakdown,
-                'confidence_factors': {
-                    'model_type': 'XGBoost + Poisson Simulation',
-                    'features_count': len(self.feature_columns),
-                    'data_quality': 'Historical match data with enhanced feature engineering'
+                'referee': referee
+            }
+    
+    def model_outputs(self, X_scaled, models=None):
+        """Run each XGBoost model once over a scaled feature matrix"""
+        models = models or self.models
+        outputs = {
+            'outcome_probs': models['classifier'].predict_proba(X_scaled),
+            'home_goals': np.maximum(0, models['home_goals'].predict(X_scaled)),
+            'away_goals': np.maximum(0, models['away_goals'].predict(X_scaled)),
+            'home_xg': np.maximum(0, models['home_xg'].predict(X_scaled)),
+            'away_xg': np.maximum(0, models['away_xg'].predict(X_scaled))
+        }
+        # Score every fixture's scoreline grid in one vectorized call
+        outputs['scorelines'] = poisson_scorelines(
+            np.maximum(POISSON_MIN_LAMBDA, outputs['home_goals']),
+            np.maximum(POISSON_MIN_LAMBDA, outputs['away_goals'])
+        )
+        return outputs
+    
+    async def predict_outputs(self, X):
+        """Scale a feature frame and run the models in the inference thread pool"""
+        # Scale and capture the models on the event loop, where training swaps them
+        X_scaled = self.scaler.transform(X)
+        return await execution_layer.run_in_thread('inference', self.model_outputs, X_scaled, self.models)
+    
+    def prediction_result(self, home_team, away_team, referee, outputs, row, top_features):
+        """Prediction response for one row of model_outputs"""
+        outcome_probs = outputs['outcome_probs'][row]
+        home_goals = outputs['home_goals'][row]
+        away_goals = outputs['away_goals'][row]
+        home_xg = outputs['home_xg'][row]
+        away_xg = outputs['away_xg'][row]
+        
+        # Calculate Poisson scoreline probabilities using predicted goals
+        poisson_results = self.calculate_poisson_scoreline_probabilities(
+            home_goals, away_goals, scorelines=outputs.get('scorelines'), row=row
+        )
+        
+        # Use Poisson probabilities for match outcome (more accurate than direct XGBoost probabilities)
+        home_win_prob = poisson_results['match_outcome_probabilities']['home_win']
+        draw_prob = poisson_results['match_outcome_probabilities']['draw']
+        away_win_prob = poisson_results['match_outcome_probabilities']['away_win']
+        
+        # Create enhanced prediction breakdown
+        prediction_breakdown = {
+            'xgboost_confidence': {
+                'classifier_confidence': float(max(outcome_probs)),
+                'features_used': len(self.feature_columns),
+                'training_samples': 'Variable by model'
+            },
+            'feature_importance': {
+                'top_features': {k: float(v) for k, v in top_features.items()}
+            },
+            'poisson_analysis': {
+                'most_likely_scoreline': poisson_results['most_likely_scoreline'][0],
+                'scoreline_probability': float(round(poisson_results['most_likely_scoreline'][1], 2)),
+                'lambda_parameters': {
+                    'home_lambda': float(poisson_results['poisson_parameters']['home_lambda']),
+                    'away_lambda': float(poisson_results['poisson_parameters']['away_lambda'])
                 }
+            },
+            'prediction_method': 'XGBoost + Poisson Distribution Simulation'
+        }
+        
+        return {
+            'success': True,
+            'home_team': home_team,
+            'away_team': away_team,
+            'referee': referee,
+            'predicted_home_goals': float(round(home_goals, 2)),
+            'predicted_away_goals': float(round(away_goals, 2)),
+            'home_xg': float(round(home_xg, 2)),
+            'away_xg': float(round(away_xg, 2)),
+            'home_win_probability': float(round(home_win_prob, 2)),
+            'draw_probability': float(round(draw_prob, 2)),
+            'away_win_probability': float(round(away_win_prob, 2)),
+            'scoreline_probabilities': {k: float(round(v, 2)) for k, v in poisson_results['scoreline_probabilities'].items()},
+            'prediction_breakdown': prediction_breakdown,
+            'confidence_factors': {
+                'model_type': 'XGBoost + Poisson Simulation',
+                'features_count': len(self.feature_columns),
+                'data_quality': 'Historical match data with enhanced feature engineering'
             }
-            
-        except Exception as e:
-            print(f"Error making XGBoost prediction: {e}")
-            return {
+        }
+    
+    async def predict_matches_batch(self, fixtures):
+        """Predict many fixtures with one feature extraction pass and one call per model.
+
+        Yields one result per fixture, in order; a fixture that cannot be predicted yields
+        success False with its error instead of failing the batch.
+        """
+        if not self.models or len(self.models) != 5:
+            raise ValueError("XGBoost models not trained. Please train models first.")
+        
+        fixtures = [self.fixture_dict(fixture) for fixture in fixtures]
+        matrix, _, errors = await self.extract_features_batch(fixtures, feature_columns=self.feature_columns)
+        valid = np.flatnonzero([error is None for error in errors])
+        
+        outputs = None
+        if len(valid):
+            X = pd.DataFrame(matrix[valid], columns=self.feature_columns)
+            outputs = await self.predict_outputs(X)
+        top_features = self._get_top_feature_importance(5)
+        
+        rows = {index: row for row, index in enumerate(valid)}
+        for index, fixture in enumerate(fixtures):
+            home_team, away_team, referee = fixture['home_team'], fixture['away_team'], fixture['referee']
+            if index in rows:
+                try:
+                    yield self.prediction_result(home_team, away_team, referee, outputs, rows[index], top_features)
+                    continue
+                except Exception as e:
+                    error = str(e)
+            else:
+                error = errors[index]
+            yield {
                 'success': False,
-                'error': str(e),
+                'error': error,
                 'home_team': home_team,
                 'away_team': away_team,
                 'referee': referee
             }
     
+    async def predict_goal_lambdas(self, fixtures):
+        """Expected home and away goals for many fixtures in one batch.
+
+        Returns (home_lambdas, away_lambdas, errors); fixtures that cannot be predicted get NaN
+        lambdas and their error message.
+        """
+        if not self.models or len(self.models) != 5:
+            raise ValueError("XGBoost models not trained. Please train models first.")
+        
+        fixtures = [self.fixture_dict(fixture) for fixture in fixtures]
+        matrix, _, errors = await self.extract_features_batch(fixtures, feature_columns=self.feature_columns)
+        home_lambdas = np.full(len(fixtures), np.nan)
+        away_lambdas = np.full(len(fixtures), np.nan)
+        
+        valid = np.flatnonzero([error is None for error in errors])
+        if len(valid):
+            outputs = await self.predict_outputs(pd.DataFrame(matrix[valid], columns=self.feature_columns))
+            home_lambdas[valid] = np.maximum(POISSON_MIN_LAMBDA, outputs['home_goals'])
+            away_lambdas[valid] = np.maximum(POISSON_MIN_LAMBDA, outputs['away_goals'])
+        return home_lambdas, away_lambdas, errors
+    
     def _get_top_feature_importance(self, top_n=5):
         """Get top feature importance from XGBoost classifier"""
         try:
@@ -2991,7 +5290,23 @@ class MLMatchPredictor:
         except:
             return {}
     
-    async def predict_match_with_starting_xi(self, home_team, away_team, referee, home_starting_xi=None, away_starting_xi=None, match_date=None, config_name="default", decay_config=None):
+    async def predict_match_with_starting_xi(self, home_team, away_team, referee, home_starting_xi=None, away_starting_xi=None, match_date=None, config_name="default", decay_config=None, bypass_cache=False, as_of=None):
+        """Cached starting XI prediction; bypass_cache=True forces a fresh computation"""
+        as_of = resolve_as_of(as_of, match_date)
+        return await prediction_cache.get_or_compute(
+            'ml_predict_match_with_starting_xi',
+            {"home_team": home_team, "away_team": away_team, "referee": referee,
+             "home_starting_xi": starting_xi_fingerprint(home_starting_xi),
+             "away_starting_xi": starting_xi_fingerprint(away_starting_xi),
+             "match_date": match_date, "as_of": as_of, "config_name": config_name,
+             "decay": decay_fingerprint(decay_config), "model_version": self.model_version},
+            lambda: self._predict_match_with_starting_xi(
+                home_team, away_team, referee, home_starting_xi, away_starting_xi, match_date, config_name, decay_config, as_of
+            ),
+            bypass=bypass_cache
+        )
+    
+    async def _predict_match_with_starting_xi(self, home_team, away_team, referee, home_starting_xi=None, away_starting_xi=None, match_date=None, config_name="default", decay_config=None, as_of=None):
         """Enhanced match prediction with starting XI and time decay support"""
         try:
             # Check if models are available
@@ -3006,7 +5321,7 @@ class MLMatchPredictor:
             # Extract features with starting XI filtering
             features = await self.extract_features_for_match_enhanced(
                 home_team, away_team, referee, match_date, 
-                home_starting_xi, away_starting_xi, decay_config
+                home_starting_xi, away_starting_xi, decay_config, as_of
             )
             if features is None:
                 raise ValueError("Could not extract enhanced features for prediction")
@@ -3016,18 +5331,16 @@ class MLMatchPredictor:
             X = pd.DataFrame([features])
             X = X.reindex(columns=self.feature_columns, fill_value=0)
             
-            # Scale features
-            X_scaled = self.scaler.transform(X)
-            
             print(f"   Features extracted: {len(features)} features")
             print(f"   Using XGBoost models for prediction...")
             
             # Make predictions using XGBoost models
-            outcome_probs = self.models['classifier'].predict_proba(X_scaled)[0]
-            home_goals = max(0, self.models['home_goals'].predict(X_scaled)[0])
-            away_goals = max(0, self.models['away_goals'].predict(X_scaled)[0])
-            home_xg = max(0, self.models['home_xg'].predict(X_scaled)[0])
-            away_xg = max(0, self.models['away_xg'].predict(X_scaled)[0])
+            outputs = await self.predict_outputs(X)
+            outcome_probs = outputs['outcome_probs'][0]
+            home_goals = outputs['home_goals'][0]
+            away_goals = outputs['away_goals'][0]
+            home_xg = outputs['home_xg'][0]
+            away_xg = outputs['away_xg'][0]
             
             print(f"   ✅ XGBoost Prediction Complete!")
             print(f"   Home Goals: {home_goals:.2f}, Away Goals: {away_goals:.2f}")
@@ -3103,7 +5416,7 @@ class MLMatchPredictor:
                 }
             )
     
-    async def predict_match_with_defaults(self, home_team, away_team, referee, match_date=None, config_name="default", decay_config=None):
+    async def predict_match_with_defaults(self, home_team, away_team, referee, match_date=None, config_name="default", decay_config=None, bypass_cache=False, as_of=None):
         """Prediction using default starting XIs based on most played players"""
         try:
             print(f"🎯 Generating default Starting XI for XGBoost prediction...")
@@ -3132,7 +5445,7 @@ class MLMatchPredictor:
             
             return await self.predict_match_with_starting_xi(
                 home_team, away_team, referee, home_xi, away_xi, 
-                match_date, config_name, decay_config
+                match_date, config_name, decay_config, bypass_cache=bypass_cache, as_of=as_of
             )
             
         except Exception as e:
@@ -3150,107 +5463,126 @@ class MLMatchPredictor:
                 }
             )
     
-    async def extract_features_for_match_enhanced(self, home_team, away_team, referee, match_date=None, home_starting_xi=None, away_starting_xi=None, decay_config=None):
-        """Enhanced feature extraction with starting XI filtering and time decay"""
-        try:
-            # Get team stats with starting XI filtering and time decay
-            home_stats = await self.calculate_team_features_enhanced(home_team, True, home_starting_xi, decay_config)
-            away_stats = await self.calculate_team_features_enhanced(away_team, False, away_starting_xi, decay_config)
-            
-            if not home_stats or not away_stats:
-                raise ValueError("Could not calculate enhanced team features")
-            
-            # Get referee bias (apply time decay if specified)
-            home_rbs, home_rbs_conf = await self.get_referee_bias_with_decay(home_team, referee, decay_config)
-            away_rbs, away_rbs_conf = await self.get_referee_bias_with_decay(away_team, referee, decay_config)
-            
-            # Get head-to-head stats with time decay
-            h2h_stats = await self.get_head_to_head_stats_with_decay(home_team, away_team, decay_config)
-            
-            # Build enhanced feature vector
-            features = {
-                # Home team offensive stats (enhanced with starting XI)
-                'home_xg_per_match': home_stats['xg'],
-                'home_goals_per_match': home_stats['goals'],
-                'home_shots_per_match': home_stats['shots_total'],
-                'home_shots_on_target_per_match': home_stats['shots_on_target'],
-                'home_xg_per_shot': home_stats['xg_per_shot'],
-                'home_shot_accuracy': home_stats['shot_accuracy'],
-                'home_conversion_rate': home_stats['conversion_rate'],
-                'home_possession_pct': home_stats['possession_pct'],
-                
-                # Home team defensive stats
-                'home_goals_conceded_per_match': home_stats['goals_conceded'],
-                'home_xg_conceded_per_match': home_stats.get('xg_conceded', 0),
-                
-                # Away team stats (enhanced with starting XI)
-                'away_xg_per_match': away_stats['xg'],
-                'away_goals_per_match': away_stats['goals'],
-                'away_shots_per_match': away_stats['shots_total'],
-                'away_shots_on_target_per_match': away_stats['shots_on_target'],
-                'away_xg_per_shot': away_stats['xg_per_shot'],
-                'away_shot_accuracy': away_stats['shot_accuracy'],
-                'away_conversion_rate': away_stats['conversion_rate'],
-                'away_possession_pct': away_stats['possession_pct'],
-                
-                # Away team defensive stats
-                'away_goals_conceded_per_match': away_stats['goals_conceded'],
-                'away_xg_conceded_per_match': away_stats.get('xg_conceded', 0),
-                
-                # Form over last 5 matches (with time decay)
-                'home_form_last5': await self.get_team_form_with_decay(home_team, 5, decay_config),
-                'away_form_last5': await self.get_team_form_with_decay(away_team, 5, decay_config),
-                
-                # Home advantage
-                'home_advantage': 1,
-                
-                # Referee bias (with time decay)
-                'home_referee_bias': home_rbs,
-                'away_referee_bias': away_rbs,
-                'home_rbs_confidence': home_rbs_conf,
-                'away_rbs_confidence': away_rbs_conf,
-                
-                # Head-to-head (with time decay)
-                'h2h_home_wins': h2h_stats['home_wins'],
-                'h2h_draws': h2h_stats['draws'],
-                'h2h_away_wins': h2h_stats['away_wins'],
-                'h2h_home_goals_avg': h2h_stats['home_goals_avg'],
-                'h2h_away_goals_avg': h2h_stats['away_goals_avg'],
-                
-                # Additional differential features
-                'goal_difference': home_stats['goals'] - away_stats['goals'],
-                'xg_difference': home_stats['xg'] - away_stats['xg'],
-                'possession_difference': home_stats['possession_pct'] - away_stats['possession_pct'],
-                'form_difference': await self.get_team_form_with_decay(home_team, 5, decay_config) - await self.get_team_form_with_decay(away_team, 5, decay_config),
-                
-                # Quality indicators (enhanced with starting XI)
-                'home_quality_rating': (home_stats['goals'] + home_stats['xg']) / 2,
-                'away_quality_rating': (away_stats['goals'] + away_stats['xg']) / 2,
-                
-                # Starting XI indicators
-                'home_xi_specified': 1 if home_starting_xi else 0,
-                'away_xi_specified': 1 if away_starting_xi else 0,
-                'time_decay_applied': 1 if decay_config else 0
-            }
-            
-            return features
-            
-        except Exception as e:
-            print(f"Error extracting enhanced features: {e}")
-            return None
+    async def extract_features_for_match_enhanced(self, home_team, away_team, referee, match_date=None, home_starting_xi=None, away_starting_xi=None, decay_config=None, as_of=None):
+        """Enhanced feature extraction with starting XI filtering and time decay as of a reference date"""
+        _, features, errors = await self.extract_features_batch(
+            [(home_team, away_team, referee, match_date, home_starting_xi, away_starting_xi, decay_config, as_of)],
+            enhanced=True
+        )
+        if errors[0]:
+            print(f"Error extracting enhanced features: {errors[0]}")
+        return features[0]
     
-    async def calculate_team_features_enhanced(self, team_name, is_home, starting_xi=None, decay_config=None):
+    async def build_enhanced_features(self, fixture, context):
+        """Enhanced feature vector for one fixture from the batch context"""
+        home_team, away_team, referee = fixture['home_team'], fixture['away_team'], fixture['referee']
+        home_starting_xi, away_starting_xi = fixture['home_starting_xi'], fixture['away_starting_xi']
+        decay_config = fixture['decay_config']
+        # Time decay is measured from, and only uses matches played before, the as-of date
+        as_of = resolve_as_of(fixture['as_of'], fixture['match_date'])
+        
+        # Team stats (starting XI filtered), referee bias, head-to-head and form, all time-decayed
+        # and independent of each other: look them up concurrently
+        (home_stats, away_stats, (home_rbs, home_rbs_conf), (away_rbs, away_rbs_conf),
+         h2h_stats, home_form, away_form) = await context.gather(
+            self.calculate_team_features_enhanced(home_team, True, home_starting_xi, decay_config, as_of, context=context),
+            self.calculate_team_features_enhanced(away_team, False, away_starting_xi, decay_config, as_of, context=context),
+            self.get_referee_bias_with_decay(home_team, referee, decay_config, as_of, context=context),
+            self.get_referee_bias_with_decay(away_team, referee, decay_config, as_of, context=context),
+            self.get_head_to_head_stats_with_decay(home_team, away_team, decay_config, as_of, context=context),
+            self.get_team_form_with_decay(home_team, 5, decay_config, as_of, context=context),
+            self.get_team_form_with_decay(away_team, 5, decay_config, as_of, context=context)
+        )
+        
+        if not home_stats or not away_stats:
+            raise ValueError("Could not calculate enhanced team features")
+        
+        # Build enhanced feature vector
+        features = {
+            # Home team offensive stats (enhanced with starting XI)
+            'home_xg_per_match': home_stats['xg'],
+            'home_goals_per_match': home_stats['goals'],
+            'home_shots_per_match': home_stats['shots_total'],
+            'home_shots_on_target_per_match': home_stats['shots_on_target'],
+            'home_xg_per_shot': home_stats['xg_per_shot'],
+            'home_shot_accuracy': home_stats['shot_accuracy'],
+            'home_conversion_rate': home_stats['conversion_rate'],
+            'home_possession_pct': home_stats['possession_pct'],
+            
+            # Home team defensive stats
+            'home_goals_conceded_per_match': home_stats['goals_conceded'],
+            'home_xg_conceded_per_match': home_stats.get('xg_conceded', 0),
+            
+            # Away team stats (enhanced with starting XI)
+            'away_xg_per_match': away_stats['xg'],
+            'away_goals_per_match': away_stats['goals'],
+            'away_shots_per_match': away_stats['shots_total'],
+            'away_shots_on_target_per_match': away_stats['shots_on_target'],
+            'away_xg_per_shot': away_stats['xg_per_shot'],
+            'away_shot_accuracy': away_stats['shot_accuracy'],
+            'away_conversion_rate': away_stats['conversion_rate'],
+            'away_possession_pct': away_stats['possession_pct'],
+            
+            # Away team defensive stats
+            'away_goals_conceded_per_match': away_stats['goals_conceded'],
+            'away_xg_conceded_per_match': away_stats.get('xg_conceded', 0),
+            
+            # Form over last 5 matches (with time decay)
+            'home_form_last5': home_form,
+            'away_form_last5': away_form,
+            
+            # Home advantage
+            'home_advantage': 1,
+            
+            # Referee bias (with time decay)
+            'home_referee_bias': home_rbs,
+            'away_referee_bias': away_rbs,
+            'home_rbs_confidence': home_rbs_conf,
+            'away_rbs_confidence': away_rbs_conf,
+            
+            # Head-to-head (with time decay)
+            'h2h_home_wins': h2h_stats['home_wins'],
+            'h2h_draws': h2h_stats['draws'],
+            'h2h_away_wins': h2h_stats['away_wins'],
+            'h2h_home_goals_avg': h2h_stats['home_goals_avg'],
+            'h2h_away_goals_avg': h2h_stats['away_goals_avg'],
+            
+            # Additional differential features
+            'goal_difference': home_stats['goals'] - away_stats['goals'],
+            'xg_difference': home_stats['xg'] - away_stats['xg'],
+            'possession_difference': home_stats['possession_pct'] - away_stats['possession_pct'],
+            'form_difference': home_form - away_form,
+            
+            # Quality indicators (enhanced with starting XI)
+            'home_quality_rating': (home_stats['goals'] + home_stats['xg']) / 2,
+            'away_quality_rating': (away_stats['goals'] + away_stats['xg']) / 2,
+            
+            # Starting XI indicators
+            'home_xi_specified': 1 if home_starting_xi else 0,
+            'away_xi_specified': 1 if away_starting_xi else 0,
+            'time_decay_applied': 1 if decay_config else 0
+        }
+        
+        return features
+    
+    async def calculate_team_features_enhanced(self, team_name, is_home, starting_xi=None, decay_config=None, as_of=None, context=None):
         """Enhanced team feature calculation with starting XI filtering and time decay"""
+        as_of = resolve_as_of(as_of)
+        if context is not None:
+            return await context.memoize(
+                ('team_features_enhanced', team_name, is_home, context.xi_key(starting_xi), context.decay_key(decay_config), as_of),
+                lambda: self.calculate_team_features_enhanced(team_name, is_home, starting_xi, decay_config, as_of)
+            )
         try:
             if starting_xi:
                 # Filter stats by starting XI players
                 selected_players = [pos.player.player_name for pos in starting_xi.positions if pos.player]
                 print(f"Enhanced prediction for {team_name}: Using Starting XI with {len(selected_players)} players")
-                stats = await self.calculate_team_averages_for_players(team_name, is_home, selected_players, decay_config)
+                stats = await self.calculate_team_averages_for_players(team_name, is_home, selected_players, decay_config, as_of)
             else:
                 # Use existing method but apply time decay
                 print(f"Enhanced prediction for {team_name}: Using team averages (no Starting XI)")
-                stats = await self.calculate_team_averages_with_decay(team_name, is_home, decay_config)
+                stats = await self.calculate_team_averages_with_decay(team_name, is_home, decay_config, as_of)
             
             if not stats:
                 print(f"Warning: No stats found for {team_name}")
@@ -3274,99 +5606,45 @@ class MLMatchPredictor:
             print(f"Error calculating enhanced team features: {e}")
             return None
     
-    async def calculate_team_averages_for_players(self, team_name, is_home, selected_players, decay_config=None):
-        """Calculate team averages using only specified players with optional time decay"""
+    async def calculate_team_averages_for_players(self, team_name, is_home, selected_players, decay_config=None, as_of=None):
+        """Calculate team averages using only specified players with optional time decay as of a date"""
         try:
-            # Get all matches for this team
-            team_matches = await db.matches.find({
-                "$or": [
-                    {"home_team": team_name},
-                    {"away_team": team_name}
-                ]
-            }).to_list(10000)
+            as_of = resolve_as_of(as_of)
+            snapshot = await data_snapshot.get()
             
-            if not team_matches:
-                return None
-            
-            # Get player stats for selected players only
-            selected_player_stats = await db.player_stats.find({
-                "team_name": team_name,
-                "player_name": {"$in": selected_players}
-            }).to_list(10000)
-            
-            if not selected_player_stats:
-                return None
+            # Per-match totals of the selected players from the team's player x match matrix
+            # (one sparse matrix-vector product instead of rescanning player stats)
+            totals, positions = snapshot.player_match_matrix(team_name).aggregate(selected_players)
             
-            # FIXED: First aggregate player stats by match, then apply time weights to match totals
-            match_aggregates = {}
-            
-            # Step 1: Group player stats by match and sum them up (without weights)
-            for player_stat in selected_player_stats:
-                match_id = player_stat['match_id']
-                
-                if match_id not in match_aggregates:
-                    match_aggregates[match_id] = {
-                        'goals': 0, 'assists': 0, 'xg': 0, 'shots_total': 0, 
-                        'shots_on_target': 0, 'penalty_attempts': 0, 'penalty_goals': 0,
-                        'is_home': player_stat.get('is_home', is_home)
-                    }
-                
-                # Sum up all Starting XI players' stats for this match
-                match_aggregates[match_id]['goals'] += player_stat.get('goals', 0)
-                match_aggregates[match_id]['assists'] += player_stat.get('assists', 0)
-                match_aggregates[match_id]['xg'] += player_stat.get('xg', 0)
-                match_aggregates[match_id]['shots_total'] += player_stat.get('shots_total', 0)
-                match_aggregates[match_id]['shots_on_target'] += player_stat.get('shots_on_target', 0)
-                match_aggregates[match_id]['penalty_attempts'] += player_stat.get('penalty_attempts', 0)
-                match_aggregates[match_id]['penalty_goals'] += player_stat.get('penalty_goals', 0)
-            
-            if not match_aggregates:
+            if totals.shape[1] == 0:
                 return None
             
             # DEBUG: Log Starting XI calculation details
             print(f"📊 Starting XI calculation for {team_name}:")
             print(f"  Selected players: {len(selected_players)} - {selected_players[:3]}...")
-            print(f"  Matches found: {len(match_aggregates)}")
+            print(f"  Matches found: {totals.shape[1]}")
             print(f"  Time decay enabled: {decay_config is not None}")
             if decay_config:
                 print(f"  Decay type: {decay_config.decay_type}, preset: {decay_config.preset_name}")
             
-            # Step 2: Apply time decay weights to match totals and calculate weighted averages
-            total_weighted_goals = 0
-            total_weighted_assists = 0
-            total_weighted_xg = 0
-            total_weighted_shots = 0
-            total_weighted_shots_on_target = 0
-            total_weighted_penalties = 0
-            total_weighted_penalty_goals = 0
-            total_weights = 0
-            
-            for match_id, match_stats in match_aggregates.items():
-                # Find the match to get date for time decay
-                match_info = next((m for m in team_matches if m['match_id'] == match_id), None)
-                if not match_info:
-                    continue
-                
-                # Calculate time weight for this match
-                weight = 1.0
-                if decay_config and match_info.get('match_date'):
-                    weight = starting_xi_manager.calculate_time_weight(
-                        match_info['match_date'], 
-                        datetime.now().strftime("%Y-%m-%d"),
-                        decay_config
-                    )
-                elif decay_config:
-                    print(f"  Warning: No match_date for match {match_id}")
-                
-                # Apply weight to match totals
-                total_weighted_goals += match_stats['goals'] * weight
-                total_weighted_assists += match_stats['assists'] * weight
-                total_weighted_xg += match_stats['xg'] * weight
-                total_weighted_shots += match_stats['shots_total'] * weight
-                total_weighted_shots_on_target += match_stats['shots_on_target'] * weight
-                total_weighted_penalties += match_stats['penalty_attempts'] * weight
-                total_weighted_penalty_goals += match_stats['penalty_goals'] * weight
-                total_weights += weight
+            # Apply time decay weights to match totals and calculate weighted averages
+            # Only matches played before the as-of date count, with or without time decay
+            played = snapshot.played_before(positions, as_of)
+            if not played.all():
+                print(f"  Skipping {int((~played).sum())} matches not played before {as_of}")
+            totals, positions = totals[:, played], positions[played]
+            weights = time_decay_weights(snapshot.match_dates[positions], decay_config, as_of)
+            
+            # Apply weights to match totals
+            weighted_totals = dict(zip(PlayerMatchMatrix.FIELDS, totals @ weights))
+            total_weighted_goals = weighted_totals['goals']
+            total_weighted_assists = weighted_totals['assists']
+            total_weighted_xg = weighted_totals['xg']
+            total_weighted_shots = weighted_totals['shots_total']
+            total_weighted_shots_on_target = weighted_totals['shots_on_target']
+            total_weighted_penalties = weighted_totals['penalty_attempts']
+            total_weighted_penalty_goals = weighted_totals['penalty_goals']
+            total_weights = weights.sum()
             
             if total_weights == 0:
                 return None
@@ -3389,7 +5667,7 @@ class MLMatchPredictor:
             # Debug logging for Starting XI effectiveness
             print(f"Starting XI calculation for {team_name}:")
             print(f"  Selected players: {len(selected_players)} - {selected_players[:3]}...")
-            print(f"  Matches found: {len(match_aggregates)}")
+            print(f"  Matches found: {len(positions)}")
             print(f"  Avg goals/match: {goals_per_match:.3f}")
             print(f"  Avg xG/match: {xg_per_match:.3f}")
             print(f"  Time decay applied: {decay_config is not None}")
@@ -3405,7 +5683,7 @@ class MLMatchPredictor:
             conversion_rate = min(2.0, conversion_rate)  # Cap at 2.0
             
             # Get team stats for possession and defensive stats (these don't change with starting XI)
-            team_stats = await self.get_team_stats_aggregates(team_name, is_home, decay_config)
+            team_stats = await self.get_team_stats_aggregates(team_name, is_home, decay_config, as_of) or {}
             
             return {
                 'goals': goals_per_match,
@@ -3429,20 +5707,27 @@ class MLMatchPredictor:
             print(f"Error calculating team averages for selected players: {e}")
             return None
     
-    async def get_team_stats_aggregates(self, team_name, is_home, decay_config=None):
+    async def get_team_stats_aggregates(self, team_name, is_home, decay_config=None, as_of=None):
         """Get team-level stats (possession, cards, etc.) with time decay"""
         try:
             # Use existing team stats calculation but apply time decay
-            return await self.calculate_team_averages_with_decay(team_name, is_home, decay_config)
+            return await self.calculate_team_averages_with_decay(team_name, is_home, decay_config, as_of)
         except Exception as e:
             print(f"Error getting team stats aggregates: {e}")
             return {}
     
-    async def calculate_team_averages_with_decay(self, team_name, is_home, decay_config=None):
-        """Calculate team averages with full time decay implementation"""
+    async def calculate_team_averages_with_decay(self, team_name, is_home, decay_config=None, as_of=None):
+        """Calculate team averages with full time decay implementation, from matches played before a reference date"""
+        base_stats = None
         try:
-            # Get the existing averages first for backward compatibility
-            base_stats = await match_predictor.calculate_team_averages(team_name, is_home)
+            as_of = resolve_as_of(as_of)
+            
+            # Undecayed averages over the same matches; None when the team has no match before as_of
+            base_stats = await match_predictor.calculate_team_averages(team_name, is_home, as_of=as_of)
+            
+            if not base_stats:
+                print(f"📊 Team averages for {team_name}: No matches before {as_of}")
+                return None
             
             if not decay_config:
                 print(f"📊 Team averages for {team_name}: Using base stats (no time decay)")
@@ -3450,57 +5735,20 @@ class MLMatchPredictor:
             
             print(f"📊 Team averages for {team_name}: Applying {decay_config.decay_type} time decay ({decay_config.preset_name})")
             
-            # Get all team stats for this team with time weighting
-            team_stats_cursor = db.team_stats.find({"team_name": team_name})
-            team_stats = await team_stats_cursor.to_list(10000)
+            snapshot = await data_snapshot.get()
             
-            if not team_stats:
-                return base_stats
+            # Exponential presets are O(1) lookups in the running aggregates when they cover as_of
+            weighted_stats = await team_decay_store.lookup(snapshot, team_name, is_home, decay_config, as_of)
+            if weighted_stats is None:
+                # Get all team stats for this team with time weighting
+                team_stats = snapshot.team_stats_for(team_name)
+                weighted_stats = self.weighted_team_stats(snapshot, team_stats, team_name, is_home, decay_config, as_of)
             
-            # Calculate weighted averages with time decay
-            weighted_stats = {}
-            total_weights = 0
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            
-            # Get all matches to lookup dates by match_id
-            all_matches = await db.matches.find({}).to_list(10000)
-            match_date_lookup = {m['match_id']: m.get('match_date') for m in all_matches}
-            
-            for stat in team_stats:
-                # Get match date for time decay calculation
-                match_id = stat.get('match_id')
-                match_date = match_date_lookup.get(match_id) if match_id else None
-                
-                if not match_date:
-                    print(f"  ⚠️ Skipping stat for match {match_id} - no match date found")
-                    continue
-                
-                # Calculate time weight
-                weight = starting_xi_manager.calculate_time_weight(
-                    match_date, current_date, decay_config
-                )
-                
-                # Apply home/away filter if needed
-                stat_is_home = stat.get('is_home', True)
-                if is_home != stat_is_home:
-                    weight *= 0.8  # Reduce weight for opposite venue
-                
-                total_weights += weight
-                
-                # Aggregate weighted stats
-                for key, value in stat.items():
-                    if key not in ['_id', 'team_name', 'match_date', 'date', 'is_home'] and isinstance(value, (int, float)):
-                        if key not in weighted_stats:
-                            weighted_stats[key] = 0
-                        weighted_stats[key] += value * weight
-            
-            # Calculate weighted averages
-            if total_weights > 0:
-                for key in weighted_stats:
-                    weighted_stats[key] /= total_weights
-            
-            # Merge with base stats, preferring weighted values
-            final_stats = {**base_stats, **weighted_stats}
+            # Rebuild every derived average (goals, points, clean_sheets, ...) from the weighted
+            # values, so no undecayed key from the base stats is mixed in
+            totals = {field: weighted_stats.get(field, 0.0) for field in match_predictor.AVERAGE_FIELDS}
+            final_stats = {**match_predictor.build_team_averages(totals, 1), **weighted_stats}
+            final_stats['matches_count'] = base_stats['matches_count']
             
             return final_stats
             
@@ -3508,47 +5756,61 @@ class MLMatchPredictor:
             print(f"Error calculating team averages with decay: {e}")
             return base_stats or None
     
-    async def get_referee_bias_with_decay(self, team_name, referee, decay_config=None):
-        """Get referee bias with full time decay implementation"""
+    @staticmethod
+    def weighted_team_stats(snapshot, team_stats, team_name, is_home, decay_config, as_of):
+        """Time-decayed average of every numeric team stat, rescanning the team's history"""
+        # Lookup match dates by match_id and weight each stat by time decay; stats from matches
+        # not played before the as-of date (or without a date) get no weight
+        match_dates = snapshot.match_dates_for_ids(team_stats['match_id'])
+        played = match_dates < np.datetime64(as_of)
+        if not played.all():
+            print(f"  ⚠️ Skipping {int((~played).sum())} stats for {team_name} - no match date before {as_of}")
+        weights = np.where(played, time_decay_weights(match_dates, decay_config, as_of), 0.0)
+        
+        # Reduce weight for the opposite venue
+        weights = np.where(team_stats['is_home'].to_numpy(dtype=bool) != is_home, weights * TeamDecayStore.OPPOSITE_VENUE_WEIGHT, weights)
+        
+        total_weights = weights.sum()
+        
+        # Aggregate weighted stats over every numeric field
+        numeric_fields = TeamDecayStore.value_fields(team_stats)
+        values = team_stats[numeric_fields].to_numpy(dtype=float)
+        weighted_stats = dict(zip(numeric_fields, np.nansum(values * weights[:, None], axis=0).tolist()))
+        
+        # Calculate weighted averages
+        if total_weights > 0:
+            for key in weighted_stats:
+                weighted_stats[key] /= total_weights
+        return weighted_stats
+    
+    async def get_referee_bias_with_decay(self, team_name, referee, decay_config=None, as_of=None, context=None):
+        """Get referee bias with full time decay implementation, from matches played before a reference date"""
         try:
             # Get existing bias for backward compatibility
-            base_bias, base_conf = await self.get_referee_bias(team_name, referee)
-            
-            if not decay_config:
-                return base_bias, base_conf
-            
-            # Get all matches with this referee and team with time weighting
-            matches_cursor = db.matches.find({
-                "$or": [
-                    {"home_team": team_name, "referee": referee},
-                    {"away_team": team_name, "referee": referee}
-                ]
-            })
-            matches = await matches_cursor.to_list(10000)
-            
-            if len(matches) < 3:
-                return base_bias, base_conf
-            
-            # Calculate time-weighted RBS
+            base_bias, base_conf = await self.get_referee_bias(team_name, referee, context=context)
+            
+            # Matches with this referee and team played before the as-of date
+            snapshot = await data_snapshot.get()
+            as_of = resolve_as_of(as_of)
+            team_matches = snapshot.team_matches(team_name)
+            played = snapshot.played_before(team_matches.index.to_numpy(), as_of)
+            matches = team_matches[played & (team_matches['referee'] == referee).to_numpy()]
+            
+            if not decay_config or len(matches) < 3:
+                # The stored RBS covers the team's whole history, so it only applies when all of it precedes as_of
+                if played.all():
+                    return base_bias, base_conf
+                if len(matches) < 3:
+                    return 0.0, 0.0
+            
+            # Calculate RBS over the matches played before the as-of date (time-weighted when decay is on)
             weighted_rbs_sum = 0
             total_weights = 0
-            current_date = datetime.now().strftime("%Y-%m-%d")
+            weights = time_decay_weights(snapshot.match_dates[matches.index.to_numpy()], decay_config, as_of)
             
-            for match in matches:
-                match_date = match.get('match_date') or match.get('date')
-                if not match_date:
-                    continue
-                
-                # Calculate time weight
-                weight = starting_xi_manager.calculate_time_weight(
-                    match_date, current_date, decay_config
-                )
-                
+            for match_id, weight in zip(matches['match_id'].to_numpy(), weights):
                 # Get team stats for this match to calculate RBS
-                team_stat = await db.team_stats.find_one({
-                    "team_name": team_name,
-                    "match_id": match.get('match_id')
-                })
+                team_stat = snapshot.team_stat_for_match(match_id, team_name)
                 
                 if team_stat:
                     # Calculate RBS for this match
@@ -3566,80 +5828,82 @@ class MLMatchPredictor:
                 confidence = min(95, total_weights * 10)  # Confidence based on weighted sample size
                 return time_weighted_rbs, confidence
             
-            return base_bias, base_conf
+            return (base_bias, base_conf) if played.all() else (0.0, 0.0)
             
         except Exception as e:
             print(f"Error calculating referee bias with decay: {e}")
             return base_bias, base_conf
     
-    async def get_head_to_head_stats_with_decay(self, home_team, away_team, decay_config=None):
-        """Get head-to-head stats with full time decay implementation"""
+    @staticmethod
+    def head_to_head_summary(meetings, home_team):
+        """Unweighted head-to-head record over completed meetings, from home_team's perspective"""
+        if meetings.empty:
+            return {'home_wins': 0, 'draws': 0, 'away_wins': 0, 'home_goals_avg': 0, 'away_goals_avg': 0}
+        normal = (meetings['home_team'] == home_team).to_numpy()
+        match_home_goals = meetings['home_score'].to_numpy(dtype=float)
+        match_away_goals = meetings['away_score'].to_numpy(dtype=float)
+        home_goals = np.where(normal, match_home_goals, match_away_goals)
+        away_goals = np.where(normal, match_away_goals, match_home_goals)
+        return {
+            'home_wins': int((home_goals > away_goals).sum()),
+            'draws': int((home_goals == away_goals).sum()),
+            'away_wins': int((home_goals < away_goals).sum()),
+            'home_goals_avg': float(home_goals.mean()),
+            'away_goals_avg': float(away_goals.mean())
+        }
+    
+    @staticmethod
+    def form_points(matches, team_name):
+        """Average points (3 win, 1 draw) over completed matches from the team's perspective, 0.0 when none"""
+        if matches.empty:
+            return 0.0
+        was_home = (matches['home_team'] == team_name).to_numpy()
+        match_home_goals = matches['home_score'].to_numpy(dtype=float)
+        match_away_goals = matches['away_score'].to_numpy(dtype=float)
+        goals_for = np.where(was_home, match_home_goals, match_away_goals)
+        goals_against = np.where(was_home, match_away_goals, match_home_goals)
+        return float(np.select([goals_for > goals_against, goals_for == goals_against], [3, 1], 0).mean())
+    
+    async def get_head_to_head_stats_with_decay(self, home_team, away_team, decay_config=None, as_of=None, context=None):
+        """Get head-to-head stats with full time decay implementation, from matches played before a reference date"""
+        base_h2h = self.head_to_head_summary(pd.DataFrame(), home_team)
         try:
-            # Get existing H2H for backward compatibility
-            base_h2h = await self.get_head_to_head_stats(home_team, away_team)
+            # Head-to-head matches played before the as-of date
+            snapshot = await data_snapshot.get()
+            as_of = resolve_as_of(as_of)
+            team_matches = snapshot.team_matches(home_team)
+            meetings = team_matches[
+                ((team_matches['home_team'] == away_team) | (team_matches['away_team'] == away_team)).to_numpy()
+                & snapshot.played_before(team_matches.index.to_numpy(), as_of)
+            ]
+            
+            # Undecayed record over the first 100 completed meetings, as get_head_to_head_stats counts them
+            base_h2h = self.head_to_head_summary(completed_matches(meetings).head(100), home_team)
             
             if not decay_config:
                 return base_h2h
             
-            # Get all head-to-head matches with time weighting
-            h2h_matches_cursor = db.matches.find({
-                "$or": [
-                    {"home_team": home_team, "away_team": away_team},
-                    {"home_team": away_team, "away_team": home_team}
-                ]
-            })
-            h2h_matches = await h2h_matches_cursor.to_list(100)
+            h2h_matches = meetings.head(100)
             
             if len(h2h_matches) < 2:
                 return base_h2h
             
-            # Calculate time-weighted H2H stats
-            weighted_home_wins = 0
-            weighted_away_wins = 0
-            weighted_draws = 0
-            weighted_home_goals = 0
-            weighted_away_goals = 0
-            total_weights = 0
-            current_date = datetime.now().strftime("%Y-%m-%d")
+            # Calculate time-weighted H2H stats over the matches played before the as-of date
+            weights = time_decay_weights(snapshot.match_dates[h2h_matches.index.to_numpy()], decay_config, as_of)
             
-            for match in h2h_matches:
-                match_date = match.get('match_date') or match.get('date')
-                if not match_date:
-                    continue
-                
-                # Calculate time weight
-                weight = starting_xi_manager.calculate_time_weight(
-                    match_date, current_date, decay_config
-                )
-                
-                home_goals = match.get('home_goals', 0)
-                away_goals = match.get('away_goals', 0)
-                
-                # Determine perspective (which team is "home" in our query)
-                if match.get('home_team') == home_team:
-                    # Normal perspective
-                    weighted_home_goals += home_goals * weight
-                    weighted_away_goals += away_goals * weight
-                    
-                    if home_goals > away_goals:
-                        weighted_home_wins += weight
-                    elif away_goals > home_goals:
-                        weighted_away_wins += weight
-                    else:
-                        weighted_draws += weight
-                else:
-                    # Reversed perspective
-                    weighted_home_goals += away_goals * weight
-                    weighted_away_goals += home_goals * weight
-                    
-                    if away_goals > home_goals:
-                        weighted_home_wins += weight
-                    elif home_goals > away_goals:
-                        weighted_away_wins += weight
-                    else:
-                        weighted_draws += weight
-                
-                total_weights += weight
+            # Goals from our home team's perspective (swapped when it played away)
+            normal = (h2h_matches['home_team'] == home_team).to_numpy()
+            match_home_goals = DataSnapshot.column(h2h_matches, 'home_goals', 0).to_numpy(dtype=float)
+            match_away_goals = DataSnapshot.column(h2h_matches, 'away_goals', 0).to_numpy(dtype=float)
+            home_goals = np.where(normal, match_home_goals, match_away_goals)
+            away_goals = np.where(normal, match_away_goals, match_home_goals)
+            
+            weighted_home_goals = (home_goals * weights).sum()
+            weighted_away_goals = (away_goals * weights).sum()
+            weighted_home_wins = weights[home_goals > away_goals].sum()
+            weighted_away_wins = weights[away_goals > home_goals].sum()
+            weighted_draws = weights[~(home_goals > away_goals) & ~(away_goals > home_goals)].sum()
+            total_weights = weights.sum()
             
             if total_weights > 0:
                 return {
@@ -3658,71 +5922,47 @@ class MLMatchPredictor:
             print(f"Error calculating H2H stats with decay: {e}")
             return base_h2h
     
-    async def get_team_form_with_decay(self, team_name, last_n=5, decay_config=None):
-        """Get team form with full time decay implementation"""
+    async def get_team_form_with_decay(self, team_name, last_n=5, decay_config=None, as_of=None, context=None):
+        """Get team form with full time decay implementation, as of a reference date"""
+        as_of = resolve_as_of(as_of)
+        if context is not None:
+            return await context.memoize(
+                ('team_form_with_decay', team_name, last_n, context.decay_key(decay_config), as_of),
+                lambda: self._team_form_with_decay(team_name, last_n, decay_config, as_of, context)
+            )
+        return await self._team_form_with_decay(team_name, last_n, decay_config, as_of)
+    
+    async def _team_form_with_decay(self, team_name, last_n=5, decay_config=None, as_of=None, context=None):
+        base_form = 0.0
         try:
-            # Get existing form for backward compatibility
-            base_form = await self.get_team_form(team_name, last_n)
-            
-            if not decay_config:
-                return base_form
-            
-            # Get recent matches with time weighting
-            recent_matches_cursor = db.matches.find({
-                "$or": [
-                    {"home_team": team_name},
-                    {"away_team": team_name}
-                ]
-            }).sort("match_date", -1).limit(last_n * 2)  # Get more to account for time decay
+            # The most recent matches played before the as-of date
+            snapshot = await data_snapshot.get()
+            team_matches = snapshot.team_matches(team_name)
+            recent_matches = (
+                team_matches[snapshot.played_before(team_matches.index.to_numpy(), as_of)]
+                .sort_values('match_date', ascending=False, kind='stable', na_position='last')
+            )
             
-            recent_matches = await recent_matches_cursor.to_list(last_n * 2)
+            # Undecayed form over the last_n completed matches, as get_team_form counts it
+            base_form = self.form_points(completed_matches(recent_matches).head(last_n), team_name)
             
-            if len(recent_matches) < 2:
+            if not decay_config or len(recent_matches) < 2:
                 return base_form
             
-            # Calculate time-weighted form
-            weighted_points = 0
-            total_weights = 0
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            matches_considered = 0
+            # Calculate time-weighted form over the last_n most recent matches
+            recent_matches = recent_matches.head(last_n)
+            weights = time_decay_weights(snapshot.match_dates[recent_matches.index.to_numpy()], decay_config, as_of)
             
-            for match in recent_matches:
-                if matches_considered >= last_n:
-                    break
-                
-                match_date = match.get('match_date') or match.get('date')
-                if not match_date:
-                    continue
-                
-                # Calculate time weight
-                weight = starting_xi_manager.calculate_time_weight(
-                    match_date, current_date, decay_config
-                )
-                
-                # Calculate points for this match
-                home_goals = match.get('home_goals', 0)
-                away_goals = match.get('away_goals', 0)
-                
-                if match.get('home_team') == team_name:
-                    # Team was home
-                    if home_goals > away_goals:
-                        points = 3  # Win
-                    elif home_goals == away_goals:
-                        points = 1  # Draw
-                    else:
-                        points = 0  # Loss
-                else:
-                    # Team was away
-                    if away_goals > home_goals:
-                        points = 3  # Win
-                    elif away_goals == home_goals:
-                        points = 1  # Draw
-                    else:
-                        points = 0  # Loss
-                
-                weighted_points += points * weight
-                total_weights += weight
-                matches_considered += 1
+            # Points for each match from the team's perspective: 3 win, 1 draw, 0 loss
+            was_home = (recent_matches['home_team'] == team_name).to_numpy()
+            match_home_goals = DataSnapshot.column(recent_matches, 'home_goals', 0).to_numpy(dtype=float)
+            match_away_goals = DataSnapshot.column(recent_matches, 'away_goals', 0).to_numpy(dtype=float)
+            goals_for = np.where(was_home, match_home_goals, match_away_goals)
+            goals_against = np.where(was_home, match_away_goals, match_home_goals)
+            points = np.select([goals_for > goals_against, goals_for == goals_against], [3, 1], 0)
+            
+            weighted_points = (points * weights).sum()
+            total_weights = weights.sum()
             
             if total_weights > 0:
                 # Return weighted average points per game
@@ -3737,6 +5977,71 @@ class MLMatchPredictor:
 # Initialize ML Match Predictor
 ml_predictor = MLMatchPredictor()
 
+def search_xgboost_hyperparameters(training_features, training_targets, optimization_method="grid_search"):
+    """Cross-validated hyperparameter search for each XGBoost model; runs in the process pool"""
+    from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
+    
+    # Define parameter grids
+    if optimization_method == "grid_search":
+        param_grid = {
+            'n_estimators': [100, 200, 300],
+            'max_depth': [3, 4, 5, 6],
+            'learning_rate': [0.01, 0.1, 0.2],
+            'subsample': [0.8, 0.9, 1.0],
+            'colsample_bytree': [0.8, 0.9, 1.0]
+        }
+    else:  # random_search
+        param_grid = {
+            'n_estimators': np.arange(50, 500, 50),
+            'max_depth': np.arange(3, 10),
+            'learning_rate': np.uniform(0.01, 0.3, 20),
+            'subsample': np.uniform(0.7, 1.0, 10),
+            'colsample_bytree': np.uniform(0.7, 1.0, 10)
+        }
+    
+    # Optimize each model type
+    optimization_results = {}
+    
+    for model_type in ['classifier', 'home_goals', 'away_goals', 'home_xg', 'away_xg']:
+        print(f"   Optimizing {model_type}...")
+        
+        # Get appropriate targets
+        y = training_targets[model_type]
+        
+        # Create XGBoost model
+        if model_type == 'classifier':
+            from xgboost import XGBClassifier
+            model = XGBClassifier(random_state=42, objective='multi:softprob')
+            scoring = 'neg_log_loss'
+        else:
+            from xgboost import XGBRegressor
+            model = XGBRegressor(random_state=42)
+            scoring = 'neg_mean_absolute_error'
+        
+        # Perform optimization
+        if optimization_method == "grid_search":
+            search = GridSearchCV(
+                model, param_grid, cv=5, scoring=scoring, 
+                n_jobs=-1, verbose=1
+            )
+        else:
+            search = RandomizedSearchCV(
+                model, param_grid, cv=5, scoring=scoring,
+                n_jobs=-1, verbose=1, n_iter=50, random_state=42
+            )
+        
+        search.fit(training_features, y)
+        
+        optimization_results[model_type] = {
+            'best_params': search.best_params_,
+            'best_score': search.best_score_,
+            'improvement': abs(search.best_score_) - abs(search.cv_results_['mean_test_score'].mean())
+        }
+        
+        print(f"   ✅ {model_type}: Score {search.best_score_:.4f}")
+    
+    return optimization_results
+
 class ModelOptimizer:
     def __init__(self):
         self.current_model_version = "1.0"
@@ -3851,16 +6156,19 @@ class ModelOptimizer:
             if model_version:
                 query["model_version"] = model_version
             
-            predictions = await db.prediction_tracking.find(query).to_list(10000)
+            scan_stats = ScanStats()
+            predictions = await collect_documents(db.prediction_tracking, query, {"_id": 0}, scan_stats=scan_stats)
             
             if not predictions:
                 return {"error": "No predictions found for evaluation period"}
             
-            # Get corresponding actual results
-            prediction_ids = [p["prediction_id"] for p in predictions]
-            actual_results = await db.actual_results.find(
-                {"prediction_id": {"$in": prediction_ids}}
-            ).to_list(10000)
+            # Get corresponding actual results, one $in lookup per batch of predictions
+            actual_results = []
+            for start in range(0, len(predictions), CURSOR_BATCH_SIZE):
+                prediction_ids = [p["prediction_id"] for p in predictions[start:start + CURSOR_BATCH_SIZE]]
+                actual_results.extend(await collect_documents(
+                    db.actual_results, {"prediction_id": {"$in": prediction_ids}}, {"_id": 0}, scan_stats=scan_stats
+                ))
             
             if not actual_results:
                 return {"error": "No actual results found for evaluation"}
@@ -3970,7 +6278,7 @@ class ModelOptimizer:
             })
             
             print(f"📈 Model Performance: {outcome_accuracy*100:.1f}% accuracy, {home_goals_mae:.2f} goals MAE")
-            return metrics
+            return {**metrics, "documents_scanned": scan_stats.total}
             
         except Exception as e:
             print(f"Error evaluating model performance: {e}")
@@ -4017,10 +6325,6 @@ class ModelOptimizer:
     async def optimize_hyperparameters(self, optimization_method="grid_search"):
         """Optimize XGBoost hyperparameters based on historical performance"""
         try:
-            from sklearn.model_selection import GridSearchCV, RandomizedSearchCV
-            from sklearn.metrics import make_scorer, log_loss
-            import numpy as np
-            
             print("🔧 Starting hyperparameter optimization...")
             
             # Get training data
@@ -4029,64 +6333,10 @@ class ModelOptimizer:
             if training_features is None:
                 return {"error": "Insufficient data for optimization"}
             
-            # Define parameter grids
-            if optimization_method == "grid_search":
-                param_grid = {
-                    'n_estimators': [100, 200, 300],
-                    'max_depth': [3, 4, 5, 6],
-                    'learning_rate': [0.01, 0.1, 0.2],
-                    'subsample': [0.8, 0.9, 1.0],
-                    'colsample_bytree': [0.8, 0.9, 1.0]
-                }
-            else:  # random_search
-                param_grid = {
-                    'n_estimators': np.arange(50, 500, 50),
-                    'max_depth': np.arange(3, 10),
-                    'learning_rate': np.uniform(0.01, 0.3, 20),
-                    'subsample': np.uniform(0.7, 1.0, 10),
-                    'colsample_bytree': np.uniform(0.7, 1.0, 10)
-                }
-            
-            # Optimize each model type
-            optimization_results = {}
-            
-            for model_type in ['classifier', 'home_goals', 'away_goals', 'home_xg', 'away_xg']:
-                print(f"   Optimizing {model_type}...")
-                
-                # Get appropriate targets
-                y = training_targets[model_type]
-                
-                # Create XGBoost model
-                if model_type == 'classifier':
-                    from xgboost import XGBClassifier
-                    model = XGBClassifier(random_state=42, objective='multi:softprob')
-                    scoring = 'neg_log_loss'
-                else:
-                    from xgboost import XGBRegressor
-                    model = XGBRegressor(random_state=42)
-                    scoring = 'neg_mean_absolute_error'
-                
-                # Perform optimization
-                if optimization_method == "grid_search":
-                    search = GridSearchCV(
-                        model, param_grid, cv=5, scoring=scoring, 
-                        n_jobs=-1, verbose=1
-                    )
-                else:
-                    search = RandomizedSearchCV(
-                        model, param_grid, cv=5, scoring=scoring,
-                        n_jobs=-1, verbose=1, n_iter=50, random_state=42
-                    )
-                
-                search.fit(training_features, y)
-                
-                optimization_results[model_type] = {
-                    'best_params': search.best_params_,
-                    'best_score': search.best_score_,
-                    'improvement': abs(search.best_score_) - abs(search.cv_results_['mean_test_score'].mean())
-                }
-                
-                print(f"   ✅ {model_type}: Score {search.best_score_:.4f}")
+            # The searches are CPU-bound, so run them in the process pool
+            optimization_results = await execution_layer.run_in_process(
+                'hpo', search_xgboost_hyperparameters, training_features, training_targets, optimization_method
+            )
             
             # Store optimization results
             await db.model_optimization.insert_one({
@@ -4109,8 +6359,8 @@ class ModelOptimizer:
         """Prepare training data for optimization"""
         try:
             # Get historical data with actual results
-            predictions = await db.prediction_tracking.find({}).to_list(10000)
-            actual_results = await db.actual_results.find({}).to_list(10000)
+            predictions = await collect_documents(db.prediction_tracking, projection={"_id": 0})
+            actual_results = await collect_documents(db.actual_results, projection={"_id": 0})
             
             if len(predictions) < 100:  # Need sufficient data
                 return None, None
@@ -4161,8 +6411,18 @@ class ModelOptimizer:
 # Initialize Model Optimizer
 model_optimizer = ModelOptimizer()
 class MatchPredictor:
+    # team_stats fields totalled for calculate_team_averages
+    AVERAGE_FIELDS = [
+        'shots_total', 'shots_on_target', 'xg', 'fouls', 'fouls_drawn', 'penalties_awarded',
+        'penalty_attempts', 'penalty_goals', 'yellow_cards', 'red_cards', 'possession_pct',
+        'goals_scored', 'goals_conceded', 'points_earned', 'xg_per_shot', 'goals_per_xg',
+        'shot_accuracy', 'conversion_rate', 'goal_difference', 'clean_sheet', 'scored_goals'
+    ]
+    
     def __init__(self):
         self.default_config = PredictionConfig()
+        # "snapshot" (in-memory data snapshot) or "pipeline" (MongoDB aggregation)
+        self.averages_source = os.environ.get('TEAM_AVERAGES_SOURCE', 'snapshot')
     
     async def get_config(self, config_name: str = "default"):
         """Get prediction configuration by name"""
@@ -4203,25 +6463,9 @@ class MatchPredictor:
                 # Away team predicted 0 goals - home team very likely to win
                 return 80.0, 15.0, 5.0
         
-        # Calculate probabilities for different score combinations
-        # We'll calculate up to a reasonable maximum (e.g., 10 goals each)
-        max_goals = 10
-        
-        home_win_prob = 0.0
-        draw_prob = 0.0
-        away_win_prob = 0.0
-        
-        for home_score in range(max_goals + 1):
-            for away_score in range(max_goals + 1):
-                # Probability of this exact score
-                prob = poisson.pmf(home_score, home_lambda) * poisson.pmf(away_score, away_lambda)
-                
-                if home_score > away_score:
-                    home_win_prob += prob
-                elif home_score == away_score:
-                    draw_prob += prob
-                else:
-                    away_win_prob += prob
+        # Exact outcome probabilities over every possible score combination
+        home_win, draw, away_win = poisson_outcome_probabilities(home_lambda, away_lambda)
+        home_win_prob, draw_prob, away_win_prob = float(home_win[0]), float(draw[0]), float(away_win[0])
         
         # Convert to percentages and ensure they sum to 100%
         total_prob = home_win_prob + draw_prob + away_win_prob
@@ -4260,82 +6504,120 @@ class MatchPredictor:
         
         return home_win_percent, draw_percent, away_win_percent
     
-    async def calculate_team_averages(self, team_name, is_home, exclude_opponent=None, season_filter=None):
-        """Calculate comprehensive team averages with home/away context"""
-        # Build query for team stats
-        query = {
-            "team_name": team_name,
-            "is_home": is_home
-        }
+    async def calculate_team_averages(self, team_name, is_home, exclude_opponent=None, season_filter=None, source=None, as_of=None):
+        """Calculate comprehensive team averages with home/away context, optionally from matches played before as_of"""
+        if (source or self.averages_source) == "pipeline":
+            return await self.calculate_team_averages_pipeline(team_name, is_home, exclude_opponent, season_filter, as_of)
+        return await self.calculate_team_averages_snapshot(team_name, is_home, exclude_opponent, season_filter, as_of)
+    
+    async def calculate_team_averages_snapshot(self, team_name, is_home, exclude_opponent=None, season_filter=None, as_of=None):
+        """Team averages computed from the shared in-memory data snapshot"""
+        snapshot = await data_snapshot.get()
         
-        # Get team stats
-        team_stats = await db.team_stats.find(query).to_list(1000)
+        # Get team stats for this venue
+        team_stats = snapshot.team_stats_for(team_name, is_home)
         
-        if not team_stats:
-            return None
+        # Only matches dated strictly before as_of count (undated matches are excluded)
+        if as_of:
+            team_stats = team_stats[snapshot.match_dates_for_ids(team_stats['match_id']) < np.datetime64(as_of)]
         
-        # Always create match_ids list
-        match_ids = [stat['match_id'] for stat in team_stats]
+        if team_stats.empty:
+            return None
         
         # Get corresponding matches to filter by season/opponent if needed
         if exclude_opponent or season_filter:
-            match_query = {"match_id": {"$in": match_ids}}
+            matches = snapshot.matches_for_ids(team_stats['match_id'])
             if season_filter:
-                match_query["season"] = season_filter
+                matches = matches[DataSnapshot.column(matches, 'season', None) == season_filter]
             
-            matches = await db.matches.find(match_query).to_list(1000)
-            valid_match_ids = set()
-            
-            for match in matches:
-                # Exclude specific opponent if requested
-                if exclude_opponent:
-                    opponent = match['away_team'] if match['home_team'] == team_name else match['home_team']
-                    if opponent == exclude_opponent:
-                        continue
-                valid_match_ids.add(match['match_id'])
+            # Exclude specific opponent if requested
+            if exclude_opponent:
+                opponent = np.where(matches['home_team'] == team_name, matches['away_team'], matches['home_team'])
+                matches = matches[opponent != exclude_opponent]
             
             # Filter team stats by valid matches
-            team_stats = [stat for stat in team_stats if stat['match_id'] in valid_match_ids]
-            # Update match_ids after filtering
-            match_ids = [stat['match_id'] for stat in team_stats]
+            team_stats = team_stats[team_stats['match_id'].isin(matches['match_id'])]
         
-        if not team_stats:
+        if team_stats.empty:
             return None
         
-        # Calculate comprehensive averages from properly calculated team stats
-        total_matches = len(team_stats)
+        totals = {
+            field: float(DataSnapshot.column(team_stats, field).fillna(0).sum())
+            for field in self.AVERAGE_FIELDS
+        }
+        return self.build_team_averages(totals, len(team_stats))
+    
+    async def calculate_team_averages_pipeline(self, team_name, is_home, exclude_opponent=None, season_filter=None, as_of=None):
+        """Team averages computed server-side by a single MongoDB aggregation"""
+        pipeline = [{"$match": {"team_name": team_name, "is_home": is_home}}]
+        
+        # Join matches only when filtering by season/opponent/date
+        if exclude_opponent or season_filter or as_of:
+            match_filter = {}
+            if season_filter:
+                match_filter["season"] = season_filter
+            if as_of:
+                # ISO dates compare as strings; undated ("Unknown") matches are excluded
+                match_filter["match_date"] = {"$lt": as_of, "$regex": r"^\d{4}-\d{2}-\d{2}$"}
+            if exclude_opponent:
+                # Opponent is the away team when team_name played at home, otherwise the home team
+                match_filter["$nor"] = [
+                    {"home_team": team_name, "away_team": exclude_opponent},
+                    {"home_team": {"$eq": exclude_opponent, "$ne": team_name}}
+                ]
+            pipeline += [
+                {"$lookup": {"from": "matches", "localField": "match_id", "foreignField": "match_id", "as": "match"}},
+                {"$match": {"match": {"$elemMatch": match_filter}}}
+            ]
+        
+        # $sum skips missing and null fields, matching the fillna(0) totals
+        group = {"_id": None, "matches_count": {"$sum": 1}}
+        group.update({field: {"$sum": f"${field}"} for field in self.AVERAGE_FIELDS})
+        pipeline.append({"$group": group})
+        
+        result = await db.team_stats.aggregate(pipeline).to_list(1)
+        if not result or not result[0]['matches_count']:
+            return None
+        
+        totals = {field: float(result[0][field]) for field in self.AVERAGE_FIELDS}
+        return self.build_team_averages(totals, result[0]['matches_count'])
+    
+    def build_team_averages(self, totals, total_matches):
+        """Turn per-field team_stats totals into the team averages dict"""
+        def mean(field):
+            return totals[field] / total_matches
+        
         averages = {
-            'shots_total': sum(stat.get('shots_total', 0) for stat in team_stats) / total_matches,
-            'shots_on_target': sum(stat.get('shots_on_target', 0) for stat in team_stats) / total_matches,
-            'xg': sum(stat.get('xg', 0) for stat in team_stats) / total_matches,
-            'fouls': sum(stat.get('fouls', 0) for stat in team_stats) / total_matches,
-            'fouls_drawn': sum(stat.get('fouls_drawn', 0) for stat in team_stats) / total_matches,
-            'penalties_awarded': sum(stat.get('penalties_awarded', 0) for stat in team_stats) / total_matches,
-            'penalty_attempts': sum(stat.get('penalty_attempts', 0) for stat in team_stats) / total_matches,
-            'penalty_goals': sum(stat.get('penalty_goals', 0) for stat in team_stats) / total_matches,
-            'yellow_cards': sum(stat.get('yellow_cards', 0) for stat in team_stats) / total_matches,
-            'red_cards': sum(stat.get('red_cards', 0) for stat in team_stats) / total_matches,
-            'possession_pct': sum(stat.get('possession_pct', 0) for stat in team_stats) / total_matches,
-            'possession_percentage': sum(stat.get('possession_pct', 0) for stat in team_stats) / total_matches,
-            'fouls_committed': sum(stat.get('fouls', 0) for stat in team_stats) / total_matches,
-            'goals': sum(stat.get('goals_scored', 0) for stat in team_stats) / total_matches,
-            'goals_conceded': sum(stat.get('goals_conceded', 0) for stat in team_stats) / total_matches,
-            'points': sum(stat.get('points_earned', 0) for stat in team_stats) / total_matches,
+            'shots_total': mean('shots_total'),
+            'shots_on_target': mean('shots_on_target'),
+            'xg': mean('xg'),
+            'fouls': mean('fouls'),
+            'fouls_drawn': mean('fouls_drawn'),
+            'penalties_awarded': mean('penalties_awarded'),
+            'penalty_attempts': mean('penalty_attempts'),
+            'penalty_goals': mean('penalty_goals'),
+            'yellow_cards': mean('yellow_cards'),
+            'red_cards': mean('red_cards'),
+            'possession_pct': mean('possession_pct'),
+            'possession_percentage': mean('possession_pct'),
+            'fouls_committed': mean('fouls'),
+            'goals': mean('goals_scored'),
+            'goals_conceded': mean('goals_conceded'),
+            'points': mean('points_earned'),
             'matches_count': total_matches,
             
             # Add comprehensive derived statistics using ONLY actual database values
-            'xg_per_shot': sum(stat.get('xg_per_shot', 0) for stat in team_stats) / total_matches,
-            'goals_per_xg': sum(stat.get('goals_per_xg', 0) for stat in team_stats) / total_matches,
-            'shot_accuracy': sum(stat.get('shot_accuracy', 0) for stat in team_stats) / total_matches,
-            'conversion_rate': sum(stat.get('conversion_rate', 0) for stat in team_stats) / total_matches,
+            'xg_per_shot': mean('xg_per_shot'),
+            'goals_per_xg': mean('goals_per_xg'),
+            'shot_accuracy': mean('shot_accuracy'),
+            'conversion_rate': mean('conversion_rate'),
             'penalty_conversion_rate': (
-                sum(stat.get('penalty_goals', 0) for stat in team_stats) / 
-                sum(stat.get('penalty_attempts', 0) for stat in team_stats) 
-                if sum(stat.get('penalty_attempts', 0) for stat in team_stats) > 0 else 0
+                totals['penalty_goals'] / totals['penalty_attempts']
+                if totals['penalty_attempts'] > 0 else 0
             ),
-            'goal_difference': sum(stat.get('goal_difference', 0) for stat in team_stats) / total_matches,
-            'clean_sheets': sum(stat.get('clean_sheet', 0) for stat in team_stats) / total_matches * 100,  # Convert to percentage
-            'scoring_rate': sum(stat.get('scored_goals', 0) for stat in team_stats) / total_matches * 100,  # Convert to percentage
+            'goal_difference': mean('goal_difference'),
+            'clean_sheets': mean('clean_sheet') * 100,  # Convert to percentage
+            'scoring_rate': mean('scored_goals') * 100,  # Convert to percentage
         }
         
         # Calculate additional derived metrics
@@ -4397,7 +6679,17 @@ class MatchPredictor:
             return rbs_result['rbs_score'], rbs_result['confidence_level']
         return 0.0, 0.0
     
-    async def predict_match(self, home_team, away_team, referee_name, match_date=None, config_name="default"):
+    async def predict_match(self, home_team, away_team, referee_name, match_date=None, config_name="default", bypass_cache=False):
+        """Cached stats-based prediction; bypass_cache=True forces a fresh computation"""
+        return await prediction_cache.get_or_compute(
+            'match_predictor_predict_match',
+            {"home_team": home_team, "away_team": away_team, "referee": referee_name,
+             "match_date": match_date, "as_of": resolve_as_of(None, match_date), "config_name": config_name},
+            lambda: self._predict_match(home_team, away_team, referee_name, match_date, config_name),
+            bypass=bypass_cache
+        )
+    
+    async def _predict_match(self, home_team, away_team, referee_name, match_date=None, config_name="default"):
         """Enhanced prediction function using comprehensive team stats with configurable weights"""
         try:
             # Get configuration
@@ -4660,189 +6952,129 @@ class RegressionAnalyzer:
     async def prepare_match_data(self, include_rbs=True):
         """Prepare match data for regression analysis with comprehensive variables"""
         try:
-            # Get all matches and team stats
-            matches = await db.matches.find().to_list(10000)
-            team_stats = await db.team_stats.find().to_list(10000)
+            snapshot = await data_snapshot.get()
+            matches = snapshot.matches.reset_index(drop=True)
+            team_stats = snapshot.team_stats
             
             # Get RBS results if requested
             rbs_results = {}
             if include_rbs:
-                rbs_data = await db.rbs_results.find().to_list(10000)
+                rbs_data = await db.rbs_results.find({}, {"_id": 0, "team_name": 1, "referee": 1, "rbs_score": 1}).to_list(None)
                 for rbs in rbs_data:
                     key = f"{rbs['team_name']}_{rbs['referee']}"
-                    rbs_results[key] = rbs['rbs_score']
-            
-            # Get player stats for additional calculations
-            player_stats = await db.player_stats.find().to_list(50000)
-            
-            # Create a comprehensive dataset
-            match_data = []
+                    rbs_results[key] = rbs['rbs_score']
             
-            for match in matches:
-                # Get stats for both teams
-                home_stats = [s for s in team_stats if s['match_id'] == match['match_id'] and s['team_name'] == match['home_team'] and s['is_home']]
-                away_stats = [s for s in team_stats if s['match_id'] == match['match_id'] and s['team_name'] == match['away_team'] and not s['is_home']]
-                
-                if home_stats and away_stats:
-                    home_stat = home_stats[0]
-                    away_stat = away_stats[0]
-                    
-                    # Get player stats for this match
-                    home_players = [p for p in player_stats if p['match_id'] == match['match_id'] and p['team_name'] == match['home_team']]
-                    away_players = [p for p in player_stats if p['match_id'] == match['match_id'] and p['team_name'] == match['away_team']]
-                    
-                    # Calculate aggregated player stats
-                    home_player_xg = sum(p.get('xg', 0) for p in home_players)
-                    away_player_xg = sum(p.get('xg', 0) for p in away_players)
-                    home_fouls_drawn_players = sum(p.get('fouls_drawn', 0) for p in home_players)
-                    away_fouls_drawn_players = sum(p.get('fouls_drawn', 0) for p in away_players)
-                    home_penalties_players = sum(p.get('penalty_attempts', 0) for p in home_players)
-                    away_penalties_players = sum(p.get('penalty_attempts', 0) for p in away_players)
-                    
-                    # Use player stats for xG if available, otherwise team stats
-                    home_xg = home_player_xg if home_player_xg > 0 else home_stat.get('xg', 0)
-                    away_xg = away_player_xg if away_player_xg > 0 else away_stat.get('xg', 0)
-                    
-                    # Calculate xG difference
-                    home_xg_diff = home_xg - away_xg
-                    away_xg_diff = away_xg - home_xg
-                    
-                    # Calculate match results and points
-                    home_score = match['home_score']
-                    away_score = match['away_score']
-                    
-                    if home_score > away_score:
-                        home_result = 'W'
-                        away_result = 'L'
-                        home_points = 3
-                        away_points = 0
-                    elif home_score < away_score:
-                        home_result = 'L'
-                        away_result = 'W'
-                        home_points = 0
-                        away_points = 3
-                    else:
-                        home_result = 'D'
-                        away_result = 'D'
-                        home_points = 1
-                        away_points = 1
+            if matches.empty or team_stats.empty:
+                return pd.DataFrame()
+            
+            # First stat row per (match, team, venue) for both teams of every match
+            first_stats = team_stats.drop_duplicates(['match_id', 'team_name', 'is_home'], keep='first')
+            match_keys = matches[['match_id', 'home_team', 'away_team', 'referee']].copy()
+            match_keys['match_order'] = np.arange(len(matches))
+            home = match_keys.merge(
+                first_stats[first_stats['is_home']], left_on=['match_id', 'home_team'], right_on=['match_id', 'team_name'], how='inner'
+            ).set_index('match_order')
+            away = match_keys.merge(
+                first_stats[~first_stats['is_home']], left_on=['match_id', 'away_team'], right_on=['match_id', 'team_name'], how='inner'
+            ).set_index('match_order')
+            
+            # Only matches with stats for both teams
+            both = home.index.intersection(away.index).sort_values()
+            if len(both) == 0:
+                return pd.DataFrame()
+            home, away = home.loc[both], away.loc[both]
+            m = matches.iloc[both]
+            
+            # Calculate aggregated player stats
+            player_fields = ['xg', 'fouls_drawn', 'penalty_attempts']
+            home_players = snapshot.player_totals(m['match_id'], m['home_team'], player_fields)
+            away_players = snapshot.player_totals(m['match_id'], m['away_team'], player_fields)
+            
+            column = DataSnapshot.column
+            
+            # Use player stats for xG if available, otherwise team stats
+            home_xg = np.where(home_players[:, 0] > 0, home_players[:, 0], column(home, 'xg').to_numpy())
+            away_xg = np.where(away_players[:, 0] > 0, away_players[:, 0], column(away, 'xg').to_numpy())
+            
+            # Calculate match results and points
+            home_score = m['home_score'].to_numpy()
+            away_score = m['away_score'].to_numpy()
+            home_points = np.select([home_score > away_score, home_score < away_score], [3, 0], 1)
+            away_points = np.select([home_score > away_score, home_score < away_score], [0, 3], 1)
+            home_result = np.select([home_score > away_score, home_score < away_score], ['W', 'L'], 'D')
+            away_result = np.select([home_score > away_score, home_score < away_score], ['L', 'W'], 'D')
+            
+            def side_frame(team, opponent, stat, players, xg, opponent_xg, result, points, goals, conceded, is_home):
+                shots = column(stat, 'shots_total').to_numpy(dtype=float)
+                shots_on_target = column(stat, 'shots_on_target').to_numpy(dtype=float)
+                pen_attempts = column(stat, 'penalty_attempts').to_numpy(dtype=float)
+                pen_goals = column(stat, 'penalty_goals').to_numpy(dtype=float)
+                has_shots = np.nan_to_num(shots) > 0
+                safe_shots = np.where(has_shots, shots, 1)
+                safe_xg = np.where(xg > 0, xg, 1)
+                safe_attempts = np.where(np.nan_to_num(pen_attempts) > 0, pen_attempts, 1)
+                referees = m['referee'].to_numpy()
+                rbs_keys = [f"{t}_{r}" for t, r in zip(team, referees)]
+                return pd.DataFrame({
+                    'team': team,
+                    'opponent': opponent,
+                    'referee': referees,
+                    'match_result': result,
+                    'points_per_game': points,
+                    'season': column(m, 'season', 'Unknown').fillna('Unknown').to_numpy(),
+                    'competition': column(m, 'competition', 'Unknown').fillna('Unknown').to_numpy(),
                     
-                    # Get RBS scores
-                    home_rbs_key = f"{match['home_team']}_{match['referee']}"
-                    away_rbs_key = f"{match['away_team']}_{match['referee']}"
-                    home_rbs = rbs_results.get(home_rbs_key, 0.0)
-                    away_rbs = rbs_results.get(away_rbs_key, 0.0)
+                    # Basic RBS variables
+                    'yellow_cards': column(stat, 'yellow_cards').to_numpy(),
+                    'red_cards': column(stat, 'red_cards').to_numpy(),
+                    'fouls_committed': column(stat, 'fouls').to_numpy(),
+                    'fouls_drawn': np.where(players[:, 1] > 0, players[:, 1], column(stat, 'fouls_drawn').to_numpy()),
+                    'penalties_awarded': np.where(players[:, 2] > 0, players[:, 2], column(stat, 'penalties_awarded').to_numpy()),
+                    'xg_difference': xg - opponent_xg,
+                    'possession_percentage': column(stat, 'possession_pct').to_numpy(),
                     
-                    # Calculate additional advanced metrics
-                    home_fouls_drawn = home_fouls_drawn_players if home_fouls_drawn_players > 0 else home_stat.get('fouls_drawn', 0)
-                    away_fouls_drawn = away_fouls_drawn_players if away_fouls_drawn_players > 0 else away_stat.get('fouls_drawn', 0)
-                    home_penalties = home_penalties_players if home_penalties_players > 0 else home_stat.get('penalties_awarded', 0)
-                    away_penalties = away_penalties_players if away_penalties_players > 0 else away_stat.get('penalties_awarded', 0)
+                    # Match Predictor variables
+                    'xg': xg,
+                    'shots_total': shots,
+                    'shots_on_target': shots_on_target,
+                    'is_home': is_home,
                     
-                    # Add home team data
-                    home_data = {
-                        'team': match['home_team'],
-                        'opponent': match['away_team'],
-                        'referee': match['referee'],
-                        'match_result': home_result,
-                        'points_per_game': home_points,
-                        'season': match.get('season', 'Unknown'),
-                        'competition': match.get('competition', 'Unknown'),
-                        
-                        # Basic RBS variables
-                        'yellow_cards': home_stat.get('yellow_cards', 0),
-                        'red_cards': home_stat.get('red_cards', 0),
-                        'fouls_committed': home_stat.get('fouls', 0),
-                        'fouls_drawn': home_fouls_drawn,
-                        'penalties_awarded': home_penalties,
-                        'xg_difference': home_xg_diff,
-                        'possession_percentage': home_stat.get('possession_pct', 0),
-                        
-                        # Match Predictor variables
-                        'xg': home_xg,
-                        'shots_total': home_stat.get('shots_total', 0),
-                        'shots_on_target': home_stat.get('shots_on_target', 0),
-                        'is_home': True,
-                        
-                        # Advanced derived stats using ONLY actual database values
-                        'goals': home_score,
-                        'goals_conceded': away_score,
-                        'xg_per_shot': home_xg / home_stat.get('shots_total') if home_stat.get('shots_total', 0) > 0 else 0,
-                        'goals_per_xg': home_score / home_xg if home_xg > 0 else 0,
-                        'shot_accuracy': home_stat.get('shots_on_target', 0) / home_stat.get('shots_total') if home_stat.get('shots_total', 0) > 0 else 0,
-                        'conversion_rate': home_score / home_stat.get('shots_total') if home_stat.get('shots_total', 0) > 0 else 0,  # Fixed: goals per total shots
-                        'penalty_attempts': home_stat.get('penalty_attempts', 0),
-                        'penalty_goals': home_stat.get('penalty_goals', 0),
-                        'penalty_conversion_rate': home_stat.get('penalty_goals', 0) / home_stat.get('penalty_attempts') if home_stat.get('penalty_attempts', 0) > 0 else 0,
-                        
-                        # Additional variables for comprehensive analysis
-                        'rbs_score': home_rbs,
-                        'home_advantage': 1,  # Home team gets advantage
-                        'goal_difference': home_score - away_score,
-                        'clean_sheets_rate': 1 if away_score == 0 else 0,
-                        'scoring_rate': 1 if home_score > 0 else 0,
-                        
-                        # Team quality ratings (derived from averages)
-                        'team_quality_rating': home_points,  # Simple proxy for team quality
-                        'attacking_rating': home_xg,
-                        'defensive_rating': max(0, 3 - away_xg),  # Inverse of opponent xG
-                        'form_rating': home_points,  # Will be enhanced with recent form
-                    }
+                    # Advanced derived stats using ONLY actual database values
+                    'goals': goals,
+                    'goals_conceded': conceded,
+                    'xg_per_shot': np.where(has_shots, xg / safe_shots, 0),
+                    'goals_per_xg': np.where(xg > 0, goals / safe_xg, 0),
+                    'shot_accuracy': np.where(has_shots, shots_on_target / safe_shots, 0),
+                    'conversion_rate': np.where(has_shots, goals / safe_shots, 0),  # Fixed: goals per total shots
+                    'penalty_attempts': pen_attempts,
+                    'penalty_goals': pen_goals,
+                    'penalty_conversion_rate': np.where(np.nan_to_num(pen_attempts) > 0, pen_goals / safe_attempts, 0),
                     
-                    # Add away team data
-                    away_data = {
-                        'team': match['away_team'],
-                        'opponent': match['home_team'],
-                        'referee': match['referee'],
-                        'match_result': away_result,
-                        'points_per_game': away_points,
-                        'season': match.get('season', 'Unknown'),
-                        'competition': match.get('competition', 'Unknown'),
-                        
-                        # Basic RBS variables
-                        'yellow_cards': away_stat.get('yellow_cards', 0),
-                        'red_cards': away_stat.get('red_cards', 0),
-                        'fouls_committed': away_stat.get('fouls', 0),
-                        'fouls_drawn': away_fouls_drawn,
-                        'penalties_awarded': away_penalties,
-                        'xg_difference': away_xg_diff,
-                        'possession_percentage': away_stat.get('possession_pct', 0),
-                        
-                        # Match Predictor variables
-                        'xg': away_xg,
-                        'shots_total': away_stat.get('shots_total', 0),
-                        'shots_on_target': away_stat.get('shots_on_target', 0),
-                        'is_home': False,
-                        
-                        # Advanced derived stats using ONLY actual database values
-                        'goals': away_score,
-                        'goals_conceded': home_score,
-                        'xg_per_shot': away_xg / away_stat.get('shots_total') if away_stat.get('shots_total', 0) > 0 else 0,
-                        'goals_per_xg': away_score / away_xg if away_xg > 0 else 0,
-                        'shot_accuracy': away_stat.get('shots_on_target', 0) / away_stat.get('shots_total') if away_stat.get('shots_total', 0) > 0 else 0,
-                        'conversion_rate': away_score / away_stat.get('shots_total') if away_stat.get('shots_total', 0) > 0 else 0,  # Fixed: goals per total shots
-                        'penalty_attempts': away_stat.get('penalty_attempts', 0),
-                        'penalty_goals': away_stat.get('penalty_goals', 0),
-                        'penalty_conversion_rate': away_stat.get('penalty_goals', 0) / away_stat.get('penalty_attempts') if away_stat.get('penalty_attempts', 0) > 0 else 0,
-                        
-                        # Additional variables for comprehensive analysis
-                        'rbs_score': away_rbs,
-                        'home_advantage': 0,  # Away team gets no home advantage
-                        'goal_difference': away_score - home_score,
-                        'clean_sheets_rate': 1 if home_score == 0 else 0,
-                        'scoring_rate': 1 if away_score > 0 else 0,
-                        
-                        # Team quality ratings (derived from averages)
-                        'team_quality_rating': away_points,  # Simple proxy for team quality
-                        'attacking_rating': away_xg,
-                        'defensive_rating': max(0, 3 - home_xg),  # Inverse of opponent xG
-                        'form_rating': away_points,  # Will be enhanced with recent form
-                    }
+                    # Additional variables for comprehensive analysis
+                    'rbs_score': [rbs_results.get(key, 0.0) for key in rbs_keys],
+                    'home_advantage': 1 if is_home else 0,
+                    'goal_difference': goals - conceded,
+                    'clean_sheets_rate': (conceded == 0).astype(int),
+                    'scoring_rate': (goals > 0).astype(int),
                     
-                    match_data.append(home_data)
-                    match_data.append(away_data)
+                    # Team quality ratings (derived from averages)
+                    'team_quality_rating': points,  # Simple proxy for team quality
+                    'attacking_rating': xg,
+                    'defensive_rating': np.maximum(0, 3 - opponent_xg),  # Inverse of opponent xG
+                    'form_rating': points,  # Will be enhanced with recent form
+                }, index=np.arange(len(m)) * 2 + (0 if is_home else 1))
+            
+            home_data = side_frame(
+                m['home_team'].to_numpy(), m['away_team'].to_numpy(), home, home_players,
+                home_xg, away_xg, home_result, home_points, home_score, away_score, True
+            )
+            away_data = side_frame(
+                m['away_team'].to_numpy(), m['home_team'].to_numpy(), away, away_players,
+                away_xg, home_xg, away_result, away_points, away_score, home_score, False
+            )
             
-            return pd.DataFrame(match_data)
+            # Interleave home and away rows per match, as before
+            return pd.concat([home_data, away_data]).sort_index().reset_index(drop=True)
         
         except Exception as e:
             raise Exception(f"Error preparing match data: {str(e)}")
@@ -5201,201 +7433,587 @@ class RegressionAnalyzer:
 # Initialize Regression Analyzer
 regression_analyzer = RegressionAnalyzer()
 
+# Column schemas for uploaded files, mirroring the Match/TeamStats/PlayerStats models.
+# Required columns must exist in the file and be non-blank on every row; the typed
+# columns are optional and fall back to the given default when blank or absent.
+INGEST_SCHEMAS = {
+    "matches": {
+        "model": Match,
+        "required": ["match_id", "home_team", "away_team"],
+        "text": {"referee": "Unknown", "result": "Unknown", "season": "Unknown", "competition": "Unknown", "match_date": "Unknown"},
+        "int": {"home_score": 0, "away_score": 0},
+        "float": {},
+        "bool": {}
+    },
+    "team_stats": {
+        "model": TeamStats,
+        "required": ["match_id", "team_name"],
+        "text": {},
+        "int": {
+            "yellow_cards": 0, "red_cards": 0, "fouls": 0, "shots_total": 0,
+            "shots_on_target": 0, "fouls_drawn": 0, "penalties_awarded": 0
+        },
+        "float": {"possession_pct": 0.0, "xg": 0.0},
+        "bool": {"is_home": False}
+    },
+    "player_stats": {
+        "model": PlayerStats,
+        "required": ["match_id", "player_name", "team_name"],
+        "text": {},
+        "int": {
+            "goals": 0, "assists": 0, "yellow_cards": 0, "fouls_committed": 0,
+            "fouls_drawn": 0, "penalty_attempts": 0, "penalty_goals": 0
+        },
+        "float": {"xg": 0.0},
+        "bool": {"is_home": False}
+    }
+}
+
+BOOL_TOKENS = {
+    "true": True, "t": True, "yes": True, "y": True, "1": True, "1.0": True, "home": True,
+    "false": False, "f": False, "no": False, "n": False, "0": False, "0.0": False, "away": False
+}
+
+MAX_REPORTED_ROW_ERRORS = 100
+
+def blank_mask(series: pd.Series) -> pd.Series:
+    """True where a column value is missing or an empty string"""
+    mask = series.isna()
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        mask |= series.astype(str).str.strip() == ''
+    return mask
+
+def required_text(series: pd.Series):
+    """Stripped text values of a required column and the mask of rows where it is blank"""
+    values = series.astype(str).str.strip()
+    return values, series.isna() | (values == '')
+
+def coerce_records(df: pd.DataFrame, record_type: str, dataset_name: str = "default"):
+    """Validate and coerce an uploaded frame column by column.
+
+    Returns (records, row_errors). Rows with blank required values or unparseable
+    typed values are left out of records and reported once each in row_errors,
+    numbered from 1 by data row.
+    """
+    schema = INGEST_SCHEMAS[record_type]
+    df = df.rename(columns=lambda column: str(column).strip())
+
+    missing_columns = [column for column in schema["required"] if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    columns = {}
+    problems = []  # (column, invalid mask, message)
+
+    for column in schema["required"]:
+        values, blank = required_text(df[column])
+        problems.append((column, blank, "is required"))
+        columns[column] = values
+
+    for column, default in schema["text"].items():
+        if column in df.columns:
+            values = df[column].astype(str).str.strip()
+            columns[column] = values.where(df[column].notna() & (values != ''), default)
+        else:
+            columns[column] = default
+
+    for kind in ("int", "float"):
+        for column, default in schema[kind].items():
+            if column not in df.columns:
+                columns[column] = default
+                continue
+            blank = blank_mask(df[column])
+            numeric = pd.to_numeric(df[column], errors="coerce")
+            invalid = (numeric.isna() | np.isinf(numeric)) & ~blank
+            problems.append((column, invalid, f"is not a valid {'integer' if kind == 'int' else 'number'}"))
+            numeric = numeric.where(~invalid & ~blank, default)
+            # Truncate toward zero like int(float(value))
+            columns[column] = np.trunc(numeric).astype("int64") if kind == "int" else numeric.astype("float64")
+
+    for column, default in schema["bool"].items():
+        if column not in df.columns:
+            columns[column] = default
+            continue
+        series = df[column]
+        blank = blank_mask(series)
+        if pd.api.types.is_bool_dtype(series):
+            parsed = series.fillna(default)
+            invalid = pd.Series(False, index=df.index)
+        elif pd.api.types.is_numeric_dtype(series):
+            parsed = series.fillna(0) != 0
+            invalid = pd.Series(False, index=df.index)
+        else:
+            parsed = series.astype(str).str.strip().str.lower().map(BOOL_TOKENS)
+            invalid = parsed.isna() & ~blank
+        problems.append((column, invalid, "is not a valid boolean"))
+        columns[column] = parsed.where(~blank & ~invalid, default).astype(bool)
+
+    # Collect per-row errors from the whole-column checks
+    rejected = pd.Series(False, index=df.index)
+    messages = defaultdict(list)
+    for column, mask, message in problems:
+        if not mask.any():
+            continue
+        rejected |= mask
+        values = df[column]
+        for index in mask.index[mask.to_numpy()]:
+            value = values.at[index]
+            shown = "" if pd.isna(value) else f" (got '{value}')"
+            messages[index].append(f"{column} {message}{shown}")
+
+    row_errors = [
+        {"row": int(index) + 1, "errors": messages[index]}
+        for index in sorted(messages)
+    ]
+
+    # Assemble documents in model field order from native Python column lists,
+    # with model defaults for fields not read from the file
+    keep = ~rejected.to_numpy()
+    count = int(keep.sum())
+    field_names = list(schema["model"].model_fields)
+    field_values = []
+    for field_name in field_names:
+        if field_name == "id":
+            field_values.append([str(uuid.uuid4()) for _ in range(count)])
+        elif field_name == "dataset_name":
+            field_values.append([dataset_name] * count)
+        elif isinstance(columns.get(field_name), pd.Series):
+            field_values.append(columns[field_name].to_numpy()[keep].tolist())
+        else:
+            default = columns.get(field_name, schema["model"].model_fields[field_name].default)
+            field_values.append([default] * count)
+
+    records = [dict(zip(field_names, values)) for values in zip(*field_values)]
+    return records, row_errors
+
+PARQUET_CONTENT_TYPES = {"application/vnd.apache.parquet", "application/parquet", "application/x-parquet"}
+ARROW_FILE_CONTENT_TYPES = {"application/vnd.apache.arrow.file", "application/x-arrow", "application/arrow"}
+ARROW_STREAM_CONTENT_TYPES = {"application/vnd.apache.arrow.stream"}
+
+def detect_upload_format(head: bytes, content_type: Optional[str] = None) -> str:
+    """Identify an upload as csv, parquet, arrow (IPC file) or arrow_stream from its magic bytes or content type"""
+    if head[:4] == b"PAR1":
+        return "parquet"
+    if head[:6] == b"ARROW1":
+        return "arrow"
+    if head[:4] == b"\xff\xff\xff\xff":
+        return "arrow_stream"
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in PARQUET_CONTENT_TYPES:
+        return "parquet"
+    if content_type in ARROW_FILE_CONTENT_TYPES:
+        return "arrow"
+    if content_type in ARROW_STREAM_CONTENT_TYPES:
+        return "arrow_stream"
+    return "csv"
+
+def arrow_source(source):
+    """Zero-copy Arrow input over a spooled file path or in-memory upload bytes"""
+    return pa.memory_map(source) if isinstance(source, str) else pa.BufferReader(source)
+
+def open_arrow_reader(source, upload_format):
+    if upload_format == "parquet":
+        return pq.ParquetFile(arrow_source(source))
+    if upload_format == "arrow":
+        return pa.ipc.open_file(arrow_source(source))
+    return pa.ipc.open_stream(arrow_source(source))
+
+def upload_column_names(source, upload_format: str) -> List[str]:
+    """Column names of an upload without reading its rows"""
+    if upload_format == "csv":
+        return list(pd.read_csv(source if isinstance(source, str) else io.BytesIO(source), nrows=0).columns)
+    reader = open_arrow_reader(source, upload_format)
+    return list(reader.schema_arrow.names if upload_format == "parquet" else reader.schema.names)
+
+def iter_upload_frames(source, upload_format: str, batch_size: int, columns=None):
+    """Yield DataFrames of at most batch_size rows from a CSV, Parquet or Arrow IPC upload.
+
+    Frames are indexed by row position in the file so row errors stay numbered across
+    batches. Arrow batches are sliced and converted without copying the file buffer.
+    """
+    wanted = (lambda name: str(name).strip() in columns) if columns else None
+    if upload_format == "csv":
+        yield from pd.read_csv(source if isinstance(source, str) else io.BytesIO(source),
+                               chunksize=batch_size, usecols=wanted)
+        return
+
+    reader = open_arrow_reader(source, upload_format)
+    if upload_format == "parquet":
+        names = [name for name in reader.schema_arrow.names if wanted is None or wanted(name)]
+        batches = reader.iter_batches(batch_size=batch_size, columns=names)
+    elif upload_format == "arrow":
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = reader
+
+    offset = 0
+    for batch in batches:
+        if wanted is not None:
+            batch = batch.select([name for name in batch.schema.names if wanted(name)])
+        for start in range(0, batch.num_rows, batch_size):
+            frame = batch.slice(start, batch_size).to_pandas()
+            frame.index = pd.RangeIndex(offset, offset + len(frame))
+            offset += len(frame)
+            yield frame
+
+def read_upload_frame(contents: bytes, content_type: Optional[str] = None) -> pd.DataFrame:
+    """Parse uploaded CSV, Parquet or Arrow IPC bytes into a DataFrame"""
+    upload_format = detect_upload_format(contents[:8], content_type)
+    if upload_format == "csv":
+        return pd.read_csv(io.BytesIO(contents))
+    reader = open_arrow_reader(contents, upload_format)
+    table = reader.read() if upload_format == "parquet" else reader.read_all()
+    return table.to_pandas()
+
+def upload_summary(label: str, processed: int, row_errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Common UploadResponse fields for an ingest that may have rejected rows"""
+    message = f"Successfully uploaded {processed} {label}"
+    if row_errors:
+        message += f" ({len(row_errors)} rows rejected)"
+    return {
+        "success": processed > 0 or not row_errors,
+        "message": message,
+        "records_processed": processed,
+        "rows_rejected": len(row_errors),
+        "row_errors": row_errors[:MAX_REPORTED_ROW_ERRORS]
+    }
+
+UPLOAD_READ_CHUNK_BYTES = int(os.environ.get('UPLOAD_READ_CHUNK_BYTES', 1024 * 1024))
+STREAM_INGEST_BATCH_SIZE = int(os.environ.get('STREAM_INGEST_BATCH_SIZE', 5000))
+
+class IngestJobRegistry:
+    """In-memory progress records for streaming uploads, most recent jobs first"""
+
+    def __init__(self, max_jobs=100):
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.tasks = {}
+
+    def create(self, record_type, dataset_name, filename, batch_size):
+        job_id = str(uuid.uuid4())
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "record_type": record_type,
+            "dataset_name": dataset_name,
+            "filename": filename,
+            "batch_size": batch_size,
+            "format": None,
+            "status": "queued",
+            "rows_parsed": 0,
+            "rows_inserted": 0,
+            "rows_rejected": 0,
+            "batches_inserted": 0,
+            "row_errors": [],
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        # Forget the oldest finished jobs beyond the limit
+        for old_id in list(self.jobs)[:-self.max_jobs]:
+            if self.jobs[old_id]["status"] in ("completed", "failed"):
+                del self.jobs[old_id]
+        return self.jobs[job_id]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def start(self, job, coroutine):
+        """Run an ingest coroutine in the background, holding a reference until it finishes"""
+        task = asyncio.create_task(coroutine)
+        self.tasks[job["job_id"]] = task
+        task.add_done_callback(lambda _: self.tasks.pop(job["job_id"], None))
+        return task
+
+# Initialize ingest job registry
+ingest_jobs = IngestJobRegistry()
+
+async def spool_upload(file: UploadFile) -> str:
+    """Copy an upload to a temporary file in fixed-size chunks and return its path"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".upload") as spool:
+        while True:
+            chunk = await file.read(UPLOAD_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            await asyncio.to_thread(spool.write, chunk)
+        return spool.name
+
+def upload_match_ids(path: str, upload_format: str, batch_size: int) -> set:
+    """match_id values of a spooled upload, read in the same batches and coerced the same way as coerce_records"""
+    match_ids = set()
+    for chunk in iter_upload_frames(path, upload_format, batch_size, columns={"match_id"}):
+        if chunk.shape[1]:
+            values, blank = required_text(chunk.iloc[:, 0])
+            match_ids.update(values[~blank.to_numpy()])
+    return match_ids
+
+def next_ingest_batch(frames, record_type: str, dataset_name: str):
+    """Parse and validate the next batch of an upload; (rows parsed, records, row errors), or None at the end"""
+    chunk = next(frames, None)
+    if chunk is None:
+        return None
+    records, row_errors = coerce_records(chunk, record_type, dataset_name)
+    return len(chunk), records, row_errors
+
+async def stream_ingest(job, path: str):
+    """Parse a spooled upload in batches, inserting each validated batch as it goes"""
+    record_type = job["record_type"]
+    collection = db[record_type]
+    job["status"] = "running"
+    job["started_at"] = datetime.now().isoformat()
+    rbs_before = decay_before = None
+    match_ids = set()
+    frames = None
+    try:
+        # RBS and team decay aggregates need the pre-upload rows of every touched match, so collect the ids first
+        match_ids = await asyncio.to_thread(upload_match_ids, path, job["format"], job["batch_size"])
+        rbs_before = await rbs_aggregate_store.capture(match_ids)
+        decay_before = await team_decay_store.capture(match_ids)
+
+        # Parsing and validation run in a worker thread; only the inserts run on the event loop
+        frames = iter_upload_frames(path, job["format"], job["batch_size"])
+        while True:
+            batch = await asyncio.to_thread(next_ingest_batch, frames, record_type, job["dataset_name"])
+            if batch is None:
+                break
+            rows_parsed, records, row_errors = batch
+            job["rows_parsed"] += rows_parsed
+            job["rows_rejected"] += len(row_errors)
+            room = MAX_REPORTED_ROW_ERRORS - len(job["row_errors"])
+            if room > 0:
+                job["row_errors"].extend(row_errors[:room])
+            if records:
+                await collection.insert_many(records)
+                job["rows_inserted"] += len(records)
+                job["batches_inserted"] += 1
+
+        job["status"] = "completed"
+        print(f"📥 Streamed {job['rows_inserted']} {record_type} rows ({job['rows_rejected']} rejected)")
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        print(f"❌ Streaming upload {job['job_id']} failed: {e}")
+    finally:
+        if frames is not None:
+            frames.close()
+        job["finished_at"] = datetime.now().isoformat()
+        if job["rows_inserted"]:
+            reason = f"{record_type} streamed"
+            data_snapshot.invalidate(reason)
+            await rbs_aggregate_store.apply_changes(rbs_before, match_ids, reason)
+            await team_decay_store.apply_changes(decay_before, match_ids, reason)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "Soccer Referee Bias Analysis Platform API"}
 
+@api_router.get("/execution-status")
+async def get_execution_status():
+    """Concurrency limits and in-flight work for the CPU-bound execution layer"""
+    return {"success": True, **execution_layer.status()}
+
+@api_router.get("/prediction-cache/stats")
+async def get_prediction_cache_stats():
+    """Hit/miss/eviction counters and size of the prediction cache, plus request coalescing counters"""
+    return {
+        "success": True,
+        **prediction_cache.stats(),
+        "model_version": ml_predictor.model_version,
+        "coalescing": request_coalescer.stats()
+    }
+
+@api_router.post("/prediction-cache/clear")
+async def clear_prediction_cache():
+    """Drop every cached prediction"""
+    cleared = prediction_cache.clear()
+    return {"success": True, "message": f"Cleared {cleared} cached predictions", "cleared": cleared}
+
+@api_router.get("/jobs")
+async def list_jobs(job_type: Optional[str] = None, status: Optional[str] = None, limit: int = 50):
+    """Most recent background jobs, optionally filtered by type and status"""
+    try:
+        jobs = await job_manager.list_jobs(job_type, status, min(max(limit, 1), 500))
+        return {"success": True, "jobs": jobs}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing jobs: {str(e)}")
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, stage, progress and result of a background job"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@api_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events with the job record on every change, ending when the job finishes"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    async def job_events():
+        last_update = None
+        last_sent = datetime.now()
+        while True:
+            job = await job_manager.get(job_id)
+            if job is None:
+                return
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                last_sent = datetime.now()
+                event = "end" if job["status"] in JOB_TERMINAL_STATUSES else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+            if job["status"] in JOB_TERMINAL_STATUSES:
+                return
+            if (datetime.now() - last_sent).total_seconds() >= 15:
+                # Keep proxies from closing an idle stream
+                last_sent = datetime.now()
+                yield ": keepalive\n\n"
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+    
+    return StreamingResponse(
+        job_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Request cancellation of a queued or running job"""
+    job = await job_manager.cancel(job_id)
+    if job is None:
+        existing = await job_manager.get(job_id)
+        if existing is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {existing['status']}")
+    return {"success": True, "job_id": job_id, "cancel_requested": True}
+
 @api_router.post("/upload/matches", response_model=UploadResponse)
 async def upload_matches(file: UploadFile = File(...)):
-    """Upload matches CSV file"""
+    """Upload matches file (CSV, Parquet or Arrow IPC)"""
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # No longer clearing existing matches - we'll append instead
-        # await db.matches.delete_many({})
-        
-        # Replace NaN values with appropriate defaults
-        df = df.fillna({
-            'home_score': 0,
-            'away_score': 0,
-            'result': 'Unknown',
-            'season': 'Unknown',
-            'competition': 'Unknown',
-            'match_date': 'Unknown'
-        })
-        
-        # Process and insert matches
-        matches = []
-        for _, row in df.iterrows():
-            # Helper function to safely convert to int
-            def safe_int(value, default=0):
-                try:
-                    if pd.isna(value) or value == '' or value is None:
-                        return default
-                    return int(float(value))
-                except (ValueError, TypeError):
-                    return default
-            
-            match = Match(
-                match_id=str(row['match_id']),
-                referee=str(row['referee']),
-                home_team=str(row['home_team']),
-                away_team=str(row['away_team']),
-                home_score=safe_int(row['home_score']),
-                away_score=safe_int(row['away_score']),
-                result=str(row['result']),
-                season=str(row['season']),
-                competition=str(row['competition']),
-                match_date=str(row['match_date']),
-                dataset_name="default"  # Default dataset for single uploads
-            )
-            matches.append(match.dict())
-        
-        await db.matches.insert_many(matches)
-        
-        return UploadResponse(
-            success=True,
-            message=f"Successfully uploaded {len(matches)} matches",
-            records_processed=len(matches)
-        )
+        df = read_upload_frame(await file.read(), file.content_type)
+        matches, row_errors = coerce_records(df, "matches")
+        del df
+        
+        # Appends to existing matches; rejected rows are reported rather than failing the file
+        if matches:
+            match_ids = {match['match_id'] for match in matches}
+            rbs_before = await rbs_aggregate_store.capture(match_ids)
+            decay_before = await team_decay_store.capture(match_ids)
+            await db.matches.insert_many(matches)
+            data_snapshot.invalidate("matches uploaded")
+            await rbs_aggregate_store.apply_changes(rbs_before, match_ids, "matches uploaded")
+            await team_decay_store.apply_changes(decay_before, match_ids, "matches uploaded")
+        
+        return UploadResponse(**upload_summary("matches", len(matches), row_errors))
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
 @api_router.post("/upload/team-stats", response_model=UploadResponse)
 async def upload_team_stats(file: UploadFile = File(...)):
-    """Upload team stats CSV file"""
+    """Upload team stats file (CSV, Parquet or Arrow IPC)"""
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # No longer clearing existing team stats - we'll append instead
-        # await db.team_stats.delete_many({})
-        
-        # Replace NaN values with 0
-        df = df.fillna(0)
-        
-        # Process and insert team stats
-        team_stats = []
-        for _, row in df.iterrows():
-            # Helper function to safely convert to int
-            def safe_int(value, default=0):
-                try:
-                    if pd.isna(value) or value == '' or value is None:
-                        return default
-                    return int(float(value))
-                except (ValueError, TypeError):
-                    return default
-            
-            # Helper function to safely convert to float
-            def safe_float(value, default=0.0):
-                try:
-                    if pd.isna(value) or value == '' or value is None:
-                        return default
-                    return float(value)
-                except (ValueError, TypeError):
-                    return default
-            
-            stats = TeamStats(
-                match_id=str(row['match_id']),
-                team_name=str(row['team_name']),
-                is_home=bool(row.get('is_home', False)),
-                yellow_cards=safe_int(row.get('yellow_cards', 0)),
-                red_cards=safe_int(row.get('red_cards', 0)),
-                fouls=safe_int(row.get('fouls', 0)),
-                possession_pct=safe_float(row.get('possession_pct', 0)),
-                shots_total=safe_int(row.get('shots_total', 0)),
-                shots_on_target=safe_int(row.get('shots_on_target', 0)),
-                fouls_drawn=safe_int(row.get('fouls_drawn', 0)),
-                penalties_awarded=safe_int(row.get('penalties_awarded', 0)),
-                xg=safe_float(row.get('xg', 0)),
-                dataset_name="default"  # Default dataset for single uploads
-            )
-            team_stats.append(stats.dict())
-        
-        await db.team_stats.insert_many(team_stats)
+        df = read_upload_frame(await file.read(), file.content_type)
+        team_stats, row_errors = coerce_records(df, "team_stats")
+        del df
         
-        return UploadResponse(
-            success=True,
-            message=f"Successfully uploaded {len(team_stats)} team stat records",
-            records_processed=len(team_stats)
-        )
+        if team_stats:
+            match_ids = {stat['match_id'] for stat in team_stats}
+            rbs_before = await rbs_aggregate_store.capture(match_ids)
+            decay_before = await team_decay_store.capture(match_ids)
+            await db.team_stats.insert_many(team_stats)
+            data_snapshot.invalidate("team stats uploaded")
+            await rbs_aggregate_store.apply_changes(rbs_before, match_ids, "team stats uploaded")
+            await team_decay_store.apply_changes(decay_before, match_ids, "team stats uploaded")
+        
+        return UploadResponse(**upload_summary("team stat records", len(team_stats), row_errors))
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
 @api_router.post("/upload/player-stats", response_model=UploadResponse)
 async def upload_player_stats(file: UploadFile = File(...)):
-    """Upload player stats CSV file"""
+    """Upload player stats file (CSV, Parquet or Arrow IPC)"""
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        
-        # No longer clearing existing player stats - we'll append instead
-        # await db.player_stats.delete_many({})
+        df = read_upload_frame(await file.read(), file.content_type)
+        player_stats, row_errors = coerce_records(df, "player_stats")
+        del df
         
-        # Replace NaN values with 0
-        df = df.fillna(0)
-        
-        # Process and insert player stats in batches (for large files)
+        # Insert in batches (for large files)
         batch_size = 1000
         total_processed = 0
-        
-        for i in range(0, len(df), batch_size):
-            batch_df = df.iloc[i:i+batch_size]
-            player_stats_batch = []
-            
-            for _, row in batch_df.iterrows():
-                # Helper function to safely convert to int
-                def safe_int(value, default=0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return int(float(value))
-                    except (ValueError, TypeError):
-                        return default
-                
-                # Helper function to safely convert to float
-                def safe_float(value, default=0.0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-                
-                stats = PlayerStats(
-                    match_id=str(row['match_id']),
-                    player_name=str(row['player_name']),
-                    team_name=str(row['team_name']),
-                    is_home=bool(row.get('is_home', False)),
-                    goals=safe_int(row.get('goals', 0)),
-                    assists=safe_int(row.get('assists', 0)),
-                    yellow_cards=safe_int(row.get('yellow_cards', 0)),
-                    fouls_committed=safe_int(row.get('fouls_committed', 0)),
-                    fouls_drawn=safe_int(row.get('fouls_drawn', 0)),
-                    xg=safe_float(row.get('xg', 0)),
-                    penalty_attempts=safe_int(row.get('penalty_attempts', 0)),
-                    penalty_goals=safe_int(row.get('penalty_goals', 0)),
-                    dataset_name="default"  # Default dataset for single uploads
-                )
-                player_stats_batch.append(stats.dict())
-            
-            if player_stats_batch:
-                await db.player_stats.insert_many(player_stats_batch)
-                total_processed += len(player_stats_batch)
-        
-        return UploadResponse(
-            success=True,
-            message=f"Successfully uploaded {total_processed} player stat records with penalty data",
-            records_processed=total_processed
-        )
+        if player_stats:
+            match_ids = {stat['match_id'] for stat in player_stats}
+            rbs_before = await rbs_aggregate_store.capture(match_ids)
+            for i in range(0, len(player_stats), batch_size):
+                batch = player_stats[i:i + batch_size]
+                await db.player_stats.insert_many(batch)
+                total_processed += len(batch)
+            data_snapshot.invalidate("player stats uploaded")
+            await rbs_aggregate_store.apply_changes(rbs_before, match_ids, "player stats uploaded")
+        
+        return UploadResponse(**upload_summary("player stat records with penalty data", total_processed, row_errors))
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
+@api_router.post("/upload/stream/{record_type}")
+async def upload_stream(record_type: str, file: UploadFile = File(...), dataset_name: str = "default",
+                        batch_size: int = STREAM_INGEST_BATCH_SIZE):
+    """Start a streaming upload of a large matches, team-stats or player-stats file.
+
+    Accepts CSV, Parquet or Arrow IPC. The file is spooled to disk in chunks and ingested in the background in batches
+    of batch_size rows; poll /upload/jobs/{job_id} for progress.
+    """
+    record_type = record_type.replace('-', '_')
+    if record_type not in INGEST_SCHEMAS:
+        raise HTTPException(status_code=400, detail=f"Unknown record type '{record_type}'. Use one of: matches, team-stats, player-stats")
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be positive")
+
+    job = ingest_jobs.create(record_type, dataset_name, file.filename, batch_size)
+    path = None
+    try:
+        path = await spool_upload(file)
+
+        with open(path, 'rb') as spooled:
+            job["format"] = detect_upload_format(spooled.read(8), file.content_type)
+
+        # Validate the header before going to the background so bad files fail fast
+        columns = upload_column_names(path, job["format"])
+        coerce_records(pd.DataFrame(columns=columns), record_type, dataset_name)
+
+        ingest_jobs.start(job, stream_ingest(job, path))
+        return {
+            "success": True,
+            "job_id": job["job_id"],
+            "status_url": f"/api/upload/jobs/{job['job_id']}"
+        }
+
+    except Exception as e:
+        if path:
+            os.remove(path)
+        job["status"] = "failed"
+        job["error"] = str(e)
+        job["finished_at"] = datetime.now().isoformat()
+        raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
+
+@api_router.get("/upload/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Progress of a streaming upload: rows parsed, inserted and rejected"""
+    job = ingest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Upload job '{job_id}' not found")
+    return {"success": True, "job": job}
+
 # Multi-Dataset Upload Endpoints
 
 @api_router.post("/datasets", response_model=DatasetListResponse)
@@ -5474,11 +8092,21 @@ async def delete_dataset(dataset_name: str):
         if matches_count == 0:
             raise HTTPException(status_code=404, detail=f"Dataset '{dataset_name}' not found")
         
+        # Matches touched by this dataset, for the incremental RBS and team decay updates
+        match_ids = set()
+        for collection in (db.matches, db.team_stats, db.player_stats):
+            match_ids.update(await collection.distinct("match_id", {"dataset_name": dataset_name}))
+        rbs_before = await rbs_aggregate_store.capture(match_ids)
+        decay_before = await team_decay_store.capture(match_ids)
+        
         # Delete all records for this dataset
         matches_deleted = await db.matches.delete_many({"dataset_name": dataset_name})
         team_stats_deleted = await db.team_stats.delete_many({"dataset_name": dataset_name})
         player_stats_deleted = await db.player_stats.delete_many({"dataset_name": dataset_name})
         rbs_deleted = await db.rbs_results.delete_many({"dataset_name": dataset_name}) if hasattr(db, 'rbs_results') else None
+        data_snapshot.invalidate(f"dataset '{dataset_name}' deleted")
+        await rbs_aggregate_store.apply_changes(rbs_before, match_ids, f"dataset '{dataset_name}' deleted")
+        await team_decay_store.apply_changes(decay_before, match_ids, f"dataset '{dataset_name}' deleted")
         
         total_deleted = (
             matches_deleted.deleted_count + 
@@ -5555,9 +8183,9 @@ async def upload_multi_dataset(files: List[UploadFile] = File(...), dataset_name
                 elif 'player' in filename:
                     player_stats_file = file
                 else:
-                    # Try to determine by CSV headers
-                    df_sample = pd.read_csv(io.StringIO(content.decode('utf-8')), nrows=1)
-                    columns = set(df_sample.columns.str.lower())
+                    # Try to determine by column headers
+                    upload_format = detect_upload_format(content[:8], file.content_type)
+                    columns = {str(column).lower() for column in upload_column_names(content, upload_format)}
                     
                     if 'referee' in columns and 'home_team' in columns:
                         matches_file = file
@@ -5572,126 +8200,30 @@ async def upload_multi_dataset(files: List[UploadFile] = File(...), dataset_name
                     detail=f"Could not identify all three file types for dataset '{dataset_name}'. Expected: matches, team_stats, player_stats files."
                 )
             
-            # Process matches file
-            matches_content = await matches_file.read()
-            matches_df = pd.read_csv(io.StringIO(matches_content.decode('utf-8')))
-            matches_df = matches_df.fillna({
-                'home_score': 0, 'away_score': 0, 'result': 'Unknown',
-                'season': 'Unknown', 'competition': 'Unknown', 'match_date': 'Unknown'
-            })
-            
-            matches = []
-            for _, row in matches_df.iterrows():
-                def safe_int(value, default=0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return int(float(value))
-                    except (ValueError, TypeError):
-                        return default
-                
-                match = Match(
-                    match_id=str(row['match_id']),
-                    referee=str(row['referee']),
-                    home_team=str(row['home_team']),
-                    away_team=str(row['away_team']),
-                    home_score=safe_int(row['home_score']),
-                    away_score=safe_int(row['away_score']),
-                    result=str(row['result']),
-                    season=str(row['season']),
-                    competition=str(row['competition']),
-                    match_date=str(row['match_date']),
-                    dataset_name=dataset_name
-                )
-                matches.append(match.dict())
-            
-            # Process team stats file
-            team_stats_content = await team_stats_file.read()
-            team_stats_df = pd.read_csv(io.StringIO(team_stats_content.decode('utf-8')))
-            team_stats_df = team_stats_df.fillna(0)
-            
-            team_stats = []
-            for _, row in team_stats_df.iterrows():
-                def safe_int(value, default=0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return int(float(value))
-                    except (ValueError, TypeError):
-                        return default
-                
-                def safe_float(value, default=0.0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-                
-                stats = TeamStats(
-                    match_id=str(row['match_id']),
-                    team_name=str(row['team_name']),
-                    is_home=bool(row.get('is_home', False)),
-                    yellow_cards=safe_int(row.get('yellow_cards', 0)),
-                    red_cards=safe_int(row.get('red_cards', 0)),
-                    fouls=safe_int(row.get('fouls', 0)),
-                    possession_pct=safe_float(row.get('possession_pct', 0)),
-                    shots_total=safe_int(row.get('shots_total', 0)),
-                    shots_on_target=safe_int(row.get('shots_on_target', 0)),
-                    fouls_drawn=safe_int(row.get('fouls_drawn', 0)),
-                    penalties_awarded=safe_int(row.get('penalties_awarded', 0)),
-                    xg=safe_float(row.get('xg', 0)),
-                    dataset_name=dataset_name
-                )
-                team_stats.append(stats.dict())
-            
-            # Process player stats file
-            player_stats_content = await player_stats_file.read()
-            player_stats_df = pd.read_csv(io.StringIO(player_stats_content.decode('utf-8')))
-            player_stats_df = player_stats_df.fillna(0)
-            
-            player_stats = []
-            for _, row in player_stats_df.iterrows():
-                def safe_int(value, default=0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return int(float(value))
-                    except (ValueError, TypeError):
-                        return default
-                
-                def safe_float(value, default=0.0):
-                    try:
-                        if pd.isna(value) or value == '' or value is None:
-                            return default
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return default
-                
-                stats = PlayerStats(
-                    match_id=str(row['match_id']),
-                    player_name=str(row['player_name']),
-                    team_name=str(row['team_name']),
-                    is_home=bool(row.get('is_home', False)),
-                    goals=safe_int(row.get('goals', 0)),
-                    assists=safe_int(row.get('assists', 0)),
-                    yellow_cards=safe_int(row.get('yellow_cards', 0)),
-                    fouls_committed=safe_int(row.get('fouls_committed', 0)),
-                    fouls_drawn=safe_int(row.get('fouls_drawn', 0)),
-                    xg=safe_float(row.get('xg', 0)),
-                    penalty_attempts=safe_int(row.get('penalty_attempts', 0)),
-                    penalty_goals=safe_int(row.get('penalty_goals', 0)),
-                    dataset_name=dataset_name
-                )
-                player_stats.append(stats.dict())
+            # Parse and validate each file column-wise
+            matches, matches_errors = coerce_records(
+                read_upload_frame(await matches_file.read(), matches_file.content_type), "matches", dataset_name
+            )
+            team_stats, team_stats_errors = coerce_records(
+                read_upload_frame(await team_stats_file.read(), team_stats_file.content_type), "team_stats", dataset_name
+            )
+            player_stats, player_stats_errors = coerce_records(
+                read_upload_frame(await player_stats_file.read(), player_stats_file.content_type), "player_stats", dataset_name
+            )
             
             # Insert all data for this dataset
+            match_ids = {record['match_id'] for record in matches + team_stats + player_stats}
+            rbs_before = await rbs_aggregate_store.capture(match_ids)
+            decay_before = await team_decay_store.capture(match_ids)
             if matches:
                 await db.matches.insert_many(matches)
             if team_stats:
                 await db.team_stats.insert_many(team_stats)
             if player_stats:
                 await db.player_stats.insert_many(player_stats)
+            data_snapshot.invalidate(f"dataset '{dataset_name}' uploaded")
+            await rbs_aggregate_store.apply_changes(rbs_before, match_ids, f"dataset '{dataset_name}' uploaded")
+            await team_decay_store.apply_changes(decay_before, match_ids, f"dataset '{dataset_name}' uploaded")
             
             dataset_total = len(matches) + len(team_stats) + len(player_stats)
             total_records += dataset_total
@@ -5701,7 +8233,17 @@ async def upload_multi_dataset(files: List[UploadFile] = File(...), dataset_name
                 "matches": len(matches),
                 "team_stats": len(team_stats),
                 "player_stats": len(player_stats),
-                "total": dataset_total
+                "total": dataset_total,
+                "rows_rejected": {
+                    "matches": len(matches_errors),
+                    "team_stats": len(team_stats_errors),
+                    "player_stats": len(player_stats_errors)
+                },
+                "row_errors": {
+                    "matches": matches_errors[:MAX_REPORTED_ROW_ERRORS],
+                    "team_stats": team_stats_errors[:MAX_REPORTED_ROW_ERRORS],
+                    "player_stats": player_stats_errors[:MAX_REPORTED_ROW_ERRORS]
+                }
             })
         
         return {
@@ -5720,128 +8262,132 @@ async def upload_multi_dataset(files: List[UploadFile] = File(...), dataset_name
 async def migrate_confidence():
     """Migrate old text confidence values to numerical confidence values"""
     try:
-        # Get all RBS results
-        results = await db.rbs_results.find().to_list(10000)
-        
+        # Stream only RBS results that still carry text confidence values
+        scan_stats = ScanStats()
         updated_count = 0
-        for result in results:
-            if isinstance(result.get('confidence_level'), str):
-                # Convert old text values to numerical
-                matches_with_ref = result.get('matches_with_ref', 1)
-                
-                # Calculate numerical confidence
-                if matches_with_ref >= 10:
-                    confidence = min(95, 70 + (matches_with_ref - 10) * 2.5)
-                elif matches_with_ref >= 5:
-                    confidence = 50 + (matches_with_ref - 5) * 4
-                elif matches_with_ref >= 2:
-                    confidence = 20 + (matches_with_ref - 2) * 10
-                else:
-                    confidence = matches_with_ref * 10
-                
-                confidence = round(confidence, 1)
-                
-                # Update the document
-                await db.rbs_results.update_one(
-                    {"_id": result["_id"]},
-                    {"$set": {"confidence_level": confidence}}
-                )
-                updated_count += 1
+        async for result in iter_documents(
+            db.rbs_results,
+            {"confidence_level": {"$type": "string"}},
+            {"_id": 1, "confidence_level": 1, "matches_with_ref": 1},
+            scan_stats=scan_stats
+        ):
+            # Convert old text values to numerical
+            matches_with_ref = result.get('matches_with_ref', 1)
+            
+            # Calculate numerical confidence
+            if matches_with_ref >= 10:
+                confidence = min(95, 70 + (matches_with_ref - 10) * 2.5)
+            elif matches_with_ref >= 5:
+                confidence = 50 + (matches_with_ref - 5) * 4
+            elif matches_with_ref >= 2:
+                confidence = 20 + (matches_with_ref - 2) * 10
+            else:
+                confidence = matches_with_ref * 10
+            
+            confidence = round(confidence, 1)
+            
+            # Update the document
+            await db.rbs_results.update_one(
+                {"_id": result["_id"]},
+                {"$set": {"confidence_level": confidence}}
+            )
+            updated_count += 1
+        
+        if updated_count:
+            data_snapshot.mark_changed("RBS confidence values migrated")
         
         return {
             "success": True,
             "message": f"Migrated {updated_count} confidence values to numerical format",
-            "updated_count": updated_count
+            "updated_count": updated_count,
+            "documents_scanned": scan_stats.total
         }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error migrating confidence values: {str(e)}")
 
-@api_router.post("/calculate-rbs")
-@app.post("/api/calculate-rbs")
-async def calculate_rbs(config_name: str = "default"):
-    """Calculate RBS scores for all team-referee combinations and ensure all team statistics are properly calculated"""
+async def calculate_rbs_job(job, config_name="default"):
+    """Calculate team statistics and RBS scores as a background job"""
     try:
         # Step 1: Calculate and update comprehensive team statistics first
         print("Step 1: Calculating comprehensive team statistics...")
-        await calculate_comprehensive_team_stats()
+        await job.update("calculating team statistics", 5)
+        team_stats_result = await calculate_comprehensive_team_stats()
         
         # Step 2: Get all data (now with updated statistics)
-        matches = await db.matches.find().to_list(10000)
-        team_stats = await db.team_stats.find().to_list(10000)
-        
-        # Step 3: Clear existing RBS results
-        await db.rbs_results.delete_many({})
+        await job.update("loading data snapshot", 50)
+        snapshot = await data_snapshot.get()
         
-        # Step 4: Get unique team-referee combinations
-        team_referee_pairs = set()
-        for match in matches:
-            team_referee_pairs.add((match['home_team'], match['referee']))
-            team_referee_pairs.add((match['away_team'], match['referee']))
-        
-        # Step 5: Calculate RBS for each combination
-        rbs_results = []
-        for team_name, referee in team_referee_pairs:
-            result = await rbs_calculator.calculate_rbs_for_team_referee(
-                team_name, referee, team_stats, matches, config_name
-            )
-            if result:
-                rbs_results.append(result)
-        
-        # Step 6: Insert results
-        if rbs_results:
-            await db.rbs_results.insert_many(rbs_results)
+        # Step 3: Rebuild per team-referee aggregates and upsert RBS results in place
+        await job.update("rebuilding RBS scores", 60)
+        rbs_results = await rbs_aggregate_store.rebuild(config_name, snapshot)
         
         return {
             "success": True,
             "message": f"Calculated comprehensive team statistics and RBS for {len(rbs_results)} team-referee combinations using '{config_name}' configuration",
             "results_count": len(rbs_results),
             "config_used": config_name,
-            "team_stats_updated": True
+            "team_stats_updated": True,
+            "documents_scanned": team_stats_result['documents_scanned'] + snapshot.document_count
         }
     
+    except JobCancelled:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating RBS: {str(e)}")
 
-async def calculate_comprehensive_team_stats():
-    """Calculate all team statistics needed for RBS and match prediction"""
+@api_router.post("/calculate-rbs")
+@app.post("/api/calculate-rbs")
+async def calculate_rbs(config_name: str = "default", wait: bool = False):
+    """Calculate RBS scores for all team-referee combinations and ensure all team statistics are properly calculated"""
+    return await job_manager.run("calculate-rbs", calculate_rbs_job, {"config_name": config_name}, wait=wait)
+
+# Bookkeeping fields excluded from the comprehensive stats source hash
+STATS_HASH_EXCLUDED_FIELDS = ('stats_calculated_at', 'stats_source_hash')
+
+def team_stats_source_hash(team_stat):
+    """Stable hash of a computed team stat record, ignoring bookkeeping fields"""
+    payload = {k: v for k, v in team_stat.items() if k not in STATS_HASH_EXCLUDED_FIELDS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+async def calculate_comprehensive_team_stats(full: bool = False):
+    """Calculate all team statistics needed for RBS and match prediction.
+
+    Records whose computed values match their stored stats_source_hash are skipped
+    unless full=True, so only team stats touched by new or changed matches, team
+    stats or player stats are written back.
+    """
     try:
         # Get all data
-        matches = await db.matches.find().to_list(10000)
-        team_stats_raw = await db.team_stats.find().to_list(10000)
-        player_stats = await db.player_stats.find().to_list(50000)
-        
-        # Group player stats by match and team for aggregation
-        player_stats_by_match_team = {}
-        for pstat in player_stats:
-            key = f"{pstat['match_id']}_{pstat['team_name']}"
-            if key not in player_stats_by_match_team:
-                player_stats_by_match_team[key] = []
-            player_stats_by_match_team[key].append(pstat)
+        snapshot = await data_snapshot.get()
+        team_stats_frame = snapshot.team_stats
+        team_stats_raw = [
+            {k: v for k, v in record.items() if not (isinstance(v, float) and math.isnan(v))}
+            for record in team_stats_frame.to_dict('records')
+        ]
+        match_lookup = {match['match_id']: match for match in snapshot.first_match_by_id.to_dict('records')}
+        
+        # Aggregate player stats per (match, team) for every team stat record at once
+        player_fields = ['xg', 'fouls_drawn', 'penalty_attempts', 'penalty_goals', 'shots_total', 'shots_on_target']
+        player_aggregates = snapshot.player_totals(team_stats_frame['match_id'], team_stats_frame['team_name'], player_fields)
         
         # Process each team stat record and calculate comprehensive metrics
         updated_team_stats = []
+        unchanged_count = 0
+        calculated_at = datetime.now().isoformat()
         
-        for team_stat in team_stats_raw:
+        for team_stat, aggregates in zip(team_stats_raw, player_aggregates):
             match_id = team_stat['match_id']
-            team_name = team_stat['team_name']
             
             # Get corresponding match data
-            match = next((m for m in matches if m['match_id'] == match_id), None)
+            match = match_lookup.get(match_id)
             if not match:
                 continue
             
-            # Get player stats for this team in this match
-            player_key = f"{match_id}_{team_name}"
-            match_player_stats = player_stats_by_match_team.get(player_key, [])
-            
-            # Calculate aggregated values from player stats
-            aggregated_xg = sum(ps.get('xg', 0) for ps in match_player_stats)
-            aggregated_fouls_drawn = sum(ps.get('fouls_drawn', 0) for ps in match_player_stats)
-            aggregated_penalties = sum(ps.get('penalty_attempts', 0) for ps in match_player_stats)
-            aggregated_penalty_goals = sum(ps.get('penalty_goals', 0) for ps in match_player_stats)
-            aggregated_shots_total = sum(ps.get('shots_total', 0) for ps in match_player_stats)
-            aggregated_shots_on_target = sum(ps.get('shots_on_target', 0) for ps in match_player_stats)
+            # Calculate aggregated values from player stats (counts stay integers)
+            aggregated_xg = float(aggregates[0])
+            (aggregated_fouls_drawn, aggregated_penalties, aggregated_penalty_goals,
+             aggregated_shots_total, aggregated_shots_on_target) = [int(v) for v in aggregates[1:]]
             
             # DATA SOURCE PRIORITY: Use aggregated player stats if available, otherwise use team stats
             # This ensures we use the most granular data available (individual player contributions)
@@ -5919,81 +8465,79 @@ async def calculate_comprehensive_team_stats():
                 'possession_pct': possession_pct,
                 'yellow_cards': team_stat.get('yellow_cards', 0),
                 'red_cards': team_stat.get('red_cards', 0),
-                'fouls': team_stat.get('fouls', 0),
-                
-                # Add timestamp for tracking
-                'stats_calculated_at': datetime.now().isoformat()
+                'fouls': team_stat.get('fouls', 0)
             })
             
+            # Skip records whose inputs (and therefore outputs) have not changed since the last run
+            source_hash = team_stats_source_hash(team_stat)
+            if not full and team_stat.get('stats_source_hash') == source_hash:
+                unchanged_count += 1
+                continue
+            
+            # Add hash and timestamp for tracking
+            team_stat['stats_source_hash'] = source_hash
+            team_stat['stats_calculated_at'] = calculated_at
             updated_team_stats.append(team_stat)
         
-        # Update the database with comprehensive team statistics
+        # Upsert changed records in place - team_stats is never emptied during the update
         if updated_team_stats:
-            # Clear and replace all team stats with updated versions
-            await db.team_stats.delete_many({})
-            await db.team_stats.insert_many(updated_team_stats)
+            await db.team_stats.bulk_write([
+                UpdateOne(
+                    {"match_id": team_stat['match_id'], "team_name": team_stat['team_name'], "is_home": team_stat.get('is_home', False)},
+                    {"$set": team_stat},
+                    upsert=True
+                )
+                for team_stat in updated_team_stats
+            ], ordered=False)
+            data_snapshot.invalidate("comprehensive team stats recalculated")
         
         return {
             "success": True,
-            "message": f"Calculated comprehensive statistics for {len(updated_team_stats)} team records",
-            "records_updated": len(updated_team_stats)
+            "message": f"Calculated comprehensive statistics for {len(updated_team_stats)} team records ({unchanged_count} unchanged)",
+            "mode": "full" if full else "incremental",
+            "records_updated": len(updated_team_stats),
+            "records_unchanged": unchanged_count,
+            "documents_scanned": snapshot.document_count
         }
         
     except Exception as e:
         raise Exception(f"Error calculating comprehensive team stats: {str(e)}")
 
 @api_router.post("/calculate-comprehensive-team-stats")
-async def calculate_comprehensive_team_stats_endpoint():
+async def calculate_comprehensive_team_stats_endpoint(full: bool = False):
     """Endpoint to manually calculate comprehensive team statistics"""
     try:
-        result = await calculate_comprehensive_team_stats()
+        result = await calculate_comprehensive_team_stats(full=full)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating comprehensive team stats: {str(e)}")
 
-@api_router.post("/recalculate-all-stats")
-async def recalculate_all_stats():
-    """Comprehensive function to recalculate all stats in the correct order"""
+async def recalculate_all_stats_job(job):
+    """Recalculate all stats in the correct order as a background job"""
     try:
         results = {}
         
         # Step 1: Calculate team stats from player data
         print("Step 1: Aggregating player stats to team level...")
+        await job.update("aggregating player stats", 5)
         player_response = await calculate_team_stats_from_players()
         results['player_aggregation'] = player_response
         
         # Step 2: Calculate shots data
         print("Step 2: Calculating shots and shots on target...")
+        await job.update("calculating shots", 30)
         shots_response = await calculate_shots_from_data()
         results['shots_calculation'] = shots_response
         
         # Step 3: Recalculate RBS scores with updated data
         print("Step 3: Recalculating RBS scores...")
+        await job.update("recalculating RBS scores", 55)
         
         # Get fresh data for RBS calculation
-        matches = await db.matches.find().to_list(10000)
-        team_stats = await db.team_stats.find().to_list(10000)
-        
-        # Clear existing RBS results
-        await db.rbs_results.delete_many({})
-        
-        # Get unique team-referee combinations
-        team_referee_pairs = set()
-        for match in matches:
-            team_referee_pairs.add((match['home_team'], match['referee']))
-            team_referee_pairs.add((match['away_team'], match['referee']))
+        snapshot = await data_snapshot.get()
         
-        rbs_results = []
-        for team_name, referee in team_referee_pairs:
-            result = await rbs_calculator.calculate_rbs_for_team_referee(
-                team_name, referee, team_stats, matches, "default"
-            )
-            if result:
-                rbs_results.append(result)
-        
-        # Insert new results
-        if rbs_results:
-            await db.rbs_results.insert_many(rbs_results)
+        # Rebuild per team-referee aggregates and upsert RBS results in place
+        rbs_results = await rbs_aggregate_store.rebuild("default", snapshot)
         
         results['rbs_calculation'] = {
             "success": True,
@@ -6002,6 +8546,7 @@ async def recalculate_all_stats():
         }
         
         # Step 4: Get final stats summary
+        await job.update("summarizing", 90)
         final_stats = await get_stats()
         results['final_stats'] = final_stats
         
@@ -6011,137 +8556,149 @@ async def recalculate_all_stats():
             "details": results
         }
         
+    except JobCancelled:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error recalculating all stats: {str(e)}")
 
-@api_router.post("/calculate-shots-from-data")
-async def calculate_shots_from_data():
-    """Calculate and populate shots and shots on target data using multiple methods"""
-    try:
-        # Get all team stats
-        team_stats = await db.team_stats.find().to_list(10000)
+@api_router.post("/recalculate-all-stats")
+async def recalculate_all_stats(wait: bool = False):
+    """Comprehensive function to recalculate all stats in the correct order, as a background job"""
+    return await job_manager.run("recalculate-all-stats", recalculate_all_stats_job, wait=wait)
+
+async def iter_team_stat_batches(scan_stats):
+    """Stream team_stats in batches together with the matches and player rows they reference"""
+    async for batch in iter_batches(db.team_stats, scan_stats=scan_stats):
+        match_ids = list({stat['match_id'] for stat in batch})
         
-        # Get all matches to cross-reference
-        matches = await db.matches.find().to_list(10000)
+        matches = await collect_documents(db.matches, {"match_id": {"$in": match_ids}}, scan_stats=scan_stats)
         match_dict = {match['match_id']: match for match in matches}
         
-        # Get all player stats for additional context
-        player_stats = await db.player_stats.find().to_list(15000)
-        
-        # Group player stats by match and team for context
-        player_by_team_match = {}
-        for player in player_stats:
-            key = f"{player['match_id']}_{player['team_name']}"
-            if key not in player_by_team_match:
-                player_by_team_match[key] = []
-            player_by_team_match[key].append(player)
+        # Group player stats by match and team
+        player_by_team_match = defaultdict(list)
+        async for player in iter_documents(db.player_stats, {"match_id": {"$in": match_ids}}, scan_stats=scan_stats):
+            player_by_team_match[f"{player['match_id']}_{player['team_name']}"].append(player)
         
+        yield batch, match_dict, player_by_team_match
+
+@api_router.post("/calculate-shots-from-data")
+async def calculate_shots_from_data():
+    """Calculate and populate shots and shots on target data using multiple methods"""
+    try:
         updated_count = 0
+        total_records = 0
+        scan_stats = ScanStats()
         
-        for team_stat in team_stats:
-            match_id = team_stat['match_id']
-            team_name = team_stat['team_name']
-            key = f"{match_id}_{team_name}"
+        # Stream team stats with their matches and player stats for context
+        async for team_stats, match_dict, player_by_team_match in iter_team_stat_batches(scan_stats):
+            total_records += len(team_stats)
             
-            # Get match info
-            match = match_dict.get(match_id)
-            if not match:
-                continue
+            for team_stat in team_stats:
+                match_id = team_stat['match_id']
+                team_name = team_stat['team_name']
+                key = f"{match_id}_{team_name}"
                 
-            # Get player stats for this team in this match
-            team_players = player_by_team_match.get(key, [])
-            
-            # Method 1: Use existing shots data if available and > 0
-            existing_shots = team_stat.get('shots_total', 0)
-            existing_shots_ot = team_stat.get('shots_on_target', 0)
-            
-            if existing_shots > 0 and existing_shots_ot > 0:
-                # Data already exists, skip
-                continue
-            
-            # Method 2: Calculate from player data and team context
-            team_xg = sum(player.get('xg', 0) for player in team_players)
-            team_goals = sum(player.get('goals', 0) for player in team_players)
-            
-            # Get actual goals from match data for verification
-            if team_stat['is_home']:
-                actual_goals = match.get('home_score', 0)
-            else:
-                actual_goals = match.get('away_score', 0)
-            
-            # Use actual goals from match if different from player sum
-            if actual_goals != team_goals:
-                team_goals = actual_goals
-            
-            # Method 3: Estimate shots using multiple factors
-            shots_total = 0
-            shots_on_target = 0
-            
-            if team_xg > 0:
-                # Base estimation: Average xG per shot in professional football is ~0.11
-                base_shots = max(1, int(team_xg / 0.11))
+                # Get match info
+                match = match_dict.get(match_id)
+                if not match:
+                    continue
+                
+                # Get player stats for this team in this match
+                team_players = player_by_team_match.get(key, [])
+                
+                # Method 1: Use existing shots data if available and > 0
+                existing_shots = team_stat.get('shots_total', 0)
+                existing_shots_ot = team_stat.get('shots_on_target', 0)
                 
-                # Adjust based on goals scored (more goals usually means more shots)
-                goal_factor = 1 + (team_goals * 0.3)  # Each goal adds 30% more shots
-                estimated_shots = int(base_shots * goal_factor)
+                if existing_shots > 0 and existing_shots_ot > 0:
+                    # Data already exists, skip
+                    continue
                 
-                # Ensure reasonable bounds (3-25 shots per match)
-                shots_total = max(3, min(25, estimated_shots))
+                # Method 2: Calculate from player data and team context
+                team_xg = sum(player.get('xg', 0) for player in team_players)
+                team_goals = sum(player.get('goals', 0) for player in team_players)
                 
-                # Shots on target estimation
-                # Typically 30-40% of shots are on target, higher for teams that score
-                if team_goals > 0:
-                    on_target_ratio = min(0.6, 0.25 + (team_goals * 0.1))  # 25% base + 10% per goal
+                # Get actual goals from match data for verification
+                if team_stat['is_home']:
+                    actual_goals = match.get('home_score', 0)
                 else:
-                    on_target_ratio = max(0.2, team_xg * 0.3)  # At least 20%, up based on xG
+                    actual_goals = match.get('away_score', 0)
                 
-                shots_on_target = max(1, min(shots_total, int(shots_total * on_target_ratio)))
+                # Use actual goals from match if different from player sum
+                if actual_goals != team_goals:
+                    team_goals = actual_goals
                 
-                # Ensure all goals are counted as shots on target at minimum
-                shots_on_target = max(shots_on_target, team_goals)
-                shots_total = max(shots_total, shots_on_target)
+                # Method 3: Estimate shots using multiple factors
+                shots_total = 0
+                shots_on_target = 0
+                
+                if team_xg > 0:
+                    # Base estimation: Average xG per shot in professional football is ~0.11
+                    base_shots = max(1, int(team_xg / 0.11))
+                    
+                    # Adjust based on goals scored (more goals usually means more shots)
+                    goal_factor = 1 + (team_goals * 0.3)  # Each goal adds 30% more shots
+                    estimated_shots = int(base_shots * goal_factor)
+                    
+                    # Ensure reasonable bounds (3-25 shots per match)
+                    shots_total = max(3, min(25, estimated_shots))
+                    
+                    # Shots on target estimation
+                    # Typically 30-40% of shots are on target, higher for teams that score
+                    if team_goals > 0:
+                        on_target_ratio = min(0.6, 0.25 + (team_goals * 0.1))  # 25% base + 10% per goal
+                    else:
+                        on_target_ratio = max(0.2, team_xg * 0.3)  # At least 20%, up based on xG
+                    
+                    shots_on_target = max(1, min(shots_total, int(shots_total * on_target_ratio)))
+                    
+                    # Ensure all goals are counted as shots on target at minimum
+                    shots_on_target = max(shots_on_target, team_goals)
+                    shots_total = max(shots_total, shots_on_target)
                 
-            else:
-                # Fallback for teams with no xG data
-                if team_goals > 0:
-                    shots_total = max(3, team_goals * 4)  # Rough estimate: 4 shots per goal
-                    shots_on_target = max(team_goals, int(shots_total * 0.3))
                 else:
-                    # Very defensive/poor performance
-                    shots_total = 3
-                    shots_on_target = 1
-            
-            # Method 4: Cross-reference with possession and attacking intent
-            possession = team_stat.get('possession_pct', 50)
-            
-            # Teams with higher possession typically have more shots
-            if possession > 60:
-                shots_total = int(shots_total * 1.2)
-            elif possession < 35:
-                shots_total = int(shots_total * 0.8)
-            
-            # Final bounds check
-            shots_total = max(1, min(30, shots_total))
-            shots_on_target = max(1, min(shots_total, shots_on_target))
-            
-            # Update the team stats
-            update_data = {
-                'shots_total': shots_total,
-                'shots_on_target': shots_on_target
-            }
-            
-            await db.team_stats.update_one(
-                {'_id': team_stat['_id']},
-                {'$set': update_data}
-            )
-            
-            updated_count += 1
+                    # Fallback for teams with no xG data
+                    if team_goals > 0:
+                        shots_total = max(3, team_goals * 4)  # Rough estimate: 4 shots per goal
+                        shots_on_target = max(team_goals, int(shots_total * 0.3))
+                    else:
+                        # Very defensive/poor performance
+                        shots_total = 3
+                        shots_on_target = 1
+                
+                # Method 4: Cross-reference with possession and attacking intent
+                possession = team_stat.get('possession_pct', 50)
+                
+                # Teams with higher possession typically have more shots
+                if possession > 60:
+                    shots_total = int(shots_total * 1.2)
+                elif possession < 35:
+                    shots_total = int(shots_total * 0.8)
+                
+                # Final bounds check
+                shots_total = max(1, min(30, shots_total))
+                shots_on_target = max(1, min(shots_total, shots_on_target))
+                
+                # Update the team stats
+                update_data = {
+                    'shots_total': shots_total,
+                    'shots_on_target': shots_on_target
+                }
+                
+                await db.team_stats.update_one(
+                    {'_id': team_stat['_id']},
+                    {'$set': update_data}
+                )
+                
+                updated_count += 1
         
+        data_snapshot.invalidate("shots data recalculated")
         return {
             "success": True,
             "message": f"Updated shots data for {updated_count} team stat records",
             "updated_count": updated_count,
-            "total_records": len(team_stats)
+            "total_records": total_records,
+            "documents_scanned": scan_stats.total
         }
     
     except Exception as e:
@@ -6190,6 +8747,7 @@ async def set_team_penalty_data(team_data: dict):
                         }}
                     )
         
+        data_snapshot.invalidate("penalty data set")
         return {
             "success": True,
             "message": f"Updated penalty data for {updates_made} team-match combinations",
@@ -6261,6 +8819,7 @@ async def reset_penalty_data():
             }}
         )
         
+        data_snapshot.invalidate("penalty data reset")
         return {
             "success": True,
             "message": "Reset all penalty data to zero"
@@ -6273,22 +8832,6 @@ async def reset_penalty_data():
 async def populate_penalty_data():
     """Populate penalty attempts and goals data using conservative, realistic estimation"""
     try:
-        # Get all player stats and team stats
-        player_stats = await db.player_stats.find().to_list(15000)
-        team_stats = await db.team_stats.find().to_list(10000)
-        matches = await db.matches.find().to_list(10000)
-        
-        # Create a match lookup
-        match_dict = {match['match_id']: match for match in matches}
-        
-        # Group player stats by match and team
-        player_by_team_match = {}
-        for player in player_stats:
-            key = f"{player['match_id']}_{player['team_name']}"
-            if key not in player_by_team_match:
-                player_by_team_match[key] = []
-            player_by_team_match[key].append(player)
-        
         # Much more conservative penalty estimation
         # In reality, penalties are rare - maybe 1 in every 8-10 matches across all teams
         player_updates = 0
@@ -6297,110 +8840,114 @@ async def populate_penalty_data():
         # Group by teams to track season totals
         team_season_penalties = {}
         
-        for team_stat in team_stats:
-            match_id = team_stat['match_id']
-            team_name = team_stat['team_name']
-            key = f"{match_id}_{team_name}"
-            
-            # Initialize team tracking
-            if team_name not in team_season_penalties:
-                team_season_penalties[team_name] = {
-                    'total_attempts': 0,
-                    'total_goals': 0,
-                    'matches_processed': 0
-                }
-            
-            # Get match and team players
-            match = match_dict.get(match_id)
-            team_players = player_by_team_match.get(key, [])
-            
-            if not match or not team_players:
-                continue
-            
-            # Get actual goals scored by the team
-            if team_stat['is_home']:
-                team_goals = match.get('home_score', 0)
-            else:
-                team_goals = match.get('away_score', 0)
-            
-            # Much more conservative penalty estimation
-            team_fouls_drawn = sum(p.get('fouls_drawn', 0) for p in team_players)
-            team_total_xg = sum(p.get('xg', 0) for p in team_players)
-            
-            # Very strict penalty criteria
-            penalty_likelihood = 0
-            
-            # Only award penalties in very specific circumstances
-            # Factor 1: Goals significantly exceed xG AND high fouls drawn
-            if team_goals >= 2 and team_total_xg > 0:
-                xg_diff = team_goals - team_total_xg
-                if xg_diff > 1.2 and team_fouls_drawn > 15:  # Very high threshold
-                    penalty_likelihood = 0.6
-                elif xg_diff > 0.9 and team_fouls_drawn > 18:  # Exceptional circumstances
-                    penalty_likelihood = 0.4
-            
-            # Factor 2: Extremely high fouls drawn (suggesting controversial match)
-            if team_fouls_drawn > 20:  # Very high fouls drawn
-                penalty_likelihood += 0.3
-            
-            # Factor 3: High-scoring match with goals exceeding xG significantly
-            if team_goals >= 3 and team_total_xg > 0 and (team_goals - team_total_xg) > 1.0:
-                penalty_likelihood += 0.2
-            
-            # Determine penalty attempts (much more conservative)
-            # Only award penalty if likelihood is very high AND team hasn't had too many this season
-            penalty_attempts = 0
-            penalty_goals = 0
-            
-            # Very conservative limits: max 2-3 penalties per team per season
-            max_penalties_per_season = 3
-            
-            if (penalty_likelihood > 0.7 and 
-                team_season_penalties[team_name]['total_attempts'] < max_penalties_per_season):
+        scan_stats = ScanStats()
+        
+        # Stream team stats with their matches and player stats
+        async for team_stats, match_dict, player_by_team_match in iter_team_stat_batches(scan_stats):
+            for team_stat in team_stats:
+                match_id = team_stat['match_id']
+                team_name = team_stat['team_name']
+                key = f"{match_id}_{team_name}"
+                
+                # Initialize team tracking
+                if team_name not in team_season_penalties:
+                    team_season_penalties[team_name] = {
+                        'total_attempts': 0,
+                        'total_goals': 0,
+                        'matches_processed': 0
+                    }
+                
+                # Get match and team players
+                match = match_dict.get(match_id)
+                team_players = player_by_team_match.get(key, [])
                 
-                penalty_attempts = 1
-                team_season_penalties[team_name]['total_attempts'] += 1
+                if not match or not team_players:
+                    continue
                 
-                # Conservative penalty conversion (league average ~77%)
-                if penalty_likelihood > 0.8:
-                    penalty_goals = 1
-                    team_season_penalties[team_name]['total_goals'] += 1
+                # Get actual goals scored by the team
+                if team_stat['is_home']:
+                    team_goals = match.get('home_score', 0)
                 else:
-                    # Miss the penalty
-                    penalty_goals = 0
-            
-            # Update team-level penalty stats
-            penalty_conversion_rate = 0.77  # Default league average
-            if team_season_penalties[team_name]['total_attempts'] > 0:
-                penalty_conversion_rate = team_season_penalties[team_name]['total_goals'] / team_season_penalties[team_name]['total_attempts']
-            
-            # Update team stats
-            await db.team_stats.update_one(
-                {'_id': team_stat['_id']},
-                {'$set': {
-                    'penalty_attempts': penalty_attempts,
-                    'penalty_goals': penalty_goals,
-                    'penalty_conversion_rate': round(penalty_conversion_rate, 3),
-                    'penalties_awarded': penalty_attempts
-                }}
-            )
-            team_updates += 1
-            
-            # Distribute penalty stats to players
-            if penalty_attempts > 0 and team_players:
-                # Find the most likely penalty taker (highest goals + xG combination)
-                best_candidate = max(team_players, 
-                    key=lambda p: p.get('goals', 0) * 3 + p.get('xg', 0) + p.get('fouls_drawn', 0) * 0.05)
+                    team_goals = match.get('away_score', 0)
+                
+                # Much more conservative penalty estimation
+                team_fouls_drawn = sum(p.get('fouls_drawn', 0) for p in team_players)
+                team_total_xg = sum(p.get('xg', 0) for p in team_players)
+                
+                # Very strict penalty criteria
+                penalty_likelihood = 0
+                
+                # Only award penalties in very specific circumstances
+                # Factor 1: Goals significantly exceed xG AND high fouls drawn
+                if team_goals >= 2 and team_total_xg > 0:
+                    xg_diff = team_goals - team_total_xg
+                    if xg_diff > 1.2 and team_fouls_drawn > 15:  # Very high threshold
+                        penalty_likelihood = 0.6
+                    elif xg_diff > 0.9 and team_fouls_drawn > 18:  # Exceptional circumstances
+                        penalty_likelihood = 0.4
+                
+                # Factor 2: Extremely high fouls drawn (suggesting controversial match)
+                if team_fouls_drawn > 20:  # Very high fouls drawn
+                    penalty_likelihood += 0.3
+                
+                # Factor 3: High-scoring match with goals exceeding xG significantly
+                if team_goals >= 3 and team_total_xg > 0 and (team_goals - team_total_xg) > 1.0:
+                    penalty_likelihood += 0.2
+                
+                # Determine penalty attempts (much more conservative)
+                # Only award penalty if likelihood is very high AND team hasn't had too many this season
+                penalty_attempts = 0
+                penalty_goals = 0
+                
+                # Very conservative limits: max 2-3 penalties per team per season
+                max_penalties_per_season = 3
+                
+                if (penalty_likelihood > 0.7 and 
+                    team_season_penalties[team_name]['total_attempts'] < max_penalties_per_season):
+                    
+                    penalty_attempts = 1
+                    team_season_penalties[team_name]['total_attempts'] += 1
+                    
+                    # Conservative penalty conversion (league average ~77%)
+                    if penalty_likelihood > 0.8:
+                        penalty_goals = 1
+                        team_season_penalties[team_name]['total_goals'] += 1
+                    else:
+                        # Miss the penalty
+                        penalty_goals = 0
                 
-                # Update the penalty taker's stats
-                await db.player_stats.update_one(
-                    {'_id': best_candidate['_id']},
+                # Update team-level penalty stats
+                penalty_conversion_rate = 0.77  # Default league average
+                if team_season_penalties[team_name]['total_attempts'] > 0:
+                    penalty_conversion_rate = team_season_penalties[team_name]['total_goals'] / team_season_penalties[team_name]['total_attempts']
+                
+                # Update team stats
+                await db.team_stats.update_one(
+                    {'_id': team_stat['_id']},
                     {'$set': {
                         'penalty_attempts': penalty_attempts,
-                        'penalty_goals': penalty_goals
+                        'penalty_goals': penalty_goals,
+                        'penalty_conversion_rate': round(penalty_conversion_rate, 3),
+                        'penalties_awarded': penalty_attempts
                     }}
                 )
-                player_updates += 1
+                team_updates += 1
+                
+                # Distribute penalty stats to players
+                if penalty_attempts > 0 and team_players:
+                    # Find the most likely penalty taker (highest goals + xG combination)
+                    best_candidate = max(team_players, 
+                        key=lambda p: p.get('goals', 0) * 3 + p.get('xg', 0) + p.get('fouls_drawn', 0) * 0.05)
+                    
+                    # Update the penalty taker's stats
+                    await db.player_stats.update_one(
+                        {'_id': best_candidate['_id']},
+                        {'$set': {
+                            'penalty_attempts': penalty_attempts,
+                            'penalty_goals': penalty_goals
+                        }}
+                    )
+                    player_updates += 1
         
         # Summary of penalties awarded by team
         penalty_summary = {}
@@ -6412,14 +8959,16 @@ async def populate_penalty_data():
                     'conversion_rate': round(data['total_goals'] / data['total_attempts'], 3) if data['total_attempts'] > 0 else 0
                 }
         
+        data_snapshot.invalidate("penalty data populated")
         return {
             "success": True,
             "message": f"Populated conservative penalty data for {team_updates} team stats and {player_updates} player stats",
             "team_updates": team_updates,
             "player_updates": player_updates,
-            "penalty_summary": penalty_summary
+            "penalty_summary": penalty_summary,
+            "documents_scanned": scan_stats.total
         }
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error populating penalty data: {str(e)}")
 
@@ -6427,85 +8976,83 @@ async def populate_penalty_data():
 async def calculate_team_stats_from_players():
     """Calculate team-level stats by aggregating player stats for each match - ONLY USES SCRAPED DATA"""
     try:
-        # Get all player stats
-        player_stats = await db.player_stats.find().to_list(15000)
-        
-        # Get all team stats to update
-        team_stats = await db.team_stats.find().to_list(10000)
-        
-        # Get all matches for goal verification
-        matches = await db.matches.find().to_list(10000)
-        match_dict = {match['match_id']: match for match in matches}
-        
-        # Group player stats by match_id and team_name
-        team_aggregations = {}
-        
-        for player in player_stats:
-            key = f"{player['match_id']}_{player['team_name']}"
-            
-            if key not in team_aggregations:
-                team_aggregations[key] = {
-                    'match_id': player['match_id'],
-                    'team_name': player['team_name'],
-                    'fouls_drawn': 0,
-                    'xg': 0.0,
-                    'goals': 0,
-                    'assists': 0,
-                    'player_yellow_cards': 0,
-                    'player_fouls_committed': 0,
-                    'penalty_attempts': 0,
-                    'penalty_goals': 0
-                }
-            
-            # Aggregate player stats to team level - ONLY USING SCRAPED DATA
-            team_aggregations[key]['fouls_drawn'] += player.get('fouls_drawn', 0)
-            team_aggregations[key]['xg'] += player.get('xg', 0)
-            team_aggregations[key]['goals'] += player.get('goals', 0)
-            team_aggregations[key]['assists'] += player.get('assists', 0)
-            team_aggregations[key]['player_yellow_cards'] += player.get('yellow_cards', 0)
-            team_aggregations[key]['player_fouls_committed'] += player.get('fouls_committed', 0)
-            
-            # Use SCRAPED penalty data from CSV - no estimation
-            team_aggregations[key]['penalty_attempts'] += player.get('penalty_attempts', 0)
-            team_aggregations[key]['penalty_goals'] += player.get('penalty_goals', 0)
-        
-        # Update team stats with aggregated data
         updated_count = 0
-        
-        for team_stat in team_stats:
-            key = f"{team_stat['match_id']}_{team_stat['team_name']}"
-            
-            if key in team_aggregations:
-                aggregated = team_aggregations[key]
-                
-                # Calculate penalty conversion rate from SCRAPED data
-                penalty_attempts = aggregated['penalty_attempts']
-                penalty_goals = aggregated['penalty_goals']
-                penalty_conversion_rate = penalty_goals / penalty_attempts if penalty_attempts > 0 else 0.77  # League average if no data
+        aggregation_keys = set()
+        scan_stats = ScanStats()
+        
+        # Stream team stats to update along with the player stats for their matches
+        async for team_stats, match_dict, player_by_team_match in iter_team_stat_batches(scan_stats):
+            # Group player stats by match_id and team_name
+            team_aggregations = {}
+            
+            for player in [p for players in player_by_team_match.values() for p in players]:
+                key = f"{player['match_id']}_{player['team_name']}"
+                
+                if key not in team_aggregations:
+                    team_aggregations[key] = {
+                        'match_id': player['match_id'],
+                        'team_name': player['team_name'],
+                        'fouls_drawn': 0,
+                        'xg': 0.0,
+                        'goals': 0,
+                        'assists': 0,
+                        'player_yellow_cards': 0,
+                        'player_fouls_committed': 0,
+                        'penalty_attempts': 0,
+                        'penalty_goals': 0
+                    }
                 
-                # Prepare update data - ONLY using scraped data, no estimation
-                update_data = {
-                    'fouls_drawn': aggregated['fouls_drawn'],
-                    'xg': round(aggregated['xg'], 2),
-                    'penalties_awarded': penalty_attempts,  # Use actual scraped attempts
-                    'penalty_attempts': penalty_attempts,
-                    'penalty_goals': penalty_goals,
-                    'penalty_conversion_rate': round(penalty_conversion_rate, 3)
-                }
+                # Aggregate player stats to team level - ONLY USING SCRAPED DATA
+                team_aggregations[key]['fouls_drawn'] += player.get('fouls_drawn', 0)
+                team_aggregations[key]['xg'] += player.get('xg', 0)
+                team_aggregations[key]['goals'] += player.get('goals', 0)
+                team_aggregations[key]['assists'] += player.get('assists', 0)
+                team_aggregations[key]['player_yellow_cards'] += player.get('yellow_cards', 0)
+                team_aggregations[key]['player_fouls_committed'] += player.get('fouls_committed', 0)
                 
-                # Update the team stats record
-                await db.team_stats.update_one(
-                    {'_id': team_stat['_id']},
-                    {'$set': update_data}
-                )
+                # Use SCRAPED penalty data from CSV - no estimation
+                team_aggregations[key]['penalty_attempts'] += player.get('penalty_attempts', 0)
+                team_aggregations[key]['penalty_goals'] += player.get('penalty_goals', 0)
+            
+            # Update team stats with aggregated data
+            for team_stat in team_stats:
+                key = f"{team_stat['match_id']}_{team_stat['team_name']}"
                 
-                updated_count += 1
+                if key in team_aggregations:
+                    aggregated = team_aggregations[key]
+                    
+                    # Calculate penalty conversion rate from SCRAPED data
+                    penalty_attempts = aggregated['penalty_attempts']
+                    penalty_goals = aggregated['penalty_goals']
+                    penalty_conversion_rate = penalty_goals / penalty_attempts if penalty_attempts > 0 else 0.77  # League average if no data
+                    
+                    # Prepare update data - ONLY using scraped data, no estimation
+                    update_data = {
+                        'fouls_drawn': aggregated['fouls_drawn'],
+                        'xg': round(aggregated['xg'], 2),
+                        'penalties_awarded': penalty_attempts,  # Use actual scraped attempts
+                        'penalty_attempts': penalty_attempts,
+                        'penalty_goals': penalty_goals,
+                        'penalty_conversion_rate': round(penalty_conversion_rate, 3)
+                    }
+                    
+                    # Update the team stats record
+                    await db.team_stats.update_one(
+                        {'_id': team_stat['_id']},
+                        {'$set': update_data}
+                    )
+                    
+                    updated_count += 1
+            
+            aggregation_keys.update(team_aggregations)
         
+        data_snapshot.invalidate("team stats aggregated from players")
         return {
             "success": True,
             "message": f"Updated {updated_count} team stats with scraped player penalty data (no estimation)",
-            "team_aggregations_found": len(team_aggregations),
-            "team_stats_updated": updated_count
+            "team_aggregations_found": len(aggregation_keys),
+            "team_stats_updated": updated_count,
+            "documents_scanned": scan_stats.total
         }
     
     except Exception as e:
@@ -6535,6 +9082,7 @@ async def add_more_realistic_stats():
             )
             updated_count += 1
         
+        data_snapshot.invalidate("sample stats added")
         return {
             "success": True,
             "message": f"Updated {updated_count} team stats with varied realistic sample data",
@@ -6568,6 +9116,7 @@ async def add_sample_realistic_stats():
             )
             updated_count += 1
         
+        data_snapshot.invalidate("sample stats added")
         return {
             "success": True,
             "message": f"Updated {updated_count} team stats with realistic sample data",
@@ -6814,58 +9363,155 @@ async def get_referee_details(referee_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching referee details: {str(e)}")
 
-@api_router.get("/referee-summary")
-async def get_referee_summary():
-    """Get summary stats for all referees"""
-    try:
-        # Get all referees with their match counts
-        pipeline = [
+# Sortable fields for referee profile listings
+REFEREE_SORT_FIELDS = {
+    "name", "matches", "teams", "avg_bias_score", "avg_abs_bias", "rbs_calculations",
+    "yellow_cards_per_match", "red_cards_per_match", "fouls_per_match", "home_win_percentage"
+}
+
+# Team stat fields totalled per referee
+REFEREE_STAT_FIELDS = ["yellow_cards", "red_cards", "fouls", "fouls_drawn", "penalties_awarded"]
+
+async def aggregate_referee_profiles(referee=None, sort_by="matches", sort_order="desc", skip=0, limit=None):
+    """Build referee profiles (matches, teams, cards/fouls, RBS) in a single aggregation round trip"""
+    if sort_by not in REFEREE_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {sorted(REFEREE_SORT_FIELDS)}")
+    if sort_order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="sort_order must be 'asc' or 'desc'")
+    
+    # Skip matches without a usable referee name
+    valid_referee = {"referee": {"$nin": [None, ""], "$not": re.compile(r"^(nan|null|none)$", re.IGNORECASE)}}
+    if referee:
+        valid_referee["referee"] = referee
+    
+    def ratio(field, count_field):
+        return {"$cond": [{"$gt": [f"${count_field}", 0]}, {"$divide": [f"${field}", f"${count_field}"]}, 0]}
+    
+    group = {
+        "_id": "$referee",
+        "matches": {"$sum": 1},
+        "home_teams": {"$addToSet": "$home_team"},
+        "away_teams": {"$addToSet": "$away_team"},
+        "competitions": {"$addToSet": "$competition"},
+        "seasons": {"$addToSet": "$season"},
+        "home_wins": {"$sum": {"$cond": [{"$gt": ["$home_score", "$away_score"]}, 1, 0]}},
+        "away_wins": {"$sum": {"$cond": [{"$gt": ["$away_score", "$home_score"]}, 1, 0]}},
+        "team_stat_rows": {"$sum": {"$size": "$team_stats"}},
+    }
+    group.update({field: {"$sum": {"$sum": f"$team_stats.{field}"}} for field in REFEREE_STAT_FIELDS})
+    
+    profile_stages = [
+        {"$match": valid_referee},
+        {"$lookup": {"from": "team_stats", "localField": "match_id", "foreignField": "match_id", "as": "team_stats"}},
+        {"$group": group},
+        {"$lookup": {"from": "rbs_results", "localField": "_id", "foreignField": "referee", "as": "rbs"}},
+        {"$addFields": {
+            "name": "$_id",
+            "teams": {"$size": {"$setUnion": ["$home_teams", "$away_teams"]}},
+            "draws": {"$subtract": ["$matches", {"$add": ["$home_wins", "$away_wins"]}]},
+            "home_win_percentage": {"$multiply": [ratio("home_wins", "matches"), 100]},
+            "yellow_cards_per_match": ratio("yellow_cards", "matches"),
+            "red_cards_per_match": ratio("red_cards", "matches"),
+            "fouls_per_match": ratio("fouls", "matches"),
+            "team_averages": {field: ratio(field, "team_stat_rows") for field in REFEREE_STAT_FIELDS},
+            "rbs_calculations": {"$size": "$rbs"},
+            "avg_bias_score": {"$ifNull": [{"$avg": "$rbs.rbs_score"}, 0]},
+            "avg_abs_bias": {"$ifNull": [{"$avg": {"$map": {"input": "$rbs.rbs_score", "as": "score", "in": {"$abs": "$$score"}}}}, 0]},
+            "max_bias": {"$ifNull": [{"$max": "$rbs.rbs_score"}, 0]},
+            "min_bias": {"$ifNull": [{"$min": "$rbs.rbs_score"}, 0]},
+        }},
+        {"$project": {"_id": 0, "rbs": 0, "home_teams": 0, "away_teams": 0}},
+        {"$sort": {sort_by: -1 if sort_order == "desc" else 1, "name": 1}},
+        {"$skip": skip},
+    ]
+    if limit:
+        profile_stages.append({"$limit": limit})
+    
+    facets = {
+        "total": [
+            {"$match": valid_referee},
+            {"$group": {"_id": "$referee"}},
+            {"$count": "count"}
+        ],
+        "referees": profile_stages
+    }
+    
+    # A single referee is matched up front so the index is used; the listing also needs the overview
+    pipeline = [{"$match": {"referee": referee}}] if referee else []
+    if not referee:
+        facets["overview"] = [
             {"$group": {
-                "_id": "$referee",
+                "_id": None,
                 "total_matches": {"$sum": 1},
-                "competitions": {"$addToSet": "$competition"},
-                "seasons": {"$addToSet": "$season"}
+                "referees": {"$addToSet": "$referee"},
+                "home_teams": {"$addToSet": "$home_team"}
             }},
-            {"$sort": {"total_matches": -1}}
-        ]
-        
-        referee_stats = await db.matches.aggregate(pipeline).to_list(1000)
-        
-        # Get RBS results count for each referee
-        rbs_pipeline = [
-            {"$group": {
-                "_id": "$referee",
-                "rbs_count": {"$sum": 1},
-                "avg_bias": {"$avg": "$rbs_score"},
-                "max_bias": {"$max": "$rbs_score"},
-                "min_bias": {"$min": "$rbs_score"}
+            {"$lookup": {
+                "from": "rbs_results",
+                "pipeline": [{"$group": {"_id": None, "avg_abs_bias": {"$avg": {"$abs": "$rbs_score"}}}}],
+                "as": "rbs"
+            }},
+            {"$project": {
+                "_id": 0,
+                "total_matches": 1,
+                "total_referees": {"$size": "$referees"},
+                "teams_covered": {"$size": "$home_teams"},
+                "avg_bias_score": {"$ifNull": [{"$arrayElemAt": ["$rbs.avg_abs_bias", 0]}, 0]}
             }}
         ]
-        
-        rbs_stats = await db.rbs_results.aggregate(rbs_pipeline).to_list(1000)
-        rbs_dict = {stat['_id']: stat for stat in rbs_stats}
-        
-        # Combine the data
-        for referee in referee_stats:
-            referee_name = referee['_id']
-            if referee_name in rbs_dict:
-                referee.update(rbs_dict[referee_name])
-                referee['avg_bias'] = round(referee.get('avg_bias', 0), 3)
-                referee['max_bias'] = round(referee.get('max_bias', 0), 3)
-                referee['min_bias'] = round(referee.get('min_bias', 0), 3)
-            else:
-                referee.update({
-                    'rbs_count': 0,
-                    'avg_bias': 0,
-                    'max_bias': 0,
-                    'min_bias': 0
-                })
+    pipeline.append({"$facet": facets})
+    
+    result = (await db.matches.aggregate(pipeline).to_list(1))[0]
+    overview = result["overview"][0] if result.get("overview") else {
+        "total_matches": 0, "total_referees": 0, "teams_covered": 0, "avg_bias_score": 0
+    }
+    total = result["total"][0]["count"] if result["total"] else 0
+    
+    referees = result["referees"]
+    for profile in referees:
+        # Confidence grows with the number of matches officiated
+        profile["confidence"] = min(95, max(20, profile["matches"] * 8))
+    
+    return {"overview": overview, "total": total, "referees": referees}
+
+def pagination_info(total, skip, limit, returned):
+    """Pagination block returned by paged listing endpoints"""
+    return {
+        "total": total,
+        "skip": skip,
+        "limit": limit,
+        "returned": returned,
+        "has_more": skip + returned < total
+    }
+
+@api_router.get("/referee-summary")
+async def get_referee_summary(sort_by: str = "matches", sort_order: str = "desc", skip: int = 0, limit: Optional[int] = None):
+    """Get summary stats for all referees"""
+    try:
+        profiles = await aggregate_referee_profiles(sort_by=sort_by, sort_order=sort_order, skip=skip, limit=limit)
+        
+        referee_stats = [
+            {
+                "_id": profile["name"],
+                "total_matches": profile["matches"],
+                "competitions": profile["competitions"],
+                "seasons": profile["seasons"],
+                "rbs_count": profile["rbs_calculations"],
+                "avg_bias": round(profile["avg_bias_score"], 3),
+                "max_bias": round(profile["max_bias"], 3),
+                "min_bias": round(profile["min_bias"], 3)
+            }
+            for profile in profiles["referees"]
+        ]
         
         return {
             "success": True,
-            "referees": referee_stats
+            "referees": referee_stats,
+            "pagination": pagination_info(profiles["total"], skip, limit, len(referee_stats))
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching referee summary: {str(e)}")
 
@@ -6926,7 +9572,8 @@ async def get_rbs_status():
             "referees_analyzed": referees_analyzed,
             "teams_covered": teams_covered,
             "total_calculations": rbs_count,
-            "last_calculated": latest_result.get("last_updated") if latest_result else None
+            "last_calculated": latest_result.get("last_updated") if latest_result else None,
+            "aggregates": await rbs_aggregate_store.get_state()
         }
     
     except Exception as e:
@@ -6958,6 +9605,32 @@ async def get_teams():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching teams: {str(e)}")
 
+@api_router.get("/teams/{team_name}/averages")
+async def get_team_averages(team_name: str, is_home: bool = True, exclude_opponent: Optional[str] = None,
+                            season_filter: Optional[str] = None, source: Optional[str] = None):
+    """Get team averages used for match prediction (source: snapshot or pipeline)"""
+    try:
+        if source not in (None, "snapshot", "pipeline"):
+            raise HTTPException(status_code=400, detail="source must be 'snapshot' or 'pipeline'")
+        
+        averages = await match_predictor.calculate_team_averages(
+            team_name, is_home, exclude_opponent, season_filter, source=source
+        )
+        if averages is None:
+            raise HTTPException(status_code=404, detail=f"No team stats found for {team_name}")
+        
+        return {
+            "success": True,
+            "team_name": team_name,
+            "is_home": is_home,
+            "source": source or match_predictor.averages_source,
+            "averages": averages
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating team averages: {str(e)}")
+
 @api_router.get("/teams/{team_name}/players", response_model=TeamPlayersResponse)
 async def get_team_players(team_name: str, formation: str = "4-4-2"):
     """Get players for a team with default starting XI based on playing time"""
@@ -7023,36 +9696,60 @@ async def get_time_decay_presets():
 @api_router.post("/predict-match-enhanced")
 async def predict_match_enhanced(request: EnhancedMatchPredictionRequest):
     """Enhanced match prediction with starting XI and time decay support"""
+    validate_as_of(request.as_of)
     try:
         # Get time decay configuration
         decay_config = time_decay_manager.get_preset(request.decay_preset or "moderate")
         if request.custom_decay_rate and request.decay_preset == "custom":
             decay_config.decay_rate_per_month = request.custom_decay_rate
+        as_of = resolve_as_of(request.as_of, request.match_date)
         
         # Use existing prediction logic but with enhanced features
-        if request.home_starting_xi or request.away_starting_xi:
-            # Enhanced prediction with specific players
-            result = await ml_predictor.predict_match_with_starting_xi(
-                home_team=request.home_team,
-                away_team=request.away_team,
-                referee=request.referee_name,
-                home_starting_xi=request.home_starting_xi,
-                away_starting_xi=request.away_starting_xi,
-                match_date=request.match_date,
-                config_name=request.config_name,
-                decay_config=decay_config if request.use_time_decay else None
-            )
-        else:
+        async def predict():
+            if request.home_starting_xi or request.away_starting_xi:
+                # Enhanced prediction with specific players
+                return await ml_predictor.predict_match_with_starting_xi(
+                    home_team=request.home_team,
+                    away_team=request.away_team,
+                    referee=request.referee_name,
+                    home_starting_xi=request.home_starting_xi,
+                    away_starting_xi=request.away_starting_xi,
+                    match_date=request.match_date,
+                    config_name=request.config_name,
+                    decay_config=decay_config if request.use_time_decay else None,
+                    bypass_cache=request.bypass_cache,
+                    as_of=as_of
+                )
             # Standard prediction with default starting XI
-            result = await ml_predictor.predict_match_with_defaults(
+            return await ml_predictor.predict_match_with_defaults(
                 home_team=request.home_team,
                 away_team=request.away_team,
                 referee=request.referee_name,
                 match_date=request.match_date,
                 config_name=request.config_name,
-                decay_config=decay_config if request.use_time_decay else None
+                decay_config=decay_config if request.use_time_decay else None,
+                bypass_cache=request.bypass_cache,
+                as_of=as_of
             )
         
+        # Identical concurrent requests (including default XI generation) share one computation
+        if request.bypass_cache:
+            result = await predict()
+        else:
+            key = request_key('predict_match_enhanced', {
+                "home_team": request.home_team,
+                "away_team": request.away_team,
+                "referee": request.referee_name,
+                "home_starting_xi": starting_xi_fingerprint(request.home_starting_xi),
+                "away_starting_xi": starting_xi_fingerprint(request.away_starting_xi),
+                "match_date": request.match_date,
+                "as_of": as_of,
+                "config_name": request.config_name,
+                "decay": decay_fingerprint(decay_config if request.use_time_decay else None),
+                "model_version": ml_predictor.model_version
+            })
+            result = await request_coalescer.run(key, predict)
+        
         # 🎯 OPTIMIZATION INTEGRATION: Auto-track XGBoost predictions for optimization
         if result.success:
             try:
@@ -7096,14 +9793,14 @@ async def predict_match_enhanced(request: EnhancedMatchPredictionRequest):
         error_dict = convert_numpy_types(error_result.dict())
         return NumpyJSONResponse(content=error_dict)
 
-@api_router.post("/optimize-xgboost-models")
-async def optimize_xgboost_models(method: str = "grid_search", retrain: bool = True):
-    """Comprehensive XGBoost model optimization workflow"""
+async def optimize_xgboost_models_job(job, method="grid_search", retrain=True):
+    """Comprehensive XGBoost model optimization workflow as a background job"""
     try:
         print("🚀 Starting comprehensive XGBoost optimization...")
         
         # Step 1: Evaluate current model performance
         print("📊 Step 1: Evaluating current model performance...")
+        await job.update("evaluating current performance", 5)
         current_performance = await model_optimizer.evaluate_model_performance(30)
         
         if "error" in current_performance:
@@ -7111,6 +9808,7 @@ async def optimize_xgboost_models(method: str = "grid_search", retrain: bool = T
         
         # Step 2: Optimize hyperparameters
         print("🔧 Step 2: Optimizing hyperparameters...")
+        await job.update("optimizing hyperparameters", 15)
         optimization_results = await model_optimizer.optimize_hyperparameters(method)
         
         if "error" in optimization_results:
@@ -7126,11 +9824,13 @@ async def optimize_xgboost_models(method: str = "grid_search", retrain: bool = T
         # Step 3: Retrain models if requested
         if retrain:
             print("🔄 Step 3: Retraining models with optimized parameters...")
-            retrain_result = await retrain_models_with_optimization()
+            await job.update("retraining with optimized parameters", 70)
+            retrain_result = await retrain_models_optimized_job(job)
             
             if retrain_result.get("success"):
                 # Step 4: Evaluate new model performance
                 print("📈 Step 4: Evaluating optimized model performance...")
+                await job.update("evaluating optimized performance", 90)
                 await asyncio.sleep(1)  # Brief pause for model to be ready
                 new_performance = await model_optimizer.evaluate_model_performance(30, model_optimizer.current_model_version)
                 
@@ -7151,9 +9851,19 @@ async def optimize_xgboost_models(method: str = "grid_search", retrain: bool = T
         print("✅ XGBoost optimization workflow complete!")
         return result
         
+    except JobCancelled:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
+@api_router.post("/optimize-xgboost-models")
+async def optimize_xgboost_models(method: str = "grid_search", retrain: bool = True, wait: bool = False):
+    """Comprehensive XGBoost model optimization workflow as a background job"""
+    return await job_manager.run(
+        "optimize-xgboost-models", optimize_xgboost_models_job,
+        {"method": method, "retrain": retrain}, wait=wait
+    )
+
 @api_router.get("/xgboost-optimization-status")
 async def get_xgboost_optimization_status():
     """Get comprehensive status of XGBoost optimization"""
@@ -7330,11 +10040,11 @@ async def get_prediction_accuracy_trends(days: int = 90):
     except Exception as e:
         return {"error": str(e)}
 
-@api_router.post("/retrain-models-optimized")
-async def retrain_models_with_optimization():
-    """Retrain models using optimized hyperparameters"""
+async def retrain_models_optimized_job(job):
+    """Retrain models using optimized hyperparameters as a background job"""
     try:
         # Get latest optimization results
+        await job.update("loading optimization results", 5)
         latest_optimization = await db.model_optimization.find_one(
             {}, sort=[("timestamp", -1)]
         )
@@ -7348,6 +10058,7 @@ async def retrain_models_with_optimization():
         optimized_params = latest_optimization["results"]
         
         # Retrain with optimized parameters
+        await job.update("retraining models", 20)
         result = await ml_predictor.train_models_with_params(optimized_params)
         
         if result.get("success"):
@@ -7357,9 +10068,16 @@ async def retrain_models_with_optimization():
         
         return result
         
+    except JobCancelled:
+        raise
     except Exception as e:
         return {"error": str(e)}
 
+@api_router.post("/retrain-models-optimized")
+async def retrain_models_with_optimization(wait: bool = False):
+    """Retrain models using optimized hyperparameters as a background job"""
+    return await job_manager.run("retrain-models-optimized", retrain_models_optimized_job, wait=wait)
+
 @api_router.post("/test-time-decay-impact")
 async def test_time_decay_impact(team_name: str = "Arsenal"):
     """Test endpoint to verify time decay is actually working with different presets"""
@@ -7486,6 +10204,7 @@ async def compare_model_versions(version1: str = "1.0", version2: str = "2.0", d
 @api_router.post("/predict-match-ensemble")
 async def predict_match_ensemble(request: MatchPredictionRequest):
     """Make ensemble match prediction using multiple ML models"""
+    validate_as_of(request.as_of)
     try:
         print(f"🤖 Ensemble prediction request: {request.home_team} vs {request.away_team}")
         
@@ -7500,7 +10219,9 @@ async def predict_match_ensemble(request: MatchPredictionRequest):
             request.away_team,
             request.referee_name,
             request.match_date,
-            decay_config=decay_config
+            decay_config=decay_config,
+            bypass_cache=request.bypass_cache,
+            as_of=request.as_of
         )
         
         # Convert NumPy types to Python native types
@@ -7539,13 +10260,13 @@ async def predict_match_ensemble(request: MatchPredictionRequest):
             "referee": request.referee_name
         }
 
-@api_router.post("/train-ensemble-models")
-async def train_ensemble_models():
-    """Train all ensemble models (Random Forest, Gradient Boosting, Neural Network, Logistic Regression)"""
+async def train_ensemble_models_job(job):
+    """Train the ensemble models as a background job"""
     try:
         print("🚀 Starting ensemble model training...")
         
         # Check if we have enough data for training
+        await job.update("checking data", 2)
         team_stats_count = await db.team_stats.count_documents({})
         if team_stats_count < 50:
             return {
@@ -7554,13 +10275,15 @@ async def train_ensemble_models():
             }
         
         # Train ensemble models
-        result = await ml_predictor.train_ensemble_models()
+        result = await ml_predictor.train_ensemble_models(progress=job.update)
         
         # Convert NumPy types to Python native types
         result = convert_numpy_types(result)
         
         return result
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"❌ Ensemble training error: {e}")
         return {
@@ -7570,6 +10293,11 @@ async def train_ensemble_models():
             "models_trained": []
         }
 
+@api_router.post("/train-ensemble-models")
+async def train_ensemble_models(wait: bool = False):
+    """Train all ensemble models (Random Forest, Gradient Boosting, Neural Network, Logistic Regression) as a background job"""
+    return await job_manager.run("train-ensemble-models", train_ensemble_models_job, wait=wait)
+
 @api_router.get("/ensemble-model-status")
 async def get_ensemble_model_status():
     """Get status and performance of ensemble models"""
@@ -7623,6 +10351,7 @@ async def get_ensemble_model_status():
 @api_router.post("/compare-prediction-methods")
 async def compare_prediction_methods(request: MatchPredictionRequest):
     """Compare XGBoost vs Ensemble predictions for the same match"""
+    validate_as_of(request.as_of)
     try:
         print(f"🔍 Comparing prediction methods: {request.home_team} vs {request.away_team}")
         
@@ -7631,7 +10360,8 @@ async def compare_prediction_methods(request: MatchPredictionRequest):
             request.home_team,
             request.away_team, 
             request.referee_name,
-            request.match_date
+            request.match_date,
+            bypass_cache=request.bypass_cache
         )
         
         # Get Ensemble prediction
@@ -7639,7 +10369,9 @@ async def compare_prediction_methods(request: MatchPredictionRequest):
             request.home_team,
             request.away_team,
             request.referee_name,
-            request.match_date
+            request.match_date,
+            bypass_cache=request.bypass_cache,
+            as_of=request.as_of
         )
         
         # Convert NumPy types to Python native types
@@ -7827,6 +10559,7 @@ async def wipe_database():
                 delete_result = await collection.delete_many({})
                 print(f"Cleared {delete_result.deleted_count} documents from {collection_name}")
                 collections_cleared += 1
+        data_snapshot.invalidate("database wiped")
         
         return {
             "success": True,
@@ -7865,6 +10598,42 @@ async def get_database_stats():
         print(f"Database stats error: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting database stats: {str(e)}")
 
+@api_router.get("/database/indexes")
+async def get_database_indexes():
+    """Report declared vs actual MongoDB indexes"""
+    try:
+        return await index_manager.report()
+    except Exception as e:
+        print(f"Database indexes error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting database indexes: {str(e)}")
+
+@api_router.post("/database/indexes")
+async def bootstrap_database_indexes():
+    """Create any missing declared indexes"""
+    try:
+        result = await index_manager.ensure_indexes()
+        return {"success": len(result["failed"]) == 0, **result}
+    except Exception as e:
+        print(f"Database index bootstrap error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error creating database indexes: {str(e)}")
+
+@api_router.get("/data-snapshot")
+async def get_data_snapshot_status():
+    """Get status of the shared in-memory data snapshot"""
+    try:
+        return {"success": True, **data_snapshot.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting data snapshot status: {str(e)}")
+
+@api_router.post("/data-snapshot/refresh")
+async def refresh_data_snapshot():
+    """Force a reload of the shared in-memory data snapshot"""
+    try:
+        snapshot = await data_snapshot.refresh(force=True)
+        return {"success": True, "snapshot": snapshot.summary(), "load_seconds": data_snapshot.last_load_seconds}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error refreshing data snapshot: {str(e)}")
+
 @api_router.get("/datasets")
 async def get_datasets():
     """Get information about uploaded datasets"""
@@ -7915,6 +10684,7 @@ async def initialize_default_config():
         if not existing:
             default_config = PredictionConfig(config_name="default")
             await db.prediction_configs.insert_one(default_config.dict())
+            data_snapshot.mark_changed("default prediction config created")
             return {
                 "success": True,
                 "message": "Default configuration created",
@@ -7974,6 +10744,7 @@ async def create_prediction_config(config_request: PredictionConfigRequest):
             {"$set": config.dict()},
             upsert=True
         )
+        data_snapshot.mark_changed(f"prediction config '{config_request.config_name}' saved")
         
         return {
             "success": True,
@@ -8038,6 +10809,7 @@ async def delete_prediction_config(config_name: str):
             raise HTTPException(status_code=400, detail="Cannot delete default configuration")
         
         result = await db.prediction_configs.delete_one({"config_name": config_name})
+        data_snapshot.mark_changed(f"prediction config '{config_name}' deleted")
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail=f"Configuration '{config_name}' not found")
@@ -8083,6 +10855,7 @@ async def create_prediction_config(config: PredictionConfigRequest):
         )
         
         await db.prediction_configs.insert_one(new_config.dict())
+        data_snapshot.mark_changed(f"prediction config '{config.config_name}' created")
         
         return {
             "success": True,
@@ -8106,6 +10879,7 @@ async def initialize_default_rbs_config():
         if not existing:
             default_config = RBSConfig(config_name="default")
             await db.rbs_configs.insert_one(default_config.dict())
+            data_snapshot.mark_changed("default RBS config created")
             return {
                 "success": True,
                 "message": "Default RBS configuration created",
@@ -8161,6 +10935,7 @@ async def create_rbs_config(config_request: RBSConfigRequest):
             {"$set": config.dict()},
             upsert=True
         )
+        data_snapshot.mark_changed(f"RBS config '{config_request.config_name}' saved")
         
         return {
             "success": True,
@@ -8221,6 +10996,7 @@ async def delete_rbs_config(config_name: str):
             raise HTTPException(status_code=400, detail="Cannot delete default RBS configuration")
         
         result = await db.rbs_configs.delete_one({"config_name": config_name})
+        data_snapshot.mark_changed(f"RBS config '{config_name}' deleted")
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail=f"RBS Configuration '{config_name}' not found")
@@ -8261,6 +11037,7 @@ async def create_rbs_config(config: RBSConfigRequest):
         )
         
         await db.rbs_configs.insert_one(new_config.dict())
+        data_snapshot.mark_changed(f"RBS config '{config.config_name}' created")
         
         return {
             "success": True,
@@ -8273,24 +11050,29 @@ async def create_rbs_config(config: RBSConfigRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating RBS configuration: {str(e)}")
 
+async def run_regression_analysis(request: RegressionAnalysisRequest):
+    """Regression analysis result; shared by concurrent identical requests"""
+    # Prepare match data
+    df = await regression_analyzer.prepare_match_data()
+    
+    if df.empty:
+        raise HTTPException(status_code=400, detail="No match data available for analysis")
+    
+    # Run regression analysis
+    return regression_analyzer.run_regression(
+        df=df,
+        selected_stats=request.selected_stats,
+        target=request.target,
+        test_size=request.test_size,
+        random_state=request.random_state
+    )
+
 @api_router.post("/regression-analysis", response_model=RegressionAnalysisResponse)
 async def perform_regression_analysis(request: RegressionAnalysisRequest):
     """Perform regression analysis on match data to determine how team stats correlate with outcomes"""
     try:
-        # Prepare match data
-        df = await regression_analyzer.prepare_match_data()
-        
-        if df.empty:
-            raise HTTPException(status_code=400, detail="No match data available for analysis")
-        
-        # Run regression analysis
-        result = regression_analyzer.run_regression(
-            df=df,
-            selected_stats=request.selected_stats,
-            target=request.target,
-            test_size=request.test_size,
-            random_state=request.random_state
-        )
+        key = request_key('regression_analysis', request.dict())
+        result = await request_coalescer.run(key, lambda: run_regression_analysis(request))
         
         return RegressionAnalysisResponse(**result)
     
@@ -8487,11 +11269,8 @@ async def get_enhanced_rbs_analysis(team_name: str, referee_name: str):
         rbs_calculator = RBSCalculator()
         
         # Get standard RBS calculation
-        matches = await db.matches.find().to_list(10000)
-        team_stats = await db.team_stats.find().to_list(10000)
-        
         standard_rbs = await rbs_calculator.calculate_rbs_for_team_referee(
-            team_name, referee_name, team_stats, matches
+            team_name, referee_name
         )
         
         # Get variance analysis
@@ -8600,7 +11379,8 @@ async def predict_match(request: MatchPredictionRequest):
             home_team=request.home_team,
             away_team=request.away_team,
             referee=request.referee_name,
-            match_date=request.match_date
+            match_date=request.match_date,
+            bypass_cache=request.bypass_cache
         )
         
         # 🎯 OPTIMIZATION INTEGRATION: Auto-track standard predictions for optimization
@@ -8628,6 +11408,293 @@ async def predict_match(request: MatchPredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Prediction error: {str(e)}")
 
+MAX_BATCH_PREDICTION_FIXTURES = int(os.environ.get('MAX_BATCH_PREDICTION_FIXTURES', 2000))
+
+async def read_batch_fixture_rows(request: Request) -> List[Any]:
+    """Fixture rows from a JSON body ({"fixtures": [...]} or a bare list) or a CSV/Parquet/Arrow upload"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/json"):
+        payload = await request.json()
+        rows = payload.get("fixtures") if isinstance(payload, dict) else payload
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be a list of fixtures or an object with a 'fixtures' list")
+        return rows
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise ValueError("Multipart request must include a 'file' field")
+        frame = read_upload_frame(await upload.read(), upload.content_type)
+    else:
+        frame = read_upload_frame(await request.body(), content_type)
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+def batch_fixture(row: Any) -> Dict[str, Any]:
+    """Validate one batch prediction row; accepts referee_name or referee"""
+    if not isinstance(row, dict):
+        raise ValueError("Fixture must be an object")
+    fields = {
+        'home_team': row.get('home_team'),
+        'away_team': row.get('away_team'),
+        'referee_name': row.get('referee_name', row.get('referee'))
+    }
+    missing = [name for name, value in fields.items() if value is None or str(value).strip() == '']
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    match_date = row.get('match_date')
+    return {
+        'home_team': str(fields['home_team']).strip(),
+        'away_team': str(fields['away_team']).strip(),
+        'referee': str(fields['referee_name']).strip(),
+        'match_date': str(match_date) if match_date not in (None, '') else None
+    }
+
+@api_router.post("/predict-matches-batch")
+async def predict_matches_batch(request: Request):
+    """Predict a fixture list (JSON or CSV) and stream one NDJSON line per fixture"""
+    try:
+        rows = await read_batch_fixture_rows(request)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid fixture list: {str(e)}")
+    
+    if not rows:
+        raise HTTPException(status_code=400, detail="No fixtures provided")
+    if len(rows) > MAX_BATCH_PREDICTION_FIXTURES:
+        raise HTTPException(status_code=400, detail=f"Too many fixtures: {len(rows)} (max {MAX_BATCH_PREDICTION_FIXTURES})")
+    if not ml_predictor.models or len(ml_predictor.models) != 5:
+        raise HTTPException(status_code=400, detail="XGBoost models not trained. Please train models first.")
+    
+    fixtures = []
+    for row in rows:
+        try:
+            fixtures.append((batch_fixture(row), None))
+        except ValueError as e:
+            fixtures.append((None, str(e)))
+    
+    async def stream_predictions():
+        succeeded = 0
+        predictions = ml_predictor.predict_matches_batch([fixture for fixture, _ in fixtures if fixture is not None])
+        try:
+            for index, (fixture, error) in enumerate(fixtures):
+                if fixture is None:
+                    result = {'success': False, 'error': error}
+                else:
+                    result = await predictions.__anext__()
+                succeeded += 1 if result.get('success') else 0
+                yield json.dumps({'index': index, **result}, default=str) + "\n"
+        except Exception as e:
+            print(f"❌ Batch prediction failed: {e}")
+            yield json.dumps({'error': f"Batch prediction failed: {str(e)}"}) + "\n"
+            return
+        
+        print(f"📊 Batch prediction: {succeeded}/{len(fixtures)} fixtures predicted")
+        yield json.dumps({'summary': {
+            'fixtures': len(fixtures),
+            'succeeded': succeeded,
+            'failed': len(fixtures) - succeeded
+        }}) + "\n"
+    
+    return StreamingResponse(stream_predictions(), media_type="application/x-ndjson")
+
+# Season simulation limits; chunks run one at a time in the process pool so jobs report progress
+MAX_SEASON_SIMULATIONS = int(os.environ.get('MAX_SEASON_SIMULATIONS', 2000000))
+SEASON_SIMULATION_CHUNK = int(os.environ.get('SEASON_SIMULATION_CHUNK', 10000))
+
+def unplayed_matches_mask(snapshot, rows, as_of=None):
+    """Mask of snapshot match rows that are fixtures still to be played.
+
+    Uploads store blank scores as 0 and a blank result as "Unknown", so a match counts as
+    unplayed when it is dated after as_of (default today), or is undated with no result and a
+    0-0 score. Past-dated 0-0 matches are played goalless draws, whatever their result column says.
+    """
+    as_of = resolve_as_of(as_of)
+    dates = snapshot.match_dates[rows.index.to_numpy()]
+    future = dates > np.datetime64(as_of)
+    undated = np.isnat(dates)
+    result = DataSnapshot.column(rows, 'result', None)
+    no_result = (result.isna() | result.astype(str).str.strip().isin(['', 'Unknown', 'nan'])).to_numpy()
+    scoreless = ((DataSnapshot.column(rows, 'home_score').fillna(0) == 0) &
+                 (DataSnapshot.column(rows, 'away_score').fillna(0) == 0)).to_numpy()
+    return future | (undated & no_result & scoreless)
+
+def season_simulation_inputs(snapshot, season=None, competition=None, include_unscheduled=True):
+    """Current table and remaining fixtures of a season, from the data snapshot.
+
+    Remaining fixtures are the season's matches that are not played yet (see unplayed_matches_mask)
+    or have no recorded score, plus (with include_unscheduled) every home/away pairing of a
+    double round-robin that has no match yet.
+    """
+    matches = snapshot.matches
+    if matches.empty or 'season' not in matches.columns:
+        raise ValueError("No matches available")
+    if competition:
+        matches = matches[matches['competition'] == competition] if 'competition' in matches.columns else matches.iloc[0:0]
+    if season is None:
+        seasons = sorted(str(s) for s in matches['season'].dropna().unique() if str(s) != "Unknown")
+        if not seasons:
+            raise ValueError("No seasons found in match data")
+        season = seasons[-1]
+    
+    rows = matches[matches['season'] == season].drop_duplicates('match_id')
+    if rows.empty:
+        raise ValueError(f"No matches found for season '{season}'")
+    
+    teams = sorted(set(rows['home_team']) | set(rows['away_team']))
+    index = {team: i for i, team in enumerate(teams)}
+    played = completed_matches(rows[~unplayed_matches_mask(snapshot, rows)])
+    scheduled = rows.drop(played.index)
+    
+    # Current table as array ops over the completed matches
+    home = played['home_team'].map(index).to_numpy()
+    away = played['away_team'].map(index).to_numpy()
+    home_score = played['home_score'].to_numpy(dtype=float)
+    away_score = played['away_score'].to_numpy(dtype=float)
+    draws = home_score == away_score
+    points = np.zeros(len(teams))
+    goal_diff = np.zeros(len(teams))
+    goals_for = np.zeros(len(teams))
+    np.add.at(points, home, 3 * (home_score > away_score) + draws)
+    np.add.at(points, away, 3 * (away_score > home_score) + draws)
+    np.add.at(goal_diff, home, home_score - away_score)
+    np.add.at(goal_diff, away, away_score - home_score)
+    np.add.at(goals_for, home, home_score)
+    np.add.at(goals_for, away, away_score)
+    matches_played = np.bincount(home, minlength=len(teams)) + np.bincount(away, minlength=len(teams))
+    
+    fixtures = [
+        {"home_team": row['home_team'], "away_team": row['away_team'], "referee": row.get('referee') or "Unknown",
+         "match_date": row.get('match_date') if row.get('match_date') != "Unknown" else None}
+        for row in scheduled.to_dict('records')
+    ]
+    if include_unscheduled:
+        existing = set(zip(rows['home_team'], rows['away_team']))
+        fixtures += [
+            {"home_team": home_team, "away_team": away_team, "referee": "Unknown", "match_date": None}
+            for home_team in teams for away_team in teams
+            if home_team != away_team and (home_team, away_team) not in existing
+        ]
+    
+    return {
+        "season": season,
+        "teams": teams,
+        "points": points,
+        "goal_difference": goal_diff,
+        "goals_for": goals_for,
+        "played": matches_played,
+        "fixtures": fixtures
+    }
+
+async def simulate_season_job(job, season=None, competition=None, simulations=100000, seed=0, top_spots=4, relegation_spots=3, include_unscheduled=True):
+    """Monte Carlo simulation of the rest of a season as a background job"""
+    try:
+        await job.update("loading season", 5)
+        snapshot = await data_snapshot.get()
+        inputs = season_simulation_inputs(snapshot, season, competition, include_unscheduled)
+        teams, fixtures = inputs["teams"], inputs["fixtures"]
+        n_teams = len(teams)
+        
+        # Expected goals for every remaining fixture from one batch prediction
+        await job.update("predicting remaining fixtures", 10, f"{len(fixtures)} fixtures")
+        home_lambdas = away_lambdas = np.zeros(0)
+        if fixtures:
+            home_lambdas, away_lambdas, errors = await ml_predictor.predict_goal_lambdas(fixtures)
+            failed = [(f, e) for f, e in zip(fixtures, errors) if e is not None]
+            if failed:
+                fixture, error = failed[0]
+                raise ValueError(f"Could not predict {len(failed)} remaining fixtures "
+                                 f"(e.g. {fixture['home_team']} vs {fixture['away_team']}: {error})")
+        
+        index = {team: i for i, team in enumerate(teams)}
+        home_index = np.array([index[f['home_team']] for f in fixtures], dtype=np.int64)
+        away_index = np.array([index[f['away_team']] for f in fixtures], dtype=np.int64)
+        base = [inputs[key].astype(np.float32) for key in ("points", "goal_difference", "goals_for")]
+        
+        position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        points_sum = np.zeros(n_teams)
+        chunks = math.ceil(simulations / SEASON_SIMULATION_CHUNK)
+        started = time.perf_counter()
+        for chunk in range(chunks):
+            size = min(SEASON_SIMULATION_CHUNK, simulations - chunk * SEASON_SIMULATION_CHUNK)
+            counts, points = await execution_layer.run_in_process(
+                'simulation', simulate_season_chunk, home_index, away_index, home_lambdas, away_lambdas,
+                *base, size, seed, chunk
+            )
+            position_counts += counts
+            points_sum += points
+            done = chunk * SEASON_SIMULATION_CHUNK + size
+            await job.update("simulating seasons", 15 + 80 * done / simulations, f"{done}/{simulations} seasons")
+        elapsed = time.perf_counter() - started
+        
+        probabilities = position_counts / simulations
+        top_spots = min(top_spots, n_teams)
+        relegation_spots = min(relegation_spots, n_teams)
+        standings = [
+            {
+                "team": team,
+                "played": int(inputs["played"][i]),
+                "points": int(inputs["points"][i]),
+                "goal_difference": int(inputs["goal_difference"][i]),
+                "goals_for": int(inputs["goals_for"][i]),
+                "expected_points": round(float(points_sum[i] / simulations), 2),
+                "title_probability": float(probabilities[i, 0]),
+                "top_probability": float(probabilities[i, :top_spots].sum()),
+                "relegation_probability": float(probabilities[i, n_teams - relegation_spots:].sum()) if relegation_spots else 0.0,
+                "expected_position": round(float(probabilities[i] @ np.arange(1, n_teams + 1)), 2),
+                "position_probabilities": [float(p) for p in probabilities[i]]
+            }
+            for i, team in enumerate(teams)
+        ]
+        standings.sort(key=lambda row: (row["expected_position"], row["team"]))
+        
+        print(f"🏆 Simulated {simulations} seasons of {inputs['season']} ({len(fixtures)} fixtures) "
+              f"in {elapsed:.2f}s ({simulations / elapsed:.0f}/s)")
+        return {
+            "success": True,
+            "season": inputs["season"],
+            "competition": competition,
+            "simulations": simulations,
+            "seed": seed,
+            "remaining_fixtures": len(fixtures),
+            "top_spots": top_spots,
+            "relegation_spots": relegation_spots,
+            "standings": standings,
+            "benchmark": {
+                "elapsed_seconds": round(elapsed, 3),
+                "simulations_per_second": round(simulations / elapsed, 1) if elapsed > 0 else None
+            }
+        }
+    
+    except JobCancelled:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error simulating season: {str(e)}")
+
+@api_router.post("/simulate-season")
+async def simulate_season(request: SeasonSimulationRequest, wait: bool = False):
+    """Title, top-N and relegation probabilities from Monte Carlo simulation of the remaining fixtures"""
+    if not 1 <= request.simulations <= MAX_SEASON_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"simulations must be between 1 and {MAX_SEASON_SIMULATIONS}")
+    if not ml_predictor.models or len(ml_predictor.models) != 5:
+        raise HTTPException(status_code=400, detail="XGBoost models not trained. Please train models first.")
+    
+    params = request.dict()
+    if params["seed"] is None:
+        # Record the seed with the job so the run can be reproduced
+        params["seed"] = int(np.random.SeedSequence().entropy % (2 ** 32))
+    return await job_manager.run("simulate-season", simulate_season_job, params, wait=wait)
+
+@api_router.get("/season-simulation/benchmark")
+async def season_simulation_benchmark(teams: int = 20, simulations: int = 20000, seed: int = 0):
+    """Season simulations per second on a synthetic double round-robin"""
+    if not 2 <= teams <= 40 or not 1 <= simulations <= 200000:
+        raise HTTPException(status_code=400, detail="teams must be 2-40 and simulations 1-200000")
+    try:
+        result = await execution_layer.run_in_process('simulation', benchmark_season_simulation, teams, simulations, seed)
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running simulation benchmark: {str(e)}")
+
 @api_router.post("/export-prediction-pdf")
 async def export_prediction_pdf(request: PDFExportRequest):
     """Export match prediction as PDF"""
@@ -8651,18 +11718,14 @@ async def export_prediction_pdf(request: PDFExportRequest):
         away_rbs_data = None
         
         try:
-            # Get all team stats and matches for RBS calculation
-            all_team_stats = await db.team_stats.find().to_list(10000)
-            all_matches = await db.matches.find().to_list(10000)
-            
             # Calculate RBS for home team
             home_rbs_result = await rbs_calculator.calculate_rbs_for_team_referee(
-                request.home_team, request.referee_name, all_team_stats, all_matches
+                request.home_team, request.referee_name
             )
             
             # Calculate RBS for away team  
             away_rbs_result = await rbs_calculator.calculate_rbs_for_team_referee(
-                request.away_team, request.referee_name, all_team_stats, all_matches
+                request.away_team, request.referee_name
             )
             
             referee_data = {
@@ -8695,11 +11758,85 @@ async def export_prediction_pdf(request: PDFExportRequest):
         print(f"Error generating PDF: {e}")
         raise HTTPException(status_code=500, detail=f"PDF generation error: {str(e)}")
 
-@api_router.post("/train-ml-models")
-async def train_ml_models():
-    """Train machine learning models"""
+@api_router.post("/feature-store/build")
+async def build_feature_store(config_name: str = "default", force: bool = False):
+    """Materialize point-in-time training features for the current data"""
+    try:
+        entry = await feature_store.build(config_name, force=force)
+        return {"success": True, **entry}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building feature store: {str(e)}")
+
+@api_router.get("/feature-store/status")
+async def get_feature_store_status():
+    """Stored feature table versions and the training feature source in use"""
+    try:
+        return {
+            "success": True,
+            "training_feature_source": ml_predictor.training_feature_source,
+            "versions": feature_store.read_manifest()["versions"]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting feature store status: {str(e)}")
+
+@api_router.post("/team-decay-aggregates/rebuild")
+async def rebuild_team_decay_aggregates():
+    """Recompute the exponentially-weighted team aggregates from the current data"""
+    try:
+        return {"success": True, **await team_decay_store.rebuild()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding team decay aggregates: {str(e)}")
+
+@api_router.get("/team-decay-aggregates/status")
+async def get_team_decay_aggregates_status():
+    """Reference date, half-lives and size of the exponentially-weighted team aggregates"""
+    try:
+        await team_decay_store.ensure_current(await data_snapshot.get())
+        return {"success": True, **team_decay_store.status()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting team decay aggregates status: {str(e)}")
+
+@api_router.get("/team-decay-aggregates/verify")
+async def verify_team_decay_aggregates(as_of: Optional[str] = None):
+    """Compare aggregate lookups with a full rescan for every team, venue and exponential preset"""
+    try:
+        snapshot = await data_snapshot.get()
+        as_of = resolve_as_of(as_of)
+        presets = [preset for preset in starting_xi_manager.decay_presets.values() if preset.decay_type == "exponential"]
+        max_difference, checked, lookup_seconds, scan_seconds = 0.0, 0, 0.0, 0.0
+
+        for team_name in sorted(team for team in snapshot.team_stats_by_team if team):
+            team_stats = snapshot.team_stats_for(team_name)
+            for is_home in (True, False):
+                for preset in presets:
+                    started = time.perf_counter()
+                    stored = await team_decay_store.lookup(snapshot, team_name, is_home, preset, as_of)
+                    lookup_seconds += time.perf_counter() - started
+                    if stored is None:
+                        continue
+                    started = time.perf_counter()
+                    scanned = MLMatchPredictor.weighted_team_stats(snapshot, team_stats, team_name, is_home, preset, as_of)
+                    scan_seconds += time.perf_counter() - started
+                    checked += 1
+                    max_difference = max([max_difference] + [abs(stored[field] - scanned[field]) for field in scanned])
+
+        return {
+            "success": True,
+            "as_of": as_of,
+            "lookups_checked": checked,
+            "max_abs_difference": max_difference,
+            "lookup_ms_per_call": round(1000 * lookup_seconds / checked, 4) if checked else None,
+            "scan_ms_per_call": round(1000 * scan_seconds / checked, 4) if checked else None,
+            **team_decay_store.status()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error verifying team decay aggregates: {str(e)}")
+
+async def train_ml_models_job(job):
+    """Train the XGBoost models as a background job"""
     try:
         # Get current data counts before training
+        await job.update("counting data", 2)
         matches_count = await db.matches.count_documents({})
         team_stats_count = await db.team_stats.count_documents({})
         player_stats_count = await db.player_stats.count_documents({})
@@ -8707,35 +11844,45 @@ async def train_ml_models():
         
         print(f"Starting ML model training with {total_data_points} total data points")
         
+        await job.update("training models", 10)
+        # train_models raises on failure and returns the per-model results
         result = await ml_predictor.train_models()
         
-        if result['success']:
-            # Save training metadata
-            training_metadata = {
-                'timestamp': datetime.now().isoformat(),
-                'data_count_at_training': total_data_points,
-                'data_breakdown': {
-                    'matches': matches_count,
-                    'team_stats': team_stats_count,
-                    'player_stats': player_stats_count
-                },
-                'training_results': result.get('training_results', {}),
-                'feature_count': len(ml_predictor.feature_columns) if hasattr(ml_predictor, 'feature_columns') else 0
-            }
-            
-            try:
-                with open('/tmp/model_training_metadata.json', 'w') as f:
-                    json.dump(training_metadata, f, indent=2)
-                print("Training metadata saved successfully")
-            except Exception as e:
-                print(f"Warning: Could not save training metadata: {e}")
+        # Save training metadata
+        await job.update("saving metadata", 95)
+        training_metadata = {
+            'timestamp': datetime.now().isoformat(),
+            'data_count_at_training': total_data_points,
+            'data_breakdown': {
+                'matches': matches_count,
+                'team_stats': team_stats_count,
+                'player_stats': player_stats_count
+            },
+            'training_results': result,
+            'feature_count': len(ml_predictor.feature_columns) if hasattr(ml_predictor, 'feature_columns') else 0,
+            'scan': ml_predictor.last_training_scan
+        }
+        
+        try:
+            with open('/tmp/model_training_metadata.json', 'w') as f:
+                json.dump(convert_numpy_types(training_metadata), f, indent=2)
+            print("Training metadata saved successfully")
+        except Exception as e:
+            print(f"Warning: Could not save training metadata: {e}")
         
         return result
         
+    except JobCancelled:
+        raise
     except Exception as e:
         print(f"Training error: {e}")
         raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
 
+@api_router.post("/train-ml-models")
+async def train_ml_models(wait: bool = False):
+    """Train machine learning models as a background job; wait=true blocks until training finishes"""
+    return await job_manager.run("train-ml-models", train_ml_models_job, wait=wait)
+
 @api_router.get("/ml-models/status")
 async def get_ml_models_status():
     """Get status of ML models"""
@@ -8830,6 +11977,7 @@ async def reload_ml_models():
         # Also delete any other collections that might exist
         await db.datasets.delete_many({})
         await db.comprehensive_team_stats.delete_many({})
+        data_snapshot.invalidate("database wiped")
         
         return {
             "success": True,
@@ -8996,154 +12144,140 @@ async def optimize_formula(request: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in formula optimization: {str(e)}")
 
+async def build_referee_analysis(sort_by, sort_order, skip, limit):
+    """Referee analysis payload; shared by concurrent identical requests"""
+    profiles = await aggregate_referee_profiles(sort_by=sort_by, sort_order=sort_order, skip=skip, limit=limit)
+    overview = profiles["overview"]
+    
+    referees = [
+        {
+            "name": profile["name"],
+            "matches": profile["matches"],
+            "teams": profile["teams"],
+            "avg_bias_score": round(profile["avg_bias_score"], 3),
+            "confidence": profile["confidence"],
+            "rbs_calculations": profile["rbs_calculations"],
+            "yellow_cards_per_match": round(profile["yellow_cards_per_match"], 2),
+            "red_cards_per_match": round(profile["red_cards_per_match"], 2),
+            "fouls_per_match": round(profile["fouls_per_match"], 2),
+            "team_averages": {k: round(v, 2) for k, v in profile["team_averages"].items()}
+        }
+        for profile in profiles["referees"]
+    ]
+    
+    return {
+        "success": True,
+        "total_referees": overview["total_referees"],
+        "total_matches": overview["total_matches"],
+        "teams_covered": overview["teams_covered"],
+        "avg_bias_score": round(overview["avg_bias_score"], 3),
+        "referees": referees,
+        "pagination": pagination_info(profiles["total"], skip, limit, len(referees))
+    }
+
 @api_router.get("/referee-analysis")
-async def get_referee_analysis():
+async def get_referee_analysis(sort_by: str = "matches", sort_order: str = "desc", skip: int = 0, limit: Optional[int] = None):
     """Get comprehensive referee analysis results"""
     try:
-        # Get total number of referees
-        total_referees = len(await db.matches.distinct("referee"))
-        
-        # Get total matches
-        total_matches = await db.matches.count_documents({})
-        
-        # Get number of teams covered
-        teams_covered = len(await db.matches.distinct("home_team"))
-        
-        # Get RBS results if available
-        rbs_results = await db.rbs_results.find({}).to_list(1000)
-        
-        # Calculate average bias score
-        avg_bias_score = 0
-        if rbs_results:
-            total_bias = sum(abs(result.get('rbs_score', 0)) for result in rbs_results)
-            avg_bias_score = total_bias / len(rbs_results)
-        
-        # Create referee profiles
-        referees = []
-        referee_names = await db.matches.distinct("referee")
-        
-        for referee_name in referee_names[:20]:  # Limit to first 20 for performance
-            if not referee_name or str(referee_name).lower() in ['nan', 'null', 'none']:
-                continue
-                
-            # Count matches for this referee
-            match_count = await db.matches.count_documents({"referee": referee_name})
-            
-            # Count teams this referee has officiated
-            teams_officiated = len(await db.matches.distinct("home_team", {"referee": referee_name}))
-            
-            # Get RBS score if available
-            rbs_data = await db.rbs_results.find_one({"referee": referee_name})
-            rbs_score = rbs_data.get('rbs_score', 0) if rbs_data else 0
-            
-            # Calculate confidence based on match count
-            confidence = min(95, max(20, match_count * 8))
-            
-            referees.append({
-                "name": referee_name,
-                "matches": match_count,
-                "teams": teams_officiated,
-                "avg_bias_score": rbs_score,
-                "confidence": confidence
-            })
-        
-        # Sort by match count (most experienced first)
-        referees.sort(key=lambda x: x["matches"], reverse=True)
-        
-        return {
-            "success": True,
-            "total_referees": total_referees,
-            "total_matches": total_matches,
-            "teams_covered": teams_covered,
-            "avg_bias_score": round(avg_bias_score, 3),
-            "referees": referees
-        }
+        key = request_key('referee_analysis', {"sort_by": sort_by, "sort_order": sort_order, "skip": skip, "limit": limit})
+        return await request_coalescer.run(key, lambda: build_referee_analysis(sort_by, sort_order, skip, limit))
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in referee analysis: {str(e)}")
 
+async def build_detailed_referee_analysis(referee_name):
+    """Detailed analysis payload for one referee; shared by concurrent identical requests"""
+    # Match, outcome and card/foul totals for this referee in one aggregation
+    profiles = await aggregate_referee_profiles(referee=referee_name)
+    profile = profiles["referees"][0] if profiles["referees"] else None
+    
+    # Get RBS data for this referee
+    rbs_data = await collect_documents(db.rbs_results, {"referee": referee_name}, {"_id": 0})
+    
+    # Calculate statistics
+    total_matches = profile["matches"] if profile else 0
+    teams_officiated = profile["teams"] if profile else 0
+    
+    # Group RBS data by team
+    team_rbs_data = {}
+    total_bias = 0
+    for result in rbs_data:
+        team_name = result.get('team_name')
+        if team_name:
+            team_rbs_data[team_name] = {
+                'rbs_score': round(result.get('rbs_score', 0), 3),
+                'rbs_raw': round(result.get('rbs_raw', 0), 3),
+                'confidence_level': result.get('confidence_level', 0),
+                'matches_with_ref': result.get('matches_with_ref', 0),
+                'matches_without_ref': result.get('matches_without_ref', 0),
+                'stats_breakdown': result.get('stats_breakdown', {}),
+                'config_used': result.get('config_used', 'default')
+            }
+            total_bias += abs(result.get('rbs_score', 0))
+    
+    # Calculate average bias score
+    avg_bias = round(total_bias / len(rbs_data), 3) if rbs_data else 0
+    
+    # Get match outcomes breakdown
+    home_wins = profile["home_wins"] if profile else 0
+    away_wins = profile["away_wins"] if profile else 0
+    draws = total_matches - home_wins - away_wins
+    
+    # Cards and fouls statistics, totalled over both teams' stats in each match
+    total_yellow_cards = profile["yellow_cards"] if profile else 0
+    total_red_cards = profile["red_cards"] if profile else 0
+    total_fouls = profile["fouls"] if profile else 0
+    
+    # Get most and least biased teams
+    if team_rbs_data:
+        most_biased_team = max(team_rbs_data.items(), key=lambda x: abs(x[1]['rbs_score']))
+        least_biased_team = min(team_rbs_data.items(), key=lambda x: abs(x[1]['rbs_score']))
+    else:
+        most_biased_team = least_biased_team = None
+    
+    return {
+        "success": True,
+        "referee_name": referee_name,
+        "total_matches": total_matches,
+        "teams_officiated": teams_officiated,
+        "avg_bias_score": avg_bias,
+        "rbs_calculations": len(rbs_data),
+        "match_outcomes": {
+            "home_wins": home_wins,
+            "away_wins": away_wins,
+            "draws": draws,
+            "home_win_percentage": round((home_wins / total_matches) * 100, 1) if total_matches > 0 else 0
+        },
+        "cards_and_fouls": {
+            "total_yellow_cards": total_yellow_cards,
+            "total_red_cards": total_red_cards,
+            "total_fouls": total_fouls,
+            "yellow_cards_per_match": round(total_yellow_cards / total_matches, 2) if total_matches > 0 else 0,
+            "red_cards_per_match": round(total_red_cards / total_matches, 2) if total_matches > 0 else 0,
+            "fouls_per_match": round(total_fouls / total_matches, 2) if total_matches > 0 else 0
+        },
+        "bias_analysis": {
+            "most_biased_team": {
+                "team": most_biased_team[0] if most_biased_team else None,
+                "rbs_score": most_biased_team[1]['rbs_score'] if most_biased_team else 0,
+                "bias_direction": "Favored" if most_biased_team and most_biased_team[1]['rbs_score'] > 0 else "Against" if most_biased_team else "Neutral"
+            } if most_biased_team else None,
+            "least_biased_team": {
+                "team": least_biased_team[0] if least_biased_team else None,
+                "rbs_score": least_biased_team[1]['rbs_score'] if least_biased_team else 0
+            } if least_biased_team else None
+        },
+        "team_rbs_details": team_rbs_data
+    }
+
 @api_router.get("/referee-analysis/{referee_name}")
 async def get_detailed_referee_analysis(referee_name: str):
     """Get detailed analysis for a specific referee"""
     try:
-        # Get all matches for this referee
-        matches = await db.matches.find({"referee": referee_name}).to_list(1000)
-        
-        # Get RBS data for this referee
-        rbs_data = await db.rbs_results.find({"referee": referee_name}).to_list(1000)
-        
-        # Calculate statistics
-        total_matches = len(matches)
-        teams_officiated = len(set([match["home_team"] for match in matches] + [match["away_team"] for match in matches]))
-        
-        # Group RBS data by team
-        team_rbs_data = {}
-        total_bias = 0
-        for result in rbs_data:
-            team_name = result.get('team_name')
-            if team_name:
-                team_rbs_data[team_name] = {
-                    'rbs_score': round(result.get('rbs_score', 0), 3),
-                    'rbs_raw': round(result.get('rbs_raw', 0), 3),
-                    'confidence_level': result.get('confidence_level', 0),
-                    'matches_with_ref': result.get('matches_with_ref', 0),
-                    'matches_without_ref': result.get('matches_without_ref', 0),
-                    'stats_breakdown': result.get('stats_breakdown', {}),
-                    'config_used': result.get('config_used', 'default')
-                }
-                total_bias += abs(result.get('rbs_score', 0))
-        
-        # Calculate average bias score
-        avg_bias = round(total_bias / len(rbs_data), 3) if rbs_data else 0
-        
-        # Get match outcomes breakdown
-        home_wins = len([m for m in matches if m.get('home_score', 0) > m.get('away_score', 0)])
-        away_wins = len([m for m in matches if m.get('away_score', 0) > m.get('home_score', 0)])
-        draws = total_matches - home_wins - away_wins
-        
-        # Calculate cards and fouls statistics
-        total_yellow_cards = sum(match.get('yellow_cards_home', 0) + match.get('yellow_cards_away', 0) for match in matches)
-        total_red_cards = sum(match.get('red_cards_home', 0) + match.get('red_cards_away', 0) for match in matches)
-        
-        # Get most and least biased teams
-        if team_rbs_data:
-            most_biased_team = max(team_rbs_data.items(), key=lambda x: abs(x[1]['rbs_score']))
-            least_biased_team = min(team_rbs_data.items(), key=lambda x: abs(x[1]['rbs_score']))
-        else:
-            most_biased_team = least_biased_team = None
-        
-        return {
-            "success": True,
-            "referee_name": referee_name,
-            "total_matches": total_matches,
-            "teams_officiated": teams_officiated,
-            "avg_bias_score": avg_bias,
-            "rbs_calculations": len(rbs_data),
-            "match_outcomes": {
-                "home_wins": home_wins,
-                "away_wins": away_wins,
-                "draws": draws,
-                "home_win_percentage": round((home_wins / total_matches) * 100, 1) if total_matches > 0 else 0
-            },
-            "cards_and_fouls": {
-                "total_yellow_cards": total_yellow_cards,
-                "total_red_cards": total_red_cards,
-                "yellow_cards_per_match": round(total_yellow_cards / total_matches, 2) if total_matches > 0 else 0,
-                "red_cards_per_match": round(total_red_cards / total_matches, 2) if total_matches > 0 else 0
-            },
-            "bias_analysis": {
-                "most_biased_team": {
-                    "team": most_biased_team[0] if most_biased_team else None,
-                    "rbs_score": most_biased_team[1]['rbs_score'] if most_biased_team else 0,
-                    "bias_direction": "Favored" if most_biased_team and most_biased_team[1]['rbs_score'] > 0 else "Against" if most_biased_team else "Neutral"
-                } if most_biased_team else None,
-                "least_biased_team": {
-                    "team": least_biased_team[0] if least_biased_team else None,
-                    "rbs_score": least_biased_team[1]['rbs_score'] if least_biased_team else 0
-                } if least_biased_team else None
-            },
-            "team_rbs_details": team_rbs_data
-        }
+        key = request_key('referee_analysis_detail', {"referee_name": referee_name})
+        return await request_coalescer.run(key, lambda: build_detailed_referee_analysis(referee_name))
     
     except Exception as e:
         print(f"Error in detailed referee analysis: {e}")
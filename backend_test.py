@@ -191,7 +191,7 @@ def test_calculate_rbs_endpoint():
     """Test the /api/calculate-rbs endpoint to verify no time decay is used"""
     print("\n=== Testing Calculate RBS Endpoint (No Time Decay) ===")
     
-    response = requests.post(f"{BASE_URL}/calculate-rbs")
+    response = requests.post(f"{BASE_URL}/calculate-rbs", params={"wait": "true"})
     
     if response.status_code == 200:
         print(f"Status: {response.status_code} OK")
@@ -456,7 +456,7 @@ def test_enhanced_rbs_functionality():
     endpoint_check_results.append(status_response.status_code == 200)
     
     # Check Calculate RBS endpoint
-    calc_response = requests.post(f"{BASE_URL}/calculate-rbs")
+    calc_response = requests.post(f"{BASE_URL}/calculate-rbs", params={"wait": "true"})
     endpoint_check_results.append(calc_response.status_code == 200)
     
     # Check Referee Analysis List endpoint
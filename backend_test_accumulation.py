@@ -203,7 +203,7 @@ def test_train_ml_models():
     print("\n=== Testing ML Model Training Endpoint ===")
     print("This may take some time as it processes all historical data...")
     
-    response = requests.post(f"{BASE_URL}/train-ml-models")
+    response = requests.post(f"{BASE_URL}/train-ml-models", params={"wait": "true"})
     
     if response.status_code == 200:
         data = response.json()
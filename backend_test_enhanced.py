@@ -438,7 +438,7 @@ def test_ml_model_integration():
     
     if not models_loaded:
         print("ML models not loaded, attempting to train models...")
-        train_response = requests.post(f"{BASE_URL}/train-ml-models")
+        train_response = requests.post(f"{BASE_URL}/train-ml-models", params={"wait": "true"})
         
         if train_response.status_code != 200:
             print(f"❌ Failed to train ML models: {train_response.status_code}")
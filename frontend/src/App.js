@@ -54,6 +54,21 @@ console.log('🔍 Frontend Configuration Debug:');
 console.log('REACT_APP_BACKEND_URL:', process.env.REACT_APP_BACKEND_URL);
 console.log('Final API URL:', API);
 
+// Start a background job endpoint and poll it until it finishes
+const runJob = async (path, params = {}) => {
+  const { data: job } = await axios.post(`${API}/${path}`, null, { params });
+  while (true) {
+    const { data: status } = await axios.get(`${API}/jobs/${job.job_id}`);
+    if (status.status === 'completed' || (status.status === 'failed' && status.result)) {
+      return status.result;
+    }
+    if (status.status === 'failed' || status.status === 'cancelled') {
+      throw new Error(status.error || `Job ${status.status}`);
+    }
+    await new Promise(resolve => setTimeout(resolve, 1000));
+  }
+};
+
 function App() {
   // Navigation state
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -327,10 +342,10 @@ function App() {
   const calculateRBS = async () => {
     setCalculatingRBS(true);
     try {
-      const response = await axios.post(`${API}/calculate-rbs`);
-      setRbsResults(response.data);
-      setRbsStatus(response.data.status);
-      alert(`✅ RBS Calculation Complete!\n\n• ${response.data.referees_analyzed} referees analyzed\n• ${response.data.teams_covered} teams covered\n• ${response.data.calculations_performed} bias scores calculated`);
+      const result = await runJob('calculate-rbs');
+      setRbsResults(result);
+      setRbsStatus(result.status);
+      alert(`✅ RBS Calculation Complete!\n\n• ${result.referees_analyzed} referees analyzed\n• ${result.teams_covered} teams covered\n• ${result.calculations_performed} bias scores calculated`);
     } catch (error) {
       console.error('Error calculating RBS:', error);
       alert(`❌ RBS Calculation Error: ${error.response?.data?.detail || error.message}`);
@@ -525,8 +540,8 @@ function App() {
   const trainMLModels = async () => {
     setTrainingModels(true);
     try {
-      const response = await axios.post(`${API}/train-ml-models`);
-      setTrainingResults(response.data);
+      const result = await runJob('train-ml-models');
+      setTrainingResults(result);
       await checkMLStatus(); // Refresh status after training
     } catch (error) {
       alert(`❌ Training Error: ${error.response?.data?.detail || error.message}`);
@@ -725,8 +740,7 @@ function App() {
 
   const trainEnsembleModels = async () => {
     try {
-      const response = await axios.post(`${API}/train-ensemble-models`);
-      return response.data;
+      return await runJob('train-ensemble-models');
     } catch (error) {
       console.error('Error training ensemble models:', error);
       throw error;
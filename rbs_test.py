@@ -19,7 +19,7 @@ def test_calculate_rbs_endpoint():
     """Test the /api/calculate-rbs endpoint to verify no time decay is used"""
     print("\n=== Testing Calculate RBS Endpoint (No Time Decay) ===")
     
-    response = requests.post(f"{BASE_URL}/calculate-rbs")
+    response = requests.post(f"{BASE_URL}/calculate-rbs", params={"wait": "true"})
     
     if response.status_code == 200:
         print(f"Status: {response.status_code} OK")
@@ -172,7 +172,7 @@ def test_enhanced_rbs_functionality():
     endpoint_check_results = []
     
     # Check Calculate RBS endpoint
-    calc_response = requests.post(f"{BASE_URL}/calculate-rbs")
+    calc_response = requests.post(f"{BASE_URL}/calculate-rbs", params={"wait": "true"})
     endpoint_check_results.append(calc_response.status_code == 200)
     
     # Check Detailed Referee Analysis endpoint
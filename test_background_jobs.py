@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test for the background job subsystem
+
+This script tests:
+1. Job endpoints enqueue a job and return 202 with its ID unless wait=true
+2. A second request for the same job type and parameters joins the running job,
+   while different parameters start a separate job
+3. GET /api/jobs/{id} reports stage and progress until completion
+4. The SSE stream ends with the final job record
+5. Running jobs can be cancelled
+"""
+
+import json
+import time
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+
+def wait_for_job(job_id, timeout=600):
+    """Poll a job until it reaches a terminal status"""
+    deadline = time.time() + timeout
+    stages = []
+    while time.time() < deadline:
+        job = requests.get(f"{BACKEND_URL}/jobs/{job_id}", timeout=30).json()
+        if not stages or stages[-1] != job["stage"]:
+            stages.append(job["stage"])
+            print(f"   {job['stage']} ({job['progress']}%)")
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job, stages
+        time.sleep(0.5)
+    return None, stages
+
+def test_enqueue_and_dedup():
+    """calculate-rbs runs as a job and duplicate requests join it"""
+    print("\n📋 Enqueue and duplicate suppression")
+    response = requests.post(f"{BACKEND_URL}/calculate-rbs", timeout=30)
+    if response.status_code != 202:
+        print(f"❌ Expected 202 without wait, got {response.status_code} {response.text}")
+        return False
+    first = response.json()
+    second = requests.post(f"{BACKEND_URL}/calculate-rbs", params={"wait": "false"}, timeout=30).json()
+    print(f"   first: {first.get('job_id')} second: {second.get('job_id')} deduplicated={second.get('deduplicated')}")
+
+    if not first.get("job_id"):
+        print(f"❌ No job ID returned: {first}")
+        return False
+
+    job, stages = wait_for_job(first["job_id"])
+    if job is None or job["status"] != "completed":
+        print(f"❌ Job did not complete: {job}")
+        return False
+
+    if second.get("deduplicated") and second["job_id"] != first["job_id"]:
+        print("❌ Deduplicated request returned a different job")
+        return False
+    if not second.get("deduplicated"):
+        print("⚠️ Second request was not deduplicated (first job may have finished already)")
+
+    print("\n📋 Different parameters are not deduplicated")
+    first = requests.post(f"{BACKEND_URL}/calculate-rbs", params={"wait": "false"}, timeout=30).json()
+    other = requests.post(f"{BACKEND_URL}/calculate-rbs", params={"wait": "false", "config_name": "dedupe_test"}, timeout=30).json()
+    print(f"   default: {first.get('job_id')} dedupe_test: {other.get('job_id')} deduplicated={other.get('deduplicated')}")
+    if not other.get("job_id"):
+        print(f"❌ No job ID returned: {other}")
+        return False
+    if other.get("deduplicated") or other["job_id"] == first.get("job_id"):
+        print("❌ Request with a different config_name joined the running job")
+        return False
+    for job_id in (first["job_id"], other["job_id"]):
+        wait_for_job(job_id)
+
+    print(f"✅ Job completed through {len(stages)} stages: {job['result'].get('message')}")
+    return True
+
+def test_sse_stream():
+    """The SSE stream sends progress events and ends with the final record"""
+    print("\n📡 SSE progress stream")
+    job = requests.post(f"{BACKEND_URL}/recalculate-all-stats", params={"wait": "false"}, timeout=30).json()
+    if not job.get("job_id"):
+        print(f"❌ No job ID returned: {job}")
+        return False
+
+    events = []
+    with requests.get(f"{BACKEND_URL}/jobs/{job['job_id']}/events", stream=True, timeout=600) as response:
+        event_type = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event_type = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                events.append((event_type, json.loads(line.split(":", 1)[1])))
+
+    if not events or events[-1][0] != "end":
+        print(f"❌ Stream did not end with an 'end' event: {[e for e, _ in events]}")
+        return False
+
+    final = events[-1][1]
+    print(f"✅ {len(events)} events, final status {final['status']} at {final['progress']}%")
+    return final["status"] == "completed"
+
+def test_cancel():
+    """A running training job can be cancelled"""
+    print("\n🛑 Cancellation")
+    job = requests.post(f"{BACKEND_URL}/train-ml-models", params={"wait": "false"}, timeout=30).json()
+    if not job.get("job_id"):
+        print(f"❌ No job ID returned: {job}")
+        return False
+
+    time.sleep(1)
+    response = requests.post(f"{BACKEND_URL}/jobs/{job['job_id']}/cancel", timeout=30)
+    if response.status_code == 409:
+        print(f"⚠️ Job finished before it could be cancelled: {response.json().get('detail')}")
+        return True
+    if response.status_code != 200:
+        print(f"❌ Cancel failed: {response.status_code} {response.text}")
+        return False
+
+    final, _ = wait_for_job(job["job_id"], timeout=120)
+    if final is None or final["status"] != "cancelled":
+        print(f"❌ Expected cancelled status, got {final and final['status']}")
+        return False
+    print("✅ Job cancelled")
+    return True
+
+def main():
+    print("⚙️ Testing Background Job Subsystem")
+    print("=" * 60)
+
+    results = [test_enqueue_and_dedup(), test_sse_stream(), test_cancel()]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} job tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test for the gameweek batch prediction endpoint
+
+This script tests:
+1. JSON fixture lists stream one NDJSON line per fixture plus a summary line
+2. Batch results match /predict-match for the same fixtures
+3. CSV uploads are accepted
+4. Invalid fixtures are reported inline without failing the batch
+"""
+
+import json
+import math
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+
+def read_ndjson(response):
+    """Parse an NDJSON response into (fixture lines, summary)"""
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    results = [line for line in lines if 'index' in line]
+    summary = next((line['summary'] for line in lines if 'summary' in line), None)
+    return results, summary
+
+def build_fixtures():
+    """A small gameweek from the uploaded teams and referees"""
+    teams = requests.get(f"{BACKEND_URL}/teams", timeout=30).json().get("teams", [])
+    referees = requests.get(f"{BACKEND_URL}/referees", timeout=30).json().get("referees", [])
+    if len(teams) < 2 or not referees:
+        return []
+    return [
+        {"home_team": home, "away_team": away, "referee_name": referees[i % len(referees)]}
+        for i, (home, away) in enumerate(zip(teams[:5], teams[1:6]))
+    ]
+
+def test_json_batch(fixtures):
+    """JSON batch returns one line per fixture that matches /predict-match"""
+    print("\n📋 JSON fixture list")
+    response = requests.post(f"{BACKEND_URL}/predict-matches-batch", json={"fixtures": fixtures}, stream=True, timeout=300)
+    if response.status_code != 200:
+        print(f"❌ Batch request failed: {response.status_code} {response.text}")
+        return False
+
+    results, summary = read_ndjson(response)
+    if len(results) != len(fixtures) or summary is None:
+        print(f"❌ Expected {len(fixtures)} results and a summary, got {len(results)} results, summary={summary}")
+        return False
+    print(f"✅ {len(results)} results streamed, summary: {summary}")
+
+    mismatches = 0
+    for fixture, result in zip(fixtures, results):
+        single = requests.post(f"{BACKEND_URL}/predict-match", json=fixture, timeout=60).json()
+        if single.get('success') != result.get('success'):
+            mismatches += 1
+            print(f"❌ {fixture['home_team']} vs {fixture['away_team']}: success differs")
+            continue
+        if not single.get('success'):
+            continue
+        for field in ('predicted_home_goals', 'predicted_away_goals', 'home_win_probability',
+                      'draw_probability', 'away_win_probability'):
+            if not math.isclose(single[field], result[field], abs_tol=1e-9):
+                mismatches += 1
+                print(f"❌ {fixture['home_team']} vs {fixture['away_team']} {field}: single={single[field]} batch={result[field]}")
+
+    if mismatches == 0:
+        print("✅ Batch results match single-fixture predictions")
+    return mismatches == 0
+
+def test_csv_batch(fixtures):
+    """CSV upload returns the same number of results"""
+    print("\n📄 CSV fixture upload")
+    csv_text = "home_team,away_team,referee_name\n" + "\n".join(
+        f"{f['home_team']},{f['away_team']},{f['referee_name']}" for f in fixtures
+    )
+    files = {"file": ("fixtures.csv", csv_text, "text/csv")}
+    response = requests.post(f"{BACKEND_URL}/predict-matches-batch", files=files, stream=True, timeout=300)
+    if response.status_code != 200:
+        print(f"❌ CSV batch failed: {response.status_code} {response.text}")
+        return False
+
+    results, summary = read_ndjson(response)
+    if len(results) != len(fixtures):
+        print(f"❌ Expected {len(fixtures)} results, got {len(results)}")
+        return False
+    print(f"✅ CSV batch returned {len(results)} results, summary: {summary}")
+    return True
+
+def test_inline_errors(fixtures):
+    """Invalid fixtures fail inline while valid ones are still predicted"""
+    print("\n⚠️ Inline per-fixture errors")
+    batch = [fixtures[0], {"home_team": fixtures[0]["home_team"]}, {"home_team": "No Such Team", "away_team": "Nobody FC", "referee_name": "Nobody"}]
+    response = requests.post(f"{BACKEND_URL}/predict-matches-batch", json=batch, stream=True, timeout=300)
+    if response.status_code != 200:
+        print(f"❌ Batch with invalid fixtures failed: {response.status_code} {response.text}")
+        return False
+
+    results, summary = read_ndjson(response)
+    ok = (
+        len(results) == 3
+        and results[0].get('success')
+        and not results[1].get('success') and 'Missing required fields' in results[1].get('error', '')
+        and not results[2].get('success')
+        and summary == {'fixtures': 3, 'succeeded': 1, 'failed': 2}
+    )
+    if ok:
+        print(f"✅ Errors reported inline: {results[1]['error']} / {results[2]['error']}")
+    else:
+        print(f"❌ Unexpected results: {results} summary={summary}")
+    return bool(ok)
+
+def main():
+    print("🏟️ Testing Batch Match Prediction")
+    print("=" * 60)
+
+    fixtures = build_fixtures()
+    if not fixtures:
+        print("❌ Need at least two teams and one referee - upload data first")
+        return False
+
+    results = [
+        test_json_batch(fixtures),
+        test_csv_batch(fixtures),
+        test_inline_errors(fixtures)
+    ]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} batch prediction tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
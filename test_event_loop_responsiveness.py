@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Responsiveness test for CPU-bound work running off the event loop
+
+This script tests:
+1. /api/ keeps answering quickly while /api/train-ml-models is running
+2. The execution layer reports the training job while it runs
+3. Training still completes successfully
+"""
+
+import threading
+import time
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+MAX_ACCEPTABLE_LATENCY = 1.0  # seconds for a trivial request while training runs
+POLL_INTERVAL = 0.2
+
+def train_in_background(result):
+    """POST /train-ml-models and record the outcome"""
+    started = time.time()
+    try:
+        response = requests.post(f"{BACKEND_URL}/train-ml-models", params={"wait": "true"}, timeout=1800)
+        result["status_code"] = response.status_code
+        result["body"] = response.text[:300]
+    except Exception as e:
+        result["error"] = str(e)
+    result["duration"] = time.time() - started
+
+def test_api_responsive_during_training():
+    """Poll /api/ while training runs and check the worst-case latency"""
+    print("⏱️ Testing API Responsiveness During Model Training")
+    print("=" * 60)
+
+    baseline = requests.get(f"{BACKEND_URL}/", timeout=10)
+    if baseline.status_code != 200:
+        print(f"❌ Backend not reachable: {baseline.status_code}")
+        return False
+
+    result = {}
+    trainer = threading.Thread(target=train_in_background, args=(result,))
+    trainer.start()
+
+    latencies = []
+    saw_training_active = False
+    while trainer.is_alive():
+        started = time.time()
+        try:
+            response = requests.get(f"{BACKEND_URL}/", timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"❌ /api/ failed during training: {e}")
+            trainer.join()
+            return False
+        latencies.append(time.time() - started)
+
+        status = requests.get(f"{BACKEND_URL}/execution-status", timeout=30).json()
+        if status.get("categories", {}).get("training", {}).get("active", 0) > 0:
+            saw_training_active = True
+
+        time.sleep(POLL_INTERVAL)
+    trainer.join()
+
+    if result.get("status_code") != 200:
+        print(f"❌ Training failed: {result}")
+        return False
+    print(f"✅ Training finished in {result['duration']:.1f}s")
+
+    if not latencies:
+        print("⚠️ Training finished before any health checks were sent; use a larger dataset")
+        return False
+
+    latencies.sort()
+    worst = latencies[-1]
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else worst
+    print(f"📊 {len(latencies)} requests during training: median {latencies[len(latencies) // 2] * 1000:.0f}ms, "
+          f"p95 {p95 * 1000:.0f}ms, max {worst * 1000:.0f}ms")
+
+    if saw_training_active:
+        print("✅ Execution layer reported the training job while it ran")
+    else:
+        print("⚠️ Training job was not observed in /api/execution-status")
+
+    if worst > MAX_ACCEPTABLE_LATENCY:
+        print(f"❌ /api/ stalled for {worst:.2f}s during training (limit {MAX_ACCEPTABLE_LATENCY}s)")
+        return False
+
+    print("✅ /api/ stayed responsive during training")
+    return True
+
+if __name__ == "__main__":
+    success = test_api_responsive_during_training()
+    exit(0 if success else 1)
@@ -106,7 +106,7 @@ def test_ensemble_model_training_error_handling():
     
     # Now test training ensemble models with insufficient data
     print("\nTesting ensemble model training with insufficient data...")
-    response = requests.post(f"{BASE_URL}/train-ensemble-models")
+    response = requests.post(f"{BASE_URL}/train-ensemble-models", params={"wait": "true"})
     
     if response.status_code == 200:
         print(f"Status: {response.status_code} OK")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test for starting-XI aggregation through the per-team player x match matrix
+
+This script tests:
+1. A prediction with each team's default starting XI succeeds
+2. Listing the same XI in a different order gives an identical prediction
+3. Replacing a player with a squad player changes (or at least does not break) the prediction
+"""
+
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+
+def team_players(team_name):
+    response = requests.get(f"{BACKEND_URL}/teams/{team_name}/players", timeout=60)
+    if response.status_code != 200:
+        return None
+    result = response.json()
+    return result if result.get("success") and result.get("default_starting_xi") else None
+
+def build_request():
+    """Enhanced prediction request with both teams' default starting XI and the home squad"""
+    teams = requests.get(f"{BACKEND_URL}/teams", timeout=30).json().get("teams", [])
+    referees = requests.get(f"{BACKEND_URL}/referees", timeout=30).json().get("referees", [])
+    if len(teams) < 2 or not referees:
+        return None, None
+    home, away = team_players(teams[0]), team_players(teams[1])
+    if home is None or away is None:
+        return None, None
+    request = {"home_team": teams[0], "away_team": teams[1], "referee_name": referees[0],
+               "home_starting_xi": home["default_starting_xi"], "away_starting_xi": away["default_starting_xi"],
+               "use_time_decay": True, "decay_preset": "moderate", "bypass_cache": True}
+    return request, [player["player_name"] for player in home["players"]]
+
+def predict(request):
+    response = requests.post(f"{BACKEND_URL}/predict-match-enhanced", json=request, timeout=120)
+    if response.status_code != 200:
+        return None
+    result = response.json()
+    return result if result.get("success") else None
+
+def core(result):
+    return (result["predicted_home_goals"], result["predicted_away_goals"],
+            result["home_win_probability"], result["draw_probability"], result["away_win_probability"])
+
+def test_default_xi(request):
+    print("\n👥 Default starting XI")
+    result = predict(request)
+    if result is None:
+        print("❌ Prediction failed - train models first")
+        return None
+    print(f"✅ {core(result)}")
+    return result
+
+def test_order_independent(request, baseline):
+    print("\n🔀 Same XI in reverse order")
+    reordered = {**request, "home_starting_xi": {**request["home_starting_xi"],
+                                                 "positions": request["home_starting_xi"]["positions"][::-1]}}
+    result = predict(reordered)
+    if result is None or core(result) != core(baseline):
+        print(f"❌ Reordered XI gave {result and core(result)} instead of {core(baseline)}")
+        return False
+    print("✅ Identical prediction")
+    return True
+
+def test_substitution(request, squad, baseline):
+    print("\n🔁 One player substituted")
+    positions = request["home_starting_xi"]["positions"]
+    selected = {slot["player"]["player_name"] for slot in positions if slot.get("player")}
+    bench = [name for name in squad if name not in selected]
+    if not bench or not positions[-1].get("player"):
+        print("⚠️ No squad player available to substitute")
+        return True
+    swapped = [*positions[:-1], {**positions[-1], "player": {**positions[-1]["player"], "player_name": bench[0]}}]
+    result = predict({**request, "home_starting_xi": {**request["home_starting_xi"], "positions": swapped}})
+    if result is None:
+        print("❌ Prediction with a substituted player failed")
+        return False
+    if core(result) == core(baseline):
+        print(f"⚠️ {bench[0]} in for {positions[-1]['player']['player_name']} did not change the prediction")
+    else:
+        print(f"✅ {bench[0]} in: {core(result)}")
+    return True
+
+def main():
+    print("🧮 Testing Player x Match Matrix Aggregation")
+    print("=" * 60)
+
+    request, squad = build_request()
+    if request is None:
+        print("❌ Need two teams with players and one referee - upload data first")
+        return False
+
+    baseline = test_default_xi(request)
+    if baseline is None:
+        return False
+    results = [True, test_order_independent(request, baseline), test_substitution(request, squad, baseline)]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} player matrix tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
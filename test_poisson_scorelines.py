@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Consistency test for the vectorized Poisson scoreline engine
+
+This script tests:
+1. Win/draw/loss probabilities from /predict-match sum to 100%
+2. Each outcome is at least the mass of its scorelines in the 7x7 grid
+   (the remainder is the exact probability of scorelines beyond the grid)
+3. The most likely scoreline is the top entry of the scoreline table
+"""
+
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+TOLERANCE = 0.05  # percentage points, covers rounding of the 49 grid entries
+
+def grid_outcome_mass(scorelines):
+    """Sum the scoreline table into home win / draw / away win percentages"""
+    home_win = draw = away_win = 0.0
+    for scoreline, prob in scorelines.items():
+        home, away = (int(goals) for goals in scoreline.split("-"))
+        if home > away:
+            home_win += prob
+        elif home == away:
+            draw += prob
+        else:
+            away_win += prob
+    return home_win, draw, away_win
+
+def check_prediction(prediction):
+    """Return a list of consistency problems for one prediction"""
+    problems = []
+    outcomes = (prediction["home_win_probability"], prediction["draw_probability"], prediction["away_win_probability"])
+    if abs(sum(outcomes) - 100) > TOLERANCE:
+        problems.append(f"outcomes sum to {sum(outcomes):.2f}")
+
+    scorelines = prediction.get("scoreline_probabilities") or {}
+    if len(scorelines) != 49:
+        problems.append(f"expected 49 scorelines, got {len(scorelines)}")
+    for name, outcome, grid in zip(("home win", "draw", "away win"), outcomes, grid_outcome_mass(scorelines)):
+        if outcome + TOLERANCE < grid:
+            problems.append(f"{name} {outcome:.2f}% is below its grid mass {grid:.2f}%")
+
+    most_likely = prediction["prediction_breakdown"]["poisson_analysis"]["most_likely_scoreline"]
+    if scorelines and most_likely != next(iter(scorelines)):
+        problems.append(f"most likely scoreline {most_likely} is not the top table entry")
+    return problems
+
+def test_poisson_consistency():
+    print("🎲 Testing Poisson Scoreline Engine")
+    print("=" * 60)
+
+    teams = requests.get(f"{BACKEND_URL}/teams", timeout=30).json().get("teams", [])
+    referees = requests.get(f"{BACKEND_URL}/referees", timeout=30).json().get("referees", [])
+    if len(teams) < 2 or not referees:
+        print("❌ Need at least two teams and one referee - upload data first")
+        return False
+
+    failures = 0
+    checked = 0
+    for home, away in list(zip(teams, teams[1:]))[:8]:
+        payload = {"home_team": home, "away_team": away, "referee_name": referees[0]}
+        prediction = requests.post(f"{BACKEND_URL}/predict-match", json=payload, timeout=60).json()
+        if not prediction.get("success"):
+            print(f"⚠️ {home} vs {away}: prediction failed ({prediction.get('error')})")
+            continue
+
+        checked += 1
+        problems = check_prediction(prediction)
+        if problems:
+            failures += 1
+            print(f"❌ {home} vs {away}: {'; '.join(problems)}")
+        else:
+            print(f"✅ {home} vs {away}: {prediction['home_win_probability']:.1f}/"
+                  f"{prediction['draw_probability']:.1f}/{prediction['away_win_probability']:.1f}")
+
+    if checked == 0:
+        print("❌ No predictions succeeded - train models first")
+        return False
+    print(f"\n{'✅' if failures == 0 else '❌'} {checked - failures}/{checked} predictions consistent")
+    return failures == 0
+
+if __name__ == "__main__":
+    success = test_poisson_consistency()
+    exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test for the prediction result cache
+
+This script tests:
+1. A repeated /predict-match request is served from the cache with an identical result
+2. bypass_cache=true recomputes instead of reading the cache
+3. Saving a prediction config bumps the data version so older entries are not reused
+4. Clearing the cache empties it
+"""
+
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+
+def cache_stats():
+    return requests.get(f"{BACKEND_URL}/prediction-cache/stats", timeout=30).json()
+
+def build_request():
+    """A prediction request from the uploaded teams and referees"""
+    teams = requests.get(f"{BACKEND_URL}/teams", timeout=30).json().get("teams", [])
+    referees = requests.get(f"{BACKEND_URL}/referees", timeout=30).json().get("referees", [])
+    if len(teams) < 2 or not referees:
+        return None
+    return {"home_team": teams[0], "away_team": teams[1], "referee_name": referees[0]}
+
+def test_hit_and_bypass(request):
+    """Second identical request hits the cache; bypass_cache skips it"""
+    print("\n🗃️ Cache hit and bypass")
+    requests.post(f"{BACKEND_URL}/prediction-cache/clear", timeout=30)
+    before = cache_stats()
+
+    first = requests.post(f"{BACKEND_URL}/predict-match", json=request, timeout=60).json()
+    second = requests.post(f"{BACKEND_URL}/predict-match", json=request, timeout=60).json()
+    if not first.get("success"):
+        print(f"❌ Prediction failed - train models first: {first}")
+        return False
+
+    after = cache_stats()
+    if after["hits"] - before["hits"] != 1 or after["misses"] - before["misses"] != 1:
+        print(f"❌ Expected 1 miss then 1 hit, got stats {after}")
+        return False
+    if first != second:
+        print("❌ Cached result differs from the computed result")
+        return False
+    print(f"✅ Repeated request served from cache (hit rate {after['hit_rate']})")
+
+    bypassed = requests.post(f"{BACKEND_URL}/predict-match", json={**request, "bypass_cache": True}, timeout=60).json()
+    stats = cache_stats()
+    if stats["bypassed"] - after["bypassed"] != 1 or stats["hits"] != after["hits"]:
+        print(f"❌ bypass_cache did not skip the cache: {stats}")
+        return False
+    if bypassed.get("predicted_home_goals") != first.get("predicted_home_goals"):
+        print("❌ Recomputed prediction differs from the cached one")
+        return False
+    print("✅ bypass_cache recomputed the prediction")
+    return True
+
+def test_data_version_invalidation(request):
+    """Saving a config bumps the data version and forces a recompute"""
+    print("\n🔄 Data version invalidation")
+    requests.post(f"{BACKEND_URL}/predict-match", json=request, timeout=60)
+    before = cache_stats()
+
+    config = requests.get(f"{BACKEND_URL}/prediction-config/default", timeout=30)
+    if config.status_code != 200:
+        print(f"⚠️ Could not load the default config ({config.status_code}), skipping")
+        return True
+    payload = config.json().get("config", {})
+    saved = requests.post(f"{BACKEND_URL}/prediction-config", json=payload, timeout=30)
+    if saved.status_code != 200:
+        print(f"❌ Saving the default config failed: {saved.status_code} {saved.text}")
+        return False
+
+    requests.post(f"{BACKEND_URL}/predict-match", json=request, timeout=60)
+    after = cache_stats()
+    if after["data_version"] <= before["data_version"]:
+        print(f"❌ Data version did not change: {before['data_version']} -> {after['data_version']}")
+        return False
+    if after["misses"] - before["misses"] != 1:
+        print(f"❌ Expected a miss after the data version changed: {after}")
+        return False
+    print(f"✅ Data version {before['data_version']} -> {after['data_version']} forced a recompute")
+    return True
+
+def test_clear():
+    """Clearing removes every entry"""
+    print("\n🧹 Cache clear")
+    cleared = requests.post(f"{BACKEND_URL}/prediction-cache/clear", timeout=30).json()
+    stats = cache_stats()
+    if stats["entries"] != 0:
+        print(f"❌ Cache still holds {stats['entries']} entries")
+        return False
+    print(f"✅ {cleared['message']}")
+    return True
+
+def main():
+    print("🗃️ Testing Prediction Cache")
+    print("=" * 60)
+
+    request = build_request()
+    if request is None:
+        print("❌ Need at least two teams and one referee - upload data first")
+        return False
+
+    results = [test_hit_and_bypass(request), test_data_version_invalidation(request), test_clear()]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} cache tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -42,7 +42,7 @@ def test_comprehensive_team_stats():
 def test_enhanced_rbs_calculation():
     """Test the /api/calculate-rbs endpoint"""
     print("\n=== Testing Enhanced RBS Calculation ===")
-    response = requests.post(f"{BASE_URL}/calculate-rbs")
+    response = requests.post(f"{BASE_URL}/calculate-rbs", params={"wait": "true"})
     
     if response.status_code == 200:
         print(f"Status: {response.status_code} OK")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test for the Monte Carlo season simulator
+
+This script tests:
+1. The synthetic benchmark reports simulations per second
+2. /api/simulate-season runs as a background job and returns position distributions
+3. Every team's position probabilities sum to 1, and every position is filled once per season
+4. The same seed reproduces the same probabilities
+5. An uploaded future fixture is simulated instead of counted as a 0-0 draw
+6. An uploaded past-dated 0-0 draw with no result counts as played
+"""
+
+import time
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+SIMULATIONS = 20000
+FUTURE_DATASET = "season_simulation_future_fixture"
+DRAW_DATASET = "season_simulation_past_draw"
+
+def wait_for_job(job_id, timeout=600):
+    """Poll a job until it reaches a terminal status"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = requests.get(f"{BACKEND_URL}/jobs/{job_id}", timeout=30).json()
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(0.5)
+    return None
+
+def run_simulation(seed, **options):
+    """Submit a simulation job and return its result"""
+    response = requests.post(f"{BACKEND_URL}/simulate-season", json={"simulations": SIMULATIONS, "seed": seed, **options}, timeout=30)
+    if response.status_code != 202:
+        print(f"❌ Submit failed: {response.status_code} {response.text}")
+        return None
+    job = wait_for_job(response.json()["job_id"])
+    if job is None or job["status"] != "completed":
+        print(f"❌ Simulation job did not complete: {job and (job['status'], job.get('error'))}")
+        return None
+    return job["result"]
+
+def test_benchmark():
+    print("\n⏱️ Simulation benchmark")
+    response = requests.get(f"{BACKEND_URL}/season-simulation/benchmark", params={"simulations": SIMULATIONS}, timeout=300)
+    if response.status_code != 200:
+        print(f"❌ Benchmark failed: {response.status_code} {response.text}")
+        return False
+    result = response.json()
+    print(f"✅ {result['simulations_per_second']:.0f} seasons/s ({result['teams']} teams, {result['fixtures']} fixtures)")
+    return result["simulations_per_second"] > 0
+
+def test_simulation():
+    print("\n🏆 Season simulation job")
+    first = run_simulation(seed=1234)
+    if first is None:
+        return False
+
+    standings = first["standings"]
+    n_teams = len(standings)
+    print(f"   {first['season']}: {first['remaining_fixtures']} remaining fixtures, "
+          f"{first['benchmark']['simulations_per_second']:.0f} seasons/s")
+    for row in standings[:3]:
+        print(f"   {row['team']}: title {row['title_probability']:.1%}, top {first['top_spots']} {row['top_probability']:.1%}, "
+              f"expected points {row['expected_points']}")
+
+    team_sums = [sum(row["position_probabilities"]) for row in standings]
+    position_sums = [sum(row["position_probabilities"][p] for row in standings) for p in range(n_teams)]
+    if any(abs(total - 1) > 1e-9 for total in team_sums + position_sums):
+        print("❌ Position probabilities do not form a valid distribution")
+        return False
+    print("✅ Position distributions are consistent")
+
+    second = run_simulation(seed=1234)
+    if second is None:
+        return False
+    if [row["position_probabilities"] for row in second["standings"]] != [row["position_probabilities"] for row in standings]:
+        print("❌ Same seed produced different results")
+        return False
+    print("✅ Same seed reproduced the same probabilities")
+    return True
+
+def upload_match(dataset_name, season, home_team, away_team, home_score, away_score, match_date):
+    """Upload a dataset holding one match with a blank result"""
+    matches = ("match_id,referee,home_team,away_team,home_score,away_score,result,season,competition,match_date\n"
+               f"{dataset_name},Test Referee,{home_team},{away_team},{home_score},{away_score},,{season},,{match_date}\n")
+    files = [
+        ("files", ("matches.csv", matches, "text/csv")),
+        ("files", ("team_stats.csv", "match_id,team_name,is_home\n", "text/csv")),
+        ("files", ("player_stats.csv", "match_id,player_name,team_name\n", "text/csv"))
+    ]
+    response = requests.post(f"{BACKEND_URL}/upload/multi-dataset", files=files,
+                             params={"dataset_names": [dataset_name]}, timeout=60)
+    return response.status_code == 200
+
+def test_future_fixture():
+    print("\n📅 Uploaded future fixture")
+    before = run_simulation(seed=99, include_unscheduled=False)
+    if before is None:
+        return False
+    home_team, away_team = before["standings"][0]["team"], before["standings"][1]["team"]
+    if not upload_match(FUTURE_DATASET, before["season"], home_team, away_team, "", "", "2099-01-01"):
+        print("❌ Could not upload the future fixture")
+        return False
+    try:
+        after = run_simulation(seed=99, season=before["season"], include_unscheduled=False)
+    finally:
+        requests.delete(f"{BACKEND_URL}/datasets/{FUTURE_DATASET}", timeout=60)
+    if after is None:
+        return False
+
+    if after["remaining_fixtures"] != before["remaining_fixtures"] + 1:
+        print(f"❌ Remaining fixtures went from {before['remaining_fixtures']} to {after['remaining_fixtures']}")
+        return False
+    played_before = {row["team"]: (row["played"], row["points"]) for row in before["standings"]}
+    played_after = {row["team"]: (row["played"], row["points"]) for row in after["standings"]}
+    if played_before != played_after:
+        print("❌ The future fixture changed the current table")
+        return False
+    print(f"✅ {home_team} vs {away_team} is simulated as a remaining fixture; current table unchanged")
+    return True
+
+def test_past_draw():
+    print("\n🤝 Uploaded past 0-0 draw without a result")
+    before = run_simulation(seed=99, include_unscheduled=False)
+    if before is None:
+        return False
+    home_team, away_team = before["standings"][0]["team"], before["standings"][1]["team"]
+    if not upload_match(DRAW_DATASET, before["season"], home_team, away_team, 0, 0, "2020-01-01"):
+        print("❌ Could not upload the draw")
+        return False
+    try:
+        after = run_simulation(seed=99, season=before["season"], include_unscheduled=False)
+    finally:
+        requests.delete(f"{BACKEND_URL}/datasets/{DRAW_DATASET}", timeout=60)
+    if after is None:
+        return False
+
+    if after["remaining_fixtures"] != before["remaining_fixtures"]:
+        print(f"❌ The draw was simulated: remaining fixtures went from {before['remaining_fixtures']} to {after['remaining_fixtures']}")
+        return False
+    table_before = {row["team"]: (row["played"], row["points"]) for row in before["standings"]}
+    table_after = {row["team"]: (row["played"], row["points"]) for row in after["standings"]}
+    for team in (home_team, away_team):
+        played, points = table_before[team]
+        if table_after[team] != (played + 1, points + 1):
+            print(f"❌ {team}: expected {(played + 1, points + 1)} played/points, got {table_after[team]}")
+            return False
+    print(f"✅ {home_team} vs {away_team} 0-0 counts as a played draw")
+    return True
+
+def main():
+    print("🎲 Testing Season Simulator")
+    print("=" * 60)
+    results = [test_benchmark(), test_simulation(), test_future_fixture(), test_past_draw()]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} simulation tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
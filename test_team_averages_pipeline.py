@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Parity test for team averages: aggregation pipeline vs in-memory snapshot
+
+This script tests:
+1. Both sources return averages for the same team/venue combinations
+2. Every averaged field matches between the two implementations
+3. Opponent exclusion and season filters give identical results
+"""
+
+import math
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+
+def get_averages(team_name, is_home, source, exclude_opponent=None, season_filter=None):
+    """Fetch team averages from the given source, or None when the team has no stats"""
+    params = {"is_home": str(is_home).lower(), "source": source}
+    if exclude_opponent:
+        params["exclude_opponent"] = exclude_opponent
+    if season_filter:
+        params["season_filter"] = season_filter
+
+    response = requests.get(f"{BACKEND_URL}/teams/{team_name}/averages", params=params, timeout=30)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()["averages"]
+
+def compare(snapshot_avg, pipeline_avg):
+    """Return the fields that differ between the two averages dicts"""
+    if snapshot_avg is None or pipeline_avg is None:
+        return [] if snapshot_avg is pipeline_avg else ["<missing>"]
+
+    mismatches = []
+    for field in sorted(set(snapshot_avg) | set(pipeline_avg)):
+        a, b = snapshot_avg.get(field), pipeline_avg.get(field)
+        if a is None or b is None or not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9):
+            mismatches.append(f"{field}: snapshot={a} pipeline={b}")
+    return mismatches
+
+def test_team_averages_parity():
+    """Compare pipeline and snapshot averages for every team"""
+    print("⚖️ Testing Team Averages Pipeline Parity")
+    print("=" * 60)
+
+    teams = requests.get(f"{BACKEND_URL}/teams", timeout=30).json().get("teams", [])
+    if not teams:
+        print("❌ No teams found - upload data first")
+        return False
+
+    cases = 0
+    failures = 0
+    for team in teams:
+        opponents = [None] + [t for t in teams if t != team][:2]
+        for is_home in (True, False):
+            for opponent in opponents:
+                snapshot_avg = get_averages(team, is_home, "snapshot", exclude_opponent=opponent)
+                pipeline_avg = get_averages(team, is_home, "pipeline", exclude_opponent=opponent)
+                cases += 1
+
+                mismatches = compare(snapshot_avg, pipeline_avg)
+                if mismatches:
+                    failures += 1
+                    venue = "home" if is_home else "away"
+                    print(f"❌ {team} ({venue}, excluding {opponent}):")
+                    for mismatch in mismatches:
+                        print(f"   - {mismatch}")
+
+    # Season filter on the first team
+    for season in ("2023-24", "2024-25"):
+        cases += 1
+        mismatches = compare(
+            get_averages(teams[0], True, "snapshot", season_filter=season),
+            get_averages(teams[0], True, "pipeline", season_filter=season)
+        )
+        if mismatches:
+            failures += 1
+            print(f"❌ {teams[0]} season {season}: {mismatches}")
+
+    if failures == 0:
+        print(f"✅ Pipeline matches snapshot for all {cases} cases")
+    else:
+        print(f"❌ {failures}/{cases} cases differ")
+    return failures == 0
+
+if __name__ == "__main__":
+    success = test_team_averages_parity()
+    exit(0 if success else 1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test for the exponentially-weighted team aggregates
+
+This script tests:
+1. The aggregates can be rebuilt from the uploaded data
+2. Status reports the reference date and the tracked half-lives
+3. Aggregate lookups match a full rescan for every team, venue and exponential preset
+4. Lookups before the reference date fall back to the rescan
+"""
+
+import requests
+
+BACKEND_URL = "http://localhost:8001/api"
+TOLERANCE = 1e-6
+
+def test_rebuild():
+    print("\n🔨 Rebuilding aggregates")
+    response = requests.post(f"{BACKEND_URL}/team-decay-aggregates/rebuild", timeout=300)
+    if response.status_code != 200:
+        print(f"❌ Rebuild failed: {response.status_code} {response.text}")
+        return False
+    result = response.json()
+    print(f"✅ {result['stat_rows']} team stat rows in {result['keys']} aggregates")
+    return result["stat_rows"] > 0
+
+def test_status():
+    print("\n📊 Aggregate status")
+    status = requests.get(f"{BACKEND_URL}/team-decay-aggregates/status", timeout=60).json()
+    if not status.get("built") or not status.get("reference_date"):
+        print(f"❌ Aggregates not built: {status}")
+        return False
+    print(f"✅ Reference date {status['reference_date']}, half-lives {status['half_lives']} months")
+    return True
+
+def test_verify():
+    print("\n🔍 Lookups vs full rescan")
+    result = requests.get(f"{BACKEND_URL}/team-decay-aggregates/verify", timeout=600).json()
+    if not result.get("lookups_checked"):
+        print(f"❌ No lookups were served from the aggregates: {result}")
+        return False
+    if result["max_abs_difference"] > TOLERANCE:
+        print(f"❌ Max difference {result['max_abs_difference']} exceeds {TOLERANCE}")
+        return False
+    print(f"✅ {result['lookups_checked']} lookups agree (max difference {result['max_abs_difference']:.2e}), "
+          f"{result['lookup_ms_per_call']} ms vs {result['scan_ms_per_call']} ms per scan")
+    return True
+
+def test_backtest_fallback():
+    print("\n⏪ Lookups before the reference date")
+    result = requests.get(f"{BACKEND_URL}/team-decay-aggregates/verify", params={"as_of": "1990-01-01"}, timeout=600).json()
+    if result.get("lookups_checked") != 0:
+        print(f"❌ Aggregates served a date before their reference date: {result.get('lookups_checked')} lookups")
+        return False
+    print("✅ Historical as_of dates fall back to the full rescan")
+    return True
+
+def main():
+    print("📉 Testing Team Decay Aggregates")
+    print("=" * 60)
+    results = [test_rebuild(), test_status(), test_verify(), test_backtest_fallback()]
+    print(f"\n{'✅' if all(results) else '❌'} {sum(results)}/{len(results)} team decay aggregate tests passed")
+    return all(results)
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)